@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import datetime
+import argparse
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+# 添加src目录到Python路径，以便导入db_base模块
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from db_base.stock_db_base import StockDbBase
+from db_base.dataframe_writer import dataframe_to_records
+
+'''
+    DataFrame -> SQLite 写入基准测试：
+        逐单元格转换（旧实现） vs 按列整体转换 + 分块 executemany（dataframe_writer）
+    数据集：
+        3年日线（约 730 行 / 股票）
+        1年5分钟线（约 242 天 x 48 根 / 股票）
+    用法：
+        python scripts/benchmark/benchmark_dataframe_insert.py --stocks 20 --repeat 3
+'''
+
+def make_daily_data(code, years=3):
+    """构造与 BaoStockProcessor.process_daily_stock_data 输出一致的日线数据"""
+    dates = pd.bdate_range(end=datetime.date.today(), periods=int(242 * years))
+    n = len(dates)
+    close = 10 + np.cumsum(np.random.randn(n) * 0.1)
+    df = pd.DataFrame({
+        'date': dates.date,                                 # datetime.date，与 data_type_conversion 一致
+        'code': code,
+        'open': close + np.random.randn(n) * 0.05,
+        'high': close + 0.2,
+        'low': close - 0.2,
+        'close': close,
+        'volume': pd.array(np.random.randint(1e5, 1e7, n), dtype='Int64'),
+        'amount': np.random.rand(n) * 1e8,
+        'change_percent': np.random.randn(n),
+        'turnover_rate': np.random.rand(n) * 5,
+        'adjustflag': pd.array(np.full(n, 2), dtype='Int64'),
+    })
+    # 少量缺失值
+    df.loc[df.sample(frac=0.01).index, 'turnover_rate'] = np.nan
+    return df
+
+def make_minute_data(code, days=242, bars_per_day=48):
+    """构造1年5分钟线数据"""
+    trade_days = pd.bdate_range(end=datetime.date.today(), periods=days)
+    morning = pd.timedelta_range('09:35:00', '11:30:00', freq='5min')
+    afternoon = pd.timedelta_range('13:05:00', '15:00:00', freq='5min')
+    offsets = morning.append(afternoon)[:bars_per_day]
+    times = (trade_days.values[:, None] + offsets.values[None, :]).ravel()
+    times = pd.DatetimeIndex(times)
+    n = len(times)
+    close = 10 + np.cumsum(np.random.randn(n) * 0.01)
+    return pd.DataFrame({
+        'date': times.date,
+        'time': times,
+        'code': code,
+        'open': close,
+        'high': close + 0.02,
+        'low': close - 0.02,
+        'close': close,
+        'volume': pd.array(np.random.randint(1e3, 1e6, n), dtype='Int64'),
+        'amount': np.random.rand(n) * 1e6,
+        'adjustflag': pd.array(np.full(n, 2), dtype='Int64'),
+    })
+
+def legacy_dataframe_to_records(df_data):
+    """旧实现：to_dict('records') + 逐单元格判断"""
+    records = df_data.to_dict('records')
+    processed_records = []
+    for record in records:
+        processed_record = {}
+        for key, value in record.items():
+            if pd.isna(value):
+                processed_record[key] = None
+            elif isinstance(value, (np.integer, np.floating)):
+                processed_record[key] = value.item()
+            elif isinstance(value, np.bool_):
+                processed_record[key] = bool(value)
+            elif isinstance(value, (pd.Timestamp, datetime.datetime)):
+                processed_record[key] = value.strftime('%Y-%m-%d %H:%M:%S')
+            elif isinstance(value, datetime.date):
+                processed_record[key] = str(value)
+            else:
+                processed_record[key] = value
+        processed_records.append(tuple(processed_record.values()))
+    return processed_records
+
+def bench_convert(list_df, convert_func, repeat):
+    total_rows = sum(len(df) for df in list_df)
+    best = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for df in list_df:
+            convert_func(df)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return total_rows / best, best
+
+def bench_insert(list_df, table_name, repeat, legacy=False):
+    """完整写入流程：建库建表 + 转换 + 插入"""
+    total_rows = sum(len(df) for df in list_df)
+    best = None
+    for _ in range(repeat):
+        db_dir = tempfile.mkdtemp(prefix="mpolicy_bench_")
+        try:
+            db_base = StockDbBase(db_dir)
+            start_time = time.perf_counter()
+            for df in list_df:
+                code = df['code'].iloc[0]
+                if legacy:
+                    # 旧实现：整体转换后一次 executemany，清表与插入分两个事务
+                    db_path = db_base.get_db_path(code)
+                    db_path.parent.mkdir(parents=True, exist_ok=True)
+                    db_base.create_baostock_table(db_path, table_name)
+                    records = legacy_dataframe_to_records(df)
+                    columns_str = ', '.join([f'"{col}"' for col in df.columns])
+                    placeholders = ', '.join('?' * len(df.columns))
+                    with db_base._get_connection(db_path) as cur:
+                        cur.execute(f"DELETE FROM {table_name}")
+                    with db_base._get_connection(db_path) as cur:
+                        cur.executemany(f'INSERT OR REPLACE INTO "{table_name}" ({columns_str}) VALUES ({placeholders})', records)
+                else:
+                    db_base.save_bao_stock_data_to_db(code, df, 'replace', table_name)
+            elapsed = time.perf_counter() - start_time
+            db_base.close_connection()
+        finally:
+            shutil.rmtree(db_dir, ignore_errors=True)
+        best = elapsed if best is None else min(best, elapsed)
+    return total_rows / best, best
+
+def main():
+    parser = argparse.ArgumentParser(description='DataFrame写入SQLite基准测试')
+    parser.add_argument('--stocks', type=int, default=20, help='模拟股票数量')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数（取最好成绩）')
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    codes = [f"sh.{600000 + i}" for i in range(args.stocks)]
+    datasets = [
+        ("3年日线", "stock_data_1d", [make_daily_data(code) for code in codes]),
+        ("1年5分钟线", "stock_data_5m", [make_minute_data(code) for code in codes]),
+    ]
+
+    print(f"股票数量: {args.stocks}, 重复次数: {args.repeat}")
+    for label, table_name, list_df in datasets:
+        total_rows = sum(len(df) for df in list_df)
+        print("=" * 60)
+        print(f"{label}: 共 {total_rows} 行（{total_rows // args.stocks} 行/股票）")
+
+        legacy_rps, legacy_time = bench_convert(list_df, legacy_dataframe_to_records, args.repeat)
+        new_rps, new_time = bench_convert(list_df, dataframe_to_records, args.repeat)
+        print(f"  转换  逐单元格: {legacy_rps:>12,.0f} 行/秒 ({legacy_time:.3f}s)")
+        print(f"  转换  按列:     {new_rps:>12,.0f} 行/秒 ({new_time:.3f}s)  x{new_rps / legacy_rps:.1f}")
+
+        legacy_rps, legacy_time = bench_insert(list_df, table_name, args.repeat, legacy=True)
+        new_rps, new_time = bench_insert(list_df, table_name, args.repeat)
+        print(f"  写入  旧实现:   {legacy_rps:>12,.0f} 行/秒 ({legacy_time:.3f}s)")
+        print(f"  写入  新实现:   {new_rps:>12,.0f} 行/秒 ({new_time:.3f}s)  x{new_rps / legacy_rps:.1f}")
+
+if __name__ == "__main__":
+    main()
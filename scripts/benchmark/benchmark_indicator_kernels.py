@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+# 添加src目录到Python路径，以便导入indicators模块
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from indicators import kernels
+
+'''
+    指标内核基准测试：对比 pandas 与 indicators.kernels 各后端（numpy，已安装时含 numba）在单只股票序列上的耗时与最大误差
+        ema        Series.ewm(span=12, adjust=False).mean()
+        wilder     Series.ewm(alpha=1/14, adjust=False).mean()
+        wma        rolling(10).apply(np.dot(x, w) / w.sum(), raw=True)
+        rolling    rolling(9).max() / min()（KDJ 的最高价、最低价）
+    序列长度默认 750（约3年日线）与 20000（分钟线）。numba 后端的首次调用含 JIT 编译，计时前先预热。
+    用法：
+        python scripts/benchmark/benchmark_indicator_kernels.py --lengths 750 20000 --repeat 50
+'''
+
+WMA_WINDOW = 10
+KDJ_WINDOW = 9
+
+def pandas_wma(series, window):
+    weights = np.arange(1, window + 1)
+    return series.rolling(window).apply(lambda x: np.dot(x, weights) / weights.sum(), raw=True)
+
+CASES = [
+    ("ema", lambda s: s.ewm(span=12, adjust=False).mean(), lambda v: kernels.ema(v, span=12)),
+    ("wilder", lambda s: s.ewm(alpha=1/14, adjust=False).mean(), lambda v: kernels.wilder(v, 14)),
+    ("wma", lambda s: pandas_wma(s, WMA_WINDOW), lambda v: kernels.wma(v, WMA_WINDOW)),
+    ("rolling_max", lambda s: s.rolling(KDJ_WINDOW).max(), lambda v: kernels.rolling_max(v, KDJ_WINDOW)),
+    ("rolling_min", lambda s: s.rolling(KDJ_WINDOW).min(), lambda v: kernels.rolling_min(v, KDJ_WINDOW)),
+]
+
+def make_series(length, seed):
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.round(10 + np.cumsum(rng.normal(0, 0.15, length)), 2))
+
+def time_call(func, arg, repeat):
+    func(arg)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(arg)
+    return (time.perf_counter() - start) / repeat, result
+
+def max_diff(expected, actual):
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+        return float('inf')
+    mask = ~np.isnan(expected)
+    if not mask.any():
+        return 0.0
+    return float(np.max(np.abs(expected[mask] - actual[mask])))
+
+def main():
+    parser = argparse.ArgumentParser(description="指标内核基准测试")
+    parser.add_argument('--lengths', type=int, nargs='+', default=[750, 20000], help="序列长度")
+    parser.add_argument('--repeat', type=int, default=50, help="每项重复次数")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    list_backends = [kernels.BACKEND_NUMPY]
+    if kernels.is_numba_available():
+        list_backends.append(kernels.BACKEND_NUMBA)
+    else:
+        print("未安装 numba，仅测试 numpy 后端")
+
+    try:
+        for length in args.lengths:
+            series = make_series(length, args.seed)
+            values = series.to_numpy()
+            print("=" * 72)
+            print(f"序列长度: {length}, 重复: {args.repeat}")
+            for name, pandas_func, kernel_func in CASES:
+                pandas_time, expected = time_call(pandas_func, series, args.repeat)
+                line = f"  {name:<12} pandas {pandas_time * 1e6:>10.1f}us"
+                for backend in list_backends:
+                    kernels.set_backend(backend)
+                    kernel_time, actual = time_call(kernel_func, values, args.repeat)
+                    line += f" | {backend} {kernel_time * 1e6:>9.1f}us x{pandas_time / kernel_time:>6.1f} 误差 {max_diff(expected, actual):.1e}"
+                print(line)
+    finally:
+        kernels.set_backend(kernels.BACKEND_AUTO)
+
+if __name__ == "__main__":
+    main()
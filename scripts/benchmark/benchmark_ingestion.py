@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import time
+import shutil
+import datetime
+import tempfile
+import argparse
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+# 添加src目录到Python路径，以便导入db_base模块
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from utils import baostock_replay
+from db_base.stock_db_base import StockDbBase
+from db_base.consolidated_stock_db_base import ConsolidatedStockDbBase
+from db_base.sqlite_profiles import PROFILE_BULK_INGEST
+from common.kline_type_conversion import convert_kline_columns
+from manager.period_manager import TimePeriod
+from processor.baostock_download_engine import BaostockDownloadEngine, query_rows, rows_to_dataframe
+from processor.stock_data_pipeline import StockDataPipeline
+
+'''
+    离线入库基准测试：以 utils.baostock_replay 代替 Baostock 服务，测量各周期全量获取与增量更新的 股票/秒
+        pipeline：单会话 获取 -> 转换 -> 批量写入 流水线（BaoStockProcessor.run_download_pipeline）
+        engine：多进程下载引擎，调用进程单一写入（BaoStockProcessor.download_stock_data_parallel）
+    场景：
+        全量：日线、周线近3年，5分钟线当年1月1日至今，replace 写入
+        增量：在全量数据之上获取最近 --refresh-days 个交易日，append 写入（收盘后的日常更新）
+    --latency 模拟每次查询的网络延迟（秒）。
+    用法：
+        python scripts/benchmark/benchmark_ingestion.py --stocks 100 --latency 0.05 --mode pipeline engine
+'''
+
+PERIODS = [
+    ("日线", 'd', TimePeriod.DAY),
+    ("周线", 'w', TimePeriod.WEEK),
+    ("5分钟线", '5', TimePeriod.MINUTE_5),
+]
+
+REPLAY_MODULE = 'utils.baostock_replay'
+
+def create_db_base(backend, db_dir):
+    if backend == 'consolidated':
+        return ConsolidatedStockDbBase(db_dir)
+    return StockDbBase(db_dir)
+
+def get_full_date_range(frequency):
+    """与 BaoStockProcessor.get_default_date_range 一致"""
+    now = datetime.datetime.now()
+    end_date = now.strftime("%Y-%m-%d")
+    if frequency in ('d', 'w'):
+        start_date = (now - datetime.timedelta(days=365*3)).strftime("%Y-%m-%d")
+    else:
+        start_date = f"{now.year}-01-01"
+    return start_date, end_date
+
+def get_refresh_date_range(refresh_days):
+    end = datetime.date.today()
+    start = end - datetime.timedelta(days=refresh_days * 7 // 5 + 2)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+def convert_raw_data(df_data):
+    """与流水线转换阶段一致：原始字符串 -> 入库格式，去掉空值行"""
+    if df_data.empty:
+        return None
+    df_data = convert_kline_columns(df_data).dropna()
+    return df_data if not df_data.empty else None
+
+def run_pipeline(db_base, codes, table_name, download_template):
+    baostock_replay.login()
+
+    def fetch(code):
+        rows, error = query_rows(baostock_replay, dict(download_template, code=code))
+        if error is not None:
+            raise RuntimeError(error)
+        return rows
+
+    def write_batch(batch):
+        list_items = [(code, df_data, download_template['write_way']) for code, df_data in batch]
+        list_result = db_base.save_bao_stock_data_batch(list_items, table_name)
+        return sum(1 for _, _, error in list_result if error is None)
+
+    pipeline = StockDataPipeline(fetch, lambda code, rows: convert_raw_data(rows_to_dataframe(rows, download_template['frequency'])), write_batch,
+                                 writer_context=lambda: db_base.use_profile(PROFILE_BULK_INGEST))
+    stats = pipeline.run(codes)
+    baostock_replay.logout()
+    return stats['write']['items']
+
+def run_engine(db_base, codes, table_name, download_template, num_workers):
+    saved = []
+
+    def on_result(download_task, df_raw):
+        df_data = convert_raw_data(df_raw)
+        if df_data is not None:
+            db_base.save_bao_stock_data_to_db(download_task['code'], df_data, download_task['write_way'], table_name)
+            saved.append(download_task['code'])
+
+    engine = BaostockDownloadEngine(num_workers=num_workers, requests_per_second=0, bs_module=REPLAY_MODULE)
+    with db_base.use_profile(PROFILE_BULK_INGEST):
+        engine.download([dict(download_template, code=code) for code in codes], on_result)
+    return len(saved)
+
+def bench_scenario(mode, db_base, codes, table_name, download_template, num_workers):
+    """返回 (股票/秒, 行/秒, 耗时, 入库股票数)"""
+    baostock_replay.reset_stats()
+    start_time = time.perf_counter()
+    if mode == 'engine':
+        saved = run_engine(db_base, codes, table_name, download_template, num_workers)
+    else:
+        saved = run_pipeline(db_base, codes, table_name, download_template)
+    elapsed = time.perf_counter() - start_time
+    # 多进程模式下替身的行数统计在工作进程中，这里统计入库后的总行数
+    rows = count_rows(db_base, codes, table_name)
+    return len(codes) / elapsed, rows / elapsed, elapsed, saved
+
+def count_rows(db_base, codes, table_name):
+    total = 0
+    for code in codes:
+        stats = db_base.get_table_stats(code, table_name)
+        total += stats['row_count'] if stats else 0
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description='离线入库基准测试（Baostock 替身）')
+    parser.add_argument('--stocks', type=int, default=100, help='模拟股票数量')
+    parser.add_argument('--latency', type=float, default=0.05, help='每次查询的模拟网络延迟（秒）')
+    parser.add_argument('--refresh-days', type=int, default=1, help='增量更新的交易日数')
+    parser.add_argument('--workers', type=int, default=4, help='engine 模式的工作进程数')
+    parser.add_argument('--mode', nargs='+', default=['pipeline', 'engine'], choices=['pipeline', 'engine'])
+    parser.add_argument('--backend', default='per_stock', choices=['per_stock', 'consolidated'])
+    parser.add_argument('--fixture-dir', default=None, help='录制数据目录（默认使用合成数据）')
+    args = parser.parse_args()
+
+    baostock_replay.configure(latency=args.latency, fixture_dir=args.fixture_dir,
+                              stocks_per_board=(args.stocks + len(baostock_replay.SYNTHETIC_BOARD_PREFIXES) - 1) // len(baostock_replay.SYNTHETIC_BOARD_PREFIXES))
+    baostock_replay.login()
+    rs = baostock_replay.query_all_stock()
+    codes = [row[0] for row in rs.data][:args.stocks]
+    baostock_replay.logout()
+
+    print(f"股票数量: {len(codes)}, 模拟延迟: {args.latency}s, 增量交易日: {args.refresh_days}, 存储: {args.backend}")
+    for mode in args.mode:
+        print("=" * 72)
+        print(f"模式: {mode}" + (f"（{args.workers} 进程）" if mode == 'engine' else "（单会话流水线）"))
+        for label, frequency, period in PERIODS:
+            db_dir = tempfile.mkdtemp(prefix="mpolicy_ingest_")
+            try:
+                db_base = create_db_base(args.backend, db_dir)
+                table_name = period.get_table_name()
+
+                start_date, end_date = get_full_date_range(frequency)
+                full_template = {'frequency': frequency, 'start_date': start_date, 'end_date': end_date, 'write_way': 'replace'}
+                stocks_per_second, rows_per_second, elapsed, saved = bench_scenario(mode, db_base, codes, table_name, full_template, args.workers)
+                print(f"  {label} 全量: {stocks_per_second:>8.1f} 股票/秒 {rows_per_second:>12,.0f} 行/秒 ({elapsed:.2f}s，入库 {saved} 只)")
+
+                start_date, end_date = get_refresh_date_range(args.refresh_days)
+                refresh_template = {'frequency': frequency, 'start_date': start_date, 'end_date': end_date, 'write_way': 'append'}
+                stocks_per_second, _, elapsed, saved = bench_scenario(mode, db_base, codes, table_name, refresh_template, args.workers)
+                print(f"  {label} 增量: {stocks_per_second:>8.1f} 股票/秒 {'':>17} ({elapsed:.2f}s，入库 {saved} 只)")
+                db_base.close_connection()
+            finally:
+                shutil.rmtree(db_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import argparse
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+# 添加src目录到Python路径，以便导入db_base模块
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from db_base.stock_db_base import StockDbBase
+from db_base.consolidated_stock_db_base import ConsolidatedStockDbBase
+from db_base.parallel_stock_reader import ParallelStockDataReader
+from db_base.sqlite_profiles import PRAGMA_PROFILES
+from benchmark_dataframe_insert import make_daily_data, make_minute_data
+
+'''
+    SQLite 连接配置基准测试：interactive / bulk_ingest / scan
+        入库：按配置批量写入（replace），bulk_ingest 的推迟索引计入耗时
+        读取：逐只读取（单线程） + 并行读取器（多线程）
+    数据集：
+        3年日线（约 730 行 / 股票）
+        1年5分钟线（约 242 天 x 48 根 / 股票）
+    用法：
+        python scripts/benchmark/benchmark_sqlite_profiles.py --stocks 200 --backend per_stock
+'''
+
+def create_db_base(backend, db_dir):
+    if backend == 'consolidated':
+        return ConsolidatedStockDbBase(db_dir)
+    return StockDbBase(db_dir)
+
+def bench_ingest(backend, list_df, table_name, profile):
+    """在全新目录中按指定配置写入全部股票，返回 (行/秒, 耗时, 数据库目录)"""
+    total_rows = sum(len(df) for df in list_df)
+    db_dir = tempfile.mkdtemp(prefix="mpolicy_profile_")
+    db_base = create_db_base(backend, db_dir)
+    start_time = time.perf_counter()
+    with db_base.use_profile(profile):
+        for df in list_df:
+            db_base.save_bao_stock_data_to_db(df['code'].iloc[0], df, 'replace', table_name)
+    elapsed = time.perf_counter() - start_time
+    db_base.close_connection()
+    return total_rows / elapsed, elapsed, db_dir
+
+def bench_read(backend, db_dir, codes, table_name, profile, repeat):
+    """单线程逐只读取，返回 (行/秒, 最好耗时)"""
+    db_base = create_db_base(backend, db_dir)
+    best = None
+    total_rows = 0
+    for _ in range(repeat):
+        total_rows = 0
+        start_time = time.perf_counter()
+        with db_base.use_profile(profile):
+            for code in codes:
+                total_rows += len(db_base.get_bao_stock_data(code, table_name))
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    db_base.close_connection()
+    return total_rows / best, best
+
+def bench_parallel_read(backend, db_dir, codes, table_name, profile, repeat, workers):
+    """并行读取器读取，返回 (行/秒, 最好耗时)"""
+    db_base = create_db_base(backend, db_dir)
+    reader = ParallelStockDataReader(db_base, max_workers=workers, profile=profile)
+    best = None
+    total_rows = 0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        total_rows = sum(len(df) for df in reader.read_all(codes, table_name).values())
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    db_base.close_connection()
+    return total_rows / best, best
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite连接配置基准测试')
+    parser.add_argument('--stocks', type=int, default=50, help='模拟股票数量')
+    parser.add_argument('--repeat', type=int, default=3, help='读取重复次数（取最好成绩）')
+    parser.add_argument('--workers', type=int, default=8, help='并行读取线程数')
+    parser.add_argument('--backend', choices=['per_stock', 'consolidated'], default='per_stock', help='存储后端')
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    codes = [f"sh.{600000 + i}" for i in range(args.stocks)]
+    datasets = [
+        ("3年日线", "stock_data_1d", [make_daily_data(code) for code in codes]),
+        ("1年5分钟线", "stock_data_5m", [make_minute_data(code) for code in codes]),
+    ]
+    profiles = list(PRAGMA_PROFILES.keys())
+
+    print(f"股票数量: {args.stocks}, 存储后端: {args.backend}, 读取重复次数: {args.repeat}, 读线程: {args.workers}")
+    list_db_dir = []
+    try:
+        for label, table_name, list_df in datasets:
+            total_rows = sum(len(df) for df in list_df)
+            print("=" * 72)
+            print(f"{label}: 共 {total_rows} 行（{total_rows // args.stocks} 行/股票）")
+
+            read_db_dir = None
+            for profile in profiles:
+                if profile == 'scan':
+                    # scan 为只读配置，不用于写入
+                    continue
+                rps, elapsed, db_dir = bench_ingest(args.backend, list_df, table_name, profile)
+                list_db_dir.append(db_dir)
+                read_db_dir = read_db_dir or db_dir
+                print(f"  写入  {profile:<12}: {rps:>12,.0f} 行/秒 ({elapsed:.3f}s)")
+
+            for profile in profiles:
+                rps, elapsed = bench_read(args.backend, read_db_dir, codes, table_name, profile, args.repeat)
+                print(f"  读取  {profile:<12}: {rps:>12,.0f} 行/秒 ({elapsed:.3f}s)")
+
+            for profile in profiles:
+                rps, elapsed = bench_parallel_read(args.backend, read_db_dir, codes, table_name, profile, args.repeat, args.workers)
+                print(f"  并行  {profile:<12}: {rps:>12,.0f} 行/秒 ({elapsed:.3f}s)")
+    finally:
+        for db_dir in list_db_dir:
+            shutil.rmtree(db_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
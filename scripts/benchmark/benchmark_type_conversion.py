@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import time
+import datetime
+import argparse
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+# 添加src目录到Python路径，以便导入common模块
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from common.kline_type_conversion import convert_kline_columns
+
+'''
+    K线原始数据类型转换基准测试：
+        逐行解析紧凑时间格式（旧 data_type_conversion） vs 按列整体转换（common.kline_type_conversion）
+    数据集：Baostock 返回的字符串格式
+        1年5分钟线（约 242 天 x 48 根 / 股票），time 为 YYYYMMDDHHMMSSsss
+        3年日线（约 730 行 / 股票）
+    测得的单只股票耗时按 --board-size 推算整个板块的转换耗时。
+    用法：
+        python scripts/benchmark/benchmark_type_conversion.py --stocks 20 --repeat 3 --board-size 1700
+'''
+
+def make_raw_minute_rows(code, days=242, bars_per_day=48):
+    """构造与 query_history_k_data_plus(frequency='5') 返回一致的字符串数据"""
+    trade_days = pd.bdate_range(end=datetime.date.today(), periods=days)
+    morning = pd.timedelta_range('09:35:00', '11:30:00', freq='5min')
+    afternoon = pd.timedelta_range('13:05:00', '15:00:00', freq='5min')
+    offsets = morning.append(afternoon)[:bars_per_day]
+    times = pd.DatetimeIndex((trade_days.values[:, None] + offsets.values[None, :]).ravel())
+    n = len(times)
+    close = 10 + np.cumsum(np.random.randn(n) * 0.01)
+    return pd.DataFrame({
+        'date': times.strftime('%Y-%m-%d'),
+        'time': times.strftime('%Y%m%d%H%M%S') + '000',
+        'code': code,
+        'open': np.char.mod('%.4f', close),
+        'high': np.char.mod('%.4f', close + 0.02),
+        'low': np.char.mod('%.4f', close - 0.02),
+        'close': np.char.mod('%.4f', close),
+        'volume': np.random.randint(1e3, 1e6, n).astype(str),
+        'amount': np.char.mod('%.4f', np.random.rand(n) * 1e6),
+        'adjustflag': '2',
+    })
+
+def make_raw_daily_rows(code, years=3):
+    """构造与 query_history_k_data_plus(frequency='d') 返回一致的字符串数据（停牌日换手率为空字符串）"""
+    dates = pd.bdate_range(end=datetime.date.today(), periods=int(242 * years))
+    n = len(dates)
+    close = 10 + np.cumsum(np.random.randn(n) * 0.1)
+    turnover = np.char.mod('%.6f', np.random.rand(n) * 5).astype(object)
+    turnover[np.random.rand(n) < 0.01] = ''
+    return pd.DataFrame({
+        'date': dates.strftime('%Y-%m-%d'),
+        'code': code,
+        'open': np.char.mod('%.4f', close),
+        'high': np.char.mod('%.4f', close + 0.2),
+        'low': np.char.mod('%.4f', close - 0.2),
+        'close': np.char.mod('%.4f', close),
+        'volume': np.random.randint(1e5, 1e7, n).astype(str),
+        'amount': np.char.mod('%.4f', np.random.rand(n) * 1e8),
+        'change_percent': np.char.mod('%.6f', np.random.randn(n)),
+        'turnover_rate': turnover,
+        'adjustflag': '2',
+    })
+
+def legacy_data_type_conversion(result):
+    """旧实现：标准格式解析失败后逐行解析紧凑时间"""
+    if 'date' in result.columns:
+        result['date'] = pd.to_datetime(result['date'], format='%Y-%m-%d').dt.date
+    if 'time' in result.columns:
+        try:
+            result['time'] = pd.to_datetime(result['time'], format='%Y-%m-%d %H:%M:%S')
+        except (ValueError, TypeError):
+            def parse_compact_time(time_str):
+                if pd.isna(time_str):
+                    return None
+                time_str = str(time_str).strip()
+                if len(time_str) >= 14 and time_str.isdigit():
+                    formatted_time = f"{time_str[0:4]}-{time_str[4:6]}-{time_str[6:8]} {time_str[8:10]}:{time_str[10:12]}:{time_str[12:14]}"
+                    return pd.to_datetime(formatted_time, format='%Y-%m-%d %H:%M:%S')
+                return pd.to_datetime(time_str)
+            result['time'] = result['time'].apply(parse_compact_time)
+    for col in ['open', 'high', 'low', 'close', 'amount', 'change_percent', 'turnover_rate']:
+        if col in result.columns:
+            result[col] = pd.to_numeric(result[col], errors='coerce')
+    for col in ['volume', 'adjustflag']:
+        if col in result.columns:
+            result[col] = pd.to_numeric(result[col], errors='coerce').astype('Int64')
+    return result
+
+def bench_convert(list_df, convert_func, repeat):
+    total_rows = sum(len(df) for df in list_df)
+    best = None
+    for _ in range(repeat):
+        # 转换是原地进行的，每轮使用新的副本（复制不计入耗时）
+        list_copy = [df.copy() for df in list_df]
+        start_time = time.perf_counter()
+        for df in list_copy:
+            convert_func(df)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return total_rows / best, best
+
+def check_same_result(df_raw):
+    """两种实现的转换结果必须一致"""
+    legacy = legacy_data_type_conversion(df_raw.copy())
+    new = convert_kline_columns(df_raw.copy())
+    for column in legacy.columns:
+        left, right = legacy[column], new[column]
+        if pd.api.types.is_numeric_dtype(left) and pd.api.types.is_numeric_dtype(right):
+            same = np.allclose(left.astype('float64'), right.astype('float64'), equal_nan=True)
+        else:
+            same = left.equals(right)
+        if not same:
+            raise AssertionError(f"列 {column} 转换结果不一致")
+
+def main():
+    parser = argparse.ArgumentParser(description='K线原始数据类型转换基准测试')
+    parser.add_argument('--stocks', type=int, default=20, help='模拟股票数量')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数（取最好成绩）')
+    parser.add_argument('--board-size', type=int, default=1700, help='推算耗时所用的板块股票数')
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    codes = [f"sh.{600000 + i}" for i in range(args.stocks)]
+    datasets = [
+        ("1年5分钟线", [make_raw_minute_rows(code) for code in codes]),
+        ("3年日线", [make_raw_daily_rows(code) for code in codes]),
+    ]
+
+    print(f"股票数量: {args.stocks}, 重复次数: {args.repeat}, 推算板块股票数: {args.board_size}")
+    for label, list_df in datasets:
+        check_same_result(list_df[0])
+
+        total_rows = sum(len(df) for df in list_df)
+        print("=" * 60)
+        print(f"{label}: 共 {total_rows} 行（{total_rows // args.stocks} 行/股票）")
+
+        legacy_rps, legacy_time = bench_convert(list_df, legacy_data_type_conversion, args.repeat)
+        new_rps, new_time = bench_convert(list_df, convert_kline_columns, args.repeat)
+        legacy_board = legacy_time / args.stocks * args.board_size
+        new_board = new_time / args.stocks * args.board_size
+        print(f"  逐行: {legacy_rps:>12,.0f} 行/秒 ({legacy_time:.3f}s)  整个板块约 {legacy_board:.1f}s")
+        print(f"  按列: {new_rps:>12,.0f} 行/秒 ({new_time:.3f}s)  整个板块约 {new_board:.1f}s  x{new_rps / legacy_rps:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import logging
+from datetime import datetime
+import time
+import argparse
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+# 添加src目录到Python路径，以便导入db_base模块
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from db_base.stock_db_base import StockDbBase
+from manager.logging_manager import get_logger
+
+'''
+    将按股票分文件存储的分钟级K线表迁移为 WITHOUT ROWID 聚簇表（主键 (date, time)），并删除旧的 (date, time, code)、(code) 索引：
+        python scripts/migrate_minute_tables.py
+        python scripts/migrate_minute_tables.py --tables stock_data_5m stock_data_15m
+    已是新结构的表会被跳过，可重复执行。迁移期间请关闭 GUI 和后台更新脚本。
+'''
+
+def setup_logging(log_level=logging.INFO):
+    """设置日志配置"""
+    log_dir = os.path.join(project_root, 'logs')
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+
+    log_file = os.path.join(log_dir, f'migrate_minute_tables_{datetime.now().strftime("%Y%m%d")}.log')
+
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    return get_logger(__name__)
+
+def migrate(db_dir, table_names=None, log_level=logging.INFO):
+    """迁移主函数"""
+    logger = setup_logging(log_level)
+    logger.info("=" * 50)
+    logger.info("开始迁移分钟级K线表结构")
+    logger.info(f"数据库目录: {db_dir}")
+    logger.info("=" * 50)
+
+    try:
+        db_base = StockDbBase(db_dir)
+
+        start_time = time.time()
+        count = db_base.migrate_minute_tables(table_names=table_names)
+
+        elapsed_time = time.time() - start_time
+        logger.info("=" * 50)
+        logger.info(f"共迁移 {count} 张表，总耗时: {elapsed_time:.2f} 秒")
+        logger.info("=" * 50)
+        return True
+
+    except Exception as e:
+        logger.error(f"迁移过程中发生错误: {str(e)}", exc_info=True)
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description='分钟级K线表结构迁移脚本')
+    parser.add_argument('--db-dir', default='./data/database/stocks/db/baostock',
+                       help='按股票分文件存储的数据库目录')
+    parser.add_argument('--tables', nargs='+',
+                       choices=['stock_data_5m', 'stock_data_15m', 'stock_data_30m', 'stock_data_60m', 'stock_data_120m'],
+                       help='指定要迁移的表，默认迁移全部分钟级表')
+    parser.add_argument('--log-level', default='INFO',
+                       choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                       help='设置日志级别')
+
+    args = parser.parse_args()
+
+    log_levels = {
+        'DEBUG': logging.DEBUG,
+        'INFO': logging.INFO,
+        'WARNING': logging.WARNING,
+        'ERROR': logging.ERROR
+    }
+
+    success = migrate(args.db_dir, args.tables, log_levels[args.log_level])
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
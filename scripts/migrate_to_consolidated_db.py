@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import logging
+from datetime import datetime
+import time
+import argparse
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+# 添加src目录到Python路径，以便导入db_base模块
+src_path = os.path.join(project_root, 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from db_base.stock_db_base import StockDbBase
+from db_base.consolidated_stock_db_base import ConsolidatedStockDbBase
+from manager.config_manager import ConfigManager
+from manager.logging_manager import get_logger
+
+'''
+    将按股票分文件存储的baostock K线数据库迁移为按周期合并存储：
+        python scripts/migrate_to_consolidated_db.py
+        python scripts/migrate_to_consolidated_db.py --tables stock_data_1d stock_data_1w --switch
+    迁移完成后在 config.ini 中设置 [Storage] backend = consolidated 即可切换（--switch 自动写入）。
+    源数据库不会被删除。
+'''
+
+def setup_logging(log_level=logging.INFO):
+    """设置日志配置"""
+    log_dir = os.path.join(project_root, 'logs')
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+
+    log_file = os.path.join(log_dir, f'migrate_consolidated_db_{datetime.now().strftime("%Y%m%d")}.log')
+
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    return get_logger(__name__)
+
+def migrate(src_dir, dst_dir, table_names=None, switch_backend=False, log_level=logging.INFO):
+    """迁移主函数"""
+    logger = setup_logging(log_level)
+    logger.info("=" * 50)
+    logger.info("开始迁移K线数据到合并存储")
+    logger.info(f"源目录: {src_dir}")
+    logger.info(f"目标目录: {dst_dir}")
+    logger.info("=" * 50)
+
+    try:
+        src_db_base = StockDbBase(src_dir)
+        dst_db_base = ConsolidatedStockDbBase(dst_dir)
+
+        start_time = time.time()
+
+        def on_progress(index, total, code):
+            if index % 100 == 0 or index == total:
+                logger.info(f"迁移进度: {index}/{total}，当前股票: {code}")
+
+        dict_migrated = dst_db_base.migrate_from_stock_db(src_db_base, table_names, progress_callback=on_progress)
+
+        elapsed_time = time.time() - start_time
+        logger.info("=" * 50)
+        for table_name, row_count in dict_migrated.items():
+            logger.info(f"{table_name}: {row_count} 行")
+        logger.info(f"总耗时: {elapsed_time:.2f} 秒")
+        logger.info("=" * 50)
+
+        if switch_backend:
+            config_manager = ConfigManager()
+            config_manager.set_config_path("config.ini")
+            config_manager.set('Storage', 'backend', 'consolidated')
+            config_manager.set('Storage', 'consolidated_db_dir', dst_dir)
+            config_manager.save()
+            logger.info("已将 config.ini 的 [Storage] backend 设置为 consolidated")
+
+        return True
+
+    except Exception as e:
+        logger.error(f"迁移过程中发生错误: {str(e)}", exc_info=True)
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description='K线数据库合并存储迁移脚本')
+    parser.add_argument('--src-dir', default='./data/database/stocks/db/baostock',
+                       help='按股票分文件存储的源目录')
+    parser.add_argument('--dst-dir', default='./data/database/stocks/db/baostock_consolidated',
+                       help='合并存储的目标目录')
+    parser.add_argument('--tables', nargs='+',
+                       choices=['stock_data_1d', 'stock_data_1w', 'stock_data_5m', 'stock_data_15m',
+                                'stock_data_30m', 'stock_data_60m', 'stock_data_120m'],
+                       help='指定要迁移的表，默认迁移全部')
+    parser.add_argument('--switch', action='store_true',
+                       help='迁移完成后将存储后端切换为合并存储')
+    parser.add_argument('--log-level', default='INFO',
+                       choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                       help='设置日志级别')
+
+    args = parser.parse_args()
+
+    log_levels = {
+        'DEBUG': logging.DEBUG,
+        'INFO': logging.INFO,
+        'WARNING': logging.WARNING,
+        'ERROR': logging.ERROR
+    }
+
+    success = migrate(args.src_dir, args.dst_dir, args.tables, args.switch, log_levels[args.log_level])
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
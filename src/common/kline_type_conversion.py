@@ -0,0 +1,108 @@
+import re
+import numpy as np
+import pandas as pd
+
+'''
+    K线原始数据（Baostock 返回的字符串）到入库格式的按列类型转换：
+        date        'YYYY-MM-DD'                         -> datetime.date
+        time        'YYYYMMDDHHMMSSsss'（Baostock 分钟线）或 'YYYY-MM-DD HH:MM:SS' -> datetime64
+        数值列      字符串                                -> float64（空字符串等无效值为 NaN）
+        volume / adjustflag                               -> Int64（可空整数）
+    每列只根据第一个非空值判断一次格式，整列按固定格式一次性解析；格式不一致的值按无效值处理（NaT / NaN），
+    只有判断不出格式时才退回 pandas 的自动推断。
+'''
+
+FLOAT_COLUMNS = ['open', 'high', 'low', 'close', 'amount', 'change_percent', 'turnover_rate']
+INTEGER_COLUMNS = ['volume', 'adjustflag']
+
+_COMPACT_TIME_PATTERN = re.compile(r'^\d{14,}$')
+_STANDARD_TIME_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$')
+
+def _first_valid_string(series):
+    index = series.first_valid_index()
+    if index is None:
+        return None
+    return str(series.loc[index]).strip()
+
+def _parse_compact_time_as_integer(series, width):
+    """
+    紧凑时间整列按整数拆分：交易日只有少数几个不同值，逐个解析后按下标展开，再加上日内秒数。
+    存在空值、非数字或时分秒越界时返回 None，由调用方按字符串格式解析。
+    """
+    try:
+        values = series.to_numpy(dtype=np.int64)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+    values = values // (10 ** (width - 14))                # 去掉毫秒位，剩余 YYYYMMDDHHMMSS
+    ymd, hms = np.divmod(values, 10 ** 6)
+    hour, minute_second = np.divmod(hms, 10 ** 4)
+    minute, second = np.divmod(minute_second, 100)
+    if (hour > 23).any() or (minute > 59).any() or (second > 59).any():
+        return None
+
+    unique_ymd, inverse = np.unique(ymd, return_inverse=True)
+    days = pd.to_datetime(pd.Series(unique_ymd).astype(str), format='%Y%m%d', errors='coerce').to_numpy()
+    seconds = (hour * 3600 + minute * 60 + second).astype('timedelta64[s]')
+    return pd.Series(days[inverse] + seconds, index=series.index, name=series.name)
+
+def convert_date_column(series):
+    """'YYYY-MM-DD' 转换为 datetime.date"""
+    return pd.to_datetime(series, format='%Y-%m-%d', errors='coerce').dt.date
+
+def convert_time_column(series):
+    """
+    时间列转换为 datetime64，按第一个非空值选择解析方式：
+        紧凑格式 YYYYMMDDHHMMSSsss：按整数拆分年月日与时分秒（见 _parse_compact_time_as_integer），
+            含空值等无法整数化时截取前14位按 %Y%m%d%H%M%S 整列解析（毫秒位 Baostock 恒为 000，舍弃）
+        标准格式 YYYY-MM-DD HH:MM:SS：按固定格式整列解析
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    sample = _first_valid_string(series)
+    if sample is None:
+        return pd.to_datetime(series, errors='coerce')
+
+    if _COMPACT_TIME_PATTERN.match(sample):
+        parsed = _parse_compact_time_as_integer(series, len(sample))
+        if parsed is not None:
+            return parsed
+        return pd.to_datetime(series.astype(str).str.slice(0, 14), format='%Y%m%d%H%M%S', errors='coerce')
+    if _STANDARD_TIME_PATTERN.match(sample):
+        return pd.to_datetime(series, format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    return pd.to_datetime(series, errors='coerce')
+
+def convert_float_column(series):
+    """
+    数值列转换为 float64：先尝试整列直接转换（无空字符串等无效值时最快），失败时按无效值为 NaN 转换
+    """
+    if pd.api.types.is_float_dtype(series):
+        return series
+    try:
+        return pd.Series(series.to_numpy(dtype=np.float64), index=series.index, name=series.name)
+    except (ValueError, TypeError):
+        return pd.to_numeric(series, errors='coerce').astype(np.float64)
+
+def convert_integer_column(series):
+    """整数列（成交量、复权方式）转换为可空整数 Int64"""
+    return convert_float_column(series).round().astype('Int64')
+
+def convert_kline_columns(df_data):
+    """
+    原地转换K线 DataFrame 中存在的列（date、time、数值列、整数列），返回同一个 DataFrame
+    """
+    if df_data is None:
+        return df_data
+
+    if 'date' in df_data.columns:
+        df_data['date'] = convert_date_column(df_data['date'])
+    if 'time' in df_data.columns:
+        df_data['time'] = convert_time_column(df_data['time'])
+    for column in FLOAT_COLUMNS:
+        if column in df_data.columns:
+            df_data[column] = convert_float_column(df_data[column])
+    for column in INTEGER_COLUMNS:
+        if column in df_data.columns:
+            df_data[column] = convert_integer_column(df_data[column])
+    return df_data
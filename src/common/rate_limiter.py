@@ -0,0 +1,82 @@
+import time
+import threading
+
+'''
+    令牌桶限流器：以固定速率补充令牌，桶容量决定允许的突发请求数。
+    线程安全；多进程下载时每个进程各持有一个限流器，总速率按进程数均分（见 split_rate）。
+'''
+
+class TokenBucket:
+    """
+    令牌桶限流器
+    """
+    def __init__(self, rate, capacity=None):
+        """
+        参数:
+            rate (float): 每秒补充的令牌数（即平均请求速率），<= 0 表示不限流
+            capacity (float, optional): 桶容量（允许的突发请求数），默认等于 rate 且不小于 1
+        """
+        self.rate = float(rate)
+        if capacity is None:
+            capacity = max(1.0, self.rate)
+        if capacity <= 0:
+            raise ValueError(f"令牌桶容量必须大于0: {capacity}")
+        self.capacity = float(capacity)
+
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def try_acquire(self, tokens=1):
+        """不等待地获取令牌，成功返回 True"""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        获取令牌，令牌不足时等待
+
+        参数:
+            tokens (float): 需要的令牌数，不能超过桶容量
+            timeout (float, optional): 最长等待时间（秒），None 表示一直等待
+
+        返回:
+            bool: 获取成功返回 True，超时返回 False
+        """
+        if self.rate <= 0:
+            return True
+        if tokens > self.capacity:
+            raise ValueError(f"请求的令牌数 {tokens} 超过桶容量 {self.capacity}")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait_time = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+            time.sleep(wait_time)
+
+def split_rate(total_rate, parts):
+    """将总速率均分给 parts 个独立的限流器（<= 0 表示不限流）"""
+    if total_rate <= 0 or parts <= 0:
+        return total_rate
+    return total_rate / parts
@@ -8,6 +8,8 @@ import time
 import numpy as np
 
 from manager.logging_manager import get_logger
+from db_base.dataframe_writer import executemany_in_chunks
+from db_base.sqlite_profiles import ensure_profile
 
 class CommonDBBasePool:
     """管理多个 CommonDBBase 实例的池（单例模式）"""
@@ -166,6 +168,9 @@ class CommonDBBase:
                 timeout=30
             )
             self._local.conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn_profile = None
+        # 按当前线程选择的连接配置设置 PRAGMA（配置未变化时不重复设置）
+        self._local.conn_profile = ensure_profile(self._local.conn, self._local.conn_profile)
         
         try:
             cursor = self._local.conn.cursor()
@@ -194,6 +199,9 @@ class CommonDBBase:
                 timeout=30
             )
             self._local.conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn_profile = None
+        # 按当前线程选择的连接配置设置 PRAGMA（配置未变化时不重复设置）
+        self._local.conn_profile = ensure_profile(self._local.conn, self._local.conn_profile)
         
         try:
             yield self._local.conn
@@ -388,29 +396,6 @@ class CommonDBBase:
             return self._insert_dataframe_fast(table_name, df_data, if_exists)
         
         try:
-            # 检查表是否存在数据
-            table_exists = False
-            row_count = 0
-            if not fast_mode:  # 非快速模式下才检查
-                with self._get_connection() as cur:
-                    cur.execute(f"SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-                    table_exists = cur.fetchone()[0] > 0
-                    
-                    if table_exists:
-                        cur.execute(f"SELECT COUNT(*) FROM {table_name}")
-                        row_count = cur.fetchone()[0]
-                        
-                        if row_count > 0:
-                            if if_exists == "fail":
-                                raise ValueError(f"表 {table_name} 中已存在数据，根据if_exists='fail'参数，操作被终止")
-                            elif if_exists == "replace":
-                                cur.execute(f"DELETE FROM {table_name}")
-                                self.logger.info(f"已清空表 {table_name} 中的 {row_count} 行数据")
-                            elif if_exists == "ignore":
-                                self.logger.info(f"表 {table_name} 中已存在数据，将忽略重复数据进行插入")
-                    else:
-                        self.logger.info(f"表 {table_name} 不存在，将创建新表")
-
             # 获取DataFrame的列名
             df_columns = list(df_data.columns)
             if not df_columns:
@@ -458,30 +443,28 @@ class CommonDBBase:
             else:
                 insert_sql = f'INSERT OR REPLACE INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
             
-            # 将DataFrame转换为记录列表
-            records = df_filtered.to_dict('records')
-            
-            # 处理缺失值，将NaN替换为None
-            processed_records = []
-            for record in records:
-                processed_record = {}
-                for key, value in record.items():
-                    # 处理NaN值
-                    if pd.isna(value):
-                        processed_record[key] = None
-                    # 处理numpy数据类型
-                    elif isinstance(value, (np.integer, np.floating)):
-                        processed_record[key] = value.item()  # 转换为Python原生类型
-                    elif isinstance(value, np.bool_):
-                        processed_record[key] = bool(value)
-                    else:
-                        processed_record[key] = value
-                processed_records.append(tuple(processed_record.values()))
-            
-            # 执行批量插入
             with self._get_connection() as cur:
-                cur.executemany(insert_sql, processed_records)
-                row_count = cur.rowcount
+                # 检查表是否存在数据（与插入处于同一事务，replace 的清表与写入一起提交）
+                cur.execute(f"SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+                table_exists = cur.fetchone()[0] > 0
+                
+                if table_exists:
+                    cur.execute(f"SELECT COUNT(*) FROM {table_name}")
+                    row_count = cur.fetchone()[0]
+                    
+                    if row_count > 0:
+                        if if_exists == "fail":
+                            raise ValueError(f"表 {table_name} 中已存在数据，根据if_exists='fail'参数，操作被终止")
+                        elif if_exists == "replace":
+                            cur.execute(f"DELETE FROM {table_name}")
+                            self.logger.info(f"已清空表 {table_name} 中的 {row_count} 行数据")
+                        elif if_exists == "ignore":
+                            self.logger.info(f"表 {table_name} 中已存在数据，将忽略重复数据进行插入")
+                else:
+                    self.logger.info(f"表 {table_name} 不存在，将创建新表")
+
+                # 按列整体转换后分批插入
+                row_count = executemany_in_chunks(cur, insert_sql, df_filtered)
                 self.logger.info(f"成功向表 {table_name} {if_exists} {row_count} 行数据")
                 return row_count
                 
@@ -520,19 +503,9 @@ class CommonDBBase:
             else:
                 insert_sql = f'INSERT OR REPLACE INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
             
-            # 直接转换DataFrame为记录列表（不进行额外处理）
-            records = df_data.to_dict('records')
-            
-            # 简单处理缺失值
-            processed_records = []
-            for record in records:
-                processed_record = tuple(None if pd.isna(value) else value for value in record.values())
-                processed_records.append(processed_record)
-            
-            # 执行批量插入
+            # 按列整体转换后分批插入
             with self._get_connection() as cur:
-                cur.executemany(insert_sql, processed_records)
-                row_count = cur.rowcount
+                row_count = executemany_in_chunks(cur, insert_sql, df_data)
                 self.logger.info(f"快速插入完成，向表 {table_name} 插入 {row_count} 行数据")
                 return row_count
                 
@@ -682,28 +655,9 @@ class CommonDBBase:
         else:
             insert_sql = f'INSERT OR REPLACE INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
         
-        # 将DataFrame转换为记录列表
-        records = df_filtered.to_dict('records')
-        
-        # 处理缺失值
-        processed_records = []
-        for record in records:
-            processed_record = {}
-            for key, value in record.items():
-                if pd.isna(value):
-                    processed_record[key] = None
-                elif isinstance(value, (np.integer, np.floating)):
-                    processed_record[key] = value.item()
-                elif isinstance(value, np.bool_):
-                    processed_record[key] = bool(value)
-                else:
-                    processed_record[key] = value
-            processed_records.append(tuple(processed_record.values()))
-        
-        # 执行批量插入
+        # 按列整体转换后分批插入
         with self._get_connection() as cur:
-            cur.executemany(insert_sql, processed_records)
-            row_count = cur.rowcount
+            row_count = executemany_in_chunks(cur, insert_sql, df_filtered)
             return row_count
 
     # ======================== 数据删除接口 ========================
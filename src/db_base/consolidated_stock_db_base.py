@@ -0,0 +1,532 @@
+import sqlite3
+import pandas as pd
+from pathlib import Path
+
+from db_base.stock_db_base import StockDbBase, DAY_SCHEMA_TABLES, MINUTE_TABLES
+from db_base.dataframe_writer import executemany_in_chunks
+from db_base.sqlite_connection_pool import DEFAULT_MAX_CONNECTIONS, DEFAULT_IDLE_TIMEOUT
+from manager.logging_manager import get_logger
+
+'''
+    合并存储：按周期分区，每个周期一个数据库文件，所有股票的K线数据存放在同一张表中。
+        baostock_consolidated/
+            stock_data_1d.db     -> 表 stock_data_1d
+            stock_data_1w.db     -> 表 stock_data_1w
+            stock_data_15m.db    -> 表 stock_data_15m
+            ...
+    表使用 WITHOUT ROWID + 主键 (code, date[, time])，同一只股票的数据在磁盘上连续存放，
+    单只股票查询为一次范围扫描；全市场查询为整表顺序扫描，无需逐个打开数千个数据库文件。
+    对外接口与 StockDbBase 保持一致，BaostockDataManager 无需修改调用方式即可切换。
+'''
+
+class ConsolidatedStockDbBase(StockDbBase):
+    """
+    按周期合并存储的股票K线数据库
+    """
+    ALLOWED_TABLES = DAY_SCHEMA_TABLES + MINUTE_TABLES
+
+    def __init__(self, db_dir=None, max_connections=DEFAULT_MAX_CONNECTIONS, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        """
+        初始化合并存储数据库管理器
+
+        参数:
+            db_dir (str, optional): 数据库目录路径，默认为./data/database/stocks/db/baostock_consolidated
+            max_connections (int): 连接池上限
+            idle_timeout (float): 空闲连接保留时间（秒）
+        """
+        if db_dir is None:
+            db_dir = "./data/database/stocks/db/baostock_consolidated"
+        super().__init__(db_dir, max_connections, idle_timeout)
+        self.logger = get_logger(__name__)
+
+    # =====================================================================数据库文件相关接口======================================================
+    def get_table_db_path(self, table_name):
+        """
+        获取指定周期表所在的数据库文件路径
+
+        参数:
+            table_name (str): 表名，例如 stock_data_1d
+
+        返回:
+            Path: 数据库文件路径
+        """
+        if table_name not in self.ALLOWED_TABLES:
+            raise ValueError(f"Invalid table name: {table_name}")
+        return self.db_dir / f"{table_name}.db"
+
+    def get_db_path(self, stock_code, table_name):
+        """
+        合并存储下股票不再有独立的数据库文件，返回其所在周期表的数据库路径（数据库文件按周期划分，必须指定表名）
+        """
+        return self.get_table_db_path(table_name)
+
+    def list_all_stocks(self, table_name):
+        """
+        列出指定周期表中已存在数据的股票代码
+
+        返回:
+            list: 股票代码列表
+        """
+        db_path = self.get_table_db_path(table_name)
+        if not db_path.exists():
+            return []
+
+        try:
+            with self._get_connection(db_path, readonly=True) as cur:
+                cur.execute(f"SELECT DISTINCT code FROM {table_name} ORDER BY code")
+                return [row[0] for row in cur.fetchall()]
+        except Exception as e:
+            self.logger.info(f"列出表 {table_name} 中股票代码时出错: {str(e)}")
+            return []
+
+    def check_stock_db_exists(self, stock_code):
+        """
+        检查指定股票在任意周期表中是否存在数据
+
+        参数:
+            stock_code (str): 股票代码
+
+        返回:
+            bool: 存在返回True，否则返回False
+        """
+        for table_name in self.ALLOWED_TABLES:
+            if self.check_table_exists(stock_code, table_name):
+                return True
+        return False
+
+    def delete_stock_db(self, stock_code):
+        """
+        删除指定股票在所有周期表中的数据
+        """
+        try:
+            for table_name in self.ALLOWED_TABLES:
+                db_path = self.get_table_db_path(table_name)
+                if not db_path.exists() or not self._table_exists(db_path, table_name):
+                    continue
+                with self._get_connection(db_path) as cur:
+                    cur.execute(f"DELETE FROM {table_name} WHERE code = ?", (stock_code,))
+            self.logger.info(f"成功删除股票 {stock_code} 的数据")
+            return True
+        except Exception as e:
+            self.logger.info(f"删除股票 {stock_code} 数据时出错: {str(e)}")
+            return False
+
+    # =======================================================================表结构相关接口=======================================================
+    def check_table_exists(self, stock_code, table_name):
+        """
+        检查指定股票在周期表中是否存在数据（合并存储下表是共享的，以是否存在该股票的数据为准）
+
+        参数:
+            stock_code (str): 股票代码
+            table_name (str): 表名
+
+        返回:
+            bool: 存在返回True，否则返回False
+        """
+        if table_name not in self.ALLOWED_TABLES:
+            return False
+
+        db_path = self.get_table_db_path(table_name)
+        if not db_path.exists():
+            return False
+
+        try:
+            if not self._table_exists(db_path, table_name):
+                return False
+            with self._get_connection(db_path, readonly=True) as cur:
+                cur.execute(f"SELECT 1 FROM {table_name} WHERE code = ? LIMIT 1", (stock_code,))
+                return cur.fetchone() is not None
+        except Exception as e:
+            self.logger.info(f"检查表 {table_name} 存在性时出错: {str(e)}")
+            return False
+
+    # ===================================================================Baostock表数据相关====================================================================
+    def get_baostock_create_table_sql(self, table_name='stock_data'):
+        sql = ""
+        if table_name in self.MINUTE_TABLES:
+            sql = f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                    code TEXT NOT NULL,
+                    date DATE NOT NULL,
+                    time DATETIME NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume INTEGER,
+                    amount REAL,
+                    adjustflag INTEGER,
+                    PRIMARY KEY (code, date, time)
+                ) WITHOUT ROWID"""
+        elif table_name in self.DAY_SCHEMA_TABLES:
+            sql = f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                    code TEXT NOT NULL,
+                    date DATE NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume INTEGER,
+                    amount REAL,
+                    change_percent REAL,
+                    turnover_rate REAL,
+                    adjustflag INTEGER,
+                    PRIMARY KEY (code, date)
+                ) WITHOUT ROWID"""
+        else:
+            raise ValueError(f"Invalid table name: {table_name}")
+
+        return sql
+
+    def create_baostock_table(self, db_path, table_name='stock_data'):
+        if table_name not in self.ALLOWED_TABLES:
+            raise ValueError(f"Invalid table name: {table_name}")
+
+        self._create_baostock_table_with_index(self.get_table_db_path(table_name), table_name)
+
+    def create_baostock_table_index_by_code(self, code, table_name):
+        self.create_baostock_table_index(self.get_table_db_path(table_name), table_name)
+
+    def migrate_minute_tables(self, code_list=None, table_names=None):
+        """合并存储的分钟级表建表时即为 WITHOUT ROWID 聚簇表，无需迁移"""
+        return 0
+
+    def create_baostock_table_index(self, db_path, table_name):
+        """
+        主键 (code, date[, time]) 已覆盖按股票查询，这里只补充按日期做全市场截面查询的索引。
+        db_path 参数仅为兼容 StockDbBase 接口，实际使用周期表对应的数据库路径。
+        """
+        if table_name not in self.ALLOWED_TABLES:
+            raise ValueError(f"Invalid table name: {table_name}")
+
+        db_path = self.get_table_db_path(table_name)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._get_connection(db_path) as cur:
+            try:
+                cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_date ON {table_name} (date)")
+                return True
+            except sqlite3.Error as e:
+                self.logger.error(f"创建表 {table_name} 索引失败: {str(e)}")
+                raise
+
+    def get_bao_stock_data(self, stock_code, table_name="stock_data", start_date=None, end_date=None, typed=False, last_n=None):
+        if not self.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+
+        db_path = self.get_table_db_path(table_name)
+        if not db_path.exists():
+            return pd.DataFrame()
+
+        if typed:
+            return self.get_table_data_typed(db_path, table_name, start_date=start_date, end_date=end_date, code=stock_code, last_n=last_n)
+        return self.get_table_data(db_path, table_name, start_date=start_date, end_date=end_date, code=stock_code, last_n=last_n)
+
+    def get_table_data(self, db_path, table="stock_data", start_date=None, end_date=None, code=None, last_n=None):
+        """
+        与 StockDbBase.get_table_data 相同，按 (date[, time]) 排序并保持原有列顺序（code 在 date 之后）
+        """
+        df = super().get_table_data(db_path, table, start_date=start_date, end_date=end_date, code=code, last_n=last_n)
+        return self._reorder_columns(df, table)
+
+    def _reorder_columns(self, df, table_name):
+        if df is None or df.empty:
+            return df
+        columns = self.MINUTE_COLUMNS if table_name in self.MINUTE_TABLES else self.DAY_COLUMNS
+        columns = [col for col in columns if col in df.columns]
+        return df[columns]
+
+    def build_stock_data_query(self, stock_code, table_name="stock_data", start_date=None, end_date=None, typed=False, last_n=None):
+        if not self.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+
+        if typed:
+            select_columns = self.get_typed_select_columns(table_name)
+        else:
+            select_columns = ', '.join(self.MINUTE_COLUMNS if table_name in self.MINUTE_TABLES else self.DAY_COLUMNS)
+        query, params = self.build_range_query(select_columns, table_name, start_date, end_date, stock_code, last_n)
+
+        return self.get_table_db_path(table_name), query, params
+
+    def build_high_water_mark_query(self, stock_code, table_name="stock_data"):
+        """主键 (code, date[, time]) 上的倒序查找，只读取一行"""
+        if not self.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+
+        if table_name in self.MINUTE_TABLES:
+            query = f"SELECT date, time FROM {table_name} WHERE code = ? ORDER BY date DESC, time DESC LIMIT 1"
+        else:
+            query = f"SELECT MAX(date), NULL FROM {table_name} WHERE code = ?"
+        return self.get_table_db_path(table_name), query, [stock_code]
+
+    def build_table_stats_query(self, stock_code, table_name="stock_data"):
+        if not self.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+        last_time = "MAX(time)" if table_name in self.MINUTE_TABLES else "NULL"
+        query = f"SELECT MIN(date), MAX(date), COUNT(*), {last_time} FROM {table_name} WHERE code = ?"
+        return self.get_table_db_path(table_name), query, [stock_code]
+
+    def get_lastest_stock_data(self, stock_code, table_name="stock_data"):
+        if not self.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+
+        db_path = self.get_table_db_path(table_name)
+        if not db_path.exists():
+            return pd.DataFrame()
+
+        try:
+            with self._get_connection(db_path, readonly=True) as cur:
+                query = f"SELECT * FROM {table_name} WHERE code = ? AND date = (SELECT MAX(date) FROM {table_name} WHERE code = ?)"
+                cur.execute(query, (stock_code, stock_code))
+                column_names = [description[0] for description in cur.description]
+                rows = cur.fetchall()
+
+                if rows:
+                    return self._reorder_columns(pd.DataFrame(rows, columns=column_names), table_name)
+                else:
+                    return pd.DataFrame()
+        except Exception as e:
+            self.logger.info(f"获取股票数据时出错: {str(e)}, code: {stock_code}")
+            return pd.DataFrame()
+
+    def get_all_lastest_stock_data(self, table_name="stock_data", code_list=None):
+        """
+        一次查询获取所有（或指定）股票的最后一行数据
+        """
+        if not self.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+
+        db_path = self.get_table_db_path(table_name)
+        if not db_path.exists():
+            return pd.DataFrame()
+
+        order_columns = "date, time" if table_name in self.MINUTE_TABLES else "date"
+        query = (f"SELECT * FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY code ORDER BY {order_columns} DESC) AS rn FROM {table_name}"
+                 + (f" WHERE code IN ({', '.join('?' * len(code_list))})" if code_list else "")
+                 + ") WHERE rn = 1")
+        params = list(code_list) if code_list else []
+
+        try:
+            with self._get_connection(db_path, readonly=True) as cur:
+                cur.execute(query, params)
+                column_names = [description[0] for description in cur.description]
+                rows = cur.fetchall()
+                df = pd.DataFrame(rows, columns=column_names).drop(columns=['rn'])
+                return self._reorder_columns(df, table_name)
+        except Exception as e:
+            self.logger.info(f"获取全市场最后一行数据时出错: {str(e)}")
+            return pd.DataFrame()
+
+    def get_all_stock_data(self, table_name="stock_data_1d", start_date=None, end_date=None, codes=None):
+        """
+        全市场读取：一次顺序扫描返回所有（或指定）股票在日期区间内的数据，按 code、date 排序
+
+        参数:
+            table_name (str): 表名
+            start_date (str, optional): 开始日期，格式 YYYY-MM-DD
+            end_date (str, optional): 结束日期，格式 YYYY-MM-DD
+            codes (list, optional): 股票代码列表，None 表示全部
+
+        返回:
+            DataFrame: 所有股票数据
+        """
+        if not self.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+
+        db_path = self.get_table_db_path(table_name)
+        if not db_path.exists():
+            return pd.DataFrame()
+
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        if codes:
+            conditions.append(f"code IN ({', '.join('?' * len(codes))})")
+            params.extend(codes)
+
+        query = f"SELECT * FROM {table_name}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY code, date" + (", time" if table_name in self.MINUTE_TABLES else "")
+
+        try:
+            with self._get_connection(db_path, readonly=True) as cur:
+                cur.execute(query, params)
+                column_names = [description[0] for description in cur.description]
+                rows = cur.fetchall()
+                return self._reorder_columns(pd.DataFrame(rows, columns=column_names), table_name)
+        except Exception as e:
+            self.logger.info(f"全市场读取表 {table_name} 时出错: {str(e)}")
+            return pd.DataFrame()
+
+    def iter_all_stock_data(self, table_name="stock_data_1d", start_date=None, end_date=None, codes=None):
+        """
+        全市场读取，按股票代码逐个产出 (code, DataFrame)
+        """
+        df_all = self.get_all_stock_data(table_name, start_date, end_date, codes)
+        if df_all is None or df_all.empty:
+            return
+
+        for code, df_code in df_all.groupby('code', sort=False):
+            yield code, df_code.reset_index(drop=True)
+
+    def save_bao_stock_data_to_db(self, stock_code, stock_data, writeWay="replace", table_name="stock_data"):
+        """
+        保存单只股票数据。合并存储下 replace 只替换该股票自身的数据，不影响表中其他股票。
+        """
+        if writeWay not in ["replace", "append", "fail", "ignore"]:
+            raise ValueError("if_exists参数必须是'replace', 'append', 'fail', 'ignore'之一")
+
+        if stock_data is None or stock_data.empty:
+            self.logger.info(f"警告: 要插入的数据为空，未执行插入操作")
+            return 0
+
+        db_path = self.get_table_db_path(table_name)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.create_baostock_table(db_path, table_name)
+
+        try:
+            # 删除与插入放在同一事务中，避免中途失败导致该股票数据丢失
+            with self._get_connection(db_path) as cur:
+                return self._write_stock_data(cur, stock_code, stock_data, writeWay, table_name)
+        except sqlite3.Error as e:
+            self.logger.info(f"向表 {table_name} 插入 {stock_code} 数据时发生数据库错误: {str(e)}")
+            raise
+
+    def _write_stock_data(self, cur, stock_code, stock_data, writeWay, table_name):
+        """在给定游标上写入单只股票数据（不提交）"""
+        columns = list(stock_data.columns)
+        placeholders = ', '.join('?' * len(columns))
+        columns_str = ', '.join([f'"{col}"' for col in columns])
+        if writeWay == "ignore":
+            insert_sql = f'INSERT OR IGNORE INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
+        else:
+            insert_sql = f'INSERT OR REPLACE INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
+
+        if writeWay in ["replace", "fail"]:
+            cur.execute(f"SELECT COUNT(*) FROM {table_name} WHERE code = ?", (stock_code,))
+            row_count = cur.fetchone()[0]
+            if row_count > 0:
+                if writeWay == "fail":
+                    raise ValueError(f"表 {table_name} 中已存在 {stock_code} 的数据，根据if_exists='fail'参数，操作被终止")
+                cur.execute(f"DELETE FROM {table_name} WHERE code = ?", (stock_code,))
+
+        return executemany_in_chunks(cur, insert_sql, stock_data)
+
+    def save_bao_stock_data_batch(self, list_items, table_name="stock_data"):
+        """
+        批量保存多只股票的数据：所有股票写入同一个事务，每只股票使用一个 SAVEPOINT，
+        单只股票失败时只回滚该股票，其余股票随批次一起提交
+
+        参数:
+            list_items (list): [(stock_code, stock_data, writeWay), ...]
+
+        返回:
+            list: [(stock_code, 写入行数, 错误信息或 None), ...]
+        """
+        list_result = []
+        list_to_write = []
+        for stock_code, stock_data, writeWay in list_items:
+            if writeWay not in ["replace", "append", "fail", "ignore"]:
+                list_result.append((stock_code, 0, f"非法的写入方式: {writeWay}"))
+            elif stock_data is None or stock_data.empty:
+                list_result.append((stock_code, 0, None))
+            else:
+                list_to_write.append((stock_code, stock_data, writeWay))
+        if not list_to_write:
+            return list_result
+
+        db_path = self.get_table_db_path(table_name)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.create_baostock_table(db_path, table_name)
+
+        with self._get_connection(db_path) as cur:
+            # 显式开启事务，SAVEPOINT 的释放不会单独提交
+            if not cur.connection.in_transaction:
+                cur.execute("BEGIN")
+            for stock_code, stock_data, writeWay in list_to_write:
+                cur.execute("SAVEPOINT stock_item")
+                try:
+                    row_count = self._write_stock_data(cur, stock_code, stock_data, writeWay, table_name)
+                    cur.execute("RELEASE SAVEPOINT stock_item")
+                    list_result.append((stock_code, row_count, None))
+                except (sqlite3.Error, ValueError) as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT stock_item")
+                    cur.execute("RELEASE SAVEPOINT stock_item")
+                    self.logger.info(f"向表 {table_name} 插入 {stock_code} 数据时出错: {str(e)}")
+                    list_result.append((stock_code, 0, str(e)))
+        return list_result
+
+    def delete_data_by_date(self, code, cutoff_date, table_name='stock_data'):
+        """
+        删除指定股票 cutoff_date（含）之后的数据
+
+        :return: 删除的行数
+        """
+        try:
+            db_path = self.get_table_db_path(table_name)
+            with self._get_connection(db_path) as cur:
+                cur.execute(f"DELETE FROM {table_name} WHERE code = ? AND date >= ?", (code, str(cutoff_date)))
+
+                row_count = cur.rowcount
+                self.logger.info(f"成功从表 {table_name} 删除 {code} 的 {row_count} 行数据")
+                return row_count
+
+        except sqlite3.Error as e:
+            self.logger.info(f"从表 {table_name} 删除数据时发生数据库错误: {str(e)}")
+            raise
+
+    # ===================================================================数据迁移====================================================================
+    def migrate_from_stock_db(self, src_db_base, table_names=None, codes=None, progress_callback=None):
+        """
+        将按股票分文件存储（StockDbBase）的数据迁移到合并存储
+
+        参数:
+            src_db_base (StockDbBase): 源数据库管理器
+            table_names (list, optional): 需要迁移的表，默认为所有支持的周期表
+            codes (list, optional): 需要迁移的股票代码，默认为源目录下的所有股票
+            progress_callback (callable, optional): 进度回调 progress_callback(index, total, code)
+
+        返回:
+            dict: {table_name: 迁移行数}
+        """
+        if table_names is None:
+            table_names = [table for table in self.ALLOWED_TABLES if table != 'stock_data']
+        if codes is None:
+            codes = src_db_base.list_all_stocks()
+
+        dict_migrated = {table_name: 0 for table_name in table_names}
+        for table_name in table_names:
+            db_path = self.get_table_db_path(table_name)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.create_baostock_table(db_path, table_name)
+
+        total = len(codes)
+        for index, code in enumerate(codes):
+            src_db_path = src_db_base.get_db_path(code)
+            if not Path(src_db_path).exists():
+                continue
+
+            for table_name in table_names:
+                if not src_db_base.check_table_exists(code, table_name):
+                    continue
+                try:
+                    df_data = src_db_base.get_table_data(src_db_path, table_name)
+                    if df_data is None or df_data.empty:
+                        continue
+                    dict_migrated[table_name] += self.save_bao_stock_data_to_db(code, df_data, "replace", table_name)
+                except Exception as e:
+                    self.logger.error(f"迁移 {code} 表 {table_name} 时出错: {str(e)}")
+
+            if progress_callback is not None:
+                progress_callback(index + 1, total, code)
+
+        # 迁移完成后释放源数据库的连接，避免持有数千个文件句柄
+        src_db_base.close_connection()
+
+        for table_name, row_count in dict_migrated.items():
+            self.logger.info(f"表 {table_name} 迁移完成，共 {row_count} 行")
+        return dict_migrated
@@ -0,0 +1,112 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+'''
+    DataFrame -> SQLite 批量写入工具（StockDbBase 与 CommonDBBase 共用）
+        按列整体转换：NaN/NaT/NA -> None，日期 -> ISO 字符串，numpy 标量 -> Python 原生类型
+        按块调用 executemany，由调用方保证所有块在同一事务中提交
+'''
+
+DEFAULT_CHUNK_SIZE = 5000
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def _to_db_value(value):
+    """单个值转换，仅用于无法整列转换的混合类型列"""
+    if value is None:
+        return None
+    if not isinstance(value, (str, bytes)) and pd.isna(value):
+        return None
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (pd.Timestamp, datetime.datetime)):
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, datetime.date):
+        return str(value)
+    return value
+
+def column_to_db_values(series):
+    """
+    将一列数据整体转换为可直接写入 SQLite 的 object 数组
+
+    参数:
+        series (pd.Series): 列数据
+
+    返回:
+        np.ndarray: dtype=object 的数组
+    """
+    dtype = series.dtype
+    mask = None
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        values = series.dt.strftime(DATETIME_FORMAT).to_numpy(dtype=object)
+        mask = series.isna().to_numpy()
+    elif isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+        # numpy 原生数值/布尔类型：astype(object) 直接得到 Python float/int/bool
+        values = series.to_numpy().astype(object)
+        if dtype.kind == 'f':
+            mask = np.isnan(series.to_numpy())
+    elif dtype == object:
+        inferred = pd.api.types.infer_dtype(series, skipna=True)
+        if inferred in ('string', 'empty'):
+            values = series.to_numpy(dtype=object).copy()
+            mask = series.isna().to_numpy()
+        elif inferred == 'date':
+            values = series.astype(str).to_numpy(dtype=object)
+            mask = series.isna().to_numpy()
+        elif inferred in ('datetime', 'datetime64'):
+            values = pd.to_datetime(series).dt.strftime(DATETIME_FORMAT).to_numpy(dtype=object)
+            mask = series.isna().to_numpy()
+        else:
+            values = np.array([_to_db_value(value) for value in series.to_numpy(dtype=object)], dtype=object)
+    else:
+        # 扩展类型（Int64、boolean、string、category 等）
+        values = series.astype(object).to_numpy(dtype=object).copy()
+        mask = series.isna().to_numpy()
+        if isinstance(dtype, pd.CategoricalDtype):
+            values = np.array([_to_db_value(value) for value in values], dtype=object)
+
+    if mask is not None and mask.any():
+        values[mask] = None
+    return values
+
+def dataframe_to_records(df_data):
+    """
+    将 DataFrame 按列转换后组装为 executemany 所需的元组列表
+
+    返回:
+        list[tuple]: 每行一个元组，列顺序与 df_data.columns 一致
+    """
+    if df_data is None or df_data.empty:
+        return []
+
+    list_columns = [column_to_db_values(df_data.iloc[:, index]) for index in range(df_data.shape[1])]
+    return list(zip(*list_columns))
+
+def iter_record_chunks(df_data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """按块转换 DataFrame，避免一次性生成全部记录占用过多内存"""
+    total = len(df_data)
+    for start in range(0, total, chunk_size):
+        yield dataframe_to_records(df_data.iloc[start:start + chunk_size])
+
+def executemany_in_chunks(cur, sql, df_data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    在调用方打开的事务中分块执行 executemany
+
+    参数:
+        cur (sqlite3.Cursor): 游标
+        sql (str): INSERT 语句
+        df_data (DataFrame): 数据，列顺序需与 sql 中的列一致
+        chunk_size (int): 每块行数
+
+    返回:
+        int: 影响的总行数
+    """
+    row_count = 0
+    for records in iter_record_chunks(df_data, chunk_size):
+        cur.executemany(sql, records)
+        if cur.rowcount > 0:
+            row_count += cur.rowcount
+    return row_count
@@ -0,0 +1,62 @@
+import os
+import threading
+
+'''
+    文件缓存共用工具（KlineBinaryCache、IndicatorColumnCache）：
+        write_file_atomic   写入临时文件后 os.replace 原子替换，读者不会看到写了一半的文件，持有旧映射的读者不受影响
+        remove_file         删除文件，不存在时忽略
+        CacheStats          线程安全的命中/缺失/过期等计数
+'''
+
+def write_file_atomic(path, write_func):
+    """
+    原子写入文件
+
+    参数:
+        path (Path): 目标文件
+        write_func (callable): write_func(f)，向以二进制方式打开的临时文件写入内容
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            write_func(f)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            os.remove(tmp_path)
+
+def remove_file(path, logger=None):
+    """删除文件，返回是否删除；文件不存在时返回 False，其他错误记录日志后返回 False"""
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        if logger is not None:
+            logger.info(f"删除缓存文件 {path} 失败: {str(e)}")
+        return False
+
+class CacheStats:
+    """
+    线程安全的缓存计数，hit_rate = hits / (hits + misses + stale)
+    """
+    def __init__(self, keys):
+        self._keys = tuple(keys)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = dict.fromkeys(self._keys, 0)
+
+    def add(self, key, value=1):
+        with self._lock:
+            self._stats[key] += value
+
+    def get(self):
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats.get('hits', 0) + stats.get('misses', 0) + stats.get('stale', 0)
+        stats['hit_rate'] = stats.get('hits', 0) / total if total > 0 else 0.0
+        return stats
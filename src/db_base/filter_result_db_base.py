@@ -80,14 +80,14 @@ class FilterResultDBBase(CommonDBBase):
         
         return sql
     def create_filter_result_table(self, period=TimePeriod.DAY):
-        table_name = f"filter_result_{period.value}"
+        table_name = f"filter_result_{period.get_storage_key()}"
 
         create_table_sql = self.get_create_table_sql(table_name)
         self.create_table(table_name, create_table_sql)
 
     def save_filter_result_to_db(self, df_result, period=TimePeriod.DAY):
 
-        table_name = f"filter_result_{period.value}"
+        table_name = f"filter_result_{period.get_storage_key()}"
 
         try:
             # 修改冲突列为新的唯一约束字段
@@ -103,7 +103,7 @@ class FilterResultDBBase(CommonDBBase):
         conditions = []
         params = []
 
-        table_name = f"filter_result_{period.value}"
+        table_name = f"filter_result_{period.get_storage_key()}"
         
         if date:
             conditions.append("date = ?")
@@ -130,7 +130,7 @@ class FilterResultDBBase(CommonDBBase):
         
     def get_latest_filter_result(self, period=TimePeriod.DAY):
         """获取最新日期的筛选结果数据"""
-        table_name = f"filter_result_{period.value}"
+        table_name = f"filter_result_{period.get_storage_key()}"
         try:
             with self._get_connection() as cur:
                 cur.execute(f'''
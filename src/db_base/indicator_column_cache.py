@@ -0,0 +1,128 @@
+import json
+import shutil
+import numpy as np
+from pathlib import Path
+
+from db_base.file_utils import write_file_atomic, remove_file, CacheStats
+from manager.logging_manager import get_logger
+
+'''
+    指标列持久化缓存：
+        <cache_dir>/<config_hash>/<period>/<code>.npy   形状为 (列数, 行数) 的 float64 数组，每行一个指标列
+        <cache_dir>/<config_hash>/<period>/<code>.json  元数据：列名、行数，以及由指标引擎定义的校验与递推状态
+    config_hash 为指标参数指纹（均线、MACD、RSI、BOLL 设置），参数修改后读取新的目录，旧目录由 prune 清理。
+    写入使用临时文件 + os.replace 原子替换，先写数据再写元数据，中途失败时行数对不上，读取时按过期处理。
+'''
+
+class IndicatorColumnCache:
+    """
+    按 (股票, 周期, 指标参数指纹) 保存已计算的指标列
+    """
+    def __init__(self, cache_dir):
+        self.logger = get_logger(__name__)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._stats = CacheStats(('hits', 'misses', 'stale', 'writes', 'invalidations'))
+
+    # =====================================================================统计相关接口======================================================
+    def reset_stats(self):
+        self._stats.reset()
+
+    def _add_stats(self, key, value=1):
+        self._stats.add(key, value)
+
+    def get_stats(self):
+        return self._stats.get()
+
+    # =====================================================================文件相关接口======================================================
+    def get_cache_paths(self, code, period, config_hash):
+        period_dir = self.cache_dir / config_hash / period.get_storage_key()
+        return period_dir / f"{code}.npy", period_dir / f"{code}.json"
+
+    def prune(self, keep_config_hash):
+        """删除其他指标参数指纹的缓存目录（参数修改后调用）"""
+        removed = 0
+        for config_dir in self.cache_dir.iterdir():
+            if config_dir.is_dir() and config_dir.name != keep_config_hash:
+                shutil.rmtree(config_dir, ignore_errors=True)
+                removed += 1
+        if removed:
+            self.logger.info(f"指标参数已修改，清理旧的指标缓存目录 {removed} 个")
+        return removed
+
+    def invalidate(self, code, period):
+        """删除该股票该周期在所有指标参数指纹下的缓存文件"""
+        removed = False
+        for config_dir in self.cache_dir.iterdir():
+            if not config_dir.is_dir():
+                continue
+            for path in self.get_cache_paths(code, period, config_dir.name):
+                if remove_file(path, self.logger):
+                    removed = True
+        if removed:
+            self._add_stats('invalidations')
+        return removed
+
+    # =====================================================================读写接口======================================================
+    def save(self, code, period, config_hash, dict_columns, meta):
+        """
+        保存指标列
+
+        参数:
+            dict_columns (dict): {列名: np.ndarray}，各列长度相同
+            meta (dict): 可 JSON 序列化的附加元数据（校验信息、递推状态）
+        """
+        if not dict_columns:
+            return False
+
+        npy_path, meta_path = self.get_cache_paths(code, period, config_hash)
+        npy_path.parent.mkdir(parents=True, exist_ok=True)
+
+        list_columns = list(dict_columns.keys())
+        array = np.vstack([np.asarray(dict_columns[column], dtype=np.float64) for column in list_columns])
+        meta = dict(meta, columns=list_columns, rows=array.shape[1])
+        try:
+            write_file_atomic(npy_path, lambda f: np.save(f, array))
+            write_file_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+        except OSError as e:
+            self.logger.info(f"写入指标缓存 {npy_path} 失败: {str(e)}")
+            return False
+
+        self._add_stats('writes')
+        return True
+
+    def load_meta(self, code, period, config_hash):
+        """只读取元数据，不存在或损坏时返回 None"""
+        _, meta_path = self.get_cache_paths(code, period, config_hash)
+        try:
+            with open(meta_path, 'rb') as f:
+                return json.loads(f.read().decode('utf-8'))
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+    def load(self, code, period, config_hash):
+        """
+        读取指标列
+
+        返回:
+            tuple: ({列名: np.ndarray}, meta)，缓存缺失或损坏时返回 None
+        """
+        npy_path, _ = self.get_cache_paths(code, period, config_hash)
+        meta = self.load_meta(code, period, config_hash)
+        if meta is None:
+            self._add_stats('misses')
+            return None
+        try:
+            array = np.load(npy_path)
+        except (FileNotFoundError, ValueError, OSError):
+            self._add_stats('misses')
+            return None
+
+        list_columns = meta.get('columns') or []
+        if array.shape != (len(list_columns), meta.get('rows')):
+            self._add_stats('stale')
+            return None
+
+        self._add_stats('hits')
+        return {column: array[index] for index, column in enumerate(list_columns)}, meta
@@ -0,0 +1,153 @@
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from db_base.file_utils import write_file_atomic, remove_file, CacheStats
+from manager.logging_manager import get_logger
+
+'''
+    K线二进制缓存（日线、周线等非分钟级周期）：
+        <cache_dir>/<period>/<code>.npy   形状为 (列数, 行数) 的 float64 数组，按列连续存放，第 0 行为纪元天数（日期）
+        <cache_dir>/<period>/<code>.json  元数据：列名、行数、生成缓存时的数据指纹（来自元数据目录 stock_catalog）
+    读取时以 mmap 方式打开，按日期二分查找后只复制所需区间，多个进程（GUI、后台更新脚本）通过操作系统页缓存共享数据。
+    写入使用临时文件 + os.replace 原子替换，读者持有的旧映射不受影响。
+    指纹与元数据目录不一致时视为过期，由调用方从 SQLite 重新读取并重建缓存。
+'''
+
+CACHE_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'amount', 'change_percent', 'turnover_rate', 'adjustflag']
+INTEGER_COLUMNS = ['volume', 'adjustflag']
+OUTPUT_COLUMNS = ['date', 'code', 'open', 'high', 'low', 'close', 'volume', 'amount', 'change_percent', 'turnover_rate', 'adjustflag']
+
+class KlineBinaryCache:
+    """
+    基于内存映射的K线只读缓存
+    """
+    def __init__(self, cache_dir):
+        self.logger = get_logger(__name__)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._stats = CacheStats(('hits', 'misses', 'stale', 'builds', 'invalidations'))
+
+    # =====================================================================统计相关接口======================================================
+    def reset_stats(self):
+        self._stats.reset()
+
+    def _add_stats(self, key, value=1):
+        self._stats.add(key, value)
+
+    def get_stats(self):
+        return self._stats.get()
+
+    # =====================================================================文件相关接口======================================================
+    def get_cache_paths(self, code, period):
+        period_dir = self.cache_dir / period.get_storage_key()
+        return period_dir / f"{code}.npy", period_dir / f"{code}.json"
+
+    @staticmethod
+    def make_fingerprint(catalog_entry):
+        """由元数据目录记录生成数据指纹，任何一次入库都会改变 last_ingest_time"""
+        if catalog_entry is None:
+            return None
+        return "|".join(str(catalog_entry.get(key)) for key in ['row_count', 'first_date', 'last_date', 'last_ingest_time', 'checksum'])
+
+    def invalidate(self, code, period):
+        """删除缓存文件（入库后调用，下次读取时重建）"""
+        removed = False
+        for path in self.get_cache_paths(code, period):
+            if remove_file(path, self.logger):
+                removed = True
+        if removed:
+            self._add_stats('invalidations')
+        return removed
+
+    # =====================================================================读写接口======================================================
+    def build(self, code, period, df_data, fingerprint):
+        """
+        由 SQLite 读出的K线数据（date 为 YYYY-MM-DD 字符串）生成缓存
+
+        参数:
+            code (str): 股票代码
+            period (TimePeriod): 周期
+            df_data (DataFrame): 该股票该周期的全部K线数据
+            fingerprint (str): 数据指纹（make_fingerprint）
+        """
+        if df_data is None or df_data.empty or fingerprint is None:
+            return False
+
+        npy_path, meta_path = self.get_cache_paths(code, period)
+        npy_path.parent.mkdir(parents=True, exist_ok=True)
+
+        df_sorted = df_data.sort_values('date', kind='stable')
+        array = np.full((len(CACHE_COLUMNS), len(df_sorted)), np.nan, dtype=np.float64)
+        array[0] = pd.to_datetime(df_sorted['date']).to_numpy(dtype='datetime64[D]').astype(np.int64)
+        for index, column in enumerate(CACHE_COLUMNS[1:], start=1):
+            if column in df_sorted.columns:
+                array[index] = pd.to_numeric(df_sorted[column], errors='coerce').to_numpy(dtype=np.float64)
+
+        meta = {'columns': CACHE_COLUMNS, 'rows': len(df_sorted), 'fingerprint': fingerprint}
+        try:
+            # 先写数据再写元数据：中途失败时指纹或行数对不上，读取时按过期处理
+            write_file_atomic(npy_path, lambda f: np.save(f, array))
+            write_file_atomic(meta_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+        except OSError as e:
+            self.logger.info(f"生成K线缓存 {npy_path} 失败: {str(e)}")
+            return False
+
+        self._add_stats('builds')
+        return True
+
+    def load(self, code, period, fingerprint, start_date=None, end_date=None, typed=False):
+        """
+        从缓存读取K线数据
+
+        参数:
+            fingerprint (str): 当前数据指纹，与缓存中的不一致时返回 None
+            start_date / end_date (str, optional): YYYY-MM-DD，闭区间
+            typed (bool): False 时返回与 SQLite 读取一致的格式（date 为字符串）；
+                          True 时 date 为 datetime64，code 为 category，数值为 float64，adjustflag 为 int64
+
+        返回:
+            DataFrame: 缓存缺失或过期时返回 None
+        """
+        npy_path, meta_path = self.get_cache_paths(code, period)
+        try:
+            with open(meta_path, 'rb') as f:
+                meta = json.loads(f.read().decode('utf-8'))
+            array = np.load(npy_path, mmap_mode='r')
+        except (FileNotFoundError, ValueError, OSError):
+            self._add_stats('misses')
+            return None
+
+        if fingerprint is None or meta.get('fingerprint') != fingerprint or meta.get('columns') != CACHE_COLUMNS \
+                or array.shape != (len(CACHE_COLUMNS), meta.get('rows')):
+            self._add_stats('stale')
+            return None
+
+        dates = array[0]
+        start_index = 0 if not start_date else int(np.searchsorted(dates, np.datetime64(start_date, 'D').astype(np.int64), side='left'))
+        end_index = len(dates) if not end_date else int(np.searchsorted(dates, np.datetime64(end_date, 'D').astype(np.int64), side='right'))
+        block = np.array(array[:, start_index:end_index])    # 只复制所需区间
+        del array
+
+        self._add_stats('hits')
+        return self._block_to_dataframe(code, block, typed)
+
+    def _block_to_dataframe(self, code, block, typed):
+        row_count = block.shape[1]
+        epoch_days = block[0].astype('datetime64[D]')
+        data = {}
+        for index, column in enumerate(CACHE_COLUMNS):
+            values = block[index]
+            if column == 'date':
+                data['date'] = pd.to_datetime(epoch_days) if typed else epoch_days.astype(str).astype(object)
+            elif column in INTEGER_COLUMNS and (column == 'adjustflag' or not typed) and not np.isnan(values).any():
+                data[column] = values.astype(np.int64)
+            else:
+                data[column] = values
+        if typed:
+            data['code'] = pd.Categorical([code] * row_count)
+        else:
+            data['code'] = np.full(row_count, code, dtype=object)
+        return pd.DataFrame(data, columns=OUTPUT_COLUMNS)
@@ -0,0 +1,200 @@
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from db_base.stock_db_base import typed_rows_to_dataframe
+from db_base.sqlite_profiles import use_profile, PROFILE_SCAN
+from manager.logging_manager import get_logger
+
+'''
+    多股票并行读取：
+        codes + 周期表 + 日期区间 -> 迭代产出 (code, DataFrame)
+    读线程从 stock_db_base 的连接池借用只读连接（mode=ro），不经过 BaostockDataManager 的全局锁；
+    SQLite WAL 模式下读与读、读与写互不阻塞，读线程数量由有界线程池控制，打开的文件句柄数量由连接池上限控制。
+'''
+
+class ParallelStockDataReader:
+    """
+    基于有界线程池的多股票K线并行读取器
+    """
+    def __init__(self, stock_db_base, max_workers=None, max_pending=None, profile=PROFILE_SCAN):
+        """
+        参数:
+            stock_db_base (StockDbBase): 数据库管理器，用于定位数据库文件和构造查询语句
+            max_workers (int, optional): 读线程数量，默认 min(8, CPU核数 + 4)
+            max_pending (int, optional): 同时在途的任务数量上限，默认 max_workers * 4，用于限制内存占用
+            profile (str): 读线程使用的连接配置，默认 scan（mmap + 大页缓存，见 sqlite_profiles）
+        """
+        self.logger = get_logger(__name__)
+        self.stock_db_base = stock_db_base
+        self.max_workers = max_workers if max_workers else min(8, (os.cpu_count() or 1) + 4)
+        self.max_pending = max_pending if max_pending else self.max_workers * 4
+        self.profile = profile
+
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    # =====================================================================统计相关接口======================================================
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {
+                'stocks_read': 0,       # 成功读取的股票数量
+                'stocks_empty': 0,      # 无数据的股票数量
+                'rows_read': 0,         # 读取的总行数
+                'errors': 0,            # 出错数量
+                'read_seconds': 0.0,    # 各读线程累计耗时
+                'wall_seconds': 0.0,    # 批次总耗时
+            }
+
+    def _add_stats(self, **kwargs):
+        with self._stats_lock:
+            for key, value in kwargs.items():
+                self._stats[key] += value
+
+    def get_stats(self):
+        """
+        返回读取吞吐统计，用于调整线程池大小
+
+        返回:
+            dict: 包含累计计数以及 stocks_per_second / rows_per_second / parallelism
+                  parallelism 为读线程累计耗时与总耗时之比，接近 max_workers 说明线程池已被充分利用
+                  connection_pool 为连接池命中/未命中统计
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        wall_seconds = stats['wall_seconds']
+        stats['max_workers'] = self.max_workers
+        stats['stocks_per_second'] = stats['stocks_read'] / wall_seconds if wall_seconds > 0 else 0.0
+        stats['rows_per_second'] = stats['rows_read'] / wall_seconds if wall_seconds > 0 else 0.0
+        stats['parallelism'] = stats['read_seconds'] / wall_seconds if wall_seconds > 0 else 0.0
+        stats['connection_pool'] = self.stock_db_base.get_connection_pool_stats()
+        return stats
+
+    # =====================================================================连接相关接口======================================================
+    def close_connections(self):
+        """关闭连接池中的空闲连接"""
+        self.stock_db_base.close_connection()
+
+    # =====================================================================读取接口======================================================
+    def read_stock_data(self, code, table_name, start_date=None, end_date=None, typed=False, profile=None):
+        """
+        在当前线程中读取单只股票数据（使用只读连接，不加全局锁）
+        typed 为 True 时返回类型化 DataFrame（datetime64 日期、category 代码、float64 数值）
+        profile 为 None 时使用读取器的默认连接配置
+
+        返回:
+            DataFrame: 股票数据，数据库或表不存在时返回空 DataFrame
+        """
+        read_start_time = time.time()
+        try:
+            db_path, query, params = self.stock_db_base.build_stock_data_query(code, table_name, start_date, end_date, typed)
+            if not db_path.exists():
+                self._add_stats(stocks_empty=1)
+                return pd.DataFrame()
+
+            with use_profile(profile or self.profile), self.stock_db_base.connection_pool.connection(db_path, readonly=True) as conn:
+                cur = conn.cursor()
+                try:
+                    cur.execute(query, params)
+                    column_names = [description[0] for description in cur.description]
+                    rows = cur.fetchall()
+                finally:
+                    cur.close()
+
+            if typed:
+                df_data = typed_rows_to_dataframe(rows, column_names)
+            else:
+                df_data = pd.DataFrame(rows, columns=column_names)
+            if df_data.empty:
+                self._add_stats(stocks_empty=1)
+            else:
+                self._add_stats(stocks_read=1, rows_read=len(df_data))
+            return df_data
+        except sqlite3.OperationalError as e:
+            # 表不存在等情况视为无数据
+            self.logger.debug(f"读取股票 {code} 表 {table_name} 失败: {str(e)}")
+            self._add_stats(stocks_empty=1)
+            return pd.DataFrame()
+        except Exception as e:
+            self.logger.error(f"读取股票 {code} 表 {table_name} 时出错: {str(e)}")
+            self._add_stats(errors=1)
+            return pd.DataFrame()
+        finally:
+            self._add_stats(read_seconds=time.time() - read_start_time)
+
+    def iter_stock_data(self, code_list, table_name, start_date=None, end_date=None, ordered=False, typed=False, profile=None):
+        """
+        并行读取多只股票数据
+
+        参数:
+            code_list (list): 股票代码列表
+            table_name (str): 表名
+            start_date (str, optional): 开始日期
+            end_date (str, optional): 结束日期
+            ordered (bool): True 时按 code_list 顺序产出，否则按完成顺序产出（吞吐更高）
+            typed (bool): True 时返回类型化 DataFrame
+            profile (str, optional): 读线程使用的连接配置，None 时使用读取器的默认配置
+
+        返回:
+            iterator: (code, DataFrame)
+        """
+        if not self.stock_db_base.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+
+        batch_start_time = time.time()
+        code_iter = iter(code_list)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stock_reader")
+        try:
+            pending = {}    # future -> (序号, code)
+            next_index = 0
+            dict_ready = {}  # ordered 模式下暂存已完成但尚未轮到产出的结果
+            next_yield_index = 0
+
+            def submit_next():
+                nonlocal next_index
+                code = next(code_iter, None)
+                if code is None:
+                    return False
+                future = executor.submit(self.read_stock_data, code, table_name, start_date, end_date, typed, profile)
+                pending[future] = (next_index, code)
+                next_index += 1
+                return True
+
+            while len(pending) < self.max_pending and submit_next():
+                pass
+
+            while pending:
+                done, _ = wait(list(pending.keys()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, code = pending.pop(future)
+                    df_data = future.result()
+                    if ordered:
+                        dict_ready[index] = (code, df_data)
+                    else:
+                        yield code, df_data
+
+                if ordered:
+                    while next_yield_index in dict_ready:
+                        yield dict_ready.pop(next_yield_index)
+                        next_yield_index += 1
+
+                # 在途任务与暂存结果合计不超过 max_pending
+                while len(pending) + len(dict_ready) < self.max_pending and submit_next():
+                    pass
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._add_stats(wall_seconds=time.time() - batch_start_time)
+
+    def read_all(self, code_list, table_name, start_date=None, end_date=None, typed=False):
+        """
+        并行读取多只股票数据，返回 {code: DataFrame}（仅包含非空数据）
+        """
+        dict_result = {}
+        for code, df_data in self.iter_stock_data(code_list, table_name, start_date, end_date, typed=typed):
+            if df_data is not None and not df_data.empty:
+                dict_result[code] = df_data
+        return dict_result
@@ -0,0 +1,263 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from manager.logging_manager import get_logger
+from db_base.sqlite_profiles import ensure_profile
+
+'''
+    SQLite 连接池（多线程共享，LRU 淘汰）：
+        按 (数据库路径, 读写模式) 缓存连接，只读连接使用 mode=ro + PRAGMA query_only，写连接开启 WAL
+        同一时刻一个连接只借给一个线程；同一线程嵌套获取同一数据库时复用已借出的连接（与原 thread-local 行为一致）
+        连接总数超过上限时关闭最久未使用的空闲连接，空闲超过 idle_timeout 秒的连接也会被关闭
+        借出时按当前线程选择的连接配置（sqlite_profiles.use_profile）设置 PRAGMA
+'''
+
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_IDLE_TIMEOUT = 300
+
+class SqliteConnectionPool:
+    """
+    有界 LRU SQLite 连接池
+    """
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, idle_timeout=DEFAULT_IDLE_TIMEOUT, timeout=30):
+        """
+        参数:
+            max_connections (int): 连接数上限（空闲 + 借出）。所有连接都被借出时允许临时超出，归还后再淘汰
+            idle_timeout (float): 空闲连接的最长保留时间（秒），<= 0 表示不按空闲时间淘汰
+            timeout (float): sqlite3.connect 的忙等待超时（秒）
+        """
+        if max_connections <= 0:
+            raise ValueError("max_connections 必须大于0")
+
+        self.logger = get_logger(__name__)
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._idle = OrderedDict()      # (path, readonly) -> [(conn, last_used, 已设置的配置名), ...]，按最近使用排序（末尾最新）
+        self._idle_count = 0
+        self._in_use_count = 0
+        self._local = threading.local() # 当前线程已借出的连接：path -> [conn, readonly, 嵌套深度]
+
+        self.reset_stats()
+
+    # =====================================================================统计相关接口======================================================
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                'hits': 0,              # 复用空闲连接
+                'misses': 0,            # 新建连接
+                'reentrant': 0,         # 同一线程嵌套获取，复用已借出的连接
+                'evictions': 0,         # 超出上限被淘汰
+                'idle_evictions': 0,    # 空闲超时被淘汰
+                'closed': 0,            # 主动关闭（close_idle / close_all）
+                'peak_connections': self._idle_count + self._in_use_count,
+            }
+
+    def get_stats(self):
+        """
+        返回:
+            dict: 命中/未命中/淘汰计数，当前空闲与借出连接数，以及命中率 hit_rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle_connections'] = self._idle_count
+            stats['in_use_connections'] = self._in_use_count
+        stats['max_connections'] = self.max_connections
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / total if total > 0 else 0.0
+        return stats
+
+    # =====================================================================连接相关接口======================================================
+    def _open(self, key, readonly):
+        if readonly:
+            uri = f"file:{os.path.abspath(key)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=self.timeout)
+            conn.execute('PRAGMA query_only=ON')
+        else:
+            conn = sqlite3.connect(key, check_same_thread=False, timeout=self.timeout)
+            conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _pop_expired_locked(self, now):
+        """在持锁状态下取出空闲超时的连接，返回待关闭列表"""
+        list_to_close = []
+        if self.idle_timeout is None or self.idle_timeout <= 0:
+            return list_to_close
+        for key in list(self._idle.keys()):
+            list_conn = self._idle[key]
+            list_keep = []
+            for item in list_conn:
+                if now - item[1] > self.idle_timeout:
+                    list_to_close.append(item[0])
+                else:
+                    list_keep.append(item)
+            if list_keep:
+                self._idle[key] = list_keep
+            else:
+                del self._idle[key]
+        self._idle_count -= len(list_to_close)
+        self._stats['idle_evictions'] += len(list_to_close)
+        return list_to_close
+
+    def _pop_overflow_locked(self):
+        """在持锁状态下按 LRU 取出超出上限的空闲连接，返回待关闭列表"""
+        list_to_close = []
+        while self._idle and self._idle_count + self._in_use_count > self.max_connections:
+            key, list_conn = next(iter(self._idle.items()))
+            conn = list_conn.pop(0)[0]
+            if not list_conn:
+                del self._idle[key]
+            self._idle_count -= 1
+            list_to_close.append(conn)
+        self._stats['evictions'] += len(list_to_close)
+        return list_to_close
+
+    def _checkout(self, key, readonly):
+        """借出连接，返回 (conn, 已设置的配置名)"""
+        pool_key = (key, readonly)
+        with self._lock:
+            list_to_close = self._pop_expired_locked(time.time())
+            conn = None
+            applied_profile = None
+            list_conn = self._idle.get(pool_key)
+            if list_conn:
+                conn, _, applied_profile = list_conn.pop()
+                if not list_conn:
+                    del self._idle[pool_key]
+                self._idle_count -= 1
+                self._stats['hits'] += 1
+            else:
+                self._stats['misses'] += 1
+            self._in_use_count += 1
+
+        for conn_to_close in list_to_close:
+            self._close_quietly(conn_to_close)
+
+        if conn is None:
+            try:
+                conn = self._open(key, readonly)
+            except Exception:
+                with self._lock:
+                    self._in_use_count -= 1
+                raise
+            with self._lock:
+                total = self._idle_count + self._in_use_count
+                if total > self._stats['peak_connections']:
+                    self._stats['peak_connections'] = total
+        return conn, applied_profile
+
+    def _checkin(self, key, readonly, conn, applied_profile, discard=False):
+        pool_key = (key, readonly)
+        with self._lock:
+            self._in_use_count -= 1
+            if discard:
+                list_to_close = [conn]
+            else:
+                self._idle.setdefault(pool_key, []).append((conn, time.time(), applied_profile))
+                self._idle.move_to_end(pool_key)
+                self._idle_count += 1
+                list_to_close = self._pop_overflow_locked()
+
+        for conn_to_close in list_to_close:
+            self._close_quietly(conn_to_close)
+
+    @contextmanager
+    def connection(self, db_path, readonly=False):
+        """
+        借出一个连接，退出时提交（只读连接回滚以释放读快照）并归还连接池，出错时回滚
+
+        参数:
+            db_path (str | Path): 数据库路径
+            readonly (bool): True 时使用只读连接（数据库文件必须已存在）；
+                             当前线程已持有该数据库的写连接时复用写连接，以便读到同一事务中未提交的数据
+        """
+        key = str(db_path)
+        if not hasattr(self._local, 'held'):
+            self._local.held = {}
+
+        held = self._local.held.get(key)
+        if held is not None and (held[1] == readonly or not held[1]):
+            # 同一线程嵌套获取：复用已借出的连接
+            held[2] += 1
+            with self._lock:
+                self._stats['reentrant'] += 1
+            conn = held[0]
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                held[2] -= 1
+            return
+
+        conn, applied_profile = self._checkout(key, readonly)
+        outer_held = held
+        self._local.held[key] = [conn, readonly, 1]
+        discard = False
+        try:
+            # 设置过程中出错时标记为未设置，下次借出时重新设置
+            previous_profile, applied_profile = applied_profile, None
+            applied_profile = ensure_profile(conn, previous_profile, readonly)
+            yield conn
+            if readonly:
+                conn.rollback()
+            else:
+                conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+            raise
+        finally:
+            if outer_held is not None:
+                self._local.held[key] = outer_held
+            else:
+                del self._local.held[key]
+            self._checkin(key, readonly, conn, applied_profile, discard)
+
+    def evict_idle(self):
+        """关闭空闲超时的连接，返回关闭的数量"""
+        with self._lock:
+            list_to_close = self._pop_expired_locked(time.time())
+        for conn in list_to_close:
+            self._close_quietly(conn)
+        return len(list_to_close)
+
+    def close_idle(self, db_path=None):
+        """
+        关闭空闲连接（借出中的连接不受影响，归还后仍可复用或被淘汰）
+
+        参数:
+            db_path (str | Path, optional): 只关闭该数据库的空闲连接（如删除数据库文件前），None 表示全部
+        """
+        key = None if db_path is None else str(db_path)
+        list_to_close = []
+        with self._lock:
+            for pool_key in list(self._idle.keys()):
+                if key is not None and pool_key[0] != key:
+                    continue
+                list_to_close.extend(item[0] for item in self._idle.pop(pool_key))
+            self._idle_count -= len(list_to_close)
+            self._stats['closed'] += len(list_to_close)
+        for conn in list_to_close:
+            self._close_quietly(conn)
+        return len(list_to_close)
+
+    def close_all(self):
+        """关闭所有空闲连接（借出中的连接在归还时进入空闲队列）"""
+        return self.close_idle()
@@ -0,0 +1,101 @@
+import threading
+from contextlib import contextmanager
+
+'''
+    SQLite 连接参数配置（按工作负载命名）：
+        interactive  界面交互、少量读写：SQLite 默认的小缓存，synchronous=NORMAL（WAL 下进程崩溃不丢已提交数据）
+        bulk_ingest  批量下载入库：synchronous=OFF、大页缓存、临时表放内存，新建表的索引推迟到批次结束后统一创建
+        scan         全市场扫描（策略筛选等）：mmap、大页缓存
+    query_only 不属于任何配置，只由连接的读写模式决定：只读连接为 ON，写连接为 OFF，
+    因此在 scan 配置下仍可通过写连接写入（如扫描过程中维护缓存表）。
+    当前线程通过 use_profile() 选择配置；连接在借出（或首次使用）时按当前线程的配置设置 PRAGMA，
+    配置未变化时不重复设置。
+'''
+
+PROFILE_INTERACTIVE = 'interactive'
+PROFILE_BULK_INGEST = 'bulk_ingest'
+PROFILE_SCAN = 'scan'
+
+DEFAULT_PROFILE = PROFILE_INTERACTIVE
+
+# 每个配置都给出全部 PRAGMA（query_only 除外），切换配置时能够完整覆盖上一个配置的设置
+PRAGMA_PROFILES = {
+    PROFILE_INTERACTIVE: {
+        'synchronous': 'NORMAL',
+        'cache_size': -2000,            # 负数单位为 KiB，约 2MB（SQLite 默认值）
+        'temp_store': 'DEFAULT',
+        'mmap_size': 0,
+    },
+    PROFILE_BULK_INGEST: {
+        'synchronous': 'OFF',           # K线数据可从数据源重新下载，批量入库时不等待落盘
+        'cache_size': -65536,           # 约 64MB
+        'temp_store': 'MEMORY',
+        'mmap_size': 0,
+    },
+    PROFILE_SCAN: {
+        'synchronous': 'NORMAL',
+        'cache_size': -32768,           # 约 32MB
+        'temp_store': 'MEMORY',
+        'mmap_size': 268435456,         # 256MB
+    },
+}
+
+# 批量入库时新建表的索引推迟到批次结束后创建
+DEFERRED_INDEX_PROFILES = (PROFILE_BULK_INGEST,)
+
+_local = threading.local()
+
+def get_current_profile():
+    """返回当前线程选择的配置名"""
+    return getattr(_local, 'profile', DEFAULT_PROFILE)
+
+def is_index_deferred():
+    """当前线程是否推迟建索引"""
+    return get_current_profile() in DEFERRED_INDEX_PROFILES
+
+@contextmanager
+def use_profile(profile):
+    """
+    在当前线程中临时切换连接配置，可嵌套，退出时恢复上一个配置
+
+    参数:
+        profile (str): interactive / bulk_ingest / scan
+    """
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"未知的连接配置: {profile}，可选: {', '.join(PRAGMA_PROFILES.keys())}")
+
+    previous_profile = get_current_profile()
+    _local.profile = profile
+    try:
+        yield profile
+    finally:
+        _local.profile = previous_profile
+
+def apply_profile(conn, profile, readonly=False):
+    """
+    为连接设置指定配置的 PRAGMA（需在事务外调用）
+
+    参数:
+        conn (sqlite3.Connection): 连接
+        profile (str): 配置名
+        readonly (bool): 只读连接设置 query_only=ON，写连接始终为 OFF
+    """
+    for pragma, value in PRAGMA_PROFILES[profile].items():
+        conn.execute(f"PRAGMA {pragma}={value}")
+    conn.execute(f"PRAGMA query_only={'ON' if readonly else 'OFF'}")
+    return profile
+
+def ensure_profile(conn, applied_profile, readonly=False):
+    """
+    连接当前的配置与本线程选择的配置不同时重新设置
+
+    参数:
+        applied_profile (str | None): 连接上次设置的配置名，None 表示尚未设置
+
+    返回:
+        str: 连接当前的配置名
+    """
+    profile = get_current_profile()
+    if profile == applied_profile:
+        return applied_profile
+    return apply_profile(conn, profile, readonly)
@@ -5,21 +5,71 @@ from pathlib import Path
 from contextlib import contextmanager
 from common.common_api import *
 import threading
+import time
 import numpy as np
 import datetime
 
 from manager.logging_manager import get_logger
+from db_base.dataframe_writer import dataframe_to_records, executemany_in_chunks, DEFAULT_CHUNK_SIZE
+from db_base.sqlite_connection_pool import SqliteConnectionPool, DEFAULT_MAX_CONNECTIONS, DEFAULT_IDLE_TIMEOUT
+from db_base import sqlite_profiles
 
 '''
     常规插入：executemany+ 分批提交
     超大数据：DataFrame.to_sql或原生 LOAD DATA/COPY
 '''
 
+# 类型化读取：日期、时间在 SQL 中直接转换为纪元天数 / 纪元秒，避免逐行解析字符串
+TYPED_COLUMN_SQL = {
+    'date': "CAST(julianday(date) - 2440587.5 AS INTEGER) AS date",
+    'time': "CAST(strftime('%s', time) AS INTEGER) AS time",
+}
+TYPED_FLOAT_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'amount', 'change_percent', 'turnover_rate']
+
+def typed_rows_to_dataframe(rows, column_names):
+    """
+    将类型化查询的结果按列转换为 NumPy 数组后构造 DataFrame（不产生 object 列）
+        date -> datetime64[ns]，time -> datetime64[ns]，code -> category，OHLCV 等 -> float64，adjustflag -> int64
+    NULL 值对应 NaN / NaT
+    """
+    if rows:
+        list_columns = list(zip(*rows))
+    else:
+        list_columns = [()] * len(column_names)
+
+    data = {}
+    for name, values in zip(column_names, list_columns):
+        if name == 'date':
+            data[name] = pd.to_datetime(np.array(values, dtype=np.float64), unit='D')
+        elif name == 'time':
+            data[name] = pd.to_datetime(np.array(values, dtype=np.float64), unit='s')
+        elif name == 'code':
+            data[name] = pd.Categorical(values)
+        elif name in TYPED_FLOAT_COLUMNS:
+            data[name] = np.array(values, dtype=np.float64)
+        elif name == 'adjustflag':
+            arr = np.array(values, dtype=np.float64)
+            data[name] = arr.astype(np.int64) if not np.isnan(arr).any() else arr
+        else:
+            data[name] = np.array(values)
+
+    return pd.DataFrame(data, columns=list(column_names))
+
+# 日线及以上周期（月、季、年线由日线聚合生成，见 processor.kline_resampler）共用日线表结构
+DAY_SCHEMA_TABLES = ['stock_data', 'stock_data_1d', 'stock_data_1w', 'stock_data_1m', 'stock_data_1mon', 'stock_data_1q', 'stock_data_1y']
+# 分钟级别表（含 date、time 两列），单只股票存储与合并存储共用
+MINUTE_TABLES = ['stock_data_3m', 'stock_data_5m', 'stock_data_10m', 'stock_data_15m', 'stock_data_30m', 'stock_data_45m', 'stock_data_60m', 'stock_data_90m', 'stock_data_120m']
+
 class StockDbBase:
     """
     股票数据库管理基类
     """
-    def __init__(self, db_dir=None):
+    DAY_SCHEMA_TABLES = DAY_SCHEMA_TABLES
+    MINUTE_TABLES = MINUTE_TABLES
+    DAY_COLUMNS = ['date', 'code', 'open', 'high', 'low', 'close', 'volume', 'amount', 'change_percent', 'turnover_rate', 'adjustflag']
+    MINUTE_COLUMNS = ['date', 'time', 'code', 'open', 'high', 'low', 'close', 'volume', 'amount', 'adjustflag']
+
+    def __init__(self, db_dir=None, max_connections=DEFAULT_MAX_CONNECTIONS, idle_timeout=DEFAULT_IDLE_TIMEOUT):
         """
         初始化数据库管理器
         
@@ -33,6 +83,8 @@ class StockDbBase:
                     star/
                     bse/
                     other/
+            max_connections (int): 连接池上限，超出后按 LRU 关闭空闲连接
+            idle_timeout (float): 空闲连接保留时间（秒）
             
         """
         self.logger = get_logger(__name__)
@@ -46,62 +98,94 @@ class StockDbBase:
         # 确保目录存在
         self.db_dir.mkdir(parents=True, exist_ok=True)
 
-        self._local = threading.local()     # 多线程隔离
         self._lock = threading.Lock()       # 保护​​共享资源​​
+        self.connection_pool = SqliteConnectionPool(max_connections, idle_timeout)   # 多线程共享的有界连接池
+        self._deferred_indexes = set()      # bulk_ingest 配置下推迟创建的索引：(db_path, table_name)
 
     @contextmanager
-    def _get_connection(self, db_path):
-        """线程安全的数据库连接获取"""
-        # 使用字典存储多个连接，以db_path为键
-        if not hasattr(self._local, 'connections'):
-            self._local.connections = {}
-        
-        # 如果该db_path的连接不存在，则创建新连接
-        if db_path not in self._local.connections:
-            self._local.connections[db_path] = sqlite3.connect(
-                db_path, 
-                check_same_thread=False,
-                timeout=30
-            )
-            self._local.connections[db_path].execute('PRAGMA journal_mode=WAL')
-        
-        try:
-            cursor = self._local.connections[db_path].cursor()
-            yield cursor
-            self._local.connections[db_path].commit()
-        except sqlite3.Error as e:
-            self._local.connections[db_path].rollback()
-            raise e
+    def _get_connection(self, db_path, readonly=False):
+        """
+        线程安全的数据库连接获取（从连接池借出，退出时提交并归还）
+
+        参数:
+            readonly (bool): True 时使用只读连接（mode=ro + query_only），数据库文件不存在时抛出 sqlite3.OperationalError
+        """
+        with self.connection_pool.connection(db_path, readonly) as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
 
     @contextmanager
-    def _get_connection_object(self, db_path):
+    def _get_connection_object(self, db_path, readonly=False):
         """线程安全的数据库连接获取（返回连接对象）"""
-        # 使用字典存储多个连接，以db_path为键
-        if not hasattr(self._local, 'connections'):
-            self._local.connections = {}
-        
-        # 如果该db_path的连接不存在，则创建新连接
-        if db_path not in self._local.connections:
-            self._local.connections[db_path] = sqlite3.connect(
-                db_path, 
-                check_same_thread=False,
-                timeout=30
-            )
-            self._local.connections[db_path].execute('PRAGMA journal_mode=WAL')
-        
-        try:
-            yield self._local.connections[db_path]
-            self._local.connections[db_path].commit()
-        except sqlite3.Error as e:
-            self._local.connections[db_path].rollback()
-            raise e
+        with self.connection_pool.connection(db_path, readonly) as conn:
+            yield conn
 
     def close_connection(self):
-        """关闭当前线程的所有数据库连接"""
-        if hasattr(self._local, 'connections'):
-            for conn in self._local.connections.values():
-                conn.close()
-            self._local.connections.clear()
+        """关闭连接池中的所有空闲连接（批量读写结束后释放文件句柄）"""
+        self.connection_pool.close_idle()
+
+    def get_connection_pool_stats(self):
+        """返回连接池命中/未命中/淘汰统计"""
+        return self.connection_pool.get_stats()
+
+    @contextmanager
+    def use_profile(self, profile):
+        """
+        在当前线程中切换连接配置（interactive / bulk_ingest / scan，见 sqlite_profiles）
+        最外层的 bulk_ingest 退出时统一创建批次中推迟的索引
+        """
+        was_deferred = sqlite_profiles.is_index_deferred()
+        with sqlite_profiles.use_profile(profile):
+            try:
+                yield profile
+            finally:
+                # 恢复外层配置前建索引，外层同样推迟时交由外层处理
+                if not was_deferred and sqlite_profiles.is_index_deferred():
+                    with sqlite_profiles.use_profile(sqlite_profiles.PROFILE_INTERACTIVE):
+                        self.build_deferred_indexes()
+
+    def build_deferred_indexes(self):
+        """创建 bulk_ingest 期间推迟的索引，返回创建的表数量"""
+        with self._lock:
+            list_pending = sorted(self._deferred_indexes, key=str)
+            self._deferred_indexes.clear()
+        if not list_pending:
+            return 0
+
+        start_time = time.time()
+        count = 0
+        for db_path, table_name in list_pending:
+            try:
+                self.create_baostock_table_index(db_path, table_name)
+                count += 1
+            except Exception as e:
+                self.logger.error(f"创建推迟的索引 {db_path} {table_name} 失败: {str(e)}")
+        self.logger.info(f"已创建推迟的索引：{count} 张表，耗时 {time.time() - start_time:.2f}秒")
+        return count
+
+    def _table_exists(self, db_path, table_name):
+        if not Path(db_path).exists():
+            return False
+        with self._get_connection(db_path, readonly=True) as cur:
+            cur.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+            return cur.fetchone()[0] > 0
+
+    def _create_baostock_table_with_index(self, db_path, table_name):
+        """建表并建索引；bulk_ingest 配置下新建的表先不建索引，批次结束后统一创建"""
+        defer_index = sqlite_profiles.is_index_deferred() and not self._table_exists(db_path, table_name)
+
+        create_table_sql = self.get_baostock_create_table_sql(table_name)
+        self.create_table(db_path, table_name, create_table_sql)
+
+        if defer_index:
+            with self._lock:
+                self._deferred_indexes.add((db_path, table_name))
+        else:
+            self.create_baostock_table_index(db_path, table_name)
+
     def create_table(self, db_path, table_name, create_table_sql):
         # 参数验证
         # if not file_exists(db_path):
@@ -127,37 +211,49 @@ class StockDbBase:
                 self.logger.info(f"创建表 {table_name} 失败: {str(e)}")
                 raise
 
-    def get_table_data(self, db_path, table="stock_data", start_date=None, end_date=None, code=None):
+    def build_range_query(self, select_columns, table_name, start_date=None, end_date=None, code=None, last_n=None):
+        """
+        构造按日期区间读取的查询，排序列与主键一致（分钟级表为 date, time），结果由索引顺序给出而不需要额外排序
+        last_n 给定时只取区间内最后 N 根K线：内层按主键倒序范围扫描并 LIMIT，外层仅对这 N 行恢复正序
+        （经 BaostockDataManager.get_stock_data_from_db_by_period(last_n=...) 调用；复盘与图表加载需要完整历史
+        以便从任意日期开始回放、在周期间换算位置，仍读取全部K线）
+
+        返回:
+            tuple: (sql, params)
+        """
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        if code:
+            conditions.append("code = ?")
+            params.append(code)
+
+        query = f"SELECT {select_columns} FROM {table_name}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        order_columns = ['date', 'time'] if table_name in self.MINUTE_TABLES else ['date']
+        if last_n is not None:
+            if int(last_n) <= 0:
+                raise ValueError(f"last_n 必须为正整数: {last_n}")
+            query = (f"SELECT * FROM ({query} ORDER BY {', '.join(col + ' DESC' for col in order_columns)} LIMIT ?)"
+                     f" ORDER BY {', '.join(order_columns)}")
+            params.append(int(last_n))
+        else:
+            query += f" ORDER BY {', '.join(order_columns)}"
+        return query, params
+
+    def get_table_data(self, db_path, table="stock_data", start_date=None, end_date=None, code=None, last_n=None):
         try:
             # 使用线程安全的连接方式执行查询
-            with self._get_connection(db_path) as cur:
-                # 基础查询
-                query = f"SELECT * FROM {table}"
-                
-                # 添加条件过滤
-                conditions = []
-                params = []
-                
-                # 日期范围过滤
-                if start_date:
-                    conditions.append("date >= ?")
-                    params.append(start_date)
-                
-                if end_date:
-                    conditions.append("date <= ?")
-                    params.append(end_date)
-                
-                # 股票代码过滤
-                if code:
-                    conditions.append("code = ?")
-                    params.append(code)
-                
-                # 如果有条件，则添加WHERE子句
-                if conditions:
-                    query += " WHERE " + " AND ".join(conditions)
-                
-                # 添加排序
-                query += " ORDER BY date"
+            with self._get_connection(db_path, readonly=True) as cur:
+                # 日期范围、股票代码过滤及排序（见 build_range_query）
+                query, params = self.build_range_query("*", table, start_date, end_date, code, last_n)
                 
                 cur.execute(query, params)
                 # 获取列名
@@ -172,11 +268,39 @@ class StockDbBase:
             self.logger.info(f"获取股票数据时出错: {str(e)}")
             return pd.DataFrame()
         
-    def insert_dataframe_to_table(self, db_path, table_name, df_data, if_exists="replace"):
+    def get_typed_select_columns(self, table_name):
+        """返回类型化读取时的 SELECT 列表达式"""
+        columns = self.MINUTE_COLUMNS if table_name in self.MINUTE_TABLES else self.DAY_COLUMNS
+        return ', '.join([TYPED_COLUMN_SQL.get(col, col) for col in columns])
+
+    def get_table_data_typed(self, db_path, table="stock_data", start_date=None, end_date=None, code=None, last_n=None):
+        """
+        与 get_table_data 相同的查询条件，但返回类型化的 DataFrame：
+            date/time 为 datetime64，code 为 category，OHLCV 为 float64，没有 object 列
+        """
+        try:
+            with self._get_connection(db_path, readonly=True) as cur:
+                query, params = self.build_range_query(self.get_typed_select_columns(table), table, start_date, end_date, code, last_n)
+
+                cur.execute(query, params)
+                column_names = [description[0] for description in cur.description]
+                rows = cur.fetchall()
+
+                return typed_rows_to_dataframe(rows, column_names)
+        except Exception as e:
+            self.logger.info(f"获取股票数据时出错: {str(e)}")
+            return pd.DataFrame()
+
+    def _dataframe_to_records(self, df_data):
+        """将 DataFrame 转换为可直接用于 executemany 的元组列表（按列整体转换，见 dataframe_writer）"""
+        return dataframe_to_records(df_data)
+
+    def insert_dataframe_to_table(self, db_path, table_name, df_data, if_exists="replace", chunk_size=DEFAULT_CHUNK_SIZE):
         """将 DataFrame 数据插入数据库表
         :param table_name: 表名
         :param df_data: DataFrame 数据, 列名和表列名对应才能使用该接口插入
         :param if_exists: 插入方式，默认为替换
+        :param chunk_size: 每批 executemany 的行数，所有批次（含 replace 的清表操作）在同一事务中提交
         """
         # 参数验证
         if not file_exists(db_path):
@@ -196,8 +320,23 @@ class StockDbBase:
             raise ValueError("if_exists参数必须是'replace', 'append', 'fail', 'ignore'之一")
 
         try:
-            # 检查表是否存在数据
+            # 获取DataFrame的列名
+            columns = list(df_data.columns)
+            if not columns:
+                raise ValueError("DataFrame没有有效的列")
+            
+            # 准备插入语句
+            placeholders = ', '.join('?' * len(columns))
+            columns_str = ', '.join([f'"{col}"' for col in columns])  # 用引号包围列名防止关键字冲突
+            
+            # 根据if_exists参数选择不同的插入策略
+            if if_exists == "ignore":
+                insert_sql = f'INSERT OR IGNORE INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
+            else:
+                insert_sql = f'INSERT OR REPLACE INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
+
             with self._get_connection(db_path) as cur:
+                # 检查表是否存在数据
                 cur.execute(f"SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
                 table_exists = cur.fetchone()[0] > 0
                 
@@ -217,51 +356,8 @@ class StockDbBase:
                 else:
                     self.logger.info(f"表 {table_name} 不存在，将创建新表")
 
-            # 获取DataFrame的列名
-            columns = list(df_data.columns)
-            if not columns:
-                raise ValueError("DataFrame没有有效的列")
-            
-            # 准备插入语句
-            placeholders = ', '.join('?' * len(columns))
-            columns_str = ', '.join([f'"{col}"' for col in columns])  # 用引号包围列名防止关键字冲突
-            
-            # 根据if_exists参数选择不同的插入策略
-            if if_exists == "ignore":
-                insert_sql = f'INSERT OR IGNORE INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
-            else:
-                insert_sql = f'INSERT OR REPLACE INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
-            
-            # 将DataFrame转换为记录列表
-            records = df_data.to_dict('records')
-            
-            # 处理缺失值，将NaN替换为None
-            processed_records = []
-            for record in records:
-                processed_record = {}
-                for key, value in record.items():
-                    # 处理NaN值
-                    if pd.isna(value):
-                        processed_record[key] = None
-                    # 处理numpy数据类型
-                    elif isinstance(value, (np.integer, np.floating)):
-                        processed_record[key] = value.item()  # 转换为Python原生类型
-                    elif isinstance(value, np.bool_):
-                        processed_record[key] = bool(value)
-                    elif isinstance(value, (pd.Timestamp, datetime.datetime)):
-                        # 处理时间戳类型，转换为字符串格式
-                        processed_record[key] = value.strftime('%Y-%m-%d %H:%M:%S')
-                    elif isinstance(value, datetime.date):
-                        # 处理日期类型
-                        processed_record[key] = str(value)
-                    else:
-                        processed_record[key] = value
-                processed_records.append(tuple(processed_record.values()))
-            
-            # 执行批量插入
-            with self._get_connection(db_path) as cur:
-                cur.executemany(insert_sql, processed_records)
-                row_count = cur.rowcount
+                # 按列整体转换后分批插入，与清表操作处于同一事务
+                row_count = executemany_in_chunks(cur, insert_sql, df_data, chunk_size)
                 # self.logger.info(f"成功向表 {table_name} {if_exists} {row_count} 行数据")
                 return row_count
                 
@@ -355,9 +451,9 @@ class StockDbBase:
             stock_codes.append(stock_code)
 
         return stock_codes
-    def list_all_stocks(self):
+    def list_all_stocks(self, table_name=None):
         """
-        列出所有已存在的股票数据库
+        列出所有已存在的股票数据库（table_name 不影响结果，与合并存储保持相同的调用方式）
         
         返回:
             list: 股票代码列表
@@ -407,12 +503,14 @@ class StockDbBase:
         # 确保目录存在
         self.db_dir.mkdir(parents=True, exist_ok=True)
 
-    def get_db_path(self, stock_code):
+    def get_db_path(self, stock_code, table_name=None):
         """
         获取指定股票代码的数据库路径
         
         参数:
             stock_code (str): 股票代码
+            table_name (str, optional): 表名，单只股票存储下所有周期在同一文件中，不影响结果；
+                                        与合并存储（按周期分文件）保持相同的调用方式
             
         返回:
             Path: 数据库文件路径
@@ -450,6 +548,7 @@ class StockDbBase:
         
         try:
             db_path = self.get_db_path(stock_code)
+            self.connection_pool.close_idle(db_path)
             os.remove(db_path)
             self.logger.info(f"成功删除股票 {stock_code} 的数据库")
             return True
@@ -490,7 +589,7 @@ class StockDbBase:
             return None
         
         try:
-            conn = sqlite3.connect(str(self.get_db_path(stock_code)))
+            conn = sqlite3.connect(str(self.get_db_path(stock_code, table_name)))
             cursor = conn.cursor()
             cursor.execute(f"PRAGMA table_info({table_name})")
             columns_info = cursor.fetchall()
@@ -514,7 +613,7 @@ class StockDbBase:
             if not is_valid_table_name(table_name):
                 raise ValueError("非法表名！")
         """
-        allowed_tables = {"stock_data", "user_info", "transaction_log", "stock_data_1d", "stock_data_1w", "stock_data_1m", "stock_data_3m", "stock_data_5m", "stock_data_10m", "stock_data_15m", "stock_data_30m", "stock_data_45m", "stock_data_60m", "stock_data_90m", "stock_data_120m"}
+        allowed_tables = {"stock_data", "user_info", "transaction_log", "stock_data_1d", "stock_data_1w", "stock_data_1m", "stock_data_1mon", "stock_data_1q", "stock_data_1y", "stock_data_3m", "stock_data_5m", "stock_data_10m", "stock_data_15m", "stock_data_30m", "stock_data_45m", "stock_data_60m", "stock_data_90m", "stock_data_120m"}
         
         # 直接匹配基础表名
         if table_name in allowed_tables:
@@ -546,7 +645,7 @@ class StockDbBase:
         db_path = self.get_db_path(stock_code)
         self
         try:
-            with self._get_connection(db_path) as cur:
+            with self._get_connection(db_path, readonly=True) as cur:
                 cur.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
                 return cur.fetchone()[0] > 0
         except Exception as e:
@@ -612,7 +711,7 @@ class StockDbBase:
             return True
         
         try:
-            conn = sqlite3.connect(str(self.get_db_path(stock_code)))
+            conn = sqlite3.connect(str(self.get_db_path(stock_code, table_name)))
             cursor = conn.cursor()
             
             # 构建SQL语句
@@ -706,7 +805,7 @@ class StockDbBase:
                 self.add_column(stock_code, column_name, column_type, None, table_name)
             
             # 更新数据库
-            conn = sqlite3.connect(str(self.get_db_path(stock_code)))
+            conn = sqlite3.connect(str(self.get_db_path(stock_code, table_name)))
             
             # 更新每一行
             for index, row in df.iterrows():
@@ -972,7 +1071,7 @@ class StockDbBase:
         db_path = self.get_db_path(code)
 
         try:
-            with self._get_connection_object(db_path) as conn:
+            with self._get_connection_object(db_path, readonly=True) as conn:
                 # 直接使用连接对象查询最大日期
                 latest_date = pd.read_sql_query(
                     "SELECT MAX(日期) as max_date FROM stock_chip_distribution_data_eastmoney", 
@@ -1000,7 +1099,7 @@ class StockDbBase:
     # ===================================================================Baostock表数据相关====================================================================
     def get_baostock_create_table_sql(self, table_name='stock_data'):
         sql = ""
-        if table_name == 'stock_data' or table_name == 'stock_data_1d' or table_name == 'stock_data_1w' or table_name == 'stock_data_1m':
+        if table_name in self.DAY_SCHEMA_TABLES:
             sql = f"""CREATE TABLE IF NOT EXISTS {table_name} (
                     date DATE NOT NULL,
                     code TEXT NOT NULL,
@@ -1015,7 +1114,7 @@ class StockDbBase:
                     adjustflag INTEGER,
                     PRIMARY KEY (date, code)
                 )"""
-        elif table_name == 'stock_data_3m' or table_name == 'stock_data_5m' or table_name == 'stock_data_10m' or table_name == 'stock_data_15m' or table_name == 'stock_data_30m' or table_name == 'stock_data_45m' or table_name == 'stock_data_60m' or table_name == 'stock_data_90m' or table_name == 'stock_data_120m':
+        elif table_name in self.MINUTE_TABLES:
             sql = f"""CREATE TABLE IF NOT EXISTS {table_name} (
                     date DATE NOT NULL,
                     time DATETIME NOT NULL,
@@ -1027,22 +1126,19 @@ class StockDbBase:
                     volume INTEGER,
                     amount REAL,
                     adjustflag INTEGER,
-                    PRIMARY KEY (date, time, code)
-                )"""
+                    PRIMARY KEY (date, time)
+                ) WITHOUT ROWID"""
         else:
             raise ValueError(f"Invalid table name: {table_name}")
         
         return sql
     def create_baostock_table(self, db_path, table_name='stock_data'):
-        allowed_table = ['stock_data', 'stock_data_1d', 'stock_data_1w', 'stock_data_1m', 'stock_data_5m', 'stock_data_15m', 'stock_data_30m', 'stock_data_60m', 'stock_data_120m']
+        allowed_table = self.DAY_SCHEMA_TABLES + self.MINUTE_TABLES
 
         if table_name not in allowed_table:
             raise ValueError(f"Invalid table name: {table_name}")
 
-        create_table_sql = self.get_baostock_create_table_sql(table_name)
-        self.create_table(db_path, table_name, create_table_sql)
-
-        self.create_baostock_table_index(db_path, table_name)
+        self._create_baostock_table_with_index(db_path, table_name)
 
 
     def create_baostock_table_index_by_code(self, code, table_name):
@@ -1050,8 +1146,7 @@ class StockDbBase:
         db_path.parent.mkdir(parents=True, exist_ok=True)
         self.create_baostock_table_index(db_path, table_name)
     def create_baostock_table_index(self, db_path, table_name):
-        allowed_table = ['stock_data', 'stock_data_1d', 'stock_data_1w', 'stock_data_1m', 
-                        'stock_data_5m', 'stock_data_15m', 'stock_data_30m', 'stock_data_60m', 'stock_data_120m']
+        allowed_table = self.DAY_SCHEMA_TABLES + self.MINUTE_TABLES
 
         if table_name not in allowed_table:
             raise ValueError(f"Invalid table name: {table_name}")
@@ -1062,17 +1157,16 @@ class StockDbBase:
         # 辅助索引：满足特定查询需求
         additional_indexes = []
 
-        if table_name in ['stock_data', 'stock_data_1d', 'stock_data_1w', 'stock_data_1m']:
+        if table_name in self.DAY_SCHEMA_TABLES:
             # 日线数据索引
             primary_index_sql = f"CREATE INDEX IF NOT EXISTS idx_{table_name}_date_code ON {table_name} (date, code)"
             # 为单独按股票代码查询添加索引
             additional_indexes.append(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_code ON {table_name} (code)")
             
-        elif table_name in ['stock_data_5m', 'stock_data_15m', 'stock_data_30m', 'stock_data_60m', 'stock_data_120m']:
-            # 分钟级别数据索引
-            primary_index_sql = f"CREATE INDEX IF NOT EXISTS idx_{table_name}_date_time_code ON {table_name} (date, time, code)"
-            # 为单独按股票代码查询添加索引
-            additional_indexes.append(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_code ON {table_name} (code)")
+        elif table_name in self.MINUTE_TABLES:
+            # 分钟级别表为 WITHOUT ROWID，主键 (date, time) 即聚簇索引，区间查询和按时间排序都直接走主键，不再建二级索引
+            # （每个数据库文件只有一只股票，code 索引没有选择性）
+            return True
 
         with self._get_connection(db_path) as cur:
             try:
@@ -1089,7 +1183,90 @@ class StockDbBase:
                 self.logger.error(f"创建表 {table_name} 索引失败: {str(e)}")
                 raise
 
-    def get_bao_stock_data(self, stock_code, table_name="stock_data", start_date=None, end_date=None):
+    def is_clustered_minute_table(self, db_path, table_name):
+        """分钟级表是否已是主键 (date, time) 的 WITHOUT ROWID 表（表不存在时返回 None）"""
+        with self._get_connection(db_path, readonly=True) as cur:
+            cur.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        return 'WITHOUT ROWID' in row[0].upper()
+
+    def migrate_minute_table(self, db_path, table_name):
+        """
+        将旧结构的分钟级表（rowid 表 + (date, time, code)、(code) 二级索引）迁移为 WITHOUT ROWID 聚簇表：
+            建新表 -> 按主键顺序复制数据 -> 删除旧表（连同旧索引） -> 新表改名，整个过程在同一事务中完成
+
+        返回:
+            bool: 发生迁移返回 True，表不存在或已是新结构返回 False
+        """
+        if table_name not in self.MINUTE_TABLES:
+            raise ValueError(f"非分钟级表: {table_name}")
+        if not Path(db_path).exists() or self.is_clustered_minute_table(db_path, table_name) is not False:
+            return False
+
+        tmp_table_name = f"{table_name}_migrating"
+        create_table_sql = self.get_baostock_create_table_sql(table_name).replace(
+            f"CREATE TABLE IF NOT EXISTS {table_name}", f"CREATE TABLE {tmp_table_name}", 1)
+        columns_str = ', '.join(self.MINUTE_COLUMNS)
+
+        with self._get_connection(db_path) as cur:
+            try:
+                # 建表语句默认自动提交，显式开启事务使迁移整体原子
+                if not cur.connection.in_transaction:
+                    cur.execute("BEGIN")
+                cur.execute(f"DROP TABLE IF EXISTS {tmp_table_name}")
+                cur.execute(create_table_sql)
+                # 旧表主键含 code，同一 (date, time) 理论上只有一行；如有重复保留后写入的一行
+                cur.execute(f"INSERT OR REPLACE INTO {tmp_table_name} ({columns_str}) "
+                            f"SELECT {columns_str} FROM {table_name} ORDER BY date, time, rowid")
+                cur.execute(f"DROP TABLE {table_name}")
+                cur.execute(f"ALTER TABLE {tmp_table_name} RENAME TO {table_name}")
+            except sqlite3.Error as e:
+                self.logger.error(f"迁移表 {db_path} {table_name} 失败: {str(e)}")
+                raise
+        return True
+
+    def migrate_minute_tables(self, code_list=None, table_names=None):
+        """
+        批量迁移分钟级表结构（见 migrate_minute_table）
+
+        参数:
+            code_list (list, optional): 股票代码列表，None 表示数据库目录下的所有股票
+            table_names (list, optional): 表名列表，None 表示所有分钟级表
+
+        返回:
+            int: 迁移的表数量
+        """
+        if code_list is None:
+            code_list = self.list_all_stocks()
+        if table_names is None:
+            table_names = self.MINUTE_TABLES
+
+        count = 0
+        for code in code_list:
+            db_path = self.get_db_path(code)
+            for table_name in table_names:
+                try:
+                    if self.migrate_minute_table(db_path, table_name):
+                        count += 1
+                except sqlite3.Error:
+                    continue
+            # 逐只处理，避免持有大量文件句柄
+            self.connection_pool.close_idle(db_path)
+
+        # 旧数据库可能处于任意状态，迁移结束后释放全部空闲连接
+        self.close_connection()
+        self.logger.info(f"分钟级表结构迁移完成，共迁移 {count} 张表")
+        return count
+
+    def get_bao_stock_data(self, stock_code, table_name="stock_data", start_date=None, end_date=None, typed=False, last_n=None):
+        """
+        获取单只股票K线数据
+        typed 为 False 时返回数据库原始类型（日期为 YYYY-MM-DD 字符串）；
+        为 True 时返回类型化 DataFrame（见 get_table_data_typed）
+        last_n 给定时只返回区间内最后 N 根K线
+        """
         db_path = self.get_db_path(stock_code)
         # self.logger.info("db_path:", db_path)
         # if not self.check_stock_db_exists(stock_code):
@@ -1103,8 +1280,28 @@ class StockDbBase:
         if not self.is_valid_table_name(table_name):
             raise ValueError(f"非法表名{table_name}！")
         
-        return self.get_table_data(db_path, table_name, start_date=start_date, end_date=end_date)
+        if typed:
+            if not db_path.exists():
+                return pd.DataFrame()
+            return self.get_table_data_typed(db_path, table_name, start_date=start_date, end_date=end_date, last_n=last_n)
+        return self.get_table_data(db_path, table_name, start_date=start_date, end_date=end_date, last_n=last_n)
     
+    def build_stock_data_query(self, stock_code, table_name="stock_data", start_date=None, end_date=None, typed=False, last_n=None):
+        """
+        构造单只股票K线查询，供不经过本类连接管理的读取方（如并行读取器）使用
+        typed 为 True 时使用类型化列表达式，结果需经 typed_rows_to_dataframe 转换
+
+        返回:
+            tuple: (db_path, sql, params)
+        """
+        if not self.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+
+        select_columns = self.get_typed_select_columns(table_name) if typed else "*"
+        query, params = self.build_range_query(select_columns, table_name, start_date, end_date, last_n=last_n)
+
+        return self.get_db_path(stock_code), query, params
+
     def get_lastest_stock_data(self, stock_code, table_name="stock_data"):
         if not self.is_valid_table_name(table_name):
             raise ValueError(f"非法表名{table_name}！")
@@ -1113,7 +1310,7 @@ class StockDbBase:
         
         try:
             # 使用线程安全的连接方式执行查询
-            with self._get_connection(db_path) as cur:
+            with self._get_connection(db_path, readonly=True) as cur:
                 query = f"SELECT * FROM {table_name} WHERE date = (SELECT MAX(date) FROM {table_name}) ORDER BY date DESC"
                 cur.execute(query)
                 # 获取列名
@@ -1130,6 +1327,105 @@ class StockDbBase:
             self.logger.info(f"获取股票数据时出错: {str(e)}, code: {stock_code}")
             return pd.DataFrame()
 
+    def build_high_water_mark_query(self, stock_code, table_name="stock_data"):
+        """
+        构造高水位查询：只取最后一根K线的 date（分钟级表附带 time）
+        日线/周线/月线命中 (date, code) 索引的 MAX 优化，分钟级表（WITHOUT ROWID）沿聚簇主键 (date, time) 倒序取第一行，均不扫描全表
+
+        返回:
+            tuple: (db_path, sql, params)
+        """
+        if not self.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+
+        if table_name in self.MINUTE_TABLES:
+            query = f"SELECT date, time FROM {table_name} ORDER BY date DESC, time DESC LIMIT 1"
+        else:
+            query = f"SELECT MAX(date), NULL FROM {table_name}"
+        return self.get_db_path(stock_code), query, []
+
+    def get_high_water_mark(self, stock_code, table_name="stock_data"):
+        """
+        获取单只股票指定表的高水位（已入库的最后日期/时间），用于增量更新时只获取并追加新数据
+
+        返回:
+            dict: {'date': 'YYYY-MM-DD', 'time': 'YYYY-MM-DD HH:MM:SS' 或 None}，数据库、表不存在或无数据时返回 None
+        """
+        db_path, query, params = self.build_high_water_mark_query(stock_code, table_name)
+        if not db_path.exists():
+            return None
+
+        try:
+            with self._get_connection(db_path, readonly=True) as cur:
+                cur.execute(query, params)
+                row = cur.fetchone()
+        except sqlite3.OperationalError as e:
+            # 表不存在视为无数据
+            self.logger.debug(f"获取股票 {stock_code} 表 {table_name} 高水位失败: {str(e)}")
+            return None
+
+        if row is None or row[0] is None:
+            return None
+        return {'date': row[0], 'time': row[1]}
+
+    def build_table_stats_query(self, stock_code, table_name="stock_data"):
+        """构造表统计查询：首个日期、最后日期、行数、最后时间（分钟级表，其余为 NULL），需要扫描全表"""
+        if not self.is_valid_table_name(table_name):
+            raise ValueError(f"非法表名{table_name}！")
+        last_time = "MAX(time)" if table_name in self.MINUTE_TABLES else "NULL"
+        return self.get_db_path(stock_code), f"SELECT MIN(date), MAX(date), COUNT(*), {last_time} FROM {table_name}", []
+
+    def get_table_stats(self, stock_code, table_name="stock_data"):
+        """
+        获取单只股票指定表的统计信息，用于重建元数据目录（stock_catalog）
+        COUNT(*) 需要扫描全表，只用于重建目录，只需要最后日期时使用 get_high_water_mark
+
+        返回:
+            dict: {'first_date', 'last_date', 'last_time', 'row_count'}，数据库、表不存在或无数据时返回 None
+        """
+        db_path, query, params = self.build_table_stats_query(stock_code, table_name)
+        if not db_path.exists():
+            return None
+
+        try:
+            with self._get_connection(db_path, readonly=True) as cur:
+                cur.execute(query, params)
+                row = cur.fetchone()
+        except sqlite3.OperationalError as e:
+            self.logger.debug(f"获取股票 {stock_code} 表 {table_name} 统计信息失败: {str(e)}")
+            return None
+
+        if row is None or not row[2]:
+            return None
+        return {'first_date': row[0], 'last_date': row[1], 'last_time': row[3], 'row_count': row[2]}
+
+    def get_all_lastest_stock_data(self, table_name="stock_data", code_list=None):
+        """
+        获取所有（或指定）股票的最后一行数据，合并为一个 DataFrame
+        按股票分文件存储时需要逐个打开数据库，仅用于重建最新K线汇总表
+
+        参数:
+            table_name (str): 表名
+            code_list (list, optional): 股票代码列表，None 表示数据库目录下的所有股票
+        """
+        if code_list is None:
+            code_list = self.list_all_stocks()
+
+        list_lastest_data = []
+        for code in code_list:
+            if not self.check_stock_db_exists(code):
+                continue
+            df_lastest = self.get_lastest_stock_data(code, table_name)
+            if df_lastest is not None and not df_lastest.empty:
+                list_lastest_data.append(df_lastest.tail(1))
+
+        # 批量读取结束后释放连接，避免持有大量文件句柄
+        self.close_connection()
+
+        if not list_lastest_data:
+            return pd.DataFrame()
+        return pd.concat(list_lastest_data, ignore_index=True)
+
     def save_bao_stock_data_to_db(self, stock_code, stock_data, writeWay="replace", table_name="stock_data"):
         db_path = self.get_db_path(stock_code)
 
@@ -1152,9 +1448,29 @@ class StockDbBase:
         self.create_baostock_table(db_path, table_name)
             
 
-        self.insert_dataframe_to_table(db_path, table_name, stock_data, writeWay)
+        return self.insert_dataframe_to_table(db_path, table_name, stock_data, writeWay)
     
 
+    def save_bao_stock_data_batch(self, list_items, table_name="stock_data"):
+        """
+        批量保存多只股票的数据（下载流水线的写入阶段使用）
+        按股票分文件存储时每只股票是独立的数据库文件，只能各自提交；单只股票失败不影响其他股票
+
+        参数:
+            list_items (list): [(stock_code, stock_data, writeWay), ...]
+
+        返回:
+            list: [(stock_code, 写入行数, 错误信息或 None), ...]
+        """
+        list_result = []
+        for stock_code, stock_data, writeWay in list_items:
+            try:
+                row_count = self.save_bao_stock_data_to_db(stock_code, stock_data, writeWay, table_name)
+                list_result.append((stock_code, row_count or 0, None))
+            except Exception as e:
+                list_result.append((stock_code, 0, str(e)))
+        return list_result
+
     def delete_data_by_date(self, code, cutoff_date, table_name='stock_data'):
         """
         根据日期删除表中的数据
@@ -0,0 +1,616 @@
+import sqlite3
+import threading
+import zlib
+import pandas as pd
+
+from db_base.common_db_base import CommonDBBase
+from db_base.dataframe_writer import dataframe_to_records, column_to_db_values
+from manager.logging_manager import get_logger
+from manager.period_manager import TimePeriod
+
+class StockMetaDbBasePool:
+    """管理多个 StockMetaDbBase 实例的池（单例模式），以数据库路径为键"""
+
+    _instance = None
+    _lock = threading.RLock()  # 使用可重入锁
+
+    def __new__(cls):
+        """重写 __new__ 方法控制实例创建"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._managers = {}
+        return cls._instance
+
+    def get_manager(self, db_path):
+        """获取指定路径的元数据库管理器实例"""
+        key = str(db_path)
+        if key not in self._managers:
+            with self._lock:
+                if key not in self._managers:
+                    self._managers[key] = StockMetaDbBase(key)
+        return self._managers[key]
+
+    def close_all(self):
+        """关闭所有数据库管理器"""
+        with self._lock:
+            for key, manager in list(self._managers.items()):
+                manager.close_connection()
+                del self._managers[key]
+
+class StockMetaDbBase(CommonDBBase):
+    """
+    K线数据元数据库，与K线数据库放在同一目录下（stock_meta.db）
+    latest_bar_<period> 表：每只股票在该周期的最后一根K线，由入库流程维护，用于启动时一次性加载全市场最新行情
+    latest_bar_state 表：各周期汇总表是否已从K线数据库完整重建过（升级前已有的K线数据只有重建后才会进入汇总表）
+    stock_catalog 表：每只股票每个周期一行（日期范围、行数、最后入库时间、校验和），由入库流程维护，
+                      用于回答"表是否存在 / 最新日期 / 哪些股票需要更新"，无需打开单只股票的数据库文件
+    ingest_job / ingest_job_item 表：批量下载任务台账，逐只股票记录处理结果（入库提交后标记），
+                      程序中途退出后同名任务从未完成的股票继续
+    trade_calendar 表：交易日历（含非交易日），供 TradingCalendar 持久化，启动时无需重复请求
+    """
+
+    LATEST_BAR_STATE_TABLE = "latest_bar_state"
+
+    CATALOG_TABLE = "stock_catalog"
+    CATALOG_COLUMNS = ['code', 'period', 'first_date', 'last_date', 'last_time', 'row_count', 'last_ingest_time', 'checksum']
+
+    JOB_TABLE = "ingest_job"
+    JOB_ITEM_TABLE = "ingest_job_item"
+    JOB_STATUS_RUNNING = "running"
+    JOB_STATUS_COMPLETED = "completed"
+    ITEM_STATUS_PENDING = "pending"
+    ITEM_STATUS_DONE = "done"          # 已入库（或下载后无数据）
+    ITEM_STATUS_SKIPPED = "skipped"    # 已是最新，无需下载
+    ITEM_STATUS_FAILED = "failed"
+
+    TRADE_CALENDAR_TABLE = "trade_calendar"
+
+    DAY_COLUMNS = ['date', 'code', 'open', 'high', 'low', 'close', 'volume', 'amount', 'change_percent', 'turnover_rate', 'adjustflag']
+    MINUTE_COLUMNS = ['date', 'time', 'code', 'open', 'high', 'low', 'close', 'volume', 'amount', 'adjustflag']
+
+    def __init__(self, db_path="./data/database/stocks/db/baostock/stock_meta.db"):
+        self.logger = get_logger(__name__)
+        self._created_tables = set()
+        super().__init__(db_path)
+
+    def _init_db(self):
+        for period in [TimePeriod.DAY, TimePeriod.WEEK]:
+            self.create_latest_bar_table(period)
+        self.create_latest_bar_state_table()
+        self.create_catalog_table()
+        self.create_ingest_job_tables()
+        self.create_trade_calendar_table()
+
+    # ===================================================================最新K线汇总表====================================================================
+    def get_latest_bar_table_name(self, period=TimePeriod.DAY):
+        return f"latest_bar_{period.get_storage_key()}"
+
+    def get_latest_bar_columns(self, period=TimePeriod.DAY):
+        return self.MINUTE_COLUMNS if TimePeriod.is_minute_level(period) else self.DAY_COLUMNS
+
+    def create_latest_bar_table(self, period=TimePeriod.DAY):
+        table_name = self.get_latest_bar_table_name(period)
+        if table_name in self._created_tables:
+            return
+
+        if TimePeriod.is_minute_level(period):
+            sql = f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                    code TEXT PRIMARY KEY NOT NULL,
+                    date DATE NOT NULL,
+                    time DATETIME NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume INTEGER,
+                    amount REAL,
+                    adjustflag INTEGER,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )"""
+        else:
+            sql = f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                    code TEXT PRIMARY KEY NOT NULL,
+                    date DATE NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume INTEGER,
+                    amount REAL,
+                    change_percent REAL,
+                    turnover_rate REAL,
+                    adjustflag INTEGER,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )"""
+        self.create_table(table_name, sql)
+        self._created_tables.add(table_name)
+
+    def upsert_latest_bars(self, df_data, period=TimePeriod.DAY, force=False):
+        """
+        用新入库的K线数据更新最新K线汇总表（df_data 可以包含多只股票、多行数据）
+
+        参数:
+            df_data (DataFrame): 入库的K线数据
+            period (TimePeriod): 周期
+            force (bool): True 时直接覆盖（用于 replace 全量写入），否则只在新数据不早于已有数据时更新
+
+        返回:
+            int: 更新的股票数量
+        """
+        if df_data is None or df_data.empty or 'code' not in df_data.columns:
+            return 0
+
+        self.create_latest_bar_table(period)
+        table_name = self.get_latest_bar_table_name(period)
+        columns = [col for col in self.get_latest_bar_columns(period) if col in df_data.columns]
+
+        sort_columns = ['date', 'time'] if 'time' in columns else ['date']
+        df_latest = df_data[columns].sort_values(sort_columns, kind='stable').drop_duplicates('code', keep='last')
+
+        records = dataframe_to_records(df_latest)
+
+        columns_str = ', '.join(columns)
+        placeholders = ', '.join('?' * len(columns))
+        update_clause = ', '.join([f"{col} = excluded.{col}" for col in columns if col != 'code'])
+        sql = (f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders}) "
+               f"ON CONFLICT(code) DO UPDATE SET {update_clause}, updated_at = CURRENT_TIMESTAMP")
+        if not force:
+            if 'time' in columns:
+                newer_condition = f"(excluded.date > {table_name}.date OR (excluded.date = {table_name}.date AND excluded.time >= {table_name}.time))"
+            else:
+                newer_condition = f"excluded.date >= {table_name}.date"
+            sql += f" WHERE {newer_condition}"
+
+        try:
+            with self._get_connection() as cur:
+                cur.executemany(sql, records)
+            return len(records)
+        except sqlite3.Error as e:
+            self.logger.info(f"更新最新K线汇总表 {table_name} 时发生数据库错误: {str(e)}")
+            raise
+
+    def get_latest_bars(self, period=TimePeriod.DAY, code_list=None):
+        """
+        一次查询获取所有（或指定）股票的最新K线
+
+        返回:
+            DataFrame: 每只股票一行，列与K线表一致
+        """
+        self.create_latest_bar_table(period)
+        table_name = self.get_latest_bar_table_name(period)
+        columns = self.get_latest_bar_columns(period)
+
+        query = f"SELECT {', '.join(columns)} FROM {table_name}"
+        params = []
+        if code_list:
+            query += f" WHERE code IN ({', '.join('?' * len(code_list))})"
+            params = list(code_list)
+
+        try:
+            with self._get_connection() as cur:
+                cur.execute(query, params)
+                rows = cur.fetchall()
+                return pd.DataFrame(rows, columns=columns)
+        except Exception as e:
+            self.logger.info(f"查询最新K线汇总表 {table_name} 时出错: {str(e)}")
+            return pd.DataFrame()
+
+    def count_latest_bars(self, period=TimePeriod.DAY):
+        self.create_latest_bar_table(period)
+        table_name = self.get_latest_bar_table_name(period)
+        with self._get_connection() as cur:
+            cur.execute(f"SELECT COUNT(*) FROM {table_name}")
+            return cur.fetchone()[0]
+
+    def delete_latest_bars(self, period=TimePeriod.DAY, code=None):
+        """删除最新K线汇总数据，code 为 None 时清空整个周期（同时清除已重建标记）"""
+        self.create_latest_bar_table(period)
+        table_name = self.get_latest_bar_table_name(period)
+        with self._get_connection() as cur:
+            if code is None:
+                cur.execute(f"DELETE FROM {table_name}")
+                row_count = cur.rowcount
+                cur.execute(f"DELETE FROM {self.LATEST_BAR_STATE_TABLE} WHERE period = ?", (period.get_storage_key(),))
+                return row_count
+            cur.execute(f"DELETE FROM {table_name} WHERE code = ?", (code,))
+            return cur.rowcount
+
+    def create_latest_bar_state_table(self):
+        if self.LATEST_BAR_STATE_TABLE in self._created_tables:
+            return
+
+        sql = f"""CREATE TABLE IF NOT EXISTS {self.LATEST_BAR_STATE_TABLE} (
+                period TEXT PRIMARY KEY NOT NULL,
+                built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) WITHOUT ROWID"""
+        self.create_table(self.LATEST_BAR_STATE_TABLE, sql)
+        self._created_tables.add(self.LATEST_BAR_STATE_TABLE)
+
+    def set_latest_bars_built(self, period=TimePeriod.DAY):
+        """标记该周期的汇总表已从K线数据库完整重建"""
+        self.create_latest_bar_state_table()
+        with self._get_connection() as cur:
+            cur.execute(f"INSERT OR REPLACE INTO {self.LATEST_BAR_STATE_TABLE} (period, built_at) VALUES (?, CURRENT_TIMESTAMP)",
+                        (period.get_storage_key(),))
+
+    def is_latest_bars_built(self, period=TimePeriod.DAY):
+        """
+        该周期的汇总表是否已完整重建过。
+        汇总表非空不代表完整：升级后首次入库只写入了本次更新的股票，未更新的股票需要重建才能进入汇总表
+        """
+        self.create_latest_bar_state_table()
+        with self._get_connection() as cur:
+            cur.execute(f"SELECT 1 FROM {self.LATEST_BAR_STATE_TABLE} WHERE period = ?", (period.get_storage_key(),))
+            return cur.fetchone() is not None
+
+    # ===================================================================元数据目录====================================================================
+    def create_catalog_table(self):
+        if self.CATALOG_TABLE in self._created_tables:
+            return
+
+        sql = f"""CREATE TABLE IF NOT EXISTS {self.CATALOG_TABLE} (
+                code TEXT NOT NULL,
+                period TEXT NOT NULL,
+                first_date DATE,
+                last_date DATE,
+                last_time DATETIME,
+                row_count INTEGER NOT NULL DEFAULT 0,
+                last_ingest_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                checksum INTEGER,
+                PRIMARY KEY (code, period)
+            ) WITHOUT ROWID"""
+        self.create_table(self.CATALOG_TABLE, sql)
+        with self._get_connection() as cur:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.CATALOG_TABLE}_period_last_date ON {self.CATALOG_TABLE} (period, last_date)")
+        self._created_tables.add(self.CATALOG_TABLE)
+
+    def _catalog_row_to_dict(self, row):
+        return dict(zip(self.CATALOG_COLUMNS, row)) if row else None
+
+    def compute_checksum(self, df_data, previous_checksum=0):
+        """
+        按入库顺序链式计算 CRC32：append 时以上一次的校验和为初值，与一次性写入全部数据的结果一致
+        列顺序固定为 K线表的标准列，避免调用方列顺序不同导致校验和不同
+        """
+        standard_columns = self.MINUTE_COLUMNS if 'time' in df_data.columns else self.DAY_COLUMNS
+        columns = [col for col in standard_columns if col in df_data.columns]
+        sort_columns = ['date', 'time'] if 'time' in columns else ['date']
+        df_sorted = df_data[columns].sort_values(sort_columns, kind='stable')
+        # 每行以换行结尾，分段计算与整体计算的字节流一致
+        payload = "".join("\x1f".join("" if value is None else str(value) for value in record) + "\n"
+                          for record in dataframe_to_records(df_sorted))
+        return zlib.crc32(payload.encode('utf-8'), previous_checksum or 0)
+
+    def update_catalog(self, code, df_data, period=TimePeriod.DAY, write_way="append"):
+        """
+        入库后更新元数据目录
+
+        参数:
+            code (str): 股票代码
+            df_data (DataFrame): 本次写入的K线数据
+            period (TimePeriod): 周期
+            write_way (str): 写入方式，replace 时以本次数据为准重新统计，append 时在已有统计上累加
+
+        说明:
+            append 时晚于原最后日期（分钟级为最后时间）的行与早于原最早日期的行（回补历史）计为新增行，
+            落在原有区间内的行视为覆盖已有K线，不重复计数；
+            只有全部行都晚于原高水位时才续算校验和，回补或覆盖改变了已存储的K线序列，校验和置为 NULL；
+            原有记录来自重建（checksum 为 NULL）时同样保持为 NULL，直到下一次 replace 全量写入
+        """
+        if df_data is None or df_data.empty or 'date' not in df_data.columns:
+            return
+
+        self.create_catalog_table()
+        is_minute = 'time' in df_data.columns
+        entry = self.get_catalog_entry(code, period)
+
+        # 按入库时的转换规则得到日期/时间字符串，保证与K线数据库中的值一致
+        dates = pd.Series(column_to_db_values(df_data['date']))
+        times = pd.Series(column_to_db_values(df_data['time'])) if is_minute else None
+
+        if write_way == 'replace' or entry is None or entry['row_count'] == 0:
+            first_date = dates.min()
+            row_count = len(df_data)
+            checksum = self.compute_checksum(df_data)
+        else:
+            # 晚于高水位的行是追加行，早于原最早日期的行是回补行，两者都是新增行
+            if is_minute and entry['last_time'] is not None:
+                mask_appended = (dates > entry['last_date']) | ((dates == entry['last_date']) & (times > entry['last_time']))
+            else:
+                mask_appended = dates > entry['last_date']
+            mask_new = mask_appended | (dates < entry['first_date']) if entry['first_date'] else mask_appended
+            first_date = min(entry['first_date'], dates.min()) if entry['first_date'] else dates.min()
+            row_count = entry['row_count'] + int(mask_new.sum())
+            if entry['checksum'] is not None and mask_appended.all():
+                checksum = self.compute_checksum(df_data, entry['checksum'])
+            else:
+                checksum = None
+
+        if is_minute:
+            last_index = pd.DataFrame({'date': dates, 'time': times}).sort_values(['date', 'time'], kind='stable').index[-1]
+            last_date, last_time = dates[last_index], times[last_index]
+        else:
+            last_date, last_time = dates.max(), None
+        if entry is not None and write_way != 'replace' and entry['last_date'] and \
+                (entry['last_date'], entry['last_time'] or '') > (last_date, last_time or ''):
+            last_date, last_time = entry['last_date'], entry['last_time']
+
+        self.set_catalog_entry(code, period, first_date, last_date, last_time, row_count, checksum)
+
+    def set_catalog_entry(self, code, period, first_date, last_date, last_time, row_count, checksum=None):
+        """直接写入一条目录记录（用于入库维护和从K线数据库重建）"""
+        self.create_catalog_table()
+        sql = (f"INSERT INTO {self.CATALOG_TABLE} (code, period, first_date, last_date, last_time, row_count, last_ingest_time, checksum) "
+               f"VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?) "
+               f"ON CONFLICT(code, period) DO UPDATE SET first_date = excluded.first_date, last_date = excluded.last_date, "
+               f"last_time = excluded.last_time, row_count = excluded.row_count, "
+               f"last_ingest_time = excluded.last_ingest_time, checksum = excluded.checksum")
+        try:
+            with self._get_connection() as cur:
+                cur.execute(sql, (code, period.value, first_date, last_date, last_time, row_count, checksum))
+        except sqlite3.Error as e:
+            self.logger.info(f"更新元数据目录 {code} {period.value} 时发生数据库错误: {str(e)}")
+            raise
+
+    def get_catalog_entry(self, code, period=TimePeriod.DAY):
+        """
+        返回:
+            dict: 目录记录，不存在时返回 None
+        """
+        self.create_catalog_table()
+        with self._get_connection() as cur:
+            cur.execute(f"SELECT {', '.join(self.CATALOG_COLUMNS)} FROM {self.CATALOG_TABLE} WHERE code = ? AND period = ?",
+                        (code, period.value))
+            return self._catalog_row_to_dict(cur.fetchone())
+
+    def has_catalog_entry(self, code, period=None):
+        """目录中是否存在该股票（period 为 None 时任一周期）"""
+        self.create_catalog_table()
+        with self._get_connection() as cur:
+            if period is None:
+                cur.execute(f"SELECT 1 FROM {self.CATALOG_TABLE} WHERE code = ? LIMIT 1", (code,))
+            else:
+                cur.execute(f"SELECT 1 FROM {self.CATALOG_TABLE} WHERE code = ? AND period = ? AND row_count > 0", (code, period.value))
+            return cur.fetchone() is not None
+
+    def get_catalog(self, period=None, code_list=None):
+        """
+        查询元数据目录
+
+        返回:
+            DataFrame: 列为 CATALOG_COLUMNS
+        """
+        self.create_catalog_table()
+        query = f"SELECT {', '.join(self.CATALOG_COLUMNS)} FROM {self.CATALOG_TABLE}"
+        conditions = []
+        params = []
+        if period is not None:
+            conditions.append("period = ?")
+            params.append(period.value)
+        if code_list:
+            conditions.append(f"code IN ({', '.join('?' * len(code_list))})")
+            params.extend(code_list)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        with self._get_connection() as cur:
+            cur.execute(query, params)
+            return pd.DataFrame(cur.fetchall(), columns=self.CATALOG_COLUMNS)
+
+    def get_stale_codes(self, period, target_date, code_list=None):
+        """
+        获取需要更新的股票：目录中最后日期早于 target_date 的股票，以及 code_list 中目录里不存在的股票
+
+        返回:
+            list: 股票代码列表（code_list 不为 None 时保持其顺序）
+        """
+        df_catalog = self.get_catalog(period, code_list)
+        dict_last_date = dict(zip(df_catalog['code'], df_catalog['last_date']))
+        if code_list is None:
+            return [code for code, last_date in dict_last_date.items() if last_date is None or last_date < target_date]
+        return [code for code in code_list if dict_last_date.get(code) is None or dict_last_date[code] < target_date]
+
+    def count_catalog_entries(self, period=None):
+        self.create_catalog_table()
+        with self._get_connection() as cur:
+            if period is None:
+                cur.execute(f"SELECT COUNT(*) FROM {self.CATALOG_TABLE}")
+            else:
+                cur.execute(f"SELECT COUNT(*) FROM {self.CATALOG_TABLE} WHERE period = ?", (period.value,))
+            return cur.fetchone()[0]
+
+    def delete_catalog_entries(self, code=None, period=None):
+        """删除目录记录，code、period 均为 None 时清空整个目录"""
+        self.create_catalog_table()
+        conditions = []
+        params = []
+        if code is not None:
+            conditions.append("code = ?")
+            params.append(code)
+        if period is not None:
+            conditions.append("period = ?")
+            params.append(period.value)
+        sql = f"DELETE FROM {self.CATALOG_TABLE}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        with self._get_connection() as cur:
+            cur.execute(sql, params)
+            return cur.rowcount
+
+    # ===================================================================下载任务台账====================================================================
+    def create_ingest_job_tables(self):
+        if self.JOB_TABLE in self._created_tables:
+            return
+
+        job_sql = f"""CREATE TABLE IF NOT EXISTS {self.JOB_TABLE} (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_name TEXT NOT NULL,
+                period TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT '{self.JOB_STATUS_RUNNING}',
+                target_date TEXT,
+                total INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP
+            )"""
+        item_sql = f"""CREATE TABLE IF NOT EXISTS {self.JOB_ITEM_TABLE} (
+                job_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                code TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT '{self.ITEM_STATUS_PENDING}',
+                error TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (job_id, code)
+            ) WITHOUT ROWID"""
+        self.create_table(self.JOB_TABLE, job_sql)
+        self.create_table(self.JOB_ITEM_TABLE, item_sql)
+        if 'target_date' not in self._get_table_columns(self.JOB_TABLE):
+            # 早期版本的台账没有 target_date，这些未完成任务不再被继续
+            with self._get_connection() as cur:
+                cur.execute(f"ALTER TABLE {self.JOB_TABLE} ADD COLUMN target_date TEXT")
+        with self._get_connection() as cur:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.JOB_TABLE}_name_status ON {self.JOB_TABLE} (job_name, status)")
+        self._created_tables.add(self.JOB_TABLE)
+
+    def create_ingest_job(self, job_name, period, code_list, target_date=None):
+        """
+        新建下载任务，全部股票初始为 pending；同名的已完成任务及目标交易日不同的未完成任务一并删除
+        target_date 为本次任务要更新到的交易日（YYYY-MM-DD），只有目标交易日相同的任务才会被继续
+
+        返回:
+            int: job_id
+        """
+        self.create_ingest_job_tables()
+        code_list = list(dict.fromkeys(code_list))
+        with self._get_connection() as cur:
+            if not cur.connection.in_transaction:
+                cur.execute("BEGIN")
+            obsolete_condition = "job_name = ? AND (status = ? OR target_date IS NOT ?)"
+            obsolete_params = (job_name, self.JOB_STATUS_COMPLETED, target_date)
+            cur.execute(f"DELETE FROM {self.JOB_ITEM_TABLE} WHERE job_id IN "
+                        f"(SELECT job_id FROM {self.JOB_TABLE} WHERE {obsolete_condition})", obsolete_params)
+            cur.execute(f"DELETE FROM {self.JOB_TABLE} WHERE {obsolete_condition}", obsolete_params)
+            cur.execute(f"INSERT INTO {self.JOB_TABLE} (job_name, period, target_date, total) VALUES (?, ?, ?, ?)",
+                        (job_name, period.value, target_date, len(code_list)))
+            job_id = cur.lastrowid
+            cur.executemany(f"INSERT INTO {self.JOB_ITEM_TABLE} (job_id, seq, code) VALUES (?, ?, ?)",
+                            [(job_id, seq, code) for seq, code in enumerate(code_list)])
+        return job_id
+
+    def get_unfinished_ingest_job(self, job_name, period, target_date=None):
+        """
+        只查找目标交易日为 target_date 的任务：较早交易日中断的任务，其已完成的股票对新的交易日同样过期，不能继续
+
+        返回:
+            dict: 最近一次未完成（中断或取消）的同名任务 {job_id, job_name, period, status, target_date, total, created_at, updated_at}，
+                  不存在时返回 None
+        """
+        self.create_ingest_job_tables()
+        columns = ['job_id', 'job_name', 'period', 'status', 'target_date', 'total', 'created_at', 'updated_at']
+        with self._get_connection() as cur:
+            cur.execute(f"SELECT {', '.join(columns)} FROM {self.JOB_TABLE} WHERE job_name = ? AND period = ? AND status = ? "
+                        f"AND target_date IS ? ORDER BY job_id DESC LIMIT 1", (job_name, period.value, self.JOB_STATUS_RUNNING, target_date))
+            row = cur.fetchone()
+        return dict(zip(columns, row)) if row else None
+
+    def get_ingest_job_remaining_codes(self, job_id):
+        """任务中尚未完成的股票（pending 与 failed），按建任务时的顺序"""
+        self.create_ingest_job_tables()
+        with self._get_connection() as cur:
+            cur.execute(f"SELECT code FROM {self.JOB_ITEM_TABLE} WHERE job_id = ? AND status IN (?, ?) ORDER BY seq",
+                        (job_id, self.ITEM_STATUS_PENDING, self.ITEM_STATUS_FAILED))
+            return [row[0] for row in cur.fetchall()]
+
+    def mark_ingest_job_items(self, job_id, code_list, status, error=None):
+        """记录一批股票的处理结果（done / skipped / failed），入库提交后调用"""
+        if not code_list:
+            return 0
+        self.create_ingest_job_tables()
+        with self._get_connection() as cur:
+            cur.executemany(f"UPDATE {self.JOB_ITEM_TABLE} SET status = ?, error = ?, updated_at = CURRENT_TIMESTAMP "
+                            f"WHERE job_id = ? AND code = ?", [(status, error, job_id, code) for code in code_list])
+            cur.execute(f"UPDATE {self.JOB_TABLE} SET updated_at = CURRENT_TIMESTAMP WHERE job_id = ?", (job_id,))
+            return len(code_list)
+
+    def get_ingest_job_progress(self, job_id):
+        """
+        返回:
+            dict: 各状态的股票数量 {'pending', 'done', 'skipped', 'failed', 'total'}
+        """
+        self.create_ingest_job_tables()
+        progress = {status: 0 for status in [self.ITEM_STATUS_PENDING, self.ITEM_STATUS_DONE, self.ITEM_STATUS_SKIPPED, self.ITEM_STATUS_FAILED]}
+        with self._get_connection() as cur:
+            cur.execute(f"SELECT status, COUNT(*) FROM {self.JOB_ITEM_TABLE} WHERE job_id = ? GROUP BY status", (job_id,))
+            for status, count in cur.fetchall():
+                progress[status] = count
+        progress['total'] = sum(progress.values())
+        return progress
+
+    def finish_ingest_job(self, job_id):
+        """
+        没有 pending 股票时将任务标记为已完成（failed 股票留在台账中，由下一次任务重新判断是否需要更新）
+
+        返回:
+            bool: 任务是否已完成
+        """
+        progress = self.get_ingest_job_progress(job_id)
+        if progress[self.ITEM_STATUS_PENDING] > 0:
+            return False
+        with self._get_connection() as cur:
+            cur.execute(f"UPDATE {self.JOB_TABLE} SET status = ?, updated_at = CURRENT_TIMESTAMP, finished_at = CURRENT_TIMESTAMP "
+                        f"WHERE job_id = ?", (self.JOB_STATUS_COMPLETED, job_id))
+        return True
+
+    def delete_ingest_jobs(self, job_name=None):
+        """删除任务台账，job_name 为 None 时清空"""
+        self.create_ingest_job_tables()
+        with self._get_connection() as cur:
+            if job_name is None:
+                cur.execute(f"DELETE FROM {self.JOB_ITEM_TABLE}")
+                cur.execute(f"DELETE FROM {self.JOB_TABLE}")
+            else:
+                cur.execute(f"DELETE FROM {self.JOB_ITEM_TABLE} WHERE job_id IN (SELECT job_id FROM {self.JOB_TABLE} WHERE job_name = ?)", (job_name,))
+                cur.execute(f"DELETE FROM {self.JOB_TABLE} WHERE job_name = ?", (job_name,))
+            return cur.rowcount
+
+    # ===================================================================交易日历====================================================================
+    def create_trade_calendar_table(self):
+        if self.TRADE_CALENDAR_TABLE in self._created_tables:
+            return
+
+        sql = f"""CREATE TABLE IF NOT EXISTS {self.TRADE_CALENDAR_TABLE} (
+                calendar_date DATE PRIMARY KEY,
+                is_trading_day INTEGER NOT NULL
+            ) WITHOUT ROWID"""
+        self.create_table(self.TRADE_CALENDAR_TABLE, sql)
+        self._created_tables.add(self.TRADE_CALENDAR_TABLE)
+
+    def save_trade_calendar(self, df_calendar):
+        """
+        保存交易日历（已存在的日期覆盖）
+
+        参数:
+            df_calendar (DataFrame): 列为 calendar_date（YYYY-MM-DD）、is_trading_day（'1'/'0' 或 1/0）
+
+        返回:
+            int: 写入的天数
+        """
+        if df_calendar is None or df_calendar.empty:
+            return 0
+        self.create_trade_calendar_table()
+        records = list(zip(df_calendar['calendar_date'].astype(str), df_calendar['is_trading_day'].astype(int)))
+        with self._get_connection() as cur:
+            cur.executemany(f"INSERT OR REPLACE INTO {self.TRADE_CALENDAR_TABLE} (calendar_date, is_trading_day) VALUES (?, ?)", records)
+        return len(records)
+
+    def get_trade_calendar(self):
+        """
+        返回:
+            DataFrame: 列为 calendar_date（YYYY-MM-DD）、is_trading_day（int），按日期升序
+        """
+        self.create_trade_calendar_table()
+        with self._get_connection() as cur:
+            cur.execute(f"SELECT calendar_date, is_trading_day FROM {self.TRADE_CALENDAR_TABLE} ORDER BY calendar_date")
+            return pd.DataFrame(cur.fetchall(), columns=['calendar_date', 'is_trading_day'])
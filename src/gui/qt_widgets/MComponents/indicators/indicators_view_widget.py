@@ -94,7 +94,6 @@ class IndicatorsViewWidget(QWidget):
         self.btn_1m.setEnabled(False)
         self.btn_5m.setEnabled(False)
         self.btn_10m.setEnabled(False)
-        self.btn_120m.setEnabled(False)
 
         # self.init_stock_card_list()
 
@@ -147,7 +146,7 @@ class IndicatorsViewWidget(QWidget):
             if btn.isChecked():  # 忽略选中的按钮
                 continue
             
-            if self.period_button_group.id(btn) in [0, 2, 6]:
+            if self.period_button_group.id(btn) in [0, 2]:
                 continue
 
             btn.setEnabled(b_enable)
@@ -0,0 +1,232 @@
+import numpy as np
+import pandas as pd
+
+from manager.indicators_config_manager import IndicatrosEnum
+from indicators import kernels
+
+'''
+    截面批量指标计算：输入按日期对齐的 (日期 × 股票) 矩阵（np.ndarray 或 DataFrame，行为日期升序，列为股票代码），
+    一次 NumPy 运算得到全部股票的指标，代替逐只股票的 DataFrame 计算。
+    停牌、未上市（或已退市）的日期为 NaN：每只股票只在自己有数据的K线上计算（先把每列的有效值按时间顺序移到列首，
+    计算后放回原位置），结果与 stock_data_indicators 对该股票单独计算一致，NaN 位置的结果仍为 NaN。
+        EMA 类（ema、macd、rsi、kdj 的平滑）   indicators.kernels.ema 的二维形式：按行递推，每步一次向量运算，与 pandas ewm(adjust=False) 逐位一致
+        SMA、BOLL                              前缀和相减（先减去每列首个有效值以减小舍入误差），与 pandas rolling 相差在浮点误差以内
+        滚动最高/最低价（KDJ）                 indicators.kernels.rolling_max / rolling_min 的二维形式
+    DataFrame 输入返回相同索引与列的 DataFrame，ndarray 输入返回 ndarray。
+'''
+
+DEFAULT_MATRIX_COLUMNS = ('close', 'high', 'low', 'volume')
+
+# ----------------------------------------矩阵构造----------------------------------------
+def build_matrices(iter_stock_data, columns=DEFAULT_MATRIX_COLUMNS, key='date'):
+    '''
+        由逐只股票的K线数据构造按日期对齐的矩阵
+        iter_stock_data: 可迭代的 (code, DataFrame)，如 BaostockDataManager.iter_stock_data_from_db_by_period
+        columns: 需要的列
+        key: 对齐用的列（日线为 date，分钟线为 time）
+        返回: {列名: DataFrame(日期 × 股票)}，缺失为 NaN
+    '''
+    list_frames = []
+    for code, df_data in iter_stock_data:
+        if df_data is None or df_data.empty:
+            continue
+        df_part = df_data[[key] + list(columns)].copy()
+        df_part['code'] = code
+        list_frames.append(df_part)
+    if not list_frames:
+        return {column: pd.DataFrame(dtype=float) for column in columns}
+
+    df_long = pd.concat(list_frames, ignore_index=True)
+    dict_matrix = {}
+    for column in columns:
+        df_matrix = df_long.pivot(index=key, columns='code', values=column).sort_index()
+        dict_matrix[column] = df_matrix.apply(pd.to_numeric, errors='coerce').astype(float)
+    return dict_matrix
+
+# ----------------------------------------内部工具----------------------------------------
+def _to_array(matrix):
+    values = matrix.to_numpy(dtype=float) if isinstance(matrix, pd.DataFrame) else np.asarray(matrix, dtype=float)
+    if values.ndim != 2:
+        raise ValueError(f"需要二维矩阵（日期 × 股票），实际维度: {values.ndim}")
+    return values
+
+def _wrap(values, like):
+    if isinstance(like, pd.DataFrame):
+        return pd.DataFrame(values, index=like.index, columns=like.columns)
+    return values
+
+def _pack(valid, *list_values):
+    '''
+        按有效性把每列的有效值稳定地移到列首（保持时间顺序）
+        返回: (order, [紧凑矩阵...])，order 用于 _unpack 放回原位置
+    '''
+    order = np.argsort(~valid, axis=0, kind='stable')
+    return order, [np.take_along_axis(values, order, axis=0) for values in list_values]
+
+def _unpack(packed, order, valid):
+    values = np.empty_like(packed)
+    np.put_along_axis(values, order, packed, axis=0)
+    values[~valid] = np.nan
+    return values
+
+def _window_positions(row_count, window):
+    '''每行窗口内的观测数（紧凑矩阵中第 i 行之前有 i+1 个观测）'''
+    return np.minimum(np.arange(1, row_count + 1), window)[:, None]
+
+def _rolling_sum_packed(values, window):
+    '''紧凑矩阵上的滚动和（前缀和相减），返回 (窗口和, 窗口观测数)'''
+    cumsum = np.cumsum(values, axis=0)
+    sums = cumsum.copy()
+    sums[window:] = cumsum[window:] - cumsum[:-window]
+    return sums, _window_positions(values.shape[0], window)
+
+def _sma_packed(values, window, min_periods):
+    base = values[:1]
+    sums, nobs = _rolling_sum_packed(values - base, window)
+    result = sums / nobs + base
+    result[np.broadcast_to(nobs < min_periods, result.shape)] = np.nan
+    return result
+
+def _std_packed(values, window, min_periods, ddof=1):
+    base = values[:1]
+    deviation = values - base
+    sums, nobs = _rolling_sum_packed(deviation, window)
+    square_sums, _ = _rolling_sum_packed(deviation * deviation, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (square_sums - sums * sums / nobs) / (nobs - ddof)
+    result = np.sqrt(np.maximum(variance, 0.0))
+    result[np.broadcast_to((nobs < min_periods) | (nobs <= ddof), result.shape)] = np.nan
+    return result
+
+# ----------------------------------------基础指标----------------------------------------
+def ema(matrix, span, min_periods=0):
+    '''指数移动平均，同 Series.ewm(span=span, min_periods=min_periods, adjust=False).mean()'''
+    values = _to_array(matrix)
+    valid = ~np.isnan(values)
+    order, (packed,) = _pack(valid, values)
+    return _wrap(_unpack(kernels.ema(packed, span=span, min_periods=min_periods), order, valid), matrix)
+
+def sma(matrix, window, min_periods=None):
+    '''简单移动平均，同 Series.rolling(window, min_periods).mean()，min_periods 默认为 window'''
+    if window <= 0:
+        raise ValueError(f"窗口长度必须大于0: {window}")
+    min_periods = window if min_periods is None else min_periods
+    values = _to_array(matrix)
+    valid = ~np.isnan(values)
+    order, (packed,) = _pack(valid, values)
+    return _wrap(_unpack(_sma_packed(packed, window, min_periods), order, valid), matrix)
+
+def rolling_std(matrix, window, min_periods=None, ddof=1):
+    '''滚动标准差，同 Series.rolling(window, min_periods).std(ddof)'''
+    if window <= 0:
+        raise ValueError(f"窗口长度必须大于0: {window}")
+    min_periods = window if min_periods is None else min_periods
+    values = _to_array(matrix)
+    valid = ~np.isnan(values)
+    order, (packed,) = _pack(valid, values)
+    return _wrap(_unpack(_std_packed(packed, window, min_periods, ddof), order, valid), matrix)
+
+def rolling_max(matrix, window, min_periods=None):
+    '''滚动最大值，同 Series.rolling(window, min_periods).max()'''
+    if window <= 0:
+        raise ValueError(f"窗口长度必须大于0: {window}")
+    min_periods = window if min_periods is None else min_periods
+    values = _to_array(matrix)
+    valid = ~np.isnan(values)
+    order, (packed,) = _pack(valid, values)
+    return _wrap(_unpack(kernels.rolling_max(packed, window, min_periods), order, valid), matrix)
+
+def rolling_min(matrix, window, min_periods=None):
+    '''滚动最小值，同 Series.rolling(window, min_periods).min()'''
+    if window <= 0:
+        raise ValueError(f"窗口长度必须大于0: {window}")
+    min_periods = window if min_periods is None else min_periods
+    values = _to_array(matrix)
+    valid = ~np.isnan(values)
+    order, (packed,) = _pack(valid, values)
+    return _wrap(_unpack(kernels.rolling_min(packed, window, min_periods), order, valid), matrix)
+
+# ----------------------------------------组合指标----------------------------------------
+def macd(close, diff_period=12, dea_period=26, ma_period=9):
+    '''
+        同 stock_data_indicators.macd
+        返回: {'diff': 矩阵, 'dea': 矩阵, 'macd': 矩阵}
+    '''
+    values = _to_array(close)
+    valid = ~np.isnan(values)
+    order, (packed,) = _pack(valid, values)
+    ema_fast = kernels.ema(packed, span=diff_period)
+    ema_slow = kernels.ema(packed, span=dea_period)
+    dif = ema_fast - ema_slow
+    dea = kernels.ema(dif, span=ma_period)
+    return {
+        IndicatrosEnum.MACD_DIFF.value: _wrap(_unpack(dif, order, valid), close),
+        IndicatrosEnum.MACD_DEA.value: _wrap(_unpack(dea, order, valid), close),
+        IndicatrosEnum.MACD.value: _wrap(_unpack(2 * (dif - dea), order, valid), close),
+    }
+
+def rsi(close, period=14):
+    '''同 stock_data_indicators.rsi（涨跌幅的 EMA，min_periods=period）'''
+    values = _to_array(close)
+    valid = ~np.isnan(values)
+    order, (packed,) = _pack(valid, values)
+    delta = np.full_like(packed, np.nan)
+    delta[1:] = packed[1:] - packed[:-1]
+    # 每只股票的第一根K线没有涨跌，与 Series.diff().where(...) 一样按 0 计入
+    with np.errstate(invalid='ignore'):
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = -np.where(delta < 0, delta, 0.0)
+    avg_gain = kernels.ema(gain, span=period, min_periods=period)
+    avg_loss = kernels.ema(loss, span=period, min_periods=period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        result = 100 - (100 / (1 + rs))
+    return _wrap(_unpack(result, order, valid), close)
+
+def kdj(high, low, close, n=9, m1=3, m2=3):
+    '''
+        同 stock_data_indicators.kdj，high/low/close 为相同形状的矩阵，三者都有值的K线才参与计算
+        返回: {'k': 矩阵, 'd': 矩阵, 'j': 矩阵}
+    '''
+    high_values, low_values, close_values = _to_array(high), _to_array(low), _to_array(close)
+    if not (high_values.shape == low_values.shape == close_values.shape):
+        raise ValueError("high、low、close 矩阵形状不一致")
+    valid = ~(np.isnan(high_values) | np.isnan(low_values) | np.isnan(close_values))
+    order, (high_packed, low_packed, close_packed) = _pack(valid, high_values, low_values, close_values)
+    low_min = kernels.rolling_min(low_packed, n)
+    high_max = kernels.rolling_max(high_packed, n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsv = (close_packed - low_min) / (high_max - low_min) * 100
+    # 最高价等于最低价时 RSV 为 NaN（0/0 或 ±inf 按 pandas 保留），与单只股票计算一致
+    k = kernels.ema(rsv, alpha=1 / m1)
+    d = kernels.ema(k, alpha=1 / m2)
+    return {
+        IndicatrosEnum.KDJ_K.value: _wrap(_unpack(k, order, valid), close),
+        IndicatrosEnum.KDJ_D.value: _wrap(_unpack(d, order, valid), close),
+        IndicatrosEnum.KDJ_J.value: _wrap(_unpack(3 * k - 2 * d, order, valid), close),
+    }
+
+def boll(close, n=20, m=2):
+    '''
+        同 stock_data_indicators.boll
+        返回: {'mid': 矩阵, 'upper': 矩阵, 'lower': 矩阵}
+    '''
+    values = _to_array(close)
+    valid = ~np.isnan(values)
+    order, (packed,) = _pack(valid, values)
+    mid = _sma_packed(packed, n, n)
+    std = _std_packed(packed, n, n)
+    return {
+        IndicatrosEnum.BOLL_MID.value: _wrap(_unpack(mid, order, valid), close),
+        IndicatrosEnum.BOLL_UPPER.value: _wrap(_unpack(mid + m * std, order, valid), close),
+        IndicatrosEnum.BOLL_LOWER.value: _wrap(_unpack(mid - m * std, order, valid), close),
+    }
+
+def volume_ratio(volume, cycle=5):
+    '''同 stock_data_indicators.quantity_ratio：成交量 / 近 cycle 根K线平均成交量'''
+    values = _to_array(volume)
+    valid = ~np.isnan(values)
+    order, (packed,) = _pack(valid, values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = packed / _sma_packed(packed, cycle, 1)
+    return _wrap(_unpack(result, order, valid), volume)
@@ -0,0 +1,622 @@
+import math
+import hashlib
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from manager.logging_manager import get_logger
+from manager.indicators_config_manager import IndicatrosEnum, get_indicator_config_manager
+from indicators import stock_data_indicators as sdi
+from indicators import kernels
+
+'''
+    增量指标计算：按 (code, period) 保存各指标的递推状态与已计算的指标列，
+    同一只股票再次读取时，已计算过的K线直接复用，只对新增的K线逐根递推，每根K线每个指标 O(1)。
+        MACD、RSI        保存 EMA 递推值（与 pandas ewm(adjust=False) 的递推公式逐位一致）
+        MA、量比、BOLL   保存滑动窗口与补偿求和状态（与 pandas rolling 的算法逐位一致），首次递推时重放已计算的K线得到
+    计算列与 stock_data_indicators.default_indicators_auto_calculate 相同，递推结果与其全量计算逐位一致。
+    缓存条目以 (首根K线, 已计算K线数, 最后一根K线及其收盘价, 指标参数) 校验，不一致（数据被改写、读取区间不同、
+    指标参数修改）时全量重算并替换条目。
+    可选的持久化缓存（db_base.indicator_column_cache）按 (股票, 周期, 指标参数指纹) 将指标列与 EMA 递推状态保存在K线数据旁，
+    进程重启后扫描、图表加载直接读取已计算的指标列；K线覆盖写入或改写已计算的K线时删除，末尾追加K线时递推后重写。
+'''
+
+DEFAULT_MAX_CACHED_ROWS = 2000000
+VOLUME_RATIO_CYCLE = 5
+
+class _EwmState:
+    '''pandas ewm(adjust=False) 的单步递推'''
+    __slots__ = ('old_wt', 'new_wt', 'weighted', 'nobs')
+
+    def __init__(self, span, weighted, nobs):
+        alpha = kernels.span_to_alpha(span)
+        self.old_wt = 1.0 - alpha
+        self.new_wt = alpha
+        self.weighted = weighted
+        self.nobs = nobs
+
+    def step(self, value):
+        self.nobs += 1
+        if self.weighted != value:
+            self.weighted = (self.old_wt * self.weighted + self.new_wt * value) / (self.old_wt + self.new_wt)
+        return self.weighted
+
+class _RollingMeanState:
+    '''pandas rolling(window, min_periods).mean() 的单步递推（Kahan 补偿求和）'''
+    __slots__ = ('window', 'min_periods', 'values', 'nobs', 'sum_x', 'compensation_add', 'compensation_remove',
+                 'neg_ct', 'num_consecutive_same_value', 'prev_value')
+
+    def __init__(self, window, min_periods):
+        self.window = window
+        self.min_periods = min_periods
+        self.values = deque()
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.neg_ct = 0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def replay(self, list_values):
+        '''从序列起点依次加入（不计算输出）'''
+        for value in list_values:
+            if len(self.values) >= self.window:
+                self._remove()
+            self._add(value)
+
+    def _add(self, value):
+        self.values.append(value)
+        self.nobs += 1
+        y = value - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct += 1
+        if value == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = value
+
+    def _remove(self):
+        value = self.values.popleft()
+        self.nobs -= 1
+        y = -value - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct -= 1
+
+    def step(self, value):
+        if len(self.values) >= self.window:
+            self._remove()
+        self._add(value)
+        if self.nobs < self.min_periods:
+            return np.nan
+        result = self.sum_x / self.nobs
+        if self.num_consecutive_same_value >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+class _RollingStdState:
+    '''pandas rolling(window).std()（ddof=1）的单步递推（带补偿的 Welford 算法，先移出后加入）'''
+    __slots__ = ('window', 'values', 'nobs', 'mean_x', 'ssqdm_x', 'compensation_add', 'compensation_remove',
+                 'num_consecutive_same_value', 'prev_value')
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def replay(self, list_values):
+        '''从序列起点依次加入（不计算输出）'''
+        for value in list_values:
+            if len(self.values) >= self.window:
+                self._remove()
+            self._add(value)
+
+    def _add(self, value):
+        self.values.append(value)
+        if value == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = value
+        self.nobs += 1
+        prev_mean = self.mean_x - self.compensation_add
+        y = value - self.compensation_add
+        t = y - self.mean_x
+        self.compensation_add = t + self.mean_x - y
+        self.mean_x += t / self.nobs
+        self.ssqdm_x += (value - prev_mean) * (value - self.mean_x)
+
+    def _remove(self):
+        value = self.values.popleft()
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.compensation_remove
+            y = value - self.compensation_remove
+            t = y - self.mean_x
+            self.compensation_remove = t + self.mean_x - y
+            self.mean_x -= t / self.nobs
+            self.ssqdm_x -= (value - prev_mean) * (value - self.mean_x)
+        else:
+            self.mean_x = 0.0
+            self.ssqdm_x = 0.0
+
+    def step(self, value):
+        if len(self.values) >= self.window:
+            self._remove()
+        self._add(value)
+        if self.nobs < self.window or self.nobs <= 1:
+            return np.nan
+        if self.num_consecutive_same_value >= self.nobs:
+            return 0.0
+        return math.sqrt(max(self.ssqdm_x / (self.nobs - 1), 0.0))
+
+class IndicatorParams:
+    '''
+        指标参数，取值规则与 stock_data_indicators.auto_*_calulate 一致
+        macd: (diff_period, dea_period, ma_period)
+        ma: [(列名, 周期), ...]
+        rsi: [周期, ...]
+        boll: (n, m)
+    '''
+    def __init__(self, macd=(12, 26, 9), ma=(), rsi=(), boll=(20, 2), volume_ratio_cycle=VOLUME_RATIO_CYCLE):
+        self.macd = tuple(macd)
+        # 同名列（如重复的均线设置）以最后一次设置为准，与全量计算时后写入的列覆盖先写入的列一致
+        self.ma = tuple(dict((str(column), int(cycle)) for column, cycle in ma).items())
+        self.rsi = tuple(dict.fromkeys(int(period) for period in rsi))
+        self.boll = tuple(boll)
+        self.volume_ratio_cycle = int(volume_ratio_cycle)
+
+    @classmethod
+    def from_config(cls):
+        '''从用户指标配置读取'''
+        config_manager = get_indicator_config_manager()
+        dict_macd_settings = config_manager.get_user_config_by_indicator_type(IndicatrosEnum.MACD.value)
+        macd = (12, 26, 9)
+        if len(dict_macd_settings) == 3:
+            macd = (dict_macd_settings[0].period, dict_macd_settings[1].period, dict_macd_settings[2].period)
+
+        dict_ma_settings = config_manager.get_user_config_by_indicator_type(IndicatrosEnum.MA.value)
+        ma = [(setting.name, setting.period) for setting in dict_ma_settings.values()]
+
+        dict_rsi_settings = config_manager.get_user_config_by_indicator_type(IndicatrosEnum.RSI.value)
+        rsi = [setting.period for setting in dict_rsi_settings.values()]
+
+        dict_boll_settings = config_manager.get_user_config_by_indicator_type(IndicatrosEnum.BOLL.value)
+        boll = (20, 2)
+        if len(dict_boll_settings) >= 2:
+            boll = (dict_boll_settings[0].period, dict_boll_settings[1].period)
+
+        return cls(macd, ma, rsi, boll)
+
+    def key(self):
+        '''参数指纹，参数修改后缓存条目失效'''
+        return (self.macd, self.ma, self.rsi, self.boll, self.volume_ratio_cycle)
+
+    def config_hash(self):
+        '''参数指纹的摘要，作为持久化指标缓存的目录名'''
+        return hashlib.sha1(repr(self.key()).encode('utf-8')).hexdigest()[:16]
+
+    def get_ewm_spans(self):
+        '''{EMA 递推状态名: span}'''
+        diff_period, dea_period, ma_period = self.macd
+        dict_spans = {'fast': diff_period, 'slow': dea_period, 'dea': ma_period}
+        for period in self.rsi:
+            dict_spans[f'gain{period}'] = period
+            dict_spans[f'loss{period}'] = period
+        return dict_spans
+
+    def get_columns(self):
+        '''计算写入的指标列（按写入顺序）'''
+        list_columns = [IndicatrosEnum.MACD_DIFF.value, IndicatrosEnum.MACD_DEA.value, IndicatrosEnum.MACD.value]
+        list_columns.extend(column for column, _ in self.ma)
+        list_columns.append(IndicatrosEnum.VOLUME_RATIO.value)
+        list_columns.extend(f'{IndicatrosEnum.RSI.value}{period}' for period in self.rsi)
+        list_columns.extend([IndicatrosEnum.BOLL_MID.value, IndicatrosEnum.BOLL_UPPER.value, IndicatrosEnum.BOLL_LOWER.value])
+        return list_columns
+
+class _IndicatorEntry:
+    '''单只股票单个周期的缓存条目：已计算的指标列与最后一根K线的递推状态'''
+    def __init__(self, params, first_key, last_key, last_close, dict_columns, ewm_states):
+        self.params = params
+        self.first_key = first_key
+        self.last_key = last_key
+        self.last_close = last_close
+        self.dict_columns = dict_columns    # {列名: np.ndarray}
+        self.ewm_states = ewm_states        # {'fast'/'slow'/'dea'/'gain<p>'/'loss<p>': _EwmState}
+        self.rolling_states = None          # 首次递推时重放已计算的K线得到
+        self.persist = True                 # 是否写入持久化缓存
+
+    @property
+    def count(self):
+        return len(self.dict_columns[IndicatrosEnum.MACD.value])
+
+    @classmethod
+    def from_history(cls, params, first_key, last_key, close, volume):
+        '''全量计算（与 stock_data_indicators 各函数的计算方式一致），并记录 EMA 递推状态'''
+        n = len(close)
+        dict_columns = {}
+        ewm_states = {}
+
+        diff_period, dea_period, ma_period = params.macd
+        ema_fast = close.ewm(span=diff_period, adjust=False).mean()
+        ema_slow = close.ewm(span=dea_period, adjust=False).mean()
+        dif = ema_fast - ema_slow
+        dea = dif.ewm(span=ma_period, adjust=False).mean()
+        dict_columns[IndicatrosEnum.MACD_DIFF.value] = dif.to_numpy(dtype=float)
+        dict_columns[IndicatrosEnum.MACD_DEA.value] = dea.to_numpy(dtype=float)
+        dict_columns[IndicatrosEnum.MACD.value] = (2 * (dif - dea)).to_numpy(dtype=float)
+        ewm_states['fast'] = _EwmState(diff_period, float(ema_fast.iloc[-1]), n)
+        ewm_states['slow'] = _EwmState(dea_period, float(ema_slow.iloc[-1]), n)
+        ewm_states['dea'] = _EwmState(ma_period, float(dea.iloc[-1]), n)
+
+        for column, cycle in params.ma:
+            dict_columns[column] = close.rolling(window=cycle, min_periods=1).mean().to_numpy(dtype=float)
+
+        volume_ma = volume.rolling(window=params.volume_ratio_cycle, min_periods=1).mean()
+        dict_columns[IndicatrosEnum.VOLUME_RATIO.value] = (volume / volume_ma).to_numpy(dtype=float)
+
+        if params.rsi:
+            delta = close.diff()
+            gain = delta.where(delta > 0, 0)
+            loss = -delta.where(delta < 0, 0)
+            for period in params.rsi:
+                # min_periods 只屏蔽输出，不影响递推值，先不设 min_periods 以取得完整的递推状态
+                avg_gain = gain.ewm(span=period, adjust=False).mean()
+                avg_loss = loss.ewm(span=period, adjust=False).mean()
+                rs = avg_gain / avg_loss
+                values = (100 - (100 / (1 + rs))).to_numpy(dtype=float, copy=True)
+                values[:period - 1] = np.nan
+                dict_columns[f'{IndicatrosEnum.RSI.value}{period}'] = values
+                ewm_states[f'gain{period}'] = _EwmState(period, float(avg_gain.iloc[-1]), n)
+                ewm_states[f'loss{period}'] = _EwmState(period, float(avg_loss.iloc[-1]), n)
+
+        boll_n, boll_m = params.boll
+        mid = close.rolling(window=boll_n).mean()
+        std = close.rolling(window=boll_n).std()
+        dict_columns[IndicatrosEnum.BOLL_MID.value] = mid.to_numpy(dtype=float)
+        dict_columns[IndicatrosEnum.BOLL_UPPER.value] = (mid + boll_m * std).to_numpy(dtype=float)
+        dict_columns[IndicatrosEnum.BOLL_LOWER.value] = (mid - boll_m * std).to_numpy(dtype=float)
+
+        return cls(params, first_key, last_key, float(close.iloc[-1]), dict_columns, ewm_states)
+
+    @classmethod
+    def from_cache(cls, params, dict_columns, meta):
+        '''由持久化的指标列与元数据（to_meta）恢复，列或递推状态不完整时返回 None'''
+        if meta.get('params') != repr(params.key()):
+            return None
+        dict_weighted = meta.get('ewm_states') or {}
+        dict_spans = params.get_ewm_spans()
+        list_columns = params.get_columns()
+        if any(column not in dict_columns for column in list_columns) or any(name not in dict_weighted for name in dict_spans):
+            return None
+        dict_columns = {column: dict_columns[column] for column in list_columns}
+        count = len(dict_columns[IndicatrosEnum.MACD.value])
+        ewm_states = {name: _EwmState(span, float(dict_weighted[name]), count) for name, span in dict_spans.items()}
+        return cls(params, meta.get('first_key'), meta.get('last_key'), float(meta.get('last_close')), dict_columns, ewm_states)
+
+    def to_meta(self):
+        '''持久化的校验信息与 EMA 递推状态（滑动窗口状态由K线重放得到，不需要保存）'''
+        return {
+            'params': repr(self.params.key()),
+            'first_key': self.first_key,
+            'last_key': self.last_key,
+            'last_close': self.last_close,
+            'ewm_states': {name: state.weighted for name, state in self.ewm_states.items()},
+        }
+
+    def matches(self, params_key, first_key, count, key_at_last, close_at_last):
+        '''数据的前 count 根K线是否就是已计算的K线'''
+        return (self.params.key() == params_key and self.first_key == first_key and self.count == count
+                and self.last_key == key_at_last and self.last_close == close_at_last)
+
+    def _init_rolling_states(self, close, volume):
+        '''
+            按 pandas 的计算顺序重放已计算的K线，得到与全量计算逐位一致的滑动窗口状态
+            （补偿和依赖于序列起点，不能只由最后一个窗口初始化），每个条目只在首次递推时重放一次
+        '''
+        params = self.params
+        count = self.count
+        boll_n = params.boll[0]
+        self.rolling_states = {('ma', column): _RollingMeanState(cycle, 1) for column, cycle in params.ma}
+        self.rolling_states['volume'] = _RollingMeanState(params.volume_ratio_cycle, 1)
+        self.rolling_states['boll_mid'] = _RollingMeanState(boll_n, boll_n)
+        self.rolling_states['boll_std'] = _RollingStdState(boll_n)
+
+        list_close = close[:count].tolist()
+        for key, state in self.rolling_states.items():
+            state.replay(volume[:count].tolist() if key == 'volume' else list_close)
+
+    def extend(self, last_key, close, volume):
+        '''
+            逐根递推 close/volume（np.ndarray，包含已计算部分）中已计算部分之后的K线
+            返回: 新增K线数量
+        '''
+        params = self.params
+        count = self.count
+        new_count = len(close) - count
+        if new_count <= 0:
+            return 0
+        if self.rolling_states is None:
+            self._init_rolling_states(close, volume)
+
+        dict_new = {column: np.empty(new_count) for column in self.dict_columns}
+        prev_close = self.last_close
+        boll_m = params.boll[1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i in range(new_count):
+                close_value = float(close[count + i])
+                volume_value = float(volume[count + i])
+
+                dif = self.ewm_states['fast'].step(close_value) - self.ewm_states['slow'].step(close_value)
+                dea = self.ewm_states['dea'].step(dif)
+                dict_new[IndicatrosEnum.MACD_DIFF.value][i] = dif
+                dict_new[IndicatrosEnum.MACD_DEA.value][i] = dea
+                dict_new[IndicatrosEnum.MACD.value][i] = 2 * (dif - dea)
+
+                for column, _ in params.ma:
+                    dict_new[column][i] = self.rolling_states[('ma', column)].step(close_value)
+
+                volume_ma = self.rolling_states['volume'].step(volume_value)
+                dict_new[IndicatrosEnum.VOLUME_RATIO.value][i] = np.float64(volume_value) / np.float64(volume_ma)
+
+                delta = close_value - prev_close
+                gain = delta if delta > 0 else 0.0
+                loss = -delta if delta < 0 else 0.0
+                for period in params.rsi:
+                    gain_state = self.ewm_states[f'gain{period}']
+                    avg_gain = gain_state.step(gain)
+                    avg_loss = self.ewm_states[f'loss{period}'].step(loss)
+                    if gain_state.nobs < period:
+                        value = np.nan
+                    else:
+                        rs = np.float64(avg_gain) / np.float64(avg_loss)
+                        value = 100 - (100 / (1 + rs))
+                    dict_new[f'{IndicatrosEnum.RSI.value}{period}'][i] = value
+
+                mid = self.rolling_states['boll_mid'].step(close_value)
+                std = self.rolling_states['boll_std'].step(close_value)
+                dict_new[IndicatrosEnum.BOLL_MID.value][i] = mid
+                dict_new[IndicatrosEnum.BOLL_UPPER.value][i] = mid + boll_m * std
+                dict_new[IndicatrosEnum.BOLL_LOWER.value][i] = mid - boll_m * std
+
+                prev_close = close_value
+
+        for column, values in dict_new.items():
+            self.dict_columns[column] = np.concatenate([self.dict_columns[column], values])
+        self.last_key = last_key
+        self.last_close = prev_close
+        return new_count
+
+    def write(self, stock_data, columns=None):
+        '''
+            将指标列写入 stock_data（写入副本，调用方修改 DataFrame 不影响缓存）
+            columns: 只写入其中的指标列，None 时写入全部
+            返回: 写入的列
+        '''
+        list_columns = self.params.get_columns()
+        if columns is not None:
+            set_required = set(columns)
+            list_columns = [column for column in list_columns if column in set_required]
+        for column in list_columns:
+            stock_data[column] = self.dict_columns[column].copy()
+        return list_columns
+
+class IncrementalIndicatorEngine:
+    def __init__(self, max_cached_rows=DEFAULT_MAX_CACHED_ROWS, column_cache=None):
+        '''
+            max_cached_rows: 内存中缓存的K线总行数上限，0 表示不在内存中缓存；达到上限后不再接纳新的股票
+                             （已缓存的股票继续增量更新），避免全市场按固定顺序扫描时最近最少使用淘汰导致缓存完全失效
+            column_cache: IndicatorColumnCache，指标列持久化缓存，为 None 时不持久化
+        '''
+        if max_cached_rows < 0:
+            raise ValueError(f"缓存行数上限不能为负数: {max_cached_rows}")
+        self.logger = get_logger(__name__)
+        self.max_cached_rows = int(max_cached_rows)
+        self.column_cache = column_cache
+        self.config_hash = None     # 最近一次计算使用的指标参数指纹，变化时清理旧参数的持久化缓存
+        self.lock = threading.Lock()
+        self.dict_entries = OrderedDict()   # {(code, period): _IndicatorEntry}
+        self.cached_rows = 0
+        self.stats = {'hits': 0, 'extends': 0, 'extended_bars': 0, 'misses': 0, 'column_misses': 0, 'rejected': 0, 'loaded': 0}
+
+    def _take(self, cache_key):
+        '''取出条目（计算期间其他线程读取同一只股票时按未命中处理）'''
+        with self.lock:
+            entry = self.dict_entries.pop(cache_key, None)
+            if entry is not None:
+                self.cached_rows -= entry.count
+            return entry
+
+    def _put(self, cache_key, entry):
+        with self.lock:
+            old_entry = self.dict_entries.pop(cache_key, None)
+            if old_entry is not None:
+                self.cached_rows -= old_entry.count
+            if self.cached_rows + entry.count > self.max_cached_rows:
+                self.stats['rejected'] += 1
+                return
+            self.dict_entries[cache_key] = entry
+            self.cached_rows += entry.count
+
+    def _check_config_hash(self, params):
+        '''指标参数修改后清理旧参数的持久化缓存'''
+        config_hash = params.config_hash()
+        with self.lock:
+            if self.config_hash == config_hash:
+                return config_hash
+            self.config_hash = config_hash
+        if self.column_cache is not None:
+            self.column_cache.prune(config_hash)
+        return config_hash
+
+    def _load_entry(self, code, period, params, config_hash):
+        '''从持久化缓存恢复条目'''
+        if self.column_cache is None:
+            return None
+        result = self.column_cache.load(code, period, config_hash)
+        if result is None:
+            return None
+        entry = _IndicatorEntry.from_cache(params, *result)
+        if entry is not None:
+            with self.lock:
+                self.stats['loaded'] += 1
+        return entry
+
+    def _find_reusable(self, code, period, stock_data, params, config_hash):
+        '''
+            依次查找内存缓存、持久化缓存中前部与 stock_data 一致的条目（内存条目被取出）
+            返回: (可复用的条目或 None, 取出的内存条目, 持久化条目)
+        '''
+        key_values = stock_data['time'] if 'time' in stock_data.columns else stock_data['date']
+        first_key = str(key_values.iloc[0])
+
+        def is_reusable(entry):
+            return entry is not None and entry.count <= len(stock_data) and entry.matches(
+                params.key(), first_key, entry.count, str(key_values.iloc[entry.count - 1]), float(stock_data['close'].iloc[entry.count - 1]))
+
+        memory_entry = self._take((code, period))
+        if is_reusable(memory_entry):
+            return memory_entry, memory_entry, None
+        persisted_entry = self._load_entry(code, period, params, config_hash)
+        if is_reusable(persisted_entry):
+            return persisted_entry, memory_entry, persisted_entry
+        return None, memory_entry, persisted_entry
+
+    def _extend(self, entry, stock_data):
+        '''递推 stock_data 中已计算部分之后的K线，返回是否有新增K线'''
+        key_values = stock_data['time'] if 'time' in stock_data.columns else stock_data['date']
+        close = stock_data['close'].to_numpy(dtype=float)
+        volume = stock_data['volume'].to_numpy(dtype=float)
+        new_count = entry.extend(str(key_values.iloc[-1]), close, volume)
+        with self.lock:
+            if new_count > 0:
+                self.stats['extends'] += 1
+                self.stats['extended_bars'] += new_count
+            else:
+                self.stats['hits'] += 1
+        return new_count > 0
+
+    def _store(self, code, period, entry, changed, config_hash):
+        '''放回内存缓存，有变化时写回持久化缓存'''
+        if self.max_cached_rows > 0:
+            self._put((code, period), entry)
+        if changed and entry.persist and self.column_cache is not None:
+            self.column_cache.save(code, period, config_hash, entry.dict_columns, entry.to_meta())
+
+    def calculate(self, code, period, stock_data, params=None):
+        '''
+            计算 stock_data 的指标并写入（原地修改，与 default_indicators_auto_calculate 相同）
+            依次查找内存缓存、持久化缓存，stock_data 的前部与已计算的K线一致时只递推新增的K线，否则全量计算；
+            全量计算或递推后写回持久化缓存
+            params: IndicatorParams，默认读取用户指标配置
+            返回: stock_data
+        '''
+        if stock_data is None or stock_data.empty:
+            raise ValueError("数据为空，无法计算指标")
+        params = IndicatorParams.from_config() if params is None else params
+        config_hash = self._check_config_hash(params)
+
+        entry, _, persisted_entry = self._find_reusable(code, period, stock_data, params, config_hash)
+        changed = True
+        if entry is not None:
+            changed = self._extend(entry, stock_data)
+        else:
+            key_values = stock_data['time'] if 'time' in stock_data.columns else stock_data['date']
+            first_key, last_key = str(key_values.iloc[0]), str(key_values.iloc[-1])
+            entry = _IndicatorEntry.from_history(params, first_key, last_key, stock_data['close'], stock_data['volume'])
+            # 只读取了部分区间（如扫描指定起始日期）时不覆盖已持久化的更长历史
+            entry.persist = persisted_entry is None or persisted_entry.first_key is None or first_key <= persisted_entry.first_key
+            with self.lock:
+                self.stats['misses'] += 1
+
+        entry.write(stock_data)
+        self._store(code, period, entry, changed, config_hash)
+
+        sdi.calc_change_percent(stock_data)
+        sdi.calc_turnover_rate(stock_data)
+        return stock_data
+
+    def calculate_columns(self, code, period, stock_data, columns, params=None):
+        '''
+            只写入 columns 中的指标列（原地修改）：内存缓存或持久化缓存中有前部与 stock_data 一致的条目时，
+            递推新增的K线后写入；没有可复用的条目时不计算（全量计算全部指标比按需计算少数几列慢），由调用方按需计算
+            返回: 写入的指标列，未命中时返回 None
+        '''
+        if stock_data is None or stock_data.empty:
+            raise ValueError("数据为空，无法计算指标")
+        params = IndicatorParams.from_config() if params is None else params
+        config_hash = self._check_config_hash(params)
+
+        entry, memory_entry, _ = self._find_reusable(code, period, stock_data, params, config_hash)
+        if entry is None:
+            # 内存条目与本次读取的区间不一致，但仍可供其他读取复用，原样放回
+            if memory_entry is not None and self.max_cached_rows > 0:
+                self._put((code, period), memory_entry)
+            with self.lock:
+                self.stats['column_misses'] += 1
+            return None
+
+        changed = self._extend(entry, stock_data)
+        list_written = entry.write(stock_data, columns)
+        self._store(code, period, entry, changed, config_hash)
+        return list_written
+
+    def on_stock_data_saved(self, code, period, df_data, writeWay):
+        '''K线入库后：覆盖写入或改写了已计算的K线时使缓存失效，追加在末尾之后的K线留待下次读取时递推'''
+        if writeWay != 'append' or df_data is None or df_data.empty:
+            self.invalidate(code, period)
+            return
+        key_column = 'time' if 'time' in df_data.columns else 'date'
+        if key_column not in df_data.columns:
+            self.invalidate(code, period)
+            return
+
+        first_saved_key = str(df_data[key_column].min())
+        with self.lock:
+            entry = self.dict_entries.get((code, period))
+            config_hash = self.config_hash
+        last_key = entry.last_key if entry is not None else None
+        if last_key is None and self.column_cache is not None:
+            config_hash = IndicatorParams.from_config().config_hash() if config_hash is None else config_hash
+            meta = self.column_cache.load_meta(code, period, config_hash)
+            last_key = meta.get('last_key') if meta is not None else None
+        if last_key is not None and first_saved_key <= last_key:
+            self.invalidate(code, period)
+
+    def invalidate(self, code=None, period=None):
+        '''使缓存条目失效，code/period 为 None 时匹配全部（持久化缓存只按单只股票单个周期删除）'''
+        with self.lock:
+            for cache_key in [cache_key for cache_key in self.dict_entries
+                              if (code is None or cache_key[0] == code) and (period is None or cache_key[1] == period)]:
+                self.cached_rows -= self.dict_entries.pop(cache_key).count
+        if self.column_cache is not None and code is not None and period is not None:
+            self.column_cache.invalidate(code, period)
+
+    def get_stats(self):
+        '''
+            缓存统计：命中（无新增K线）、递推（有新增K线）、全量计算、按需计算未命中、因容量未缓存、从持久化缓存恢复的次数，
+            以及当前内存条目数与行数
+        '''
+        with self.lock:
+            stats = dict(self.stats, entries=len(self.dict_entries), cached_rows=self.cached_rows)
+        if self.column_cache is not None:
+            stats['column_cache'] = self.column_cache.get_stats()
+        return stats
@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+
+from manager.logging_manager import get_logger
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+'''
+    指标计算内核：一维 float64 数组上的递推与滑动窗口计算，供 stock_data_indicators 调用，代替逐只股票多次 pandas ewm / rolling.apply。
+        ema               指数移动平均，参数与 NaN 处理同 Series.ewm(span/alpha, min_periods, adjust=False).mean()
+        wilder            Wilder 平滑（alpha = 1/period 的 EMA）
+        wma               线性加权移动平均（权重 1..window），同 rolling(window).apply(np.dot(x, w) / w.sum())
+        rolling_max/min   滚动极值，同 rolling(window, min_periods).max() / min()
+    后端：
+        numba   可选依赖，已安装时默认使用，JIT 编译的逐元素递推，EMA 与 pandas 逐位一致
+        numpy   未安装 numba 时使用：一维 EMA 直接调用 pandas ewm（与原有计算逐位一致，指标与筛选结果不变），
+                WMA 与滚动极值为向量化实现，滚动极值逐位一致
+    set_backend('numpy' / 'numba' / 'auto') 切换后端。
+    ema、rolling_max/min 也接受二维矩阵（日期 × 股票，按列计算，供 cross_sectional_indicators 使用）：
+    EMA 按行递推、每步一次向量运算，与 pandas 逐位一致；二维输入不区分后端。
+    span_to_alpha / normalize_alpha 为各指标模块共用的 alpha 换算。
+'''
+
+logger = get_logger(__name__)
+
+BACKEND_AUTO = 'auto'
+BACKEND_NUMPY = 'numpy'
+BACKEND_NUMBA = 'numba'
+
+def _span_to_com(span):
+    if span < 1:
+        raise ValueError(f"span 必须大于等于1: {span}")
+    return (span - 1) / 2.0
+
+def _alpha_to_com(alpha):
+    if not 0 < alpha <= 1:
+        raise ValueError(f"alpha 必须在 (0, 1] 内: {alpha}")
+    return (1.0 - alpha) / alpha
+
+def span_to_alpha(span):
+    '''与 pandas 一致：span -> com -> alpha'''
+    return 1.0 / (1.0 + _span_to_com(span))
+
+def normalize_alpha(alpha):
+    '''与 pandas 一致：直接给定的 alpha 也经 com 换算'''
+    return 1.0 / (1.0 + _alpha_to_com(alpha))
+
+# ----------------------------------------逐元素递推（numba 编译）----------------------------------------
+def _ema_loop(values, alpha, min_periods):
+    '''pandas ewm(adjust=False, ignore_na=False) 的递推，见 pandas._libs.window.aggregations.ewm'''
+    n = values.shape[0]
+    result = np.empty(n)
+    if n == 0:
+        return result
+    old_wt_factor = 1.0 - alpha
+    new_wt = alpha
+    min_periods = max(min_periods, 1)
+    weighted = values[0]
+    nobs = 1 if weighted == weighted else 0
+    old_wt = 1.0
+    result[0] = weighted if nobs >= min_periods else np.nan
+    for i in range(1, n):
+        cur = values[i]
+        is_observation = cur == cur
+        if is_observation:
+            nobs += 1
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+                old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        result[i] = weighted if nobs >= min_periods else np.nan
+    return result
+
+def _wma_loop(values, window):
+    n = values.shape[0]
+    result = np.full(n, np.nan)
+    weight_sum = window * (window + 1) / 2.0
+    for i in range(window - 1, n):
+        total = 0.0
+        for k in range(window):
+            total += values[i - window + 1 + k] * (k + 1)
+        result[i] = total / weight_sum
+    return result
+
+def _rolling_extreme_loop(values, window, min_periods, is_max):
+    n = values.shape[0]
+    result = np.full(n, np.nan)
+    for i in range(n):
+        start = max(0, i - window + 1)
+        count = 0
+        extreme = np.nan
+        for k in range(start, i + 1):
+            value = values[k]
+            if value == value:
+                if count == 0 or (is_max and value > extreme) or (not is_max and value < extreme):
+                    extreme = value
+                count += 1
+        if count >= min_periods and count > 0:
+            result[i] = extreme
+    return result
+
+if numba is not None:
+    _ema_jit = numba.njit(cache=True)(_ema_loop)
+    _wma_jit = numba.njit(cache=True)(_wma_loop)
+    _rolling_extreme_jit = numba.njit(cache=True)(_rolling_extreme_loop)
+
+# ----------------------------------------NumPy 实现----------------------------------------
+def _ema_numpy(values, com, min_periods):
+    '''传入 com 而非 alpha，pandas 内部换算出的 alpha 与 span_to_alpha / normalize_alpha 逐位相同'''
+    return pd.Series(values).ewm(com=com, min_periods=min_periods, adjust=False).mean().to_numpy()
+
+def _ema_columns(values, alpha, min_periods):
+    '''
+        二维矩阵按列（沿行方向）递推 ewm(adjust=False)，NaN 处理与 pandas ignore_na=False 相同（首个有效值起算，
+        中间的 NaN 使旧值权重继续衰减）
+    '''
+    old_wt_factor = 1.0 - alpha
+    new_wt = alpha
+    row_count, column_count = values.shape
+    result = np.full_like(values, np.nan)
+    min_periods = max(int(min_periods), 1)
+    if row_count == 0:
+        return result
+
+    valid = values == values
+    if not (valid[1:] & ~valid[:-1]).any():
+        # 有效值都在列首（没有中间的 NaN）：每步都是观测值，旧值权重恒为 old_wt_factor
+        total_wt = old_wt_factor + new_wt
+        weighted = values[0].copy()
+        result[0] = weighted
+        for row in range(1, row_count):
+            cur = values[row]
+            weighted = np.where(weighted != cur, (old_wt_factor * weighted + new_wt * cur) / total_wt, weighted)
+            result[row] = weighted
+        result[:min_periods - 1] = np.nan
+        return result
+
+    weighted = np.full(column_count, np.nan)
+    old_wt = np.ones(column_count)
+    nobs = np.zeros(column_count, dtype=np.int64)
+    with np.errstate(invalid='ignore'):
+        for row in range(row_count):
+            cur = values[row]
+            is_observation = cur == cur
+            nobs += is_observation
+            started = weighted == weighted
+
+            old_wt = np.where(started, old_wt * old_wt_factor, old_wt)
+            update = started & is_observation & (weighted != cur)
+            weighted = np.where(update, (old_wt * weighted + new_wt * cur) / (old_wt + new_wt), weighted)
+            old_wt = np.where(started & is_observation, 1.0, old_wt)
+
+            first = ~started & is_observation
+            weighted = np.where(first, cur, weighted)
+            old_wt = np.where(first, 1.0, old_wt)
+
+            result[row] = np.where(nobs >= min_periods, weighted, np.nan)
+    return result
+
+def _wma_numpy(values, window):
+    result = np.full(values.shape[0], np.nan)
+    if values.shape[0] >= window:
+        weights = np.arange(1, window + 1, dtype=float)
+        result[window - 1:] = np.convolve(values, weights[::-1], mode='valid') / weights.sum()
+    return result
+
+def _rolling_extreme_numpy(values, window, min_periods, is_max):
+    func = np.fmax if is_max else np.fmin
+    result = values.copy()
+    for offset in range(1, min(window, values.shape[0])):
+        result[offset:] = func(result[offset:], values[:-offset])
+    valid_count = np.cumsum(values == values, axis=0)
+    window_count = valid_count.copy()
+    window_count[window:] -= valid_count[:-window]
+    result[(window_count < min_periods) | (window_count == 0)] = np.nan
+    return result
+
+# ----------------------------------------后端选择----------------------------------------
+_backend = BACKEND_NUMBA if numba is not None else BACKEND_NUMPY
+
+def is_numba_available():
+    return numba is not None
+
+def get_backend():
+    return _backend
+
+def set_backend(backend=BACKEND_AUTO):
+    '''auto：已安装 numba 时使用 numba，否则使用 numpy'''
+    global _backend
+    if backend == BACKEND_AUTO:
+        backend = BACKEND_NUMBA if numba is not None else BACKEND_NUMPY
+    if backend == BACKEND_NUMBA and numba is None:
+        raise ValueError("未安装 numba，无法使用 numba 后端")
+    if backend not in (BACKEND_NUMPY, BACKEND_NUMBA):
+        raise ValueError(f"未知的指标内核后端: {backend}")
+    _backend = backend
+    logger.info(f"指标内核后端: {backend}")
+
+def _to_array(values):
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if values.ndim not in (1, 2):
+        raise ValueError(f"需要一维序列或二维矩阵，实际维度: {values.ndim}")
+    return values
+
+# ----------------------------------------对外接口----------------------------------------
+def ema(values, span=None, alpha=None, min_periods=0):
+    '''指数移动平均，span 与 alpha 二选一，同 Series.ewm(..., adjust=False).mean()；二维输入按列计算'''
+    if (span is None) == (alpha is None):
+        raise ValueError("span 与 alpha 必须且只能指定一个")
+    com = _span_to_com(span) if span is not None else _alpha_to_com(alpha)
+    alpha = 1.0 / (1.0 + com)
+    values = _to_array(values)
+    if values.ndim == 2:
+        return _ema_columns(values, alpha, int(min_periods))
+    if _backend == BACKEND_NUMBA:
+        return _ema_jit(values, alpha, int(min_periods))
+    return _ema_numpy(values, com, int(min_periods))
+
+def wilder(values, period, min_periods=0):
+    '''Wilder 平滑：alpha = 1/period'''
+    return ema(values, alpha=1.0 / period, min_periods=min_periods)
+
+def wma(values, window):
+    '''线性加权移动平均，窗口内有 NaN 或不足 window 根时为 NaN'''
+    if window <= 0:
+        raise ValueError(f"窗口长度必须大于0: {window}")
+    values = _to_array(values)
+    if values.ndim != 1:
+        raise ValueError("wma 只支持一维序列")
+    if _backend == BACKEND_NUMBA:
+        return _wma_jit(values, int(window))
+    return _wma_numpy(values, int(window))
+
+def rolling_max(values, window, min_periods=None):
+    '''滚动最大值，忽略 NaN，窗口内有效值少于 min_periods（默认 window）时为 NaN；二维输入按列计算'''
+    return _rolling_extreme(values, window, min_periods, True)
+
+def rolling_min(values, window, min_periods=None):
+    '''滚动最小值，忽略 NaN，窗口内有效值少于 min_periods（默认 window）时为 NaN；二维输入按列计算'''
+    return _rolling_extreme(values, window, min_periods, False)
+
+def _rolling_extreme(values, window, min_periods, is_max):
+    if window <= 0:
+        raise ValueError(f"窗口长度必须大于0: {window}")
+    min_periods = window if min_periods is None else int(min_periods)
+    values = _to_array(values)
+    if _backend == BACKEND_NUMBA and values.ndim == 1:
+        return _rolling_extreme_jit(values, int(window), min_periods, is_max)
+    return _rolling_extreme_numpy(values, int(window), min_periods, is_max)
@@ -0,0 +1,104 @@
+from indicators import stock_data_indicators as sdi
+from indicators.incremental_indicators import IndicatorParams
+from manager.indicators_config_manager import IndicatrosEnum
+
+'''
+    按需计算指标：调用方声明需要的列（如 policy_filter 中各筛选函数的 *_COLUMNS），只计算这些列所属的指标
+        diff / dea / macd              MACD（三列一起计算）
+        均线列名（如 ma24）            对应周期的均线
+        volume_ratio                   量比
+        rsi<周期>（如 rsi12）          对应周期的 RSI
+        mid / upper / lower            BOLL
+        change_percent / turnover_rate 数据库中缺失时补算
+    指标参数与列名取自 IndicatorParams（用户指标配置），结果与 default_indicators_auto_calculate 的对应列相同。
+    不属于任何指标的列（date、close、code 等）原样使用；用户配置中没有的指标列不计算，由调用方的 columns_check 处理。
+    已计算的指标记录在对象中，之后再访问其他列时只补算缺少的指标。
+'''
+
+GROUP_MACD = 'macd'
+GROUP_MA = 'ma'
+GROUP_VOLUME_RATIO = 'volume_ratio'
+GROUP_RSI = 'rsi'
+GROUP_BOLL = 'boll'
+GROUP_CHANGE_PERCENT = 'change_percent'
+GROUP_TURNOVER_RATE = 'turnover_rate'
+
+def build_column_groups(params):
+    '''{列名: 指标}，指标为 (类型, 参数...) 元组，同一指标的列共用一个元组'''
+    dict_column_group = {}
+    for column in (IndicatrosEnum.MACD_DIFF.value, IndicatrosEnum.MACD_DEA.value, IndicatrosEnum.MACD.value):
+        dict_column_group[column] = (GROUP_MACD,)
+    for column, cycle in params.ma:
+        dict_column_group[column] = (GROUP_MA, column, cycle)
+    dict_column_group[IndicatrosEnum.VOLUME_RATIO.value] = (GROUP_VOLUME_RATIO,)
+    for period in params.rsi:
+        dict_column_group[f'{IndicatrosEnum.RSI.value}{period}'] = (GROUP_RSI, period)
+    for column in (IndicatrosEnum.BOLL_MID.value, IndicatrosEnum.BOLL_UPPER.value, IndicatrosEnum.BOLL_LOWER.value):
+        dict_column_group[column] = (GROUP_BOLL,)
+    dict_column_group['change_percent'] = (GROUP_CHANGE_PERCENT,)
+    dict_column_group['turnover_rate'] = (GROUP_TURNOVER_RATE,)
+    return dict_column_group
+
+class LazyIndicatorFrame:
+    """
+    K线数据与按需计算的指标列，指标列写入 data（原地修改）
+    """
+    def __init__(self, stock_data, params=None):
+        '''
+            stock_data: K线数据 DataFrame
+            params: IndicatorParams，默认读取用户指标配置
+        '''
+        if stock_data is None or stock_data.empty:
+            raise ValueError("数据为空，无法计算指标")
+        self.data = stock_data
+        self.params = IndicatorParams.from_config() if params is None else params
+        self.dict_column_group = build_column_groups(self.params)
+        self.set_computed = set()
+
+    def get_required_groups(self, columns):
+        '''columns 用到且尚未计算的指标（按列的顺序去重）'''
+        list_groups = []
+        for column in columns:
+            group = self.dict_column_group.get(column)
+            if group is not None and group not in self.set_computed and group not in list_groups:
+                list_groups.append(group)
+        return list_groups
+
+    def _calculate_group(self, group):
+        group_type = group[0]
+        if group_type == GROUP_MACD:
+            sdi.macd(self.data, *self.params.macd)
+        elif group_type == GROUP_MA:
+            sdi.ma(self.data, group[1], group[2])
+        elif group_type == GROUP_VOLUME_RATIO:
+            sdi.quantity_ratio(self.data, self.params.volume_ratio_cycle)
+        elif group_type == GROUP_RSI:
+            sdi.rsi(self.data, group[1])
+        elif group_type == GROUP_BOLL:
+            sdi.boll(self.data, *self.params.boll)
+        elif group_type == GROUP_CHANGE_PERCENT:
+            sdi.calc_change_percent(self.data)
+        elif group_type == GROUP_TURNOVER_RATE:
+            sdi.calc_turnover_rate(self.data)
+
+    def require(self, columns):
+        '''计算 columns 用到的指标，返回 data'''
+        for group in self.get_required_groups(columns):
+            self._calculate_group(group)
+            self.set_computed.add(group)
+        return self.data
+
+    def __getitem__(self, column):
+        '''首次访问指标列时计算该指标'''
+        self.require((column,))
+        return self.data[column]
+
+    def __contains__(self, column):
+        return column in self.data.columns or column in self.dict_column_group
+
+    def get_computed_columns(self):
+        return [column for column, group in self.dict_column_group.items() if group in self.set_computed]
+
+def calculate_required_indicators(stock_data, columns, params=None):
+    '''只计算 columns 用到的指标并写入 stock_data（原地修改），返回 stock_data'''
+    return LazyIndicatorFrame(stock_data, params).require(columns)
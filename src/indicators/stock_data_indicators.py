@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 from manager.indicators_config_manager import get_kline_half_width, IndicatrosEnum, get_indicator_config_manager
+from indicators import kernels
 
 '''
     指标计算
@@ -19,11 +21,11 @@ class KLine():
 
 # 历史数据≤2年 → 全量计算
 def macd(stock_data, diff_period=12, dea_period=26, ma_period=9):
-    close = stock_data['close']
-    ema12 = close.ewm(span=diff_period, adjust=False).mean()
-    ema26 = close.ewm(span=dea_period, adjust=False).mean()
+    close = stock_data['close'].to_numpy(dtype=float)
+    ema12 = kernels.ema(close, span=diff_period)
+    ema26 = kernels.ema(close, span=dea_period)
     dif = ema12 - ema26
-    dea = dif.ewm(span=ma_period, adjust=False).mean()
+    dea = kernels.ema(dif, span=ma_period)
     macd = 2 * (dif - dea)
 
     # TODO: 清除旧的数据
@@ -45,16 +47,17 @@ def kdj(data, n=9, m1=3, m2=3):
         raise ValueError("缺少必要的数据列：high, low, close")
     
     # 计算未成熟随机值RSV
-    low_min = data['low'].rolling(window=n).min()
-    high_max = data['high'].rolling(window=n).max()
-    data['RSV'] = (data['close'] - low_min) / (high_max - low_min) * 100
+    low_min = kernels.rolling_min(data['low'].to_numpy(dtype=float), n)
+    high_max = kernels.rolling_max(data['high'].to_numpy(dtype=float), n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        data['RSV'] = (data['close'].to_numpy(dtype=float) - low_min) / (high_max - low_min) * 100
     
     # TODO: 清除旧的数据
     # 计算K值
-    data[IndicatrosEnum.KDJ_K.value] = data['RSV'].ewm(alpha=1/m1, adjust=False).mean()
+    data[IndicatrosEnum.KDJ_K.value] = kernels.ema(data['RSV'].to_numpy(dtype=float), alpha=1/m1)
     
     # 计算D值
-    data[IndicatrosEnum.KDJ_D.value] = data[IndicatrosEnum.KDJ_K.value].ewm(alpha=1/m2, adjust=False).mean()
+    data[IndicatrosEnum.KDJ_D.value] = kernels.ema(data[IndicatrosEnum.KDJ_K.value].to_numpy(dtype=float), alpha=1/m2)
     
     # 计算J值
     data[IndicatrosEnum.KDJ_J.value] = 3 * data[IndicatrosEnum.KDJ_K.value] - 2 * data[IndicatrosEnum.KDJ_D.value]
@@ -81,11 +84,12 @@ def rsi(data, period=14):
     
     # 核心修正：使用指数移动平均 (EMA) 替代简单移动平均 (SMA)
     # 使用span参数，其等于周期period
-    avg_gain = gain.ewm(span=period, min_periods=period, adjust=False).mean()
-    avg_loss = loss.ewm(span=period, min_periods=period, adjust=False).mean()
+    avg_gain = kernels.ema(gain.to_numpy(dtype=float), span=period, min_periods=period)
+    avg_loss = kernels.ema(loss.to_numpy(dtype=float), span=period, min_periods=period)
     
     # 计算RS
-    rs = avg_gain / avg_loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
     
     # 计算RSI
     rsi_name = f'{IndicatrosEnum.RSI.value}{period}'
@@ -139,13 +143,10 @@ def ma_corrected(stock_data, column='5', cycle=5, ma_type='EMA'):
         stock_data[column] = close.rolling(window=cycle, min_periods=cycle).mean()
     elif ma_type.upper() == 'EMA':
         # 修正算法：指数移动平均 (更可能匹配同花顺)
-        stock_data[column] = close.ewm(span=cycle, min_periods=cycle, adjust=False).mean()
+        stock_data[column] = kernels.ema(close.to_numpy(dtype=float), span=cycle, min_periods=cycle)
     elif ma_type.upper() == 'WMA':
-        # 另一种算法：加权移动平均
-        weights = np.arange(1, cycle+1)  # 生成线性权重 [1, 2, ..., cycle]
-        def wma_func(x):
-            return np.dot(x, weights) / weights.sum()
-        stock_data[column] = close.rolling(window=cycle, min_periods=cycle).apply(wma_func, raw=True)
+        # 另一种算法：加权移动平均，线性权重 [1, 2, ..., cycle]
+        stock_data[column] = kernels.wma(close.to_numpy(dtype=float), cycle)
     else:
         raise ValueError("ma_type 参数应为 'SMA', 'EMA' 或 'WMA'")
     
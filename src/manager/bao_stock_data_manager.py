@@ -2,13 +2,27 @@
 from PyQt5.QtCore import QObject, pyqtSignal
 from db_base.stock_info_db_base import StockInfoDBBasePool
 from db_base.stock_db_base import StockDbBase
+from db_base.consolidated_stock_db_base import ConsolidatedStockDbBase
+from db_base.stock_meta_db_base import StockMetaDbBasePool
+from db_base.parallel_stock_reader import ParallelStockDataReader
+from db_base.kline_binary_cache import KlineBinaryCache
+from db_base.indicator_column_cache import IndicatorColumnCache
+from db_base.sqlite_connection_pool import DEFAULT_MAX_CONNECTIONS, DEFAULT_IDLE_TIMEOUT
+from manager.config_manager import ConfigManager
 from indicators import stock_data_indicators as sdi
+from indicators.incremental_indicators import IncrementalIndicatorEngine
+from indicators.cross_sectional_indicators import build_matrices, DEFAULT_MATRIX_COLUMNS
+from indicators.lazy_indicator_frame import calculate_required_indicators
 from manager.logging_manager import get_logger
 from common.common_api import *
+from common.kline_type_conversion import convert_kline_columns
+from processor.kline_resampler import resample_daily_bars, resample_minute_bars, is_resample_period, is_intraday_resample_period
 
 from manager.period_manager import TimePeriod
+from manager.trading_calendar import TradingCalendar
 
 import time
+import datetime
 import traceback
 import pandas as pd
 import threading
@@ -47,10 +61,137 @@ class BaostockDataManager(QObject):
         self.dict_lastest_1d_stock_data = {}  # {code : pd.DataFrame}, 仅缓存最后一行数据用于快速加载股票list列表
 
         self.stock_info_db_base = StockInfoDBBasePool().get_manager(1)
-        self.stock_db_base = StockDbBase("./data/database/stocks/db/baostock")
+        self.stock_db_base = self.create_stock_db_base()
+        self.stock_meta_db_base = StockMetaDbBasePool().get_manager(self.stock_db_base.get_src_db_dir() / "stock_meta.db")
+        self.parallel_reader = self.create_parallel_reader()
+        self.kline_cache = self.create_kline_cache()
+        self.indicator_engine = self.create_indicator_engine()
+        self.list_derived_periods = self.load_derived_periods()
+        self.trading_calendar = TradingCalendar(self.stock_meta_db_base)   # 交易日历，启动时从本地加载，由 BaoStockProcessor 补齐
+        self.trading_calendar.load_local()
 
         self.get_all_stocks_from_db()
 
+    def create_stock_db_base(self):
+        '''
+            根据配置选择K线存储后端：
+                [Storage]
+                backend = per_stock      # 默认，每只股票一个数据库文件
+                backend = consolidated   # 每个周期一个数据库文件，所有股票合并存储
+            连接池配置：
+                max_connections = 64         # 连接池上限，超出后按 LRU 关闭空闲连接
+                connection_idle_timeout = 300  # 空闲连接保留时间（秒）
+        '''
+        config_manager = ConfigManager()
+        config_manager.set_config_path("config.ini")
+        backend = config_manager.get('Storage', 'backend', 'per_stock')
+        max_connections = int(config_manager.get('Storage', 'max_connections', str(DEFAULT_MAX_CONNECTIONS)))
+        idle_timeout = float(config_manager.get('Storage', 'connection_idle_timeout', str(DEFAULT_IDLE_TIMEOUT)))
+        self.logger.info(f"K线存储后端: {backend}, 连接池上限: {max_connections}")
+
+        if backend == 'consolidated':
+            db_dir = config_manager.get('Storage', 'consolidated_db_dir', './data/database/stocks/db/baostock_consolidated')
+            return ConsolidatedStockDbBase(db_dir, max_connections, idle_timeout)
+
+        return StockDbBase("./data/database/stocks/db/baostock", max_connections, idle_timeout)
+
+    def create_parallel_reader(self):
+        '''
+            多股票并行读取器，线程数可配置：
+                [Storage]
+                reader_threads = 8
+        '''
+        config_manager = ConfigManager()
+        config_manager.set_config_path("config.ini")
+        reader_threads = int(config_manager.get('Storage', 'reader_threads', '0'))
+        return ParallelStockDataReader(self.stock_db_base, max_workers=reader_threads if reader_threads > 0 else None)
+
+    def create_kline_cache(self):
+        '''
+            日线、周线的内存映射二进制缓存，默认开启：
+                [Storage]
+                binary_cache = true
+                binary_cache_dir = ./data/database/stocks/kline_cache
+        '''
+        config_manager = ConfigManager()
+        config_manager.set_config_path("config.ini")
+        if config_manager.get('Storage', 'binary_cache', 'true').strip().lower() not in ('true', '1', 'yes', 'on'):
+            return None
+        cache_dir = config_manager.get('Storage', 'binary_cache_dir', str(self.stock_db_base.get_src_db_dir() / "kline_cache"))
+        return KlineBinaryCache(cache_dir)
+
+    def create_indicator_engine(self):
+        '''
+            增量指标计算引擎，按 (股票, 周期) 缓存已计算的指标与递推状态，默认关闭：
+                [Indicators]
+                incremental_cache_rows = 2000000   # 内存中缓存的K线总行数上限，默认 0（不在内存中缓存）
+                persisted_cache = false            # 指标列持久化缓存（可选，默认关闭），按指标参数指纹存放，参数修改后自动失效
+                persisted_cache_dir = ./data/database/stocks/indicator_cache
+            两者都关闭时每次全量计算
+        '''
+        config_manager = ConfigManager()
+        config_manager.set_config_path("config.ini")
+        max_cached_rows = int(config_manager.get('Indicators', 'incremental_cache_rows', '0'))
+        column_cache = None
+        if config_manager.get('Indicators', 'persisted_cache', 'false').strip().lower() in ('true', '1', 'yes', 'on'):
+            cache_dir = config_manager.get('Indicators', 'persisted_cache_dir', str(self.stock_db_base.get_src_db_dir() / "indicator_cache"))
+            column_cache = IndicatorColumnCache(cache_dir)
+        if max_cached_rows <= 0 and column_cache is None:
+            return None
+        return IncrementalIndicatorEngine(max(max_cached_rows, 0), column_cache)
+
+    def load_derived_periods(self):
+        '''
+            本地聚合生成的周期，源周期入库后同步更新，不再从远端下载（需显式配置，默认全部从远端下载）：
+                [Storage]
+                derived_periods = 1w,1M,1Q,1Y,30m,60m,120m   # 默认为空
+                minute_base_period = 15m                      # 分钟级聚合的源周期（需下载）
+            周线、月线、季线、年线由日线聚合；分钟级由 minute_base_period 按交易时段聚合。
+            启用某个可下载的周期前，先用 BaostockProcessor.validate_derived_bars 确认聚合结果与官方K线一致
+        '''
+        config_manager = ConfigManager()
+        config_manager.set_config_path("config.ini")
+        base_value = config_manager.get('Storage', 'minute_base_period', TimePeriod.MINUTE_15.value).strip()
+        try:
+            self.minute_base_period = TimePeriod(base_value)
+        except ValueError:
+            self.logger.warning(f"minute_base_period {base_value} 无效，使用 {TimePeriod.MINUTE_15.value}")
+            self.minute_base_period = TimePeriod.MINUTE_15
+
+        list_periods = []
+        for value in config_manager.get('Storage', 'derived_periods', '').split(','):
+            value = value.strip()
+            if not value:
+                continue
+            try:
+                period = TimePeriod(value)
+            except ValueError:
+                self.logger.warning(f"derived_periods 中的周期 {value} 无效，已忽略")
+                continue
+            if not is_resample_period(period) and not is_intraday_resample_period(period, self.minute_base_period):
+                self.logger.warning(f"周期 {value} 不能由{TimePeriod.get_chinese_label(self.minute_base_period)}或日线聚合生成，已忽略")
+                continue
+            list_periods.append(period)
+        return list_periods
+
+    def is_derived_period(self, period):
+        '''该周期是否本地聚合生成'''
+        return period in self.list_derived_periods
+
+    def get_derived_source_period(self, period):
+        '''聚合周期的源周期：长周期为日线，分钟级为 minute_base_period'''
+        return self.minute_base_period if TimePeriod.is_minute_level(period) else TimePeriod.DAY
+
+    def get_trading_calendar(self):
+        return self.trading_calendar
+
+    def is_kline_cache_period(self, period):
+        '''二进制缓存只服务日线及以上周期'''
+        return self.kline_cache is not None and not TimePeriod.is_minute_level(period)
+
+    def is_consolidated_storage(self):
+        return isinstance(self.stock_db_base, ConsolidatedStockDbBase)
+
     def get_stock_info_dict(self):
         with self.lock:
             return MappingProxyType(self.dict_stocks_info)
@@ -123,17 +264,23 @@ class BaostockDataManager(QObject):
         
     # ----------------------stock_db_base相关接口-----------------------------------------
     def check_stock_db_exists(self, code):
+        # 优先查元数据目录，命中时只做一次文件存在性检查，不打开数据库
+        if self.stock_meta_db_base.has_catalog_entry(code) and self._check_stock_db_file_exists(code):
+            return True
         with self.lock:
             return self.stock_db_base.check_stock_db_exists(code)
     
-    def get_db_path(self, code):
+    def get_db_path(self, code, period=TimePeriod.DAY):
+        '''指定周期K线所在的数据库文件（合并存储下按周期划分）'''
         with self.lock:
-            return self.stock_db_base.get_db_path(code)
+            return self.stock_db_base.get_db_path(code, period.get_table_name())
 
     def check_table_exists(self, code, period=TimePeriod.DAY):
-        table_name = period.get_table_name()
-        with self.lock:
-            return self.stock_db_base.check_table_exists(code, table_name)
+        '''目录中有记录时直接判断，否则走高水位的索引查找（见 get_high_water_mark）'''
+        dict_entry = self._get_stored_catalog_entry(code, period)
+        if dict_entry is not None:
+            return dict_entry['row_count'] > 0
+        return self.get_high_water_mark(code, period) is not None
     
     def create_baostock_table_index(self, db_path, period=TimePeriod.DAY):
         table_name = period.get_table_name()
@@ -208,13 +355,25 @@ class BaostockDataManager(QObject):
         self.logger.info(f"总共处理了 {total_count} 只股票")
         return True  
 
-    def get_stock_data_from_db_by_period(self, code, period=TimePeriod.DAY, start_date=None, end_date=None):
-        '''从数据中获取股票指定周期的k线数据(原始数据库数据，未处理指标)'''
+    def get_stock_data_from_db_by_period(self, code, period=TimePeriod.DAY, start_date=None, end_date=None, typed=False, last_n=None):
+        '''
+            从数据中获取股票指定周期的k线数据(原始数据库数据，未处理指标)
+            typed: False 时日期为 YYYY-MM-DD 字符串（与现有调用方兼容）；
+                   True 时返回无 object 列的类型化数据（date/time 为 datetime64，code 为 category，OHLCV 为 float64）
+            last_n: 只取区间内最后 N 根K线，在数据库中按主键倒序扫描后截断，不读取全部历史
+        '''
+        if self.is_kline_cache_period(period):
+            df_data = self.get_stock_data_from_kline_cache(code, period, start_date, end_date, typed)
+            if df_data is not None:
+                if last_n is not None:
+                    df_data = df_data.tail(int(last_n)).reset_index(drop=True)
+                return df_data if not df_data.empty else pd.DataFrame()
+
         table_name = period.get_table_name()
         # self.logger.info(f"处理股票: {code}, 表名：{table_name}")
 
         with self.lock:
-            df_data = self.stock_db_base.get_bao_stock_data(code, table_name, start_date, end_date)
+            df_data = self.stock_db_base.get_bao_stock_data(code, table_name, start_date, end_date, typed, last_n)
 
         df_data = df_data.dropna()
 
@@ -223,20 +382,157 @@ class BaostockDataManager(QObject):
         
         return df_data
     
-    def get_stock_data_from_db_by_period_with_indicators_auto(self, code, period=TimePeriod.DAY, start_date=None, end_date=None):
+    def get_all_stock_data_from_db_by_period(self, period=TimePeriod.DAY, start_date=None, end_date=None, code_list=None):
+        '''
+            全市场读取指定周期的k线数据(原始数据库数据，未处理指标)
+            合并存储下为一次顺序扫描；按股票分文件存储时退化为逐个读取
+            return: dict, {code : DataFrame}
+        '''
+        dict_result = {}
+        table_name = period.get_table_name()
+
+        if self.is_consolidated_storage():
+            with self.lock:
+                df_all = self.stock_db_base.get_all_stock_data(table_name, start_date, end_date, code_list)
+
+            if df_all is None or df_all.empty:
+                return dict_result
+
+            for code, df_code in df_all.groupby('code', sort=False):
+                df_code = df_code.dropna()
+                if not df_code.empty:
+                    dict_result[code] = df_code.reset_index(drop=True)
+            return dict_result
+
+        if code_list is None:
+            with self.lock:
+                dict_stocks_info = self.dict_stocks_info
+            code_list = [code for board_data in dict_stocks_info.values() for code in board_data['证券代码'].tolist()]
+
+        for code in code_list:
+            df_data = self.get_stock_data_from_db_by_period(code, period, start_date, end_date)
+            if not df_data.empty:
+                dict_result[code] = df_data
+
+        return dict_result
+
+    def iter_stock_data_from_db_by_period(self, code_list, period=TimePeriod.DAY, start_date=None, end_date=None, ordered=False, typed=False, profile=None):
+        '''
+            并行批量读取多只股票指定周期的k线数据(原始数据库数据，未处理指标)
+            读线程使用各自的只读连接，不占用 self.lock；typed 含义同 get_stock_data_from_db_by_period
+            profile: 读线程的连接配置，None 时为并行读取器默认的 scan
+            return: iterator, (code, DataFrame)，无数据的股票返回空 DataFrame
+        '''
+        table_name = period.get_table_name()
+        for code, df_data in self.parallel_reader.iter_stock_data(code_list, table_name, start_date, end_date, ordered, typed, profile):
+            if df_data is None or df_data.empty:
+                yield code, pd.DataFrame()
+            else:
+                yield code, df_data.dropna()
+
+    def iter_stock_data_from_db_by_period_with_indicators(self, code_list, period=TimePeriod.DAY, start_date=None, end_date=None, ordered=False, profile=None, columns=None):
+        '''并行批量读取多只股票指定周期的k线数据，并计算指标（columns 见 calculate_indicators）'''
+        dict_name = self.get_stock_name_dict()
+        for code, df_data in self.iter_stock_data_from_db_by_period(code_list, period, start_date, end_date, ordered, profile=profile):
+            df_data = df_data.assign(name=dict_name.get(code, "未知"))
+            self.calculate_indicators(code, period, df_data, columns)
+            yield code, df_data
+
+    def get_stock_data_matrices_by_period(self, code_list, period=TimePeriod.DAY, start_date=None, end_date=None, columns=DEFAULT_MATRIX_COLUMNS, profile=None):
+        '''
+            并行读取多只股票指定周期的k线数据，按日期（分钟级为时间）对齐为 (日期 × 股票) 矩阵，
+            供 indicators.cross_sectional_indicators 批量计算指标，停牌、未上市的日期为 NaN
+            return: {列名: DataFrame(日期 × 股票)}
+        '''
+        key = 'time' if TimePeriod.is_minute_level(period) else 'date'
+        return build_matrices(self.iter_stock_data_from_db_by_period(code_list, period, start_date, end_date, profile=profile), columns, key)
+
+    def get_stock_data_from_kline_cache(self, code, period=TimePeriod.DAY, start_date=None, end_date=None, typed=False):
+        '''
+            从二进制缓存读取K线数据，缓存以元数据目录记录为指纹：
+                指纹一致时直接按日期区间从内存映射中读取；
+                缓存缺失或过期时从数据库读取全部数据重建缓存后再读取。
+            只使用目录中已有的记录，读取路径不统计全表、不回填目录（由入库流程或 rebuild_stock_catalog 维护）
+            返回: DataFrame，无法使用缓存（目录无记录、重建失败）时返回 None，由调用方回退到数据库读取
+        '''
+        fingerprint = self.kline_cache.make_fingerprint(self._get_stored_catalog_entry(code, period))
+        if fingerprint is None:
+            return None
+
+        df_data = self.kline_cache.load(code, period, fingerprint, start_date, end_date, typed)
+        if df_data is not None:
+            return df_data
+
+        with self.lock:
+            df_full_data = self.stock_db_base.get_bao_stock_data(code, period.get_table_name())
+        df_full_data = df_full_data.dropna()
+        if not self.kline_cache.build(code, period, df_full_data, fingerprint):
+            return None
+
+        return self.kline_cache.load(code, period, fingerprint, start_date, end_date, typed)
+
+    def get_kline_cache_stats(self):
+        '''K线二进制缓存统计（命中/缺失/过期/重建次数）'''
+        if self.kline_cache is None:
+            return {}
+        return self.kline_cache.get_stats()
+
+    def get_parallel_reader_stats(self):
+        '''并行读取吞吐统计'''
+        return self.parallel_reader.get_stats()
+
+    def get_connection_pool_stats(self):
+        '''K线数据库连接池统计（命中/未命中/淘汰、当前空闲与借出连接数）'''
+        return self.stock_db_base.get_connection_pool_stats()
+
+    def use_storage_profile(self, profile):
+        '''
+            在当前线程中切换K线数据库连接配置（上下文管理器）：
+                interactive  默认，界面交互
+                bulk_ingest  批量下载入库，新建表的索引在退出时统一创建
+                scan         全市场扫描（并行读取器的读线程默认使用）
+        '''
+        return self.stock_db_base.use_profile(profile)
+
+    def get_stock_data_from_db_by_period_with_indicators_auto(self, code, period=TimePeriod.DAY, start_date=None, end_date=None, last_n=None, columns=None):
         # 不再加载完整日线数据到内存
-        return self.get_stock_data_from_db_by_period_with_indicators(code, period, start_date, end_date)
+        return self.get_stock_data_from_db_by_period_with_indicators(code, period, start_date, end_date, last_n, columns)
 
-    def get_stock_data_from_db_by_period_with_indicators(self, code, period=TimePeriod.DAY, start_date=None, end_date=None):
-        '''从数据中获取股票指定周期的k线数据，并计算指标'''
-        df_data = self.get_stock_data_from_db_by_period(code, period, start_date, end_date)
+    def get_stock_data_from_db_by_period_with_indicators(self, code, period=TimePeriod.DAY, start_date=None, end_date=None, last_n=None, columns=None):
+        '''从数据中获取股票指定周期的k线数据，并计算指标（last_n 见 get_stock_data_from_db_by_period，columns 见 calculate_indicators）'''
+        df_data = self.get_stock_data_from_db_by_period(code, period, start_date, end_date, last_n=last_n)
         # self.data_type_conversion(df_data)
         stock_name = self.get_stock_name_by_code(code)
         if stock_name is None:
             stock_name = "未知"
         df_data = df_data.assign(name=stock_name)
-        sdi.default_indicators_auto_calculate(df_data)
+        self.calculate_indicators(code, period, df_data, columns)
+        return df_data
+
+    def calculate_indicators(self, code, period, df_data, columns=None):
+        '''
+            计算指标并写入 df_data，开启增量计算时只递推上次计算之后新增的K线
+            columns: 调用方需要的列（如 policy_filter 中筛选函数的 *_COLUMNS），指定时只计算这些列所属的指标：
+                     增量计算的缓存（内存或持久化）命中时从中取出所需的列，未命中时按需计算；None 时计算全部指标
+        '''
+        if columns is not None:
+            list_written = None
+            if self.indicator_engine is not None:
+                list_written = self.indicator_engine.calculate_columns(code, period, df_data, columns)
+            if list_written is not None:
+                columns = [column for column in columns if column not in list_written]
+            calculate_required_indicators(df_data, columns)
+        elif self.indicator_engine is None:
+            sdi.default_indicators_auto_calculate(df_data)
+        else:
+            self.indicator_engine.calculate(code, period, df_data)
         return df_data
+
+    def get_indicator_engine_stats(self):
+        '''增量指标计算统计（命中/递推/全量计算次数，缓存条目数与行数，持久化缓存命中情况）'''
+        if self.indicator_engine is None:
+            return {}
+        return self.indicator_engine.get_stats()
     
     def get_all_lastest_row_data_dict_by_period_auto(self, period=TimePeriod.DAY):
         if self.dict_lastest_1d_stock_data:
@@ -246,66 +542,84 @@ class BaostockDataManager(QObject):
             return self.get_all_lastest_row_data_dict_by_period(period)
     def get_all_lastest_row_data_dict_by_period(self, period=TimePeriod.DAY):
         '''获取所有股票的指定周期k线数据的最后一行数据，通常用于初始化list列表，不需要计算指标'''
-        dict_result = {}    # {'code': DataFrame}
-        table_name = period.get_table_name()
-
-        # 遍历所有板块
-        board_index = 0
-        total_count = 0
         self.logger.info(f"开始读取本地数据库日线、周线股票的最后一天（行）数据...")
         start_time = time.time()  # 记录开始时间
 
         with self.lock:
             dict_stocks_info = self.dict_stocks_info
 
-        for board_name, board_data in dict_stocks_info.items():
+        # 与原有逻辑保持一致：只加载前两个板块（沪A主板、深A主板）
+        code_list = []
+        for board_index, board_data in enumerate(dict_stocks_info.values()):
             if board_index > 1:
                 break
-            board_index += 1
-
-            self.logger.info(f"读取 {board_name} 板块...")
-            board_start_time = time.time()  # 记录开始时间
-            
-            # 遍历该板块的每一行数据
-            for index, row in board_data.iterrows():
-                # if index > 100:
-                #     break
+            code_list.extend(board_data['证券代码'].tolist())
 
-                try:
-                    code = row['证券代码']
-                    name = row['证券名称'] if '证券名称' in row else '未知'
-                    
-                    with self.lock:
-                        lastest_1d_data = self.stock_db_base.get_lastest_stock_data(code, table_name)     
-
-                    if lastest_1d_data is None or lastest_1d_data.empty:
-                        self.logger.debug(f"股票 {code} 日线数据为空，跳过指标计算")
-                        continue 
-
-                    # 只对非空数据进行指标计算
-                    # self.data_type_conversion(lastest_1d_data)
-                    lastest_1d_data['name'] = name
-                    # sdi.default_indicators_auto_calculate(lastest_1d_data)
-                    dict_result[code] = lastest_1d_data
-                    total_count += 1
-                    
-                except Exception as e:
-                    self.logger.error(f"处理股票 {code} 时发生错误: {str(e)}")
-                    self.logger.error(traceback.format_exc())
-                    # 继续处理下一个股票
-                    continue
-
-            board_read_elapsed_time = time.time() - board_start_time  # 计算耗时
-            self.logger.info(f"读取完成，共读取{total_count}只股票，耗时: {board_read_elapsed_time:.2f}秒，即{board_read_elapsed_time/60:.2f}分钟")
+        df_lastest = self.get_all_lastest_row_data_by_period(period, code_list)
+        dict_result = self.lastest_row_data_to_dict(df_lastest, code_list)
 
-        
         all_read_elapsed_time = time.time() - start_time  # 计算耗时
-        self.logger.info(f"读取完成，总耗时: {all_read_elapsed_time:.2f}秒，即{all_read_elapsed_time/60:.2f}分钟")
+        self.logger.info(f"读取完成，共读取{len(dict_result)}只股票，总耗时: {all_read_elapsed_time:.2f}秒")
 
         with self.lock:
             self.dict_lastest_1d_stock_data = dict_result
 
         return dict_result
+
+    def get_all_lastest_row_data_by_period(self, period=TimePeriod.DAY, code_list=None):
+        '''
+            从最新K线汇总表一次性获取所有（或指定）股票的最后一行数据
+            汇总表未完整重建过时（首次使用、升级或迁移后）先从K线数据库重建，
+            之后由入库流程增量维护；不能以汇总表为空判断，升级后首次入库只会写入本次更新的股票
+            return: DataFrame，以 code 为索引，包含 name 列
+        '''
+        if not self.stock_meta_db_base.is_latest_bars_built(period):
+            self.rebuild_lastest_row_data_summary(period)
+
+        df_lastest = self.stock_meta_db_base.get_latest_bars(period, code_list)
+        if df_lastest is None or df_lastest.empty:
+            return pd.DataFrame()
+
+        df_lastest['name'] = df_lastest['code'].map(self.get_stock_name_dict()).fillna('未知')
+        df_lastest.index = df_lastest['code'].values
+        return df_lastest
+
+    def rebuild_lastest_row_data_summary(self, period=TimePeriod.DAY):
+        '''从K线数据库重建指定周期的最新K线汇总表'''
+        table_name = period.get_table_name()
+        self.logger.info(f"重建最新K线汇总表: {table_name}")
+        start_time = time.time()
+
+        with self.lock:
+            df_lastest = self.stock_db_base.get_all_lastest_stock_data(table_name)
+
+        self.stock_meta_db_base.delete_latest_bars(period)
+        row_count = self.stock_meta_db_base.upsert_latest_bars(df_lastest, period, force=True)
+        self.stock_meta_db_base.set_latest_bars_built(period)
+
+        self.logger.info(f"重建完成，共{row_count}只股票，耗时: {time.time() - start_time:.2f}秒")
+        return row_count
+
+    def get_stock_name_dict(self):
+        '''返回 {code: name} 字典'''
+        dict_name = {}
+        with self.lock:
+            dict_stocks_info = self.dict_stocks_info
+        for board_data in dict_stocks_info.values():
+            if board_data is None or board_data.empty:
+                continue
+            dict_name.update(dict(zip(board_data['证券代码'], board_data['证券名称'])))
+        return dict_name
+
+    def lastest_row_data_to_dict(self, df_lastest, code_list=None):
+        '''将最后一行数据的 DataFrame 拆分为 {code: 单行DataFrame}，顺序与 code_list 一致'''
+        if df_lastest is None or df_lastest.empty:
+            return {}
+
+        dict_rows = {code: df_code.reset_index(drop=True) for code, df_code in df_lastest.groupby('code', sort=False)}
+        if code_list is None:
+            return dict_rows
+        return {code: dict_rows[code] for code in code_list if code in dict_rows}
     
     def get_lastest_row_data_dict_by_code_list_auto(self, code_list=[], period=TimePeriod.DAY):
         '''优先从缓存中获取：指定列表中的股票代码指定周期的最后一天股票数据'''
@@ -330,30 +644,8 @@ class BaostockDataManager(QObject):
             self.logger.info(f"没有指定股票代码，返回空字典")
             return {}
         
-        dict_result = {}
-        table_name = period.get_table_name()
-        for code in code_list:
-            try:
-                with self.lock:
-                    lastest_1d_data = self.stock_db_base.get_lastest_stock_data(code, table_name)     
-
-                if lastest_1d_data is None or lastest_1d_data.empty:
-                    self.logger.debug(f"股票 {code} 日线数据为空，跳过指标计算")
-                    continue 
-
-                # 只对非空数据进行指标计算
-                # self.data_type_conversion(lastest_1d_data)
-                lastest_1d_data['name'] = self.get_stock_name_by_code(code)
-                # sdi.default_indicators_auto_calculate(lastest_1d_data)
-                dict_result[code] = lastest_1d_data
-                
-            except Exception as e:
-                self.logger.error(f"处理股票 {code} 时发生错误: {str(e)}")
-                self.logger.error(traceback.format_exc())
-                # 继续处理下一个股票
-                continue
-
-        return dict_result
+        df_lastest = self.get_all_lastest_row_data_by_period(period, code_list)
+        return self.lastest_row_data_to_dict(df_lastest, code_list)
     
     def get_lastest_stock_data_date(self, code, period=TimePeriod.DAY):
         '''获取指定股票的指定周期的股票数据最后一天的日期'''
@@ -363,11 +655,142 @@ class BaostockDataManager(QObject):
             s_return = dict_lastest_1d_stock_data[code].iloc[0]['date'] if code in dict_lastest_1d_stock_data else None 
             self.logger.info(f"返回缓存的最后一天（行数据）的日期： {s_return}")
             return s_return
-        else:  # 从数据库中读取
-            table_name = period.get_table_name()
+        else:  # 从元数据目录（或K线表索引）中读取
+            high_water_mark = self.get_high_water_mark(code, period)
+            return high_water_mark['date'] if high_water_mark is not None else None
+
+    def get_high_water_mark(self, code, period=TimePeriod.DAY):
+        '''
+            获取指定股票指定周期已入库的最后日期/时间（高水位），增量更新时据此只获取并追加新数据
+            来自元数据目录，目录中没有记录时走K线表索引（MAX(date) 或倒序取一行），不回填目录、不扫描全表
+            返回: {'date': 'YYYY-MM-DD', 'time': 'YYYY-MM-DD HH:MM:SS' 或 None}，无数据时返回 None
+        '''
+        dict_entry = self._get_stored_catalog_entry(code, period)
+        if dict_entry is not None:
+            if not dict_entry['row_count']:
+                return None
+            return {'date': dict_entry['last_date'], 'time': dict_entry['last_time']}
+
+        with self.lock:
+            return self.stock_db_base.get_high_water_mark(code, period.get_table_name())
+
+    # ----------------------元数据目录相关接口-----------------------------------------
+    def _check_stock_db_file_exists(self, code, period=TimePeriod.DAY):
+        '''只检查数据库文件是否存在（不打开数据库），用于发现目录与数据库文件不同步（如数据库被手动删除）'''
+        with self.lock:
+            db_path = self.stock_db_base.get_db_path(code, period.get_table_name())
+        return db_path.exists()
+
+    def _get_stored_catalog_entry(self, code, period=TimePeriod.DAY):
+        '''
+            只读取目录中已有的记录，不回填；数据库文件已不存在时只清除该股票该周期的目录记录并返回 None
+            （合并存储下数据库文件按周期划分，其他周期的记录仍然有效；不清除时 filter_stale_codes 会把该股票当作已是最新）
+        '''
+        dict_entry = self.stock_meta_db_base.get_catalog_entry(code, period)
+        if dict_entry is None:
+            return None
+        if self._check_stock_db_file_exists(code, period):
+            return dict_entry
+        self.logger.info(f"股票 {code} 的{TimePeriod.get_chinese_label(period)}数据库文件已不存在，清除该周期的元数据目录记录")
+        self.stock_meta_db_base.delete_catalog_entries(code=code, period=period)
+        return None
+
+    def get_catalog_entry(self, code, period=TimePeriod.DAY):
+        '''
+            获取指定股票指定周期的元数据目录记录（first_date、last_date、last_time、row_count、last_ingest_time、checksum）
+            目录中没有记录时统计一次并回填（checksum 为 NULL），统计行数需要扫描全表，
+            因此不在读取路径上调用；只需要最后日期时使用 get_high_water_mark。
+            升级后可先调用 rebuild_stock_catalog 一次性回填
+            返回: dict，无数据时返回 None
+        '''
+        dict_entry = self._get_stored_catalog_entry(code, period)
+        if dict_entry is not None:
+            return dict_entry
+
+        table_name = period.get_table_name()
+        with self.lock:
+            dict_stats = self.stock_db_base.get_table_stats(code, table_name)
+        if dict_stats is None:
+            return None
+
+        self.stock_meta_db_base.set_catalog_entry(code, period, dict_stats['first_date'], dict_stats['last_date'],
+                                                  dict_stats['last_time'], dict_stats['row_count'])
+        return self.stock_meta_db_base.get_catalog_entry(code, period)
+
+    def get_stock_catalog(self, period=TimePeriod.DAY, code_list=None):
+        '''返回指定周期的元数据目录 DataFrame'''
+        return self.stock_meta_db_base.get_catalog(period, code_list)
+
+    def get_stale_codes(self, period=TimePeriod.DAY, target_date=None, code_list=None):
+        '''
+            需要更新的股票：元数据目录中最后日期早于 target_date（默认今天）或目录中不存在的股票
+        '''
+        if target_date is None:
+            target_date = datetime.datetime.now().strftime("%Y-%m-%d")
+        return self.stock_meta_db_base.get_stale_codes(period, target_date, code_list)
+
+    def rebuild_stock_catalog(self, period=TimePeriod.DAY, code_list=None):
+        '''从K线数据库重建指定周期的元数据目录（逐只股票统计，checksum 为 NULL）'''
+        table_name = period.get_table_name()
+        self.logger.info(f"重建元数据目录: {table_name}")
+        start_time = time.time()
+
+        with self.lock:
+            if code_list is None:
+                code_list = self.stock_db_base.list_all_stocks(table_name)
+
+        self.stock_meta_db_base.delete_catalog_entries(period=period)
+        row_count = 0
+        for code in code_list:
             with self.lock:
-                lastest_data = self.stock_db_base.get_lastest_stock_data(code, table_name) 
-            return lastest_data.iloc[0]['date'] if lastest_data is not None and not lastest_data.empty else None
+                dict_stats = self.stock_db_base.get_table_stats(code, table_name)
+            if dict_stats is None:
+                continue
+            self.stock_meta_db_base.set_catalog_entry(code, period, dict_stats['first_date'], dict_stats['last_date'],
+                                                      dict_stats['last_time'], dict_stats['row_count'])
+            row_count += 1
+
+        with self.lock:
+            self.stock_db_base.close_connection()
+
+        self.logger.info(f"重建完成，共{row_count}只股票，耗时: {time.time() - start_time:.2f}秒")
+        return row_count
+
+    # ----------------------下载任务台账相关接口-----------------------------------------
+    def start_ingest_job(self, job_name, period, code_list, resume=True, target_date=None):
+        '''
+            开始（或继续）一个批量下载任务
+            resume 为 True 且存在目标交易日同为 target_date 的未完成同名任务时，继续该任务中尚未完成的股票（pending、failed），
+            忽略 code_list；否则以 code_list 新建任务（较早交易日中断的任务随之删除）
+            返回: (job_id, 待处理股票代码列表)
+        '''
+        if resume:
+            dict_job = self.stock_meta_db_base.get_unfinished_ingest_job(job_name, period, target_date)
+            if dict_job is not None:
+                list_codes = self.stock_meta_db_base.get_ingest_job_remaining_codes(dict_job['job_id'])
+                self.logger.info(f"继续未完成的下载任务 {job_name}（{dict_job['created_at']} 创建，目标交易日 {target_date}）："
+                                 f"剩余 {len(list_codes)}/{dict_job['total']} 只股票")
+                return dict_job['job_id'], list_codes
+
+        job_id = self.stock_meta_db_base.create_ingest_job(job_name, period, code_list, target_date)
+        return job_id, list(code_list)
+
+    def mark_ingest_job_items(self, job_id, code_list, status, error=None):
+        '''记录股票处理结果；台账写入失败只记录日志，不影响数据入库'''
+        try:
+            self.stock_meta_db_base.mark_ingest_job_items(job_id, code_list, status, error)
+        except Exception as e:
+            self.logger.error(f"更新下载任务台账 {job_id} 时出错: {str(e)}")
+
+    def finish_ingest_job(self, job_id):
+        '''
+            任务结束时调用：所有股票均已处理时标记为完成，否则保持未完成状态，下次同名任务从剩余股票继续
+            返回: dict 各状态的股票数量，另含 completed
+        '''
+        completed = self.stock_meta_db_base.finish_ingest_job(job_id)
+        progress = self.stock_meta_db_base.get_ingest_job_progress(job_id)
+        progress['completed'] = completed
+        return progress
 
     def save_stock_data_to_db(self, code, df_data, writeWay="replace", period=TimePeriod.DAY):
         '''保存k线数据到指定周期数据库'''
@@ -376,72 +799,113 @@ class BaostockDataManager(QObject):
         with self.lock:
             self.stock_db_base.save_bao_stock_data_to_db(code, df_data, writeWay, table_name)
 
+        self._on_stock_data_saved(code, df_data, writeWay, period)
 
-    def data_type_conversion(self, result):
-        # 1. 转换日期列
-        if 'date' in result.columns:
-            result['date'] = pd.to_datetime(result['date'], format='%Y-%m-%d').dt.date  # 转换为 datetime.date 类型，或者用 .dt.normalize() 取日期部分
+    def save_stock_data_batch_to_db(self, list_items, period=TimePeriod.DAY):
+        '''
+            批量保存多只股票的k线数据（合并存储下所有股票在同一事务中提交）
+            list_items: [(code, df_data, writeWay), ...]
+            返回: 写入成功的股票代码列表
+        '''
+        table_name = period.get_table_name()
+        with self.lock:
+            list_result = self.stock_db_base.save_bao_stock_data_batch(list_items, table_name)
+
+        dict_error = {code: error for code, _, error in list_result}
+        list_saved_codes = []
+        for code, df_data, writeWay in list_items:
+            error = dict_error.get(code)
+            if error is not None:
+                self.logger.error(f"保存股票 {code} 数据到 {table_name} 失败: {error}")
+                continue
+            self._on_stock_data_saved(code, df_data, writeWay, period)
+            list_saved_codes.append(code)
+        return list_saved_codes
 
-        # 处理 time 字段 - 增强版
-        if 'time' in result.columns:
-            # 先尝试直接转换，如果失败则逐个处理
+    def _on_stock_data_saved(self, code, df_data, writeWay, period):
+        '''K线数据入库后同步维护最新K线汇总表、元数据目录、二进制缓存和增量指标缓存'''
+        # 同步维护最新K线汇总表
+        try:
+            self.stock_meta_db_base.upsert_latest_bars(df_data, period, force=(writeWay == 'replace'))
+        except Exception as e:
+            self.logger.error(f"更新股票 {code} 最新K线汇总数据时出错: {str(e)}")
+
+        # 同步维护元数据目录
+        try:
+            self.stock_meta_db_base.update_catalog(code, df_data, period, writeWay)
+        except Exception as e:
+            self.logger.error(f"更新股票 {code} 元数据目录时出错: {str(e)}")
+
+        # 二进制缓存在下次读取时重建
+        if self.is_kline_cache_period(period):
+            self.kline_cache.invalidate(code, period)
+
+        # 覆盖或改写已计算K线时丢弃增量指标缓存（含持久化的指标列），末尾追加的K线在下次读取时递推
+        if self.indicator_engine is not None:
+            self.indicator_engine.on_stock_data_saved(code, period, df_data, writeWay)
+
+        # 源周期更新后同步聚合（日线 -> 周线等，minute_base_period -> 30/60/120分钟）
+        list_derived_periods = [derived_period for derived_period in self.list_derived_periods
+                                if self.get_derived_source_period(derived_period) == period]
+        if list_derived_periods:
             try:
-                # 首先尝试标准格式
-                result['time'] = pd.to_datetime(result['time'], format='%Y-%m-%d %H:%M:%S')
-            except (ValueError, TypeError):
-                try:
-                    # 尝试紧凑格式 YYYYMMDDHHMMSSxxx
-                    def parse_compact_time(time_str):
-                        if pd.isna(time_str):
-                            return None
-                        
-                        time_str = str(time_str).strip()
-                        
-                        # 处理类似 "20250102100000000" 的格式
-                        if len(time_str) >= 14 and time_str.isdigit():
-                            # 截取前14位作为日期时间: YYYYMMDDHHMMSS
-                            if len(time_str) >= 14:
-                                year = time_str[0:4]
-                                month = time_str[4:6]
-                                day = time_str[6:8]
-                                hour = time_str[8:10]
-                                minute = time_str[10:12]
-                                second = time_str[12:14]
-                                
-                                formatted_time = f"{year}-{month}-{day} {hour}:{minute}:{second}"
-                                return pd.to_datetime(formatted_time, format='%Y-%m-%d %H:%M:%S')
-                        
-                        # 其他格式尝试
-                        return pd.to_datetime(time_str)
-                    
-                    # 对每个时间值单独处理
-                    result['time'] = result['time'].apply(parse_compact_time)
-                    
-                except Exception as e:
-                    self.logger.warning(f"时间字段转换出现异常: {e}")
-                    # 最后的备选方案：使用 pandas 自动推断
-                    try:
-                        result['time'] = pd.to_datetime(result['time'], errors='coerce')
-                    except:
-                        # 如果还是失败，转换为字符串
-                        result['time'] = result['time'].astype(str)
-                        self.logger.warning(f"时间字段转换最终失败，已转换为字符串")
-
-
-        # 2. 转换数值列 (开盘, 最高, 最低, 收盘, 成交额, 涨跌幅, 换手率)
-        numeric_columns = ['open', 'high', 'low', 'close', 'amount', 'change_percent', 'turnover_rate']
-        for col in numeric_columns:
-            if col in result.columns:
-                # result[col] = result[col].str.replace(',', '').str.replace('%', '').str.replace('--', '0')
-                result[col] = pd.to_numeric(result[col], errors='coerce')  # errors='coerce' 将无效解析转换为NaN
-
-        # 3. 转换成交量 (整数)
-        if 'volume' in result.columns:
-            result['volume'] = pd.to_numeric(result['volume'], errors='coerce').astype('Int64')  # 使用 Pandas 的可空整数类型
-
-        # 4. 转换复权方式 (整数)
-        if 'adjustflag' in result.columns:
-            result['adjustflag'] = pd.to_numeric(result['adjustflag'], errors='coerce').astype('Int64')
+                self._update_derived_bars(code, period, list_derived_periods, rebuild=(writeWay == 'replace'))
+            except Exception as e:
+                self.logger.error(f"由{TimePeriod.get_chinese_label(period)}聚合股票 {code} 的K线时出错: {str(e)}")
+
+    def update_derived_bars(self, code, period, rebuild=False):
+        '''
+            由已入库的源周期K线聚合生成 period 的K线并入库（见 get_derived_source_period），只写入已结束的周期
+            返回: 写入的K线数量
+        '''
+        source_period = self.get_derived_source_period(period)
+        if not is_resample_period(period) and not is_intraday_resample_period(period, source_period):
+            raise ValueError(f"周期 {period} 不能由{TimePeriod.get_chinese_label(source_period)}聚合生成")
+        return self._update_derived_bars(code, source_period, [period], rebuild)[period]
+
+    def _update_derived_bars(self, code, source_period, list_periods, rebuild=False):
+        '''
+            同一源周期的多个聚合周期只读取一次源数据
+            增量：从各周期高水位（上一根已结束K线）中最早的日期起读取源数据，聚合后只追加高水位之后的K线，
+                  高水位所在K线只用于提供前收盘价（长周期涨跌幅）
+            rebuild 为 True 或尚无数据时读取全部源数据重建（replace）
+            返回: {period: 写入的K线数量}
+        '''
+        dict_high_water_mark = {}
+        for period in list_periods:
+            high_water_mark = None if rebuild else self.get_high_water_mark(code, period)
+            # 分钟级高水位以时间为准，缺少时间时按无数据重建
+            if high_water_mark is not None and TimePeriod.is_minute_level(period) and high_water_mark['time'] is None:
+                high_water_mark = None
+            dict_high_water_mark[period] = high_water_mark
+        list_dates = [high_water_mark['date'] for high_water_mark in dict_high_water_mark.values() if high_water_mark is not None]
+        start_date = min(list_dates) if len(list_dates) == len(list_periods) else None
+
+        dict_count = {period: 0 for period in list_periods}
+        df_source = self.get_stock_data_from_db_by_period(code, source_period, start_date=start_date)
+        if df_source.empty:
+            return dict_count
+
+        trade_dates = self.trading_calendar.get_trade_dates()
+        for period in list_periods:
+            key = 'time' if TimePeriod.is_minute_level(period) else 'date'
+            if key == 'time':
+                df_bars = resample_minute_bars(df_source, period)
+            else:
+                df_bars = resample_daily_bars(df_source, period, trade_dates)
+            high_water_value = dict_high_water_mark[period][key] if dict_high_water_mark[period] is not None else None
+            if high_water_value is not None:
+                df_bars = df_bars[df_bars[key].astype(str) > str(high_water_value)]
+            if df_bars.empty:
+                continue
+
+            self.save_stock_data_to_db(code, df_bars, 'append' if high_water_value is not None else 'replace', period)
+            dict_count[period] = len(df_bars)
+        return dict_count
+
+    def data_type_conversion(self, result):
+        # 1~4. 日期、时间、数值列、成交量与复权方式（按列整体转换，见 common.kline_type_conversion）
+        convert_kline_columns(result)
 
         # 5. 转换是否ST (布尔值) - 根据你的数据实际情况定义如何映射
         # 假设你的字符串可能是 '是'/'否' 或 '1'/'0'
@@ -1,6 +1,10 @@
 from enum import Enum
 from functools import total_ordering
 
+# 存储用的周期键（表名、缓存目录）：SQLite 表名与 Windows 文件名不区分大小写，
+# 月线 '1M' 会与1分钟 '1m' 冲突，长周期统一使用小写且互不相同的键
+_STORAGE_KEY_OVERRIDES = {'1M': '1mon', '1Q': '1q', '1Y': '1y'}
+
 class TimePeriod(Enum):
     # 定义周期优先级顺序（使用字符串值避免初始化问题）
     _period_order = [
@@ -101,12 +105,19 @@ class TimePeriod(Enum):
                          cls.MINUTE_15, cls.MINUTE_30, cls.MINUTE_45, cls.MINUTE_60, 
                          cls.MINUTE_90, cls.MINUTE_120]
     
+    def get_storage_key(self):
+        """
+        存储用的周期键（大小写不敏感时仍唯一）
+        例如: '1d' -> '1d', '30m' -> '30m', '1M' -> '1mon'
+        """
+        return _STORAGE_KEY_OVERRIDES.get(self.value, self.value)
+
     def get_table_name(self):
         """
         获取对应级别的数据库表名
-        例如: '1d' -> 'stock_data_1d', '30m' -> 'stock_data_30m'
+        例如: '1d' -> 'stock_data_1d', '30m' -> 'stock_data_30m', '1M' -> 'stock_data_1mon'
         """
-        return f"stock_data_{self.value}"
+        return f"stock_data_{self.get_storage_key()}"
     
 
     def compare_to(self, other):
@@ -0,0 +1,224 @@
+import threading
+import datetime
+import numpy as np
+import pandas as pd
+
+from manager.logging_manager import get_logger
+
+'''
+    交易日历：一次加载后以有序数组回答交易日相关问题，持久化到元数据库（StockMetaDbBase.trade_calendar），
+    启动时从本地读取，只有本地日历不覆盖所需日期范围时才请求远端。
+        is_trading_day                  O(1)（集合查找）
+        next / previous_trading_day     O(log n)（二分查找）
+        count_trading_days              O(log n)
+        get_week_end_trading_day        O(log n)，交易周以自然周（周一至周日）划分
+        count_week_ends                 O(log n)，区间内已结束的交易周数量
+    日历未覆盖的日期按工作日（周一至周五）推算。
+'''
+
+def _to_day(value):
+    """'YYYY-MM-DD' / datetime.date / datetime.datetime / pd.Timestamp / np.datetime64 -> np.datetime64[D]"""
+    if isinstance(value, str):
+        return np.datetime64(value[:10], 'D')
+    if isinstance(value, pd.Timestamp):
+        return np.datetime64(value.date(), 'D')
+    return np.datetime64(value, 'D')
+
+def _week_id(days):
+    """自然周编号：1970-01-01 为周四，+3 后按7天整除即以周一为一周的开始"""
+    return (days.astype(np.int64) + 3) // 7
+
+class TradingCalendar:
+    def __init__(self, meta_db_base=None):
+        '''
+            meta_db_base: StockMetaDbBase，为 None 时不持久化
+        '''
+        self.logger = get_logger(__name__)
+        self.meta_db_base = meta_db_base
+        self.lock = threading.Lock()
+        self._set_arrays(np.array([], dtype='datetime64[D]'), np.array([], dtype='datetime64[D]'))
+
+    def _set_arrays(self, calendar_days, trade_days):
+        '''calendar_days: 日历覆盖的全部日期（升序），trade_days: 其中的交易日（升序）'''
+        if len(calendar_days) > 0:
+            first_day, last_day = calendar_days[0], calendar_days[-1]
+        else:
+            first_day = last_day = None
+
+        # 每个交易周的最后一个交易日；日历最后一周未覆盖到周五时，该周的最后一个交易日无法确定，不计入（由周五推算）
+        week_end_days = trade_days
+        if len(trade_days) > 0:
+            week_ids = _week_id(trade_days)
+            week_end_days = trade_days[np.r_[week_ids[1:] != week_ids[:-1], True]]
+            if _week_id(np.array([last_day]))[0] == week_ids[-1] and (last_day.astype(np.int64) + 3) % 7 < 4:
+                week_end_days = week_end_days[:-1]
+
+        with self.lock:
+            self._calendar_days = calendar_days
+            self._trade_days = trade_days
+            self._trade_day_set = set(trade_days.astype(str).tolist())
+            self._week_end_days = week_end_days
+            self._first_day = first_day
+            self._last_day = last_day
+
+    def _snapshot(self):
+        with self.lock:
+            return self._trade_days, self._trade_day_set, self._week_end_days, self._first_day, self._last_day
+
+    # ----------------------------------------加载与持久化----------------------------------------
+    def set_calendar(self, df_calendar, persist=True):
+        '''
+            合并交易日历（同一日期以新数据为准）
+            df_calendar: 列为 calendar_date（YYYY-MM-DD）、is_trading_day（'1'/'0' 或 1/0），与 Baostock query_trade_dates 一致
+        '''
+        if df_calendar is None or df_calendar.empty:
+            return
+        df_new = pd.DataFrame({
+            'calendar_date': df_calendar['calendar_date'].astype(str).str.slice(0, 10),
+            'is_trading_day': df_calendar['is_trading_day'].astype(int),
+        })
+        if persist and self.meta_db_base is not None:
+            try:
+                self.meta_db_base.save_trade_calendar(df_new)
+            except Exception as e:
+                self.logger.error(f"保存交易日历时出错: {str(e)}")
+
+        df_merged = pd.concat([self.to_frame(), df_new], ignore_index=True)
+        df_merged = df_merged.drop_duplicates('calendar_date', keep='last').sort_values('calendar_date')
+        calendar_days = df_merged['calendar_date'].to_numpy(dtype='datetime64[D]')
+        self._set_arrays(calendar_days, calendar_days[df_merged['is_trading_day'].to_numpy() == 1])
+
+    def load_local(self):
+        '''从元数据库加载已持久化的交易日历，返回加载的天数'''
+        if self.meta_db_base is None:
+            return 0
+        try:
+            df_calendar = self.meta_db_base.get_trade_calendar()
+        except Exception as e:
+            self.logger.error(f"读取本地交易日历时出错: {str(e)}")
+            return 0
+        self.set_calendar(df_calendar, persist=False)
+        return len(df_calendar)
+
+    def ensure_range(self, start_date, end_date, fetch_func):
+        '''
+            保证日历覆盖 [start_date, end_date]，本地不覆盖时调用 fetch_func(start_date, end_date) 获取并持久化
+            fetch_func 返回与 set_calendar 相同格式的 DataFrame
+            返回: 是否已覆盖
+        '''
+        if self.is_covered(start_date, end_date):
+            return True
+        start_date, end_date = str(_to_day(start_date)), str(_to_day(end_date))
+        self.logger.info(f"本地交易日历未覆盖 {start_date} 至 {end_date}，从远端获取")
+        try:
+            df_calendar = fetch_func(start_date, end_date)
+        except Exception as e:
+            self.logger.error(f"获取交易日历时出错: {str(e)}")
+            return False
+        self.set_calendar(df_calendar)
+        return self.is_covered(start_date, end_date)
+
+    def is_covered(self, start_date, end_date=None):
+        '''日历是否覆盖 [start_date, end_date]'''
+        _, _, _, first_day, last_day = self._snapshot()
+        if first_day is None:
+            return False
+        end_date = start_date if end_date is None else end_date
+        return first_day <= _to_day(start_date) and _to_day(end_date) <= last_day
+
+    def to_frame(self):
+        '''返回: DataFrame，列为 calendar_date（YYYY-MM-DD）、is_trading_day（int）'''
+        with self.lock:
+            calendar_days, trade_days = self._calendar_days, self._trade_days
+        return pd.DataFrame({
+            'calendar_date': calendar_days.astype(str),
+            'is_trading_day': np.isin(calendar_days, trade_days).astype(int),
+        })
+
+    def get_trade_dates(self):
+        '''已覆盖范围内的交易日（datetime64[D] 升序数组）'''
+        with self.lock:
+            return self._trade_days
+
+    # ----------------------------------------查询----------------------------------------
+    def is_trading_day(self, day):
+        trade_days, trade_day_set, _, first_day, last_day = self._snapshot()
+        day = _to_day(day)
+        if first_day is not None and first_day <= day <= last_day:
+            return str(day) in trade_day_set
+        return bool(np.is_busday(day))
+
+    def next_trading_day(self, day):
+        '''day 之后（不含）的第一个交易日'''
+        trade_days, _, _, first_day, last_day = self._snapshot()
+        day = _to_day(day) + np.timedelta64(1, 'D')
+        if first_day is None:
+            return np.busday_offset(day, 0, roll='forward')
+        if day < first_day:
+            candidate = np.busday_offset(day, 0, roll='forward')
+            if candidate < first_day:
+                return candidate
+            day = first_day
+        if day <= last_day:
+            index = np.searchsorted(trade_days, day, side='left')
+            if index < len(trade_days):
+                return trade_days[index]
+        return np.busday_offset(max(day, last_day + np.timedelta64(1, 'D')), 0, roll='forward')
+
+    def previous_trading_day(self, day):
+        '''day 之前（不含）的最后一个交易日'''
+        trade_days, _, _, first_day, last_day = self._snapshot()
+        day = _to_day(day) - np.timedelta64(1, 'D')
+        if first_day is None:
+            return np.busday_offset(day, 0, roll='backward')
+        if day > last_day:
+            candidate = np.busday_offset(day, 0, roll='backward')
+            if candidate > last_day:
+                return candidate
+            day = last_day
+        if day >= first_day:
+            index = np.searchsorted(trade_days, day, side='right')
+            if index > 0:
+                return trade_days[index - 1]
+        return np.busday_offset(min(day, first_day - np.timedelta64(1, 'D')), 0, roll='backward')
+
+    def _count_in_range(self, sorted_days, start_day, end_day, weekmask):
+        '''sorted_days 中位于 [start_day, end_day] 的数量，日历未覆盖的部分按 weekmask 推算'''
+        _, _, _, first_day, last_day = self._snapshot()
+        one_day = np.timedelta64(1, 'D')
+        if end_day < start_day:
+            return 0
+        if first_day is None:
+            return int(np.busday_count(start_day, end_day + one_day, weekmask=weekmask))
+
+        count = 0
+        if start_day < first_day:
+            count += int(np.busday_count(start_day, min(end_day, first_day - one_day) + one_day, weekmask=weekmask))
+        if end_day > last_day:
+            count += int(np.busday_count(max(start_day, last_day + one_day), end_day + one_day, weekmask=weekmask))
+        covered_start, covered_end = max(start_day, first_day), min(end_day, last_day)
+        if covered_start <= covered_end:
+            count += int(np.searchsorted(sorted_days, covered_end, side='right') - np.searchsorted(sorted_days, covered_start, side='left'))
+        return count
+
+    def count_trading_days(self, start_date, end_date=None):
+        '''[start_date, end_date] 内的交易日天数，end_date 默认为今天'''
+        end_date = datetime.date.today() if end_date is None else end_date
+        return self._count_in_range(self.get_trade_dates(), _to_day(start_date), _to_day(end_date), '1111100')
+
+    def get_week_end_trading_day(self, day):
+        '''day 所在交易周的最后一个交易日，该周没有交易日时返回 None'''
+        day = _to_day(day)
+        week_start = day - np.timedelta64(int((day.astype(np.int64) + 3) % 7), 'D')
+        week_end = week_start + np.timedelta64(6, 'D')
+        last_trading_day = self.previous_trading_day(week_end + np.timedelta64(1, 'D'))
+        return last_trading_day if last_trading_day >= week_start else None
+
+    def count_week_ends(self, start_date, end_date=None):
+        '''
+            [start_date, end_date] 内已结束的交易周数量（交易周最后一个交易日落在区间内），end_date 默认为今天
+            日历未覆盖的部分按周五推算
+        '''
+        _, _, week_end_days, _, _ = self._snapshot()
+        end_date = datetime.date.today() if end_date is None else end_date
+        return self._count_in_range(week_end_days, _to_day(start_date), _to_day(end_date), '0000100')
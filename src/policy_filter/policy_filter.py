@@ -25,6 +25,24 @@ s_target_code = ""          # 带前缀，如：sh.600000, sz_000001
 b_less_than_ma5 = False
 b_filter_log = False
 
+# 各筛选函数用到的列，调用方据此只计算所需的指标（见 indicators.lazy_indicator_frame）
+DAILY_UP_MA52_COLUMNS = ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma24', 'ma30', 'ma52', 'ma60', 'turnover_rate', 'volume_ratio')
+DAILY_UP_MA24_COLUMNS = ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma20', 'ma24', 'ma30', 'ma52', 'turnover_rate', 'volume_ratio')
+DAILY_UP_MA20_COLUMNS = ('date', 'close', 'dea', 'ma5', 'ma10', 'ma20', 'ma24', 'ma52', 'turnover_rate', 'volume_ratio')
+DAILY_UP_MA10_COLUMNS = ('date', 'close', 'dea', 'ma5', 'ma10', 'ma24', 'ma52', 'turnover_rate', 'volume_ratio')
+LIMIT_COPY_COLUMNS = ('date', 'code', 'close')
+BREAK_THROUGH_AND_STEP_BACK_COLUMNS = ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma20', 'ma24', 'ma30', 'ma52', 'turnover_rate', 'volume_ratio')
+DAILY_DOWN_BETWEEN_MA24_MA52_COLUMNS = ('date', 'close', 'dea', 'ma5', 'ma24', 'ma52', 'ma60', 'turnover_rate', 'volume_ratio')
+DAILY_DOWN_BETWEEN_MA5_MA52_COLUMNS = ('date', 'close', 'dea', 'ma5', 'ma10', 'ma52', 'ma60', 'turnover_rate', 'volume_ratio')
+DAILY_DOWN_BREAKTHROUGH_COLUMNS = ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma24', 'ma52', 'ma60', 'turnover_rate', 'volume_ratio')
+DAILY_DOWN_DOUBLE_BOTTOM_COLUMNS = ('date', 'code', 'close', 'low', 'diff', 'dea', 'ma5', 'ma10', 'ma24', 'ma52', 'ma60', 'turnover_rate', 'volume_ratio')
+LOWEST_AFTER_DEA_CROSS_COLUMNS = ('code', 'close', 'dea', 'low')
+ADJUST_PERIOD_COLUMNS = ('date', 'code', 'close', 'low', 'high', IndicatrosEnum.MACD_DIFF.value, IndicatrosEnum.MACD_DEA.value, IndicatrosEnum.MACD.value, 'ma5', 'ma24', 'ma52')
+# get_last_adjust_period_deviate_status 内部调用 find_unit_adjust_period，需同时包含 ADJUST_PERIOD_COLUMNS
+ADJUST_PERIOD_DEVIATE_STATUS_COLUMNS = ('turnover_rate', 'volume_ratio') + ADJUST_PERIOD_COLUMNS
+WEEKLY_CLOSE_MA52_COLUMNS = ('date', 'close', 'ma52')
+WEEKLY_CLOSE_DEA_MA52_COLUMNS = ('date', 'close', 'dea', 'ma52')
+
 def set_ma5_diff(ma5_diff):
     policy_filter_ma5_diff = ma5_diff
 
@@ -149,7 +167,7 @@ def daily_up_ma52_filter(df_filter_data, df_weekly_data, period=TimePeriod.DAY):
         logger.info("筛选数据数据为空！")
         return False
 
-    if not columns_check(df_filter_data, ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma24', 'ma30',  'ma52', 'ma60', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, DAILY_UP_MA52_COLUMNS):
         logger.info("筛选数据列名不存在！")
         return False
 
@@ -168,7 +186,7 @@ def daily_up_ma52_filter(df_filter_data, df_weekly_data, period=TimePeriod.DAY):
     day_lb = last_day_row['volume_ratio'].item()
 
     if b_weekly_condition and df_weekly_data is not None and not df_weekly_data.empty:
-        if not columns_check(df_weekly_data, ('date', 'close', 'dea', 'ma52')):
+        if not columns_check(df_weekly_data, WEEKLY_CLOSE_DEA_MA52_COLUMNS):
             logger.info("周线列名不存在！")
             return False
         
@@ -216,7 +234,7 @@ def daily_up_ma24_filter(df_filter_data, df_weekly_data, period=TimePeriod.DAY):
         return False
     
     
-    if not columns_check(df_filter_data, ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma20', 'ma24', 'ma30', 'ma52', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, DAILY_UP_MA24_COLUMNS):
         return False
     
     last_day_row = df_filter_data.tail(1)
@@ -233,7 +251,7 @@ def daily_up_ma24_filter(df_filter_data, df_weekly_data, period=TimePeriod.DAY):
     day_lb = last_day_row['volume_ratio'].item()
 
     if b_weekly_condition and df_weekly_data is not None and not df_weekly_data.empty:
-        if not columns_check(df_weekly_data, ('date', 'close', 'ma52')):
+        if not columns_check(df_weekly_data, WEEKLY_CLOSE_MA52_COLUMNS):
             return False
         
         last_week_row = df_weekly_data.tail(1)
@@ -275,7 +293,7 @@ def daily_up_ma10_filter(df_filter_data, period=TimePeriod.DAY):
     if df_filter_data.empty:
         return False
 
-    if not columns_check(df_filter_data, ('date', 'close', 'dea', 'ma5', 'ma10', 'ma24', 'ma52', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, DAILY_UP_MA10_COLUMNS):
         return False
     
     last_day_row = df_filter_data.tail(1)
@@ -320,7 +338,7 @@ def daily_up_ma20_filter(df_filter_data, period=TimePeriod.DAY):
     day_ma52 = 0.0
     day_turn = 0.0
     day_lb = 0.0
-    if not columns_check(df_filter_data, ('date', 'close', 'dea', 'ma5', 'ma10', 'ma20', 'ma24', 'ma52', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, DAILY_UP_MA20_COLUMNS):
         return False
     
     last_day_row = df_filter_data.tail(1)
@@ -456,7 +474,7 @@ def break_through_and_step_back(df_filter_data, period=TimePeriod.DAY):
     if df_filter_data.empty:
         return False
     
-    if not columns_check(df_filter_data, ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma20', 'ma24', 'ma30', 'ma52', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, BREAK_THROUGH_AND_STEP_BACK_COLUMNS):
         return False
 
     last_row = df_filter_data.tail(1)
@@ -486,7 +504,7 @@ def break_through_and_step_back_2(df_filter_data, period=TimePeriod.DAY):
     if df_filter_data.empty:
         return False
     
-    if not columns_check(df_filter_data, ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma20', 'ma24', 'ma30', 'ma52', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, BREAK_THROUGH_AND_STEP_BACK_COLUMNS):
         return False
 
     last_row = df_filter_data.tail(1)
@@ -517,7 +535,7 @@ def break_through_and_step_back_3(df_filter_data, period=TimePeriod.DAY):
         logger.warning("数据为空")
         return False
     
-    if not columns_check(df_filter_data, ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma20', 'ma24', 'ma30', 'ma52', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, BREAK_THROUGH_AND_STEP_BACK_COLUMNS):
         logger.warning("缺少数据列")
         return False
 
@@ -558,7 +576,7 @@ def daily_down_between_ma24_ma52_filter(df_filter_data, df_weekly_data, period=T
     if df_filter_data.empty:
         return False
     
-    if not columns_check(df_filter_data, ('date', 'close', 'dea', 'ma24', 'ma52', 'ma60', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, DAILY_DOWN_BETWEEN_MA24_MA52_COLUMNS):
         return False
     
     last_day_row = df_filter_data.tail(1)
@@ -576,7 +594,7 @@ def daily_down_between_ma24_ma52_filter(df_filter_data, df_weekly_data, period=T
     day_lb = last_day_row['volume_ratio'].item()
 
     if b_weekly_condition and df_weekly_data is not None and not df_weekly_data.empty:
-        if not columns_check(df_weekly_data, ('date', 'close', 'dea', 'ma52')):
+        if not columns_check(df_weekly_data, WEEKLY_CLOSE_DEA_MA52_COLUMNS):
             return False
     
         last_week_row = df_weekly_data.tail(1)
@@ -630,7 +648,7 @@ def daily_down_between_ma5_ma52_filter(df_filter_data, df_weekly_data, period=Ti
     if df_filter_data.empty:
         return False
     
-    if not columns_check(df_filter_data, ('date', 'close', 'dea', 'ma5', 'ma10', 'ma52', 'ma60', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, DAILY_DOWN_BETWEEN_MA5_MA52_COLUMNS):
         return False
 
     last_day_row = df_filter_data.tail(1)
@@ -647,7 +665,7 @@ def daily_down_between_ma5_ma52_filter(df_filter_data, df_weekly_data, period=Ti
     day_lb = last_day_row['volume_ratio'].item()
 
     if b_weekly_condition and df_weekly_data is not None and not df_weekly_data.empty:
-        if not columns_check(df_weekly_data, ('date', 'close', 'dea', 'ma52')):
+        if not columns_check(df_weekly_data, WEEKLY_CLOSE_DEA_MA52_COLUMNS):
             return False
 
         last_week_row = df_weekly_data.tail(1)
@@ -686,7 +704,7 @@ def daily_down_breakthrough_ma24_filter(df_filter_data):
     if df_filter_data.empty:
         return False
     
-    if not columns_check(df_filter_data, ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma24', 'ma52', 'ma60', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, DAILY_DOWN_BREAKTHROUGH_COLUMNS):
         return False
     
     last_day_row = df_filter_data.tail(1)
@@ -724,7 +742,7 @@ def daily_down_breakthrough_ma52_filter(df_filter_data):
     if df_filter_data.empty:
         return False
     
-    if not columns_check(df_filter_data, ('date', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma24', 'ma52', 'ma60', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, DAILY_DOWN_BREAKTHROUGH_COLUMNS):
         return False
     
     last_day_row = df_filter_data.tail(1)
@@ -771,7 +789,7 @@ def daily_down_double_bottom_filter(df_filter_data, df_weekly_data, b_weekly_fil
     
     # logger.info(df_filter_data.tail(10))
     
-    if not columns_check(df_filter_data, ('date', 'code', 'close', 'diff', 'dea', 'ma5', 'ma10', 'ma24', 'ma52', 'ma60', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, DAILY_DOWN_DOUBLE_BOTTOM_COLUMNS):
         return False
     
     last_day_row = df_filter_data.tail(1)
@@ -792,7 +810,7 @@ def daily_down_double_bottom_filter(df_filter_data, df_weekly_data, b_weekly_fil
         return False
     
     if b_weekly_condition and df_weekly_data is not None and not df_weekly_data.empty:
-        if not columns_check(df_weekly_data, ('date', 'close', 'dea', 'ma52')):
+        if not columns_check(df_weekly_data, WEEKLY_CLOSE_DEA_MA52_COLUMNS):
             return False
         
         last_week_row = df_weekly_data.tail(1)
@@ -856,7 +874,7 @@ def find_lowest_after_dea_cross_below_zero(df_filter_data):
         return result
     
     # 检查是否包含必要的列
-    if not columns_check(df_filter_data, ('code', 'dea', 'low')):
+    if not columns_check(df_filter_data, LOWEST_AFTER_DEA_CROSS_COLUMNS):
         logger.info("缺少必要的列：股票代码 或 DEA 或 最低")
         return result
     
@@ -918,7 +936,7 @@ def get_cross_index(df_data):
         return {}
     
     # 检查是否包含必要的列
-    if not columns_check(df_data, ('code', 'close', 'low', 'high', IndicatrosEnum.MACD_DIFF.value, IndicatrosEnum.MACD_DEA.value, IndicatrosEnum.MACD.value, 'ma24', 'ma52')):
+    if not columns_check(df_data, ADJUST_PERIOD_COLUMNS):
         logger.info("缺少必要的列：股票代码 或 DEA 或 最低")
         return {}
 
@@ -972,7 +990,7 @@ def get_last_adjust_period_deviate_status(df_filter_data, period=TimePeriod.DAY)
         return -1
     
     # 检查是否包含必要的列
-    if not columns_check(df_filter_data, ('date', 'code', 'turnover_rate', 'volume_ratio')):
+    if not columns_check(df_filter_data, ADJUST_PERIOD_DEVIATE_STATUS_COLUMNS):
         logger.info("缺少必要的列")
         return -1
     
@@ -1013,7 +1031,7 @@ def find_unit_adjust_period(df_data, period=TimePeriod.DAY):
         return unit_adjust_period_list
     
     # 检查是否包含必要的列
-    if not columns_check(df_data, ('code', 'close', 'low', 'high', IndicatrosEnum.MACD_DIFF.value, IndicatrosEnum.MACD_DEA.value, IndicatrosEnum.MACD.value, 'ma24', 'ma52')):
+    if not columns_check(df_data, ADJUST_PERIOD_COLUMNS):
         logger.info("缺少必要的列：股票代码 或 DEA 或 最低")
         return unit_adjust_period_list
     
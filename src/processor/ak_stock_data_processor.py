@@ -13,6 +13,8 @@ import time
 from common.common_api import *
 import threading
 from manager.logging_manager import get_logger
+from manager.config_manager import ConfigManager
+from processor.akshare_fetcher import AkshareBatchFetcher, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND, DEFAULT_MAX_RETRIES
 
 def singleton(cls):
     """
@@ -74,6 +76,21 @@ class AKStockDataProcessor:
     def get_stocks_eastmoney(self):
         return self.df_stocks_eastmoney
 
+    def create_batch_fetcher(self):
+        '''
+            逐只股票请求的 akshare 接口使用并发获取器，配置：
+                [AkshareDownload]
+                max_workers = 8               # 并发线程数
+                requests_per_second = 8       # 合计请求速率上限，<= 0 不限流
+                max_retries = 2
+        '''
+        config_manager = ConfigManager()
+        config_manager.set_config_path("config.ini")
+        max_workers = int(config_manager.get('AkshareDownload', 'max_workers', str(DEFAULT_MAX_WORKERS)))
+        requests_per_second = float(config_manager.get('AkshareDownload', 'requests_per_second', str(DEFAULT_REQUESTS_PER_SECOND)))
+        max_retries = int(config_manager.get('AkshareDownload', 'max_retries', str(DEFAULT_MAX_RETRIES)))
+        return AkshareBatchFetcher(max_workers, requests_per_second, max_retries)
+
     # 股票数据接口
     def get_stocks_info_and_save_to_db(self):
         # 初始化数据库  ./stocks/db/stocks.db
@@ -233,42 +250,27 @@ class AKStockDataProcessor:
             self.logger.info("已是最新日期数据")
             return
 
-        self.df_stocks_eastmoney = pd.DataFrame()
+        list_codes = []
         for key, value in self.dict_stocks.items():
             # 检查 DataFrame 是否为空
             if value.empty:
                 continue
-            
-            index = 1
-            for index, row in value.iterrows():
-                try:
-                    stock_code = row['证券代码']
-                    # self.logger.info("stock_code的类型：", type(stock_code))
-                    # self.logger.info(f"正在获取第 {index} 只股票：{stock_code}")
-                    stock_individual_info_em_df = ak.stock_individual_info_em(symbol=stock_code, timeout=30000)
-                    # self.logger.info("stock_individual_info_em_df的类型：", type(stock_individual_info_em_df))
-                    # add_stock_data(self.df_stocks_eastmoney, stock_individual_info_em_df)
-                    # self.logger.info("stock_individual_info_em_df:", stock_individual_info_em_df)
-
-                    # 将键值对形式的DataFrame转换为一行数据
-                    # 方法1: 使用pivot或set_index + unstack
-                    stock_data = stock_individual_info_em_df.set_index('item')['value'].to_dict()
-                    
-                    # 转换为DataFrame的一行
-                    stock_row = pd.DataFrame([stock_data])
-                    # self.logger.info("转换后的数据:", stock_row)
-                    
-                    # 合并到总数据中
-                    self.df_stocks_eastmoney = pd.concat([self.df_stocks_eastmoney, stock_row], ignore_index=True)
-                    
-
-                    sleep_time = random.uniform(0.5, 1)
-                    time.sleep(sleep_time)
-
-                except Exception as e:
-                    self.logger.info(f"处理股票 {stock_code} 时出错: {e}")
-                    continue
-        
+            list_codes.extend(value['证券代码'].tolist())
+
+        def fetch(stock_code):
+            stock_individual_info_em_df = ak.stock_individual_info_em(symbol=stock_code, timeout=30000)
+            # 将键值对形式的DataFrame转换为一行数据
+            return stock_individual_info_em_df.set_index('item')['value'].to_dict()
+
+        # 并发获取，结果先放入列表，最后一次性构造 DataFrame
+        dict_stats = self.create_batch_fetcher().fetch(list_codes, fetch)
+        for stock_code, error in dict_stats['errors'].items():
+            self.logger.info(f"处理股票 {stock_code} 时出错: {error}")
+        self.df_stocks_eastmoney = pd.DataFrame([stock_data for _, stock_data in dict_stats['results']])
+        if self.df_stocks_eastmoney.empty:
+            self.logger.info("未获取到东方财富股票数据")
+            return
+
         # 打印最后处理的股票数据
         self.df_stocks_eastmoney['日期'] = today
         self.logger.info("\n处理后的数据:\n")
@@ -306,54 +308,15 @@ class AKStockDataProcessor:
             self.logger.info(f"db_dir: {db_dir}")
             self.stock_db_base.set_db_dir(db_dir)
 
-            for index, row in df_data.iterrows():
-                stock_code = row['证券代码']
-                # self.logger.info("stock_code的类型：", type(stock_code))
-
-                self.logger.info(f"正在获取第 {index} 只股票的筹码分布信息：{stock_code}")
-
-                try:
-                    # 注意：stock_cyq_em接口会超时
-                    stock_cyq_em_df = ak.stock_cyq_em(symbol=stock_code, adjust="qfq")
-                    # self.logger.info("stock_cyq_em_df的类型：", stock_cyq_em_df)
-
-                    # if self.dict_chip_distribution_data_eastmoney[stock_code].empty:
-                    #     # 不存在则全量更新
-                    #     self.stock_db_base.insert_eastmoney_stock_chip_distribution_data_to_db(stock_code, stock_cyq_em_df)
-                    #     # 优化：策略筛选只需要最后一行数据
-                    #     self.dict_chip_distribution_data_eastmoney[stock_code] = stock_cyq_em_df
-                    # else:
-                    #     # 存在则增量更新
-                    #     # combined_df = pd.concat([self.dict_chip_distribution_data_eastmoney[stock_code], stock_cyq_em_df], axis=0, ignore_index=True)
-                    #     # 删除重复行（基于所有列）
-                    #     # unique_df = combined_df.drop_duplicates()
-
-                    #     self.dict_chip_distribution_data_eastmoney[stock_code]['日期'] = pd.to_datetime(self.dict_chip_distribution_data_eastmoney[stock_code]['日期'])
-                    #     stock_cyq_em_df['日期'] = pd.to_datetime(stock_cyq_em_df['日期'])
-
-                    #     # 找到 df1 中的最大日期（最后日期）
-                    #     last_date_in_df1 = self.dict_chip_distribution_data_eastmoney[stock_code]['日期'].max()
-                    #     self.logger.info(f"df1 中的最后日期是: {last_date_in_df1}")
-
-                    #     # 在 df2 中筛选所有日期大于 df1 最后日期的行
-                    #     new_data_in_df2 = stock_cyq_em_df[stock_cyq_em_df['日期'] > last_date_in_df1] # 使用布尔索引进行条件筛选[2](@ref)
-
-                    #     # 显示新增的数据
-                    #     self.logger.info(f"df2 中在 {last_date_in_df1} 之后的新增数据行数为: {len(new_data_in_df2)}")
-                    #     self.logger.info(new_data_in_df2)
-
-                        # # 新增数据添加到数据库中
-                        # self.stock_db_base.insert_eastmoney_stock_chip_distribution_data_to_db(stock_code, new_data_in_df2)
-
-                    # 获取到的数据直接插入，接口内部会做去重
-                    self.stock_db_base.insert_eastmoney_stock_chip_distribution_data_to_db(stock_code, stock_cyq_em_df)
-
-                    sleep_time = random.uniform(0.1, 0.5)
-                    time.sleep(sleep_time)
-                    
-                except Exception as e:
-                        self.logger.info(f"处理股票 {stock_code} 的筹码分布信息时出错: {e}")
-                        continue
+            def save(stock_code, stock_cyq_em_df):
+                # 获取到的数据直接插入，接口内部会做去重；在调用线程中写入（db_dir 为当前板块）
+                self.stock_db_base.insert_eastmoney_stock_chip_distribution_data_to_db(stock_code, stock_cyq_em_df)
+
+            # 注意：stock_cyq_em接口会超时，失败的股票按退避重试
+            dict_stats = self.create_batch_fetcher().fetch(df_data['证券代码'].tolist(),
+                                                           lambda stock_code: ak.stock_cyq_em(symbol=stock_code, adjust="qfq"), on_result=save)
+            for stock_code, error in dict_stats['errors'].items():
+                self.logger.info(f"处理股票 {stock_code} 的筹码分布信息时出错: {error}")
                 
 
     def query_eastmoney_stock_chip_distribution_data(self):
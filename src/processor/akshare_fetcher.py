@@ -0,0 +1,115 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from common.rate_limiter import TokenBucket
+from manager.logging_manager import get_logger
+
+'''
+    akshare 多股票并发获取：线程池并发请求，所有线程共享一个令牌桶限流（总请求速率不超过 requests_per_second），
+    失败按指数退避（带随机抖动）重试。
+    结果在调用线程中逐个交给 on_result（可安全地写入非线程安全的对象），或由 fetch 汇总后返回，
+    调用方将结果放入列表，最后一次性 concat 并批量入库。
+'''
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUESTS_PER_SECOND = 8.0
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 1.0
+
+class AkshareBatchFetcher:
+    """
+    限流的多线程 akshare 获取器
+    """
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE):
+        """
+        参数:
+            max_workers (int): 并发线程数
+            requests_per_second (float): 所有线程合计的请求速率上限，<= 0 表示不限流
+            max_retries (int): 单只股票失败后的重试次数
+            backoff_base (float): 重试等待基数（秒），第 n 次重试等待 backoff_base * 2^(n-1) 加随机抖动
+        """
+        if max_workers <= 0:
+            raise ValueError(f"并发线程数必须大于0: {max_workers}")
+        if max_retries < 0:
+            raise ValueError(f"重试次数不能为负数: {max_retries}")
+
+        self.logger = get_logger(__name__)
+        self.max_workers = int(max_workers)
+        self.max_retries = int(max_retries)
+        self.backoff_base = float(backoff_base)
+        self.rate_limiter = TokenBucket(requests_per_second)
+
+    def _fetch_one(self, fetch_func, item, stop_event):
+        """返回 (结果, 错误信息)，取消时返回 (None, None)"""
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if stop_event.is_set():
+                return None, None
+            if attempt > 0:
+                time.sleep(self.backoff_base * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+            self.rate_limiter.acquire()
+            try:
+                return fetch_func(item), None
+            except Exception as e:
+                error = str(e)
+        return None, error
+
+    def fetch(self, items, fetch_func, on_result=None, task=None):
+        """
+        并发获取
+
+        参数:
+            items (iterable): 待获取项（如股票代码）
+            fetch_func (callable): fetch_func(item) -> 结果，在工作线程中调用
+            on_result (callable, optional): on_result(item, result)，在调用线程中按完成顺序调用；
+                                            为 None 时结果按 items 顺序汇总返回；
+                                            on_result 抛出的异常记入 errors，不中断其余项
+            task (BaseTask, optional): 后台任务，每完成一项检查暂停与取消，取消后未开始的请求不再发出
+
+        返回:
+            dict: {'results': [(item, result), ...]（仅 on_result 为 None 时）, 'errors': {item: 错误信息},
+                   'items': 成功数, 'elapsed': 耗时（秒）, 'cancelled': 是否取消}
+        """
+        items = list(items)
+        start_time = time.perf_counter()
+        stop_event = threading.Event()
+        dict_results = {}
+        dict_errors = {}
+        success_count = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            dict_future = {executor.submit(self._fetch_one, fetch_func, item, stop_event): index for index, item in enumerate(items)}
+            for future in as_completed(dict_future):
+                index = dict_future[future]
+                result, error = future.result()
+                if error is not None:
+                    dict_errors[items[index]] = error
+                elif result is not None:
+                    if on_result is not None:
+                        try:
+                            on_result(items[index], result)
+                        except Exception as e:
+                            dict_errors[items[index]] = str(e)
+                        else:
+                            success_count += 1
+                    else:
+                        dict_results[index] = result
+                        success_count += 1
+
+                if task is not None and not stop_event.is_set():
+                    task._check_pause()
+                    if task.is_cancelled():
+                        stop_event.set()
+
+        elapsed = time.perf_counter() - start_time
+        self.logger.info(f"akshare 并发获取完成：成功 {success_count}/{len(items)}，失败 {len(dict_errors)}，耗时 {elapsed:.1f}秒")
+        return {
+            'results': [(items[index], dict_results[index]) for index in sorted(dict_results)],
+            'errors': dict_errors,
+            'items': success_count,
+            'elapsed': elapsed,
+            'cancelled': stop_event.is_set(),
+        }
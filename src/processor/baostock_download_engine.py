@@ -0,0 +1,252 @@
+import time
+import queue
+import random
+import importlib
+import traceback
+import multiprocessing
+import pandas as pd
+
+from common.rate_limiter import TokenBucket, split_rate
+from manager.logging_manager import get_logger
+
+'''
+    多进程 Baostock 下载引擎：
+        N 个工作进程各自 bs.login() 建立独立会话，从共享任务队列领取下载任务，
+        每个进程按 总速率 / N 限流，失败时指数退避重试（异常时重新登录），原始行数据经结果队列交回调用进程；
+        调用进程是唯一的写入方（on_result 回调中入库），SQLite 写入不存在多进程竞争。
+    bs_module 为 Baostock 模块名，默认 'baostock'；测试时可传入实现了 login/logout/query_history_k_data_plus 的替身模块。
+    工作进程使用 spawn 方式启动，不继承 GUI 进程的 Qt 状态；本模块不依赖 PyQt，子进程只加载下载所需的模块。
+
+    下载任务为 dict：
+        {'code': 'sh.600000', 'frequency': 'd', 'start_date': 'YYYY-MM-DD', 'end_date': 'YYYY-MM-DD', ...}
+    其余键（如写入方式、周期）原样随结果返回。
+'''
+
+DAY_QUERY_FIELDS = "date,code,open,high,low,close,volume,amount,pctChg,turn,adjustflag"
+DAY_RESULT_COLUMNS = ['date', 'code', 'open', 'high', 'low', 'close', 'volume', 'amount', 'change_percent', 'turnover_rate', 'adjustflag']
+MINUTE_QUERY_FIELDS = "date,time,code,open,high,low,close,volume,amount,adjustflag"
+MINUTE_RESULT_COLUMNS = ['date', 'time', 'code', 'open', 'high', 'low', 'close', 'volume', 'amount', 'adjustflag']
+
+DEFAULT_NUM_WORKERS = 4
+DEFAULT_REQUESTS_PER_SECOND = 20.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+
+_MSG_RESULT = 'result'
+_MSG_DONE = 'done'
+
+def get_query_fields(frequency):
+    """返回 (查询字段, 结果列名)：d/w/m 为日线及以上，其余为分钟级"""
+    if frequency in ('d', 'w', 'm'):
+        return DAY_QUERY_FIELDS, DAY_RESULT_COLUMNS
+    return MINUTE_QUERY_FIELDS, MINUTE_RESULT_COLUMNS
+
+def rows_to_dataframe(rows, frequency):
+    """工作进程返回的原始行（字符串）转换为 DataFrame，类型转换由调用方完成"""
+    _, columns = get_query_fields(frequency)
+    return pd.DataFrame(rows, columns=columns)
+
+def _login(bs):
+    lg = bs.login()
+    return lg.error_code == '0', f"{lg.error_code}: {lg.error_msg}"
+
+def query_rows(bs, download_task):
+    """
+    执行一次查询
+
+    返回:
+        tuple: (rows, error)，成功时 error 为 None
+    """
+    fields, _ = get_query_fields(download_task['frequency'])
+    rs = bs.query_history_k_data_plus(download_task['code'], fields,
+                                      start_date=download_task['start_date'], end_date=download_task['end_date'],
+                                      frequency=download_task['frequency'], adjustflag=download_task.get('adjustflag', '2'))
+    rows = []
+    while (rs.error_code == '0') & rs.next():
+        rows.append(rs.get_row_data())
+    if rs.error_code != '0':
+        # 分页过程中出错时整只股票重试，不返回部分数据
+        return None, f"{rs.error_code}: {rs.error_msg}"
+    return rows, None
+
+def _download_worker(worker_id, bs_module, task_queue, result_queue, stop_event, worker_rate, max_retries, backoff_base):
+    """工作进程入口：登录 -> 循环领取任务下载 -> 登出"""
+    bs = importlib.import_module(bs_module)
+    limiter = TokenBucket(worker_rate)
+
+    logged_in, login_msg = _login(bs)
+    worker_error = None if logged_in else f"登录失败 {login_msg}"
+    try:
+        while logged_in and not stop_event.is_set():
+            download_task = task_queue.get()
+            if download_task is None:
+                break
+
+            rows, error, attempts = None, None, 0
+            while attempts <= max_retries and not stop_event.is_set():
+                attempts += 1
+                limiter.acquire()
+                try:
+                    rows, error = query_rows(bs, download_task)
+                except Exception as e:
+                    rows, error = None, f"{type(e).__name__}: {str(e)}"
+                    # 连接异常后会话可能已失效，重新登录
+                    try:
+                        bs.logout()
+                    except Exception:
+                        pass
+                    _login(bs)
+
+                if error is None:
+                    break
+                if attempts <= max_retries:
+                    time.sleep(backoff_base * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5))
+
+            if attempts == 0 or (error is not None and stop_event.is_set()):
+                # 领取任务时已取消（未发出请求），或失败后在重试前取消（重试次数未用完）：
+                # 不回报结果，由 download 计为未处理，台账保持 pending
+                break
+            result_queue.put({'type': _MSG_RESULT, 'worker_id': worker_id, 'task': download_task,
+                              'rows': rows, 'error': error, 'attempts': attempts})
+    except Exception:
+        worker_error = traceback.format_exc()
+    finally:
+        if logged_in:
+            try:
+                bs.logout()
+            except Exception:
+                pass
+        result_queue.put({'type': _MSG_DONE, 'worker_id': worker_id, 'error': worker_error})
+
+class BaostockDownloadEngine:
+    """
+    多进程 Baostock 下载引擎
+    """
+    def __init__(self, num_workers=DEFAULT_NUM_WORKERS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE, bs_module='baostock'):
+        """
+        参数:
+            num_workers (int): 工作进程数（即 Baostock 会话数）
+            requests_per_second (float): 所有进程合计的请求速率上限，<= 0 表示不限流
+            max_retries (int): 单只股票失败后的最大重试次数
+            backoff_base (float): 退避基数（秒），第 k 次重试前等待 backoff_base * 2^(k-1) 并加随机抖动
+            bs_module (str): Baostock 模块名（可替换为替身模块）
+        """
+        if num_workers is None or num_workers <= 0:
+            # 下载受网络延迟限制而非 CPU，默认进程数不随 CPU 核数变化
+            num_workers = DEFAULT_NUM_WORKERS
+        if max_retries < 0:
+            raise ValueError(f"max_retries 不能为负数: {max_retries}")
+
+        self.logger = get_logger(__name__)
+        self.num_workers = int(num_workers)
+        self.requests_per_second = float(requests_per_second)
+        self.max_retries = int(max_retries)
+        self.backoff_base = float(backoff_base)
+        self.bs_module = bs_module
+
+    def download(self, list_download_tasks, on_result, task=None, poll_interval=0.5):
+        """
+        下载全部任务，每完成一只股票在调用线程中回调 on_result(download_task, df_data)
+
+        参数:
+            list_download_tasks (list): 下载任务列表（见模块说明）
+            on_result (callable): 单一写入方回调，df_data 为字符串列的原始数据（可能为空）；回调中抛出的异常只记录日志
+            task (BaseTask, optional): 后台任务，支持暂停（阻塞写入方）与取消（通知工作进程停止领取任务）
+            poll_interval (float): 结果队列轮询间隔（秒）
+
+        返回:
+            dict: 统计信息（tasks、succeeded、empty、failed、unfinished、rows、retries、elapsed、rows_per_second、failed_codes、worker_errors）
+                  unfinished 为取消或工作进程异常退出时未处理的任务数
+        """
+        stats = {'tasks': len(list_download_tasks), 'succeeded': 0, 'empty': 0, 'failed': 0, 'unfinished': 0, 'rows': 0, 'retries': 0,
+                 'elapsed': 0.0, 'rows_per_second': 0.0, 'workers': 0, 'failed_codes': [], 'worker_errors': []}
+        if not list_download_tasks:
+            return stats
+
+        num_workers = min(self.num_workers, len(list_download_tasks))
+        stats['workers'] = num_workers
+        start_time = time.time()
+
+        ctx = multiprocessing.get_context('spawn')
+        task_queue = ctx.Queue()
+        result_queue = ctx.Queue()
+        stop_event = ctx.Event()
+        for download_task in list_download_tasks:
+            task_queue.put(download_task)
+        for _ in range(num_workers):
+            task_queue.put(None)
+
+        worker_rate = split_rate(self.requests_per_second, num_workers)
+        list_process = [ctx.Process(target=_download_worker,
+                                    args=(worker_id, self.bs_module, task_queue, result_queue, stop_event,
+                                          worker_rate, self.max_retries, self.backoff_base),
+                                    name=f"baostock-download-{worker_id}", daemon=True)
+                        for worker_id in range(num_workers)]
+        for process in list_process:
+            process.start()
+        self.logger.info(f"Baostock下载引擎启动：{num_workers} 个进程，{stats['tasks']} 只股票，限速 {self.requests_per_second} 次/秒")
+
+        done_count = 0
+        finished = 0
+        try:
+            while done_count < num_workers:
+                if task is not None:
+                    task._check_pause()
+                    if task.is_cancelled() and not stop_event.is_set():
+                        self.logger.info("下载任务已取消，通知工作进程停止")
+                        stop_event.set()
+
+                try:
+                    message = result_queue.get(timeout=poll_interval)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in list_process):
+                        # 工作进程异常退出且没有发送结束消息
+                        self.logger.error("所有下载进程已退出，结束等待")
+                        break
+                    continue
+
+                if message['type'] == _MSG_DONE:
+                    done_count += 1
+                    if message['error']:
+                        stats['worker_errors'].append(message['error'])
+                        self.logger.error(f"下载进程 {message['worker_id']} 异常: {message['error']}")
+                    continue
+
+                finished += 1
+                download_task = message['task']
+                stats['retries'] += max(0, message['attempts'] - 1)
+                if message['error'] is not None:
+                    stats['failed'] += 1
+                    stats['failed_codes'].append(download_task['code'])
+                    self.logger.info(f"股票 {download_task['code']} 下载失败（{message['attempts']} 次）: {message['error']}")
+                    continue
+
+                df_data = rows_to_dataframe(message['rows'], download_task['frequency'])
+                if df_data.empty:
+                    stats['empty'] += 1
+                else:
+                    stats['succeeded'] += 1
+                    stats['rows'] += len(df_data)
+                try:
+                    on_result(download_task, df_data)
+                except Exception as e:
+                    self.logger.error(f"保存股票 {download_task['code']} 数据时出错: {str(e)}")
+
+                if finished % 100 == 0:
+                    self.logger.info(f"下载进度: {finished}/{stats['tasks']}")
+        finally:
+            stop_event.set()
+            for process in list_process:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            task_queue.cancel_join_thread()
+            result_queue.cancel_join_thread()
+
+        stats['unfinished'] = stats['tasks'] - finished
+        stats['elapsed'] = time.time() - start_time
+        stats['rows_per_second'] = stats['rows'] / stats['elapsed'] if stats['elapsed'] > 0 else 0.0
+        self.logger.info(f"Baostock下载完成：成功 {stats['succeeded']}，无数据 {stats['empty']}，失败 {stats['failed']}，"
+                         f"未处理 {stats['unfinished']}，共 {stats['rows']} 行，重试 {stats['retries']} 次，耗时 {stats['elapsed']:.2f}秒")
+        return stats
@@ -27,9 +27,30 @@ import json
 from manager.filter_result_data_manager import FilterResultDataManger
 from manager.bao_stock_data_manager import BaostockDataManager
 from manager.period_manager import TimePeriod
+from db_base.sqlite_profiles import PROFILE_BULK_INGEST, PROFILE_SCAN
+from db_base.stock_meta_db_base import StockMetaDbBase
+from processor.baostock_download_engine import (BaostockDownloadEngine, DEFAULT_NUM_WORKERS, DEFAULT_REQUESTS_PER_SECOND,
+                                                DEFAULT_MAX_RETRIES, query_rows, rows_to_dataframe)
+from processor.stock_data_pipeline import StockDataPipeline, DEFAULT_QUEUE_SIZE, DEFAULT_BATCH_SIZE
+from processor.kline_resampler import resample_daily_bars, resample_minute_bars, diff_resampled_bars, get_period_start
 
 from thread.task_pool import get_default_task_pool
 
+# 策略类型 -> (日线所需列, 周线所需列)，只计算筛选函数用到的指标；周线所需列为空表示该策略不使用周线数据
+DICT_STRATEGY_FILTER_COLUMNS = {
+    0: (pf.DAILY_UP_MA52_COLUMNS, pf.WEEKLY_CLOSE_DEA_MA52_COLUMNS),
+    1: (pf.DAILY_UP_MA24_COLUMNS, pf.WEEKLY_CLOSE_MA52_COLUMNS),
+    2: (pf.DAILY_UP_MA10_COLUMNS, ()),
+    4: (pf.DAILY_DOWN_BETWEEN_MA24_MA52_COLUMNS, pf.WEEKLY_CLOSE_DEA_MA52_COLUMNS),
+    5: (pf.DAILY_DOWN_BETWEEN_MA5_MA52_COLUMNS, pf.WEEKLY_CLOSE_DEA_MA52_COLUMNS),
+    6: (pf.DAILY_DOWN_BREAKTHROUGH_COLUMNS, ()),
+    7: (pf.DAILY_DOWN_BREAKTHROUGH_COLUMNS, ()),
+    13: (pf.LIMIT_COPY_COLUMNS, ()),
+    14: (pf.BREAK_THROUGH_AND_STEP_BACK_COLUMNS, ()),
+    15: (pf.BREAK_THROUGH_AND_STEP_BACK_COLUMNS, ()),
+    16: (pf.BREAK_THROUGH_AND_STEP_BACK_COLUMNS, ()),
+}
+
 def singleton(cls):
     """
     一个线程安全的单例装饰器。
@@ -132,7 +153,10 @@ class BaoStockProcessor(QObject):
             self._is_initialized = True
             self.logger.info("Baostock login successful.")
 
-            self.df_trade_dates = self.get_current_trade_dates()
+            # 交易日历优先使用本地持久化数据，只在不覆盖上一年至今年年底时请求远端
+            start_date, end_date = self.get_current_year_dates()
+            start_date = f"{int(start_date[:4]) - 1}-01-01"
+            self.get_trading_calendar().ensure_range(start_date, end_date, self.query_trade_dates)
             if self.is_trading_day_today():
                 self.logger.info("今天是交易日")
                 # self.can_update_today_data()
@@ -193,10 +217,14 @@ class BaoStockProcessor(QObject):
 
     # 获取当年交易日信息
     def get_current_trade_dates(self):
+        start_date, end_date = self.get_current_year_dates()
+        return self.query_trade_dates(start_date, end_date)
 
+    def query_trade_dates(self, start_date, end_date):
+        '''从 Baostock 获取交易日历，返回 DataFrame（calendar_date、is_trading_day），供 TradingCalendar 补齐本地日历'''
         #### 获取交易日信息 ####
-        start_date, end_date = self.get_current_year_dates()
-        rs = bs.query_trade_dates(start_date=start_date, end_date=end_date)
+        with self.lock:
+            rs = bs.query_trade_dates(start_date=start_date, end_date=end_date)
         self.logger.info('query_trade_dates respond error_code:'+rs.error_code)
         self.logger.info('query_trade_dates respond  error_msg:'+rs.error_msg)
 
@@ -207,18 +235,13 @@ class BaoStockProcessor(QObject):
             data_list.append(rs.get_row_data())
         result = pd.DataFrame(data_list, columns=rs.fields)
 
-        #### 结果集输出到csv文件 ####   
-        # result.to_csv("D:\\trade_datas.csv", encoding="gbk", index=False)
-        # self.logger.info("2025年交易日：", result)
-
         return result
 
+    def get_trading_calendar(self):
+        return BaostockDataManager().get_trading_calendar()
+
     def is_trading_day(self, day_str=''):
-        if day_str in self.df_trade_dates['calendar_date'].values:
-            trading_status = self.df_trade_dates.loc[self.df_trade_dates['calendar_date'] == day_str, 'is_trading_day'].iloc[0]
-            return trading_status == '1'
-        else:
-            return False # 或者根据你的需求返回 None 或抛出异常
+        return self.get_trading_calendar().is_trading_day(day_str)
 
     # 判断当天是否是交易日
     def is_trading_day_today(self):
@@ -241,6 +264,16 @@ class BaoStockProcessor(QObject):
             # self.logger.info("当前时间在17:30之前或等于20:30")
             return False
 
+    def get_latest_available_trade_date(self):
+        '''
+            当前可获取数据的最后一个交易日（YYYY-MM-DD）：交易日18:00后为今天，否则为上一个交易日
+            用作下载任务台账的目标交易日，只有目标交易日相同的中断任务才能继续
+        '''
+        today = date.today()
+        if self.is_trading_day_today() and self.can_update_today_data():
+            return today.strftime('%Y-%m-%d')
+        return str(self.get_trading_calendar().previous_trading_day(today))
+
     def count_fridays_since(self, specific_date_str):
         """
         计算从指定日期到今天之间有多少个星期五。
@@ -264,21 +297,11 @@ class BaoStockProcessor(QObject):
         if specific_date > today:
             return 0
 
-        # 3. 初始化计数器
-        friday_count = 0
-        # 4. 循环遍历从指定日期到今天的每一天
-        current_date = specific_date
-        while current_date <= today:
-            # 5. 判断当前日期是否为星期五 (Monday=0, Sunday=6)
-            if current_date.weekday() == 4:
-                friday_count += 1
-            # 6. 移动到下一天
-            current_date += timedelta(days=1)
-
-        return friday_count
+        # 3. 按星期掩码直接计数，不逐日遍历
+        return int(np.busday_count(specific_date, today + timedelta(days=1), weekmask='Fri'))
     
     def count_trading_days(self, s_begin_date, s_end_date=None):
-        '''计算指定日期范围内的交易日天数'''
+        '''计算指定日期范围内的交易日天数（交易日历二分查找）'''
         try:
             # 1. 将字符串转换为日期对象
             start_date = datetime.datetime.strptime(s_begin_date, '%Y-%m-%d').date()
@@ -295,27 +318,31 @@ class BaoStockProcessor(QObject):
         if end_date < start_date:
             return 0
         
-        # 确保交易日数据已加载
-        if not hasattr(self, 'df_trade_dates') or self.df_trade_dates is None:
-            self.logger.warning("交易日数据未初始化，返回0")
-            return 0
-        
-        # 筛选指定日期范围内的交易日
-        mask = (
-            (pd.to_datetime(self.df_trade_dates['calendar_date']).dt.date >= start_date) &
-            (pd.to_datetime(self.df_trade_dates['calendar_date']).dt.date <= end_date) &
-            (self.df_trade_dates['is_trading_day'] == '1')
-        )
-        
-        return len(self.df_trade_dates[mask])
-        
+        return self.get_trading_calendar().count_trading_days(start_date, end_date)
+
+    def get_default_date_range(self, frequency):
+        '''
+            全量获取时的默认日期范围：
+                日线、周线、月线（d/w/m）：近3年
+                1分钟：近3个月（Baostock 只提供近3个月）
+                其他分钟级别：当年1月1日至今（Baostock 只提供近1年）
+            返回: (start_date, end_date)
+        '''
+        now = datetime.datetime.now()
+        end_date = now.strftime("%Y-%m-%d")
+        if frequency in ('d', 'w', 'm'):
+            start_date = (now - datetime.timedelta(days=365*3)).strftime("%Y-%m-%d")
+        elif frequency == '1':
+            start_date = (now - datetime.timedelta(days=3*30)).strftime("%Y-%m-%d")
+        else:
+            start_date = f"{now.year}-01-01"
+        return start_date, end_date
 
     # 日线全量更新
     def process_daily_stock_data(self, code, start_date=None, end_date=None):
         if start_date == None or end_date == None:
             # 默认计算近3年的日期范围
-            end_date = (datetime.datetime.now()).strftime("%Y-%m-%d")
-            start_date = (datetime.datetime.now() - datetime.timedelta(days=365*3)).strftime("%Y-%m-%d")
+            start_date, end_date = self.get_default_date_range('d')
             # self.logger.info(f"获取股票 {stock_code} 数据，时间范围：{start_date} 至 {end_date}")
         
         # sleep_time = random.uniform(0.1, 0.3)
@@ -368,114 +395,104 @@ class BaoStockProcessor(QObject):
         
         return result
        
-    # 增量维护，收盘后调用
-    def update_daily_stock_data(self, code):
-        day_stock_data = pd.DataFrame()
-        data_to_save = pd.DataFrame()
-        if not BaostockDataManager().check_stock_db_exists(code):
-            self.logger.info(f"{code}.db 不存在", code)
-            return day_stock_data, data_to_save
-
-        # 步骤一：得到当前数据库中的股票数据
-        day_stock_data = BaostockDataManager().get_stock_data_from_db_by_period(code, TimePeriod.DAY)
-        # self.logger.info("code: ", code)
-        # self.logger.info("day_stock_data的类型：", type(day_stock_data))
-        # self.logger.info(day_stock_data.tail(1))
-        if day_stock_data is None or day_stock_data.empty:
-            self.logger.info("day_stock_data为空")
-            return day_stock_data, data_to_save
-
-        # 判断是否存在空值
-        if day_stock_data.isnull().values.any():
-            # self.logger.info("存在空值")
-            # 获取所有包含空值的行
-            rows_with_nulls = day_stock_data[day_stock_data.isnull().any(axis=1)]
-            # self.logger.info("\n所有包含空值的行:")
-            # self.logger.info(rows_with_nulls)
-            
-            # 提取第一个包含空值的行（按索引顺序）
-            first_row_with_null = rows_with_nulls.iloc[0]
-            # self.logger.info("\n第一个包含空值的行:")
-            # self.logger.info(first_row_with_null)
-
-            null_data_code = first_row_with_null['code']
-            # self.logger.info(f"第一个包含空值行的股票代码: {null_data_code}")
-            first_null_date = first_row_with_null['date']
-            # self.logger.info("第一个包含空值的行日期类型是: ", type(first_null_date))  # <class 'str'>
-            # self.logger.info(f"第一个包含空值的行日期是: {first_null_date}")
-    
+    def _high_water_mark_frame(self, code, high_water_mark):
+        '''已是最新数据时返回高水位行（code/date/time），调用方据此判断该股票处理成功，无需读取历史数据'''
+        return pd.DataFrame([{'code': code, 'date': high_water_mark['date'], 'time': high_water_mark['time']}])
+
+    def _get_incremental_date_range(self, high_water_mark):
+        '''
+            日线、分钟级增量更新的日期范围：高水位次日至今天
+            返回: (start_date, end_date)，已是最新数据（或当日数据尚不可获取）时返回 None
+        '''
+        last_date = high_water_mark['date']
         now_date = datetime.datetime.now().strftime("%Y-%m-%d")
-        if now_date in day_stock_data['date'].values:
+        if last_date >= now_date:
             # self.logger.info("已是最新日线数据")
-            return day_stock_data, data_to_save
-        
-        last_date = None
-        if day_stock_data.empty or day_stock_data is None:
-            self.logger.info("数据库表为空，默认获取近3年股票数据")
-            last_date = (datetime.datetime.now() - datetime.timedelta(days=365*3)).strftime("%Y-%m-%d")
-        else:
-            last_date = day_stock_data['date'].iloc[-1]
-        # self.logger.info("最后日期（方法2）:", last_date) 
+            return None
 
         parsed_date = datetime.datetime.strptime(last_date, "%Y-%m-%d")  # 解析为日期对象
         last_date = parsed_date + datetime.timedelta(days=1)
 
-        # 获取数据库中最后日期至今的股票数据
         start_date = last_date.strftime("%Y-%m-%d")               # Baostock要求的日期格式
         end_date = (datetime.datetime.now()).strftime("%Y-%m-%d")   #  + datetime.timedelta(days=1)
-        # self.logger.info(f"获取股票 {code} 数据，时间范围：{start_date} 至 {end_date}")
-        
+        # self.logger.info(f"获取股票数据，时间范围：{start_date} 至 {end_date}")
+
         # 判断数据库最后日期至今有无交易日数据需更新
         if self.is_trading_day_today():
             # 交易日18:00后才能更新当天数据
             if not self.can_update_today_data():
-                # self.logger.info("今天不是交易日，未到数据更新时间，请稍后再试")
-                # return day_stock_data, data_to_save
-
                 # 判断昨日数据是否已存在，不存在则更新昨日数据
                 yesterday = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-                if yesterday in day_stock_data['date'].values:
+                if high_water_mark['date'] >= yesterday:
                     # self.logger.info("昨日及之前数据已存在，直接返回现有数据")
-                    return day_stock_data, data_to_save
+                    return None
         else:
             # self.logger.info("今天不是交易日，判断数据库中是否是最新数据")
             trading_day_count = self.count_trading_days(start_date, end_date)
             # self.logger.info(f"交易日数量：{trading_day_count}")
             if trading_day_count == 0:
                 # self.logger.info("数据库中已是最新数据，直接返回现有数据")
-                return day_stock_data, data_to_save
+                return None
+
+        return start_date, end_date
 
+    def _get_weekly_incremental_date_range(self, high_water_mark):
+        '''
+            周线增量更新的日期范围：高水位次日至今天，期间没有周五说明已是最新周线数据
+            返回: (start_date, end_date)，无需更新时返回 None
+        '''
+        # 最后一行数据日期 + 1，至今有几个交易周结束（交易周最后一个交易日）？一个也没有说明是最新数据，无需更新。
+        parsed_date = datetime.datetime.strptime(high_water_mark['date'], "%Y-%m-%d")  # 解析为日期对象
+        last_date = parsed_date + datetime.timedelta(days=1)
+        trading_calendar = self.get_trading_calendar()
+        num_week_ends = trading_calendar.count_week_ends(last_date.date(), date.today())
+        if not num_week_ends > 0:
+            # self.logger.info("已是最新周线数据")
+            return None
         
-        df_new_stock_data = self.process_daily_stock_data(code, start_date, end_date)
-        # 判断获取到的数据是否存在空值
-        # if df_new_stock_data.isnull().values.any():
-        #     self.logger.info(f"股票 {code} 的数据存在空值")
-        #     return day_stock_data, data_to_save
-        # if df_new_stock_data.empty:
-        #     self.logger.info("process_daily_stock_data执行结果为空！")
-        #     return day_stock_data, data_to_save
+        # 唯一结束的交易周就是本周且今天是本周最后一个交易日时，18:00后才能获取本周周线
+        if num_week_ends == 1 and trading_calendar.get_week_end_trading_day(date.today()) == np.datetime64(date.today(), 'D'):
+            if not self.can_update_today_data():
+                self.logger.info("交易日18:00后才能更新数据！")
+                return None
+
+        start_date = last_date.strftime("%Y-%m-%d")               # Baostock要求的日期格式
+        end_date = datetime.datetime.now().strftime("%Y-%m-%d")
+        return start_date, end_date
+
+    # 增量维护，收盘后调用
+    # 只读取高水位（库中最后日期），不再加载全部历史数据；返回 (新数据或高水位行, 待追加数据)
+    def update_daily_stock_data(self, code):
+        data_to_save = pd.DataFrame()
+        if not BaostockDataManager().check_stock_db_exists(code):
+            self.logger.info(f"{code}.db 不存在")
+            return pd.DataFrame(), data_to_save
+
+        # 步骤一：得到当前数据库中的最后日期
+        high_water_mark = BaostockDataManager().get_high_water_mark(code, TimePeriod.DAY)
+        if high_water_mark is None:
+            self.logger.info("day_stock_data为空")
+            return pd.DataFrame(), data_to_save
+        df_high_water_mark = self._high_water_mark_frame(code, high_water_mark)
+
+        # 判断数据库最后日期至今有无交易日数据需更新
+        date_range = self._get_incremental_date_range(high_water_mark)
+        if date_range is None:
+            return df_high_water_mark, data_to_save
+
+        # 获取数据库中最后日期至今的股票数据
+        start_date, end_date = date_range
         
-        # self.logger.info("获取到的新数据：")
-        # self.logger.info(df_new_stock_data)
+        df_new_stock_data = self.process_daily_stock_data(code, start_date, end_date)
 
         df_new_stock_data = df_new_stock_data.dropna()
 
         if not df_new_stock_data.empty:
-            # 处理空 DataFrame 的情况
-            if day_stock_data.empty:
-                combined_df = df_new_stock_data.copy()
-                self.logger.info("原数据为空，直接使用新获取的数据")
-            else:
-                # BaostockDataManager().data_type_conversion(df_new_stock_data)
-                # 合并计算指标
-                combined_df = pd.concat([day_stock_data, df_new_stock_data], axis=0, ignore_index=True)
-
-            # 指标数据不再入库
-            data_to_save = combined_df.tail(len(df_new_stock_data))
-
-            return combined_df, data_to_save
+            # 指标数据不再入库，新数据直接追加
+            data_to_save = df_new_stock_data
+            return data_to_save, data_to_save
         
-        return day_stock_data, data_to_save
+        return df_high_water_mark, data_to_save
 
 
     # 空值修复，暂无用
@@ -484,11 +501,16 @@ class BaoStockProcessor(QObject):
 
     # 周线全量更新
     def process_weekly_stock_data(self, code, start_date=None, end_date=None):
+        return self._process_long_period_stock_data(code, "w", start_date, end_date)
+
+    def process_monthly_stock_data(self, code, start_date=None, end_date=None):
+        '''月线只用于校验本地聚合（见 validate_derived_bars），不单独入库'''
+        return self._process_long_period_stock_data(code, "m", start_date, end_date)
+
+    def _process_long_period_stock_data(self, code, frequency, start_date=None, end_date=None):
         if start_date == None or end_date == None:
             # 默认计算近3年的日期范围（周线数据通常需要更长时间来计算指标）
-            end_date = datetime.datetime.now().strftime("%Y-%m-%d")
-            # end_date = (datetime.datetime.now() - datetime.timedelta(days=3)).strftime("%Y-%m-%d")
-            start_date = (datetime.datetime.now() - datetime.timedelta(days=365*3)).strftime("%Y-%m-%d")
+            start_date, end_date = self.get_default_date_range(frequency)
 
         # self.logger.info(f"获取股票 {code} 周线数据，时间范围：{start_date} 至 {end_date}")
         
@@ -499,7 +521,7 @@ class BaoStockProcessor(QObject):
             rs = bs.query_history_k_data_plus(code,
                 "date,code,open,high,low,close,volume,amount,pctChg,turn,adjustflag",
                 start_date=start_date, end_date=end_date,
-                frequency="w", adjustflag="2")
+                frequency=frequency, adjustflag="2")
         # self.logger.info(rs.error_code)      # 0
         # self.logger.info(rs.error_msg)       # success
         # self.logger.info("rs的类型：", type(rs))       # <class 'baostock.data.resultset.ResultData'>
@@ -525,6 +547,11 @@ class BaoStockProcessor(QObject):
 
     def process_and_save_weekly_stock_data(self, code):
         result = pd.DataFrame()
+        if BaostockDataManager().is_derived_period(TimePeriod.WEEK):
+            # 周线由日线本地聚合
+            BaostockDataManager().update_derived_bars(code, TimePeriod.WEEK)
+            return BaostockDataManager().get_stock_data_from_db_by_period(code, TimePeriod.WEEK)
+
         if not BaostockDataManager().check_stock_db_exists(code) or not BaostockDataManager().check_table_exists(code, TimePeriod.WEEK):
             self.logger.info(f"周线 {code}.db 不存在，即将从Baostock获取")
             result = self.process_weekly_stock_data(code)
@@ -544,78 +571,36 @@ class BaoStockProcessor(QObject):
     # 增量维护，周线数据不好增量维护，追加后原表中还会存在周中数据。建议：每周末（或本周收盘后）调用一次更新本周周线数据
     # 例如：周二第一次update，表中会存在周二时的周线数据，当周线再update时，周二数据（已过时）依旧会在表中。
     # 补充：周线接口只能每周最后一个交易日才可以获取，月线每月最后一个交易日才可以获取。
+    # 只读取高水位（库中最后日期），不再加载全部历史数据；返回 (新数据或高水位行, 待追加数据)
     def update_weekly_stock_data(self, code):
-        week_stock_data = pd.DataFrame()
         data_to_save = pd.DataFrame()
         if not BaostockDataManager().check_stock_db_exists(code):
             self.logger.info(f"{code}.db 不存在")
-            return week_stock_data, data_to_save
-
-        # 步骤一：得到当前数据库中的股票数据
-        week_stock_data = BaostockDataManager().get_stock_data_from_db_by_period(code, TimePeriod.WEEK)
+            return pd.DataFrame(), data_to_save
 
-        # self.logger.info(f"获取到的周线数据长度：{len(week_stock_data)}")
-        week_stock_data = week_stock_data.dropna()
-        # self.logger.info(f"dropna后的周线数据长度：{len(week_stock_data)}")
-        # 手动检查可疑数据
-        # for col in week_stock_data.columns:
-        #     if week_stock_data[col].isnull().any():
-        #         self.logger.info(f"列 {col} 包含空值")
-        #         self.logger.info(f"空值位置: {week_stock_data[col].isnull()}")
-
-        if week_stock_data is None or week_stock_data.empty:
+        # 步骤一：得到当前数据库中的最后日期
+        high_water_mark = BaostockDataManager().get_high_water_mark(code, TimePeriod.WEEK)
+        if high_water_mark is None:
             self.logger.info(f"{code}.db 中无周线数据")
-            return week_stock_data, data_to_save
-        
-        # 最后一行数据日期 + 1，至今有几个周五？一个也没有说明是最新数据，无需更新。
-        # now_date = datetime.datetime.now().strftime("%Y-%m-%d")
-        # if now_date in week_stock_data['date'].values:
-        #     self.logger.info("已是最新数据")
-        #     return week_stock_data, data_to_save
-        last_date = week_stock_data['date'].iloc[-1]
-        parsed_date = datetime.datetime.strptime(last_date, "%Y-%m-%d")  # 解析为日期对象
-        last_date = parsed_date + datetime.timedelta(days=1)
-        num_fridays = self.count_fridays_since(last_date.strftime("%Y-%m-%d"))
-        if not num_fridays > 0:
-            # self.logger.info("已是最新周线数据")
-            return week_stock_data, data_to_save
-        
-        # 判断今天是否周五，数据库最后日期到今天有周五存在，但今天不是周五，则可以获取之前的周数据
-        current_date = datetime.datetime.now()
-        if current_date.weekday() != 5:
-            pass
-        elif self.is_trading_day_today():
-            # 交易日17:30后才能更新当天数据
-            if not self.can_update_today_data():
-                self.logger.info("交易日18:00后才能更新数据！")
-                return week_stock_data, data_to_save
+            return pd.DataFrame(), data_to_save
+        df_high_water_mark = self._high_water_mark_frame(code, high_water_mark)
         
-        last_date = week_stock_data['date'].iloc[-1]
-        # self.logger.info("最后周线日期:", last_date) 
-
-        parsed_date = datetime.datetime.strptime(last_date, "%Y-%m-%d")  # 解析为日期对象
-        last_date = parsed_date + datetime.timedelta(days=1)
-        # self.logger.info(last_date.strftime("%Y-%m-%d"))
+        date_range = self._get_weekly_incremental_date_range(high_water_mark)
+        if date_range is None:
+            return df_high_water_mark, data_to_save
 
         # 步骤二：获取数据库中最后日期至今的股票数据
-        start_date = last_date.strftime("%Y-%m-%d")               # Baostock要求的日期格式
-        end_date = datetime.datetime.now().strftime("%Y-%m-%d")
+        start_date, end_date = date_range
 
         df_new_weekly_stock_data = self.process_weekly_stock_data(code, start_date, end_date)
 
         df_new_weekly_stock_data = df_new_weekly_stock_data.dropna()
 
         if df_new_weekly_stock_data is not None and not df_new_weekly_stock_data.empty:
-            if not week_stock_data.empty:
-                # 合并计算指标
-                combined_df = pd.concat([week_stock_data, df_new_weekly_stock_data], axis=0, ignore_index=True)
-            else:
-                combined_df = df_new_weekly_stock_data.copy()
-                self.logger.info("原数据为空，直接使用新获取的数据")
-
-            data_to_save = combined_df.tail(len(df_new_weekly_stock_data))
+            data_to_save = df_new_weekly_stock_data
+            return data_to_save, data_to_save
         
-        return week_stock_data, data_to_save
+        return df_high_water_mark, data_to_save
     
     # 分钟级数据获取接口
     def process_and_save_minute_level_stock_data(self, code, level='30'):
@@ -627,6 +612,10 @@ class BaoStockProcessor(QObject):
             return result
 
         time_period = TimePeriod.from_minute_number_label(level)
+        if BaostockDataManager().is_derived_period(time_period):
+            # 由较细的分钟线本地聚合
+            BaostockDataManager().update_derived_bars(code, time_period)
+            return BaostockDataManager().get_stock_data_from_db_by_period(code, time_period)
 
         if not BaostockDataManager().check_stock_db_exists(code) or not BaostockDataManager().check_table_exists(code, time_period):
             # self.logger.info(f"分钟级 {code}.db 不存在，即将从Baostock获取")
@@ -651,15 +640,7 @@ class BaoStockProcessor(QObject):
         
         # 1分钟只能获取近3个月数据，其他分钟级别只能获取近1年的数据
         if start_date == None or end_date == None:
-            # 默认计算近3年的日期范围（周线数据通常需要更长时间来计算指标）
-            end_date = datetime.datetime.now().strftime("%Y-%m-%d")
-            # end_date = (datetime.datetime.now() - datetime.timedelta(days=3)).strftime("%Y-%m-%d")
-
-            if level == '1':
-                start_date = (datetime.datetime.now() - datetime.timedelta(days=3*30)).strftime("%Y-%m-%d")
-            else:
-                current_year = datetime.datetime.now().year
-                start_date = f"{current_year}-01-01"
+            start_date, end_date = self.get_default_date_range(level)
 
         # self.logger.info(f"获取股票 {code} 分钟级数据，时间范围：{start_date} 至 {end_date}")
         
@@ -701,98 +682,43 @@ class BaoStockProcessor(QObject):
 
         return result
     
+    # 只读取高水位（库中最后日期/时间），不再加载全部历史数据；返回 (新数据或高水位行, 待追加数据)
     def update_minute_level_stock_data(self, code, level='30'):
-        result = pd.DataFrame()
         data_to_save = pd.DataFrame()
         if not BaostockDataManager().check_stock_db_exists(code):
-            self.logger.info("{stock_code}.db 不存在", code)
-            return result, data_to_save
+            self.logger.info(f"{code}.db 不存在")
+            return pd.DataFrame(), data_to_save
         
         allowed_levels = ['1', '3', '5', '10', '15', '30', '45', '60', '90', '120']
         if level not in allowed_levels:
-            return result, data_to_save
+            return pd.DataFrame(), data_to_save
         
         time_period = TimePeriod.from_minute_number_label(level)
 
-        # 步骤一：得到当前数据库中的股票数据
-        minute_stock_data = BaostockDataManager().get_stock_data_from_db_by_period(code, time_period)
-        if minute_stock_data is None or minute_stock_data.empty:
+        # 步骤一：得到当前数据库中的最后日期
+        high_water_mark = BaostockDataManager().get_high_water_mark(code, time_period)
+        if high_water_mark is None:
             self.logger.info("minute_stock_data为空")
-            return result, data_to_save
-
-        # 判断是否存在空值
-        if minute_stock_data.isnull().values.any():
-            self.logger.info("存在空值")
-            # minute_stock_data = minute_stock_data.dropna()
-        
+            return pd.DataFrame(), data_to_save
+        df_high_water_mark = self._high_water_mark_frame(code, high_water_mark)
 
         # 因为分钟级也只能按天获取，因此不用小时、分级的判断
-        now_date = datetime.datetime.now().strftime("%Y-%m-%d")
-        if now_date in minute_stock_data['date'].values:
-            # self.logger.info("已是最新日线数据")
-            return minute_stock_data, data_to_save
-        
-        last_date = None
-        if minute_stock_data.empty or minute_stock_data is None:
-            # self.logger.info("数据库表为空，默认获取近1年股票数据")
-            if level == '1':
-                last_date = (datetime.datetime.now() - datetime.timedelta(days=3*30)).strftime("%Y-%m-%d")
-            else:
-                # last_date = (datetime.datetime.now() - datetime.timedelta(days=365)).strftime("%Y-%m-%d")
-                current_year = datetime.datetime.now().year
-                last_date = f"{current_year}-01-01"
-        else:
-            last_date = minute_stock_data['date'].iloc[-1]
-        # self.logger.info("最后日期（方法2）:", last_date) 
-
-        parsed_date = datetime.datetime.strptime(last_date, "%Y-%m-%d")  # 解析为日期对象
-        last_date = parsed_date + datetime.timedelta(days=1)
+        date_range = self._get_incremental_date_range(high_water_mark)
+        if date_range is None:
+            return df_high_water_mark, data_to_save
 
         # 获取数据库中最后日期至今的股票数据
-        start_date = last_date.strftime("%Y-%m-%d")               # Baostock要求的日期格式
-        end_date = (datetime.datetime.now()).strftime("%Y-%m-%d")   
-        # self.logger.info(f"获取股票 {code} 数据，时间范围：{start_date} 至 {end_date}")
-        
-        # 判断数据库最后日期至今有无交易日数据需更新
-        if self.is_trading_day_today():
-            # 交易日18:00后才能更新当天数据
-            if not self.can_update_today_data():
-                # self.logger.info("今天不是交易日，未到数据更新时间，请稍后再试")
-                # return minute_stock_data, data_to_save
-
-                # 判断昨日数据是否已存在，不存在则更新昨日数据
-                yesterday = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
-                if yesterday in minute_stock_data['date'].values:
-                    # self.logger.info("昨日及之前数据已存在，直接返回现有数据")
-                    return minute_stock_data, data_to_save
-        else:
-            # self.logger.info("今天不是交易日，判断数据库中是否是最新数据")
-            trading_day_count = self.count_trading_days(start_date, end_date)
-            # self.logger.info(f"交易日数量：{trading_day_count}")
-            if trading_day_count == 0:
-                # self.logger.info("数据库中已是最新数据，直接返回现有数据")
-                return minute_stock_data, data_to_save
-
+        start_date, end_date = date_range
         
         df_new_stock_data = self.process_minute_level_stock_data(code, level, start_date, end_date)
 
         df_new_stock_data = df_new_stock_data.dropna()
         
         if df_new_stock_data is not None and not df_new_stock_data.empty:
-            # 处理空 DataFrame 的情况
-            if minute_stock_data.empty:
-                combined_df = df_new_stock_data.copy()
-                self.logger.info("原数据为空，直接使用新获取的数据")
-            else:
-                BaostockDataManager().data_type_conversion(df_new_stock_data)
-                # 合并计算指标
-                combined_df = pd.concat([minute_stock_data, df_new_stock_data], axis=0, ignore_index=True)
-
-            data_to_save = combined_df.tail(len(df_new_stock_data))
+            data_to_save = df_new_stock_data
+            return data_to_save, data_to_save
 
-            return combined_df, data_to_save
-
-        return minute_stock_data, data_to_save
+        return df_high_water_mark, data_to_save
 
     # ------------------------------------------数据更新接口--------------------------------------------
     def get_chinese_board_name(self, board_name):
@@ -815,50 +741,26 @@ class BaoStockProcessor(QObject):
             self.logger.info(f"无效的板块名称: {board_name}")
             return
 
-        i = 1
         board_name_chinese = self.get_chinese_board_name(board_name)
         time_period_name_chinese = TimePeriod.get_chinese_label(TimePeriod)
         self.logger.info(f"开始处理 {board_name_chinese} {time_period_name_chinese} 股票数据...")
         start_time = time.time()  # 记录开始时间
 
-        dict_stock_info = BaostockDataManager().get_stock_info_dict()
-        for index, row in dict_stock_info[board_name].iterrows():
-            if task:
-                # 检查暂停状态
-                task._check_pause()
-                
-                # 检查取消状态
-                if task.is_cancelled():
-                    break
-
-            value = row['证券代码']
-            stock_name = row['证券名称'] if '证券名称' in row else '未知'
-            # self.logger.info(f"获取第 {i} 只{board_name_chinese}股票 {value} 【{time_period_name_chinese}】数据")
-
-            result = None
-            if TimePeriod == TimePeriod.DAY:
-                result = self.process_and_save_daily_stock_data(value)
-            elif TimePeriod == TimePeriod.WEEK:
-                result = self.process_and_save_weekly_stock_data(value)
-
-            if result is None or result.empty:
-                # self.logger.info(f"股票 {value} 数据获取失败")
-                continue
-
-            # if i > 3:
-            #     self.logger.info(f"已获取到所有{board_name_chinese}股票{time_period_name_chinese}数据, i: {i}")
-            #     break
-
-            
-            if i % 100 == 0:  # 每100只股票打印一次日志
-                self.logger.info(f"已处理 {i} 只{board_name_chinese}股票【{time_period_name_chinese}】数据")
-
-            i += 1
+        if TimePeriod not in (TimePeriod.DAY, TimePeriod.WEEK):
+            self.logger.info(f"不支持的周期: {TimePeriod}")
+            return
 
-            del result
+        dict_stock_info = BaostockDataManager().get_stock_info_dict()
+        if BaostockDataManager().is_derived_period(TimePeriod):
+            # 周线由已入库的日线本地聚合，不再请求远端
+            processed_count = self.derive_stock_data(list(dict_stock_info[board_name]['证券代码']), TimePeriod, task)
+        else:
+            stats = self.run_download_pipeline(list(dict_stock_info[board_name]['证券代码']), TimePeriod, task,
+                                               job_name=f"{board_name}_{TimePeriod.value}")
+            processed_count = stats['write']['items']
 
         process_elapsed_time = time.time() - start_time  # 计算耗时
-        self.logger.info(f"{board_name_chinese} {time_period_name_chinese}股票数据处理完成，共处理{i}只股票，耗时: {process_elapsed_time:.2f}秒，即{process_elapsed_time/60:.2f}分钟")
+        self.logger.info(f"{board_name_chinese} {time_period_name_chinese}股票数据处理完成，共处理{processed_count}只股票，耗时: {process_elapsed_time:.2f}秒，即{process_elapsed_time/60:.2f}分钟")
 
         # 批处理完成后强制垃圾回收
         gc.collect()
@@ -1009,54 +911,338 @@ class BaoStockProcessor(QObject):
             self.logger.error(f"Invalid level: {level}. Allowed values are: {allowed_levels}")
             return
         
-        i = 1
-
         self.logger.info(f"开始处理{board_type}股票{level}分钟级别数据...")
         start_time = time.time()  # 记录开始时间
 
         dict_stock_info = BaostockDataManager().get_stock_info_dict()
-        for index, row in dict_stock_info[board_type].iterrows():
-            if task:
-                # 检查暂停状态
-                task._check_pause()
-                
-                # 检查取消状态
-                if task.is_cancelled():
-                    break
+        time_period = TimePeriod.from_minute_number_label(level)
+        if BaostockDataManager().is_derived_period(time_period):
+            # 由较细的分钟线本地聚合，不再请求远端
+            processed_count = self.derive_stock_data(list(dict_stock_info[board_type]['证券代码']), time_period, task)
+        else:
+            stats = self.run_download_pipeline(list(dict_stock_info[board_type]['证券代码']), time_period, task,
+                                               job_name=f"{board_type}_{time_period.value}")
+            processed_count = stats['write']['items']
+
+        process_elapsed_time = time.time() - start_time  # 计算耗时
+        self.logger.info(f"获取{board_type}股票{level}分钟级别数据完成，共处理{processed_count}只股票，耗时: {process_elapsed_time:.2f}秒，即{process_elapsed_time/60:.2f}分钟")
+
+        self.logger.info(f"{board_type}股票{level}分钟级别数据获取完成")
+
+        # 批处理完成后强制垃圾回收
+        gc.collect()
 
-            value = row['证券代码']
-            stock_name = row['证券名称'] if '证券名称' in row else '未知'
-            # self.logger.info(f"获取第 {i} 只{board_type}股票 {value} {level}分钟级别数据")
-            
-            result = self.process_and_save_minute_level_stock_data(value, level)
 
-            # 测试
-            # result = self.process_minute_level_stock_data(value, level)
+    # ------------------------------------------流水线下载接口--------------------------------------------
+    def _fetch_stock_rows(self, code, period):
+        '''流水线获取阶段：生成下载任务并通过本进程的 Baostock 会话获取原始数据，无需下载时返回 None，查询失败时抛出 RuntimeError'''
+        download_task = self.plan_stock_download(code, period)
+        if download_task is None:
+            return None
 
-            if result is None or result.empty:
-                # self.logger.info(f"股票 {value} 数据获取失败")
+        with self.lock:
+            rows, error = query_rows(bs, download_task)
+        if error is not None:
+            raise RuntimeError(f"查询失败 {error}")
+        return download_task, rows
+
+    def _convert_stock_rows(self, code, raw):
+        '''流水线转换阶段：原始数据转换为入库格式，返回 (写入方式, DataFrame)，无数据时返回 None'''
+        download_task, rows = raw
+        df_data = rows_to_dataframe(rows, download_task['frequency'])
+        if df_data.empty:
+            return None
+        BaostockDataManager().data_type_conversion(df_data)
+        df_data = df_data.dropna()
+        if df_data.empty:
+            return None
+        return download_task['write_way'], df_data
+
+    def filter_stale_codes(self, codes, period=TimePeriod.DAY):
+        '''
+            只保留需要更新的股票：按元数据目录中的最后日期套用增量更新的判断（见 _get_incremental_date_range），
+            一次查询目录，不打开单只股票的数据库；目录中没有记录的股票保留（由 plan_stock_download 判断全量或增量）
+        '''
+        df_catalog = BaostockDataManager().get_stock_catalog(period, list(codes))
+        df_catalog = df_catalog[df_catalog['row_count'] > 0]
+        dict_last_date = dict(zip(df_catalog['code'], df_catalog['last_date']))
+
+        dict_is_stale = {}    # 同一最后日期只判断一次
+        list_stale_codes = []
+        for code in codes:
+            last_date = dict_last_date.get(code)
+            if last_date is None:
+                list_stale_codes.append(code)
                 continue
-            
-            # 测试
-            # if i > 3:
-            #     self.logger.info(f"已获取到所有沪市股票日线数据, i: {i}")
-            #     break
-            
-            if i % 100 == 0:  # 每100只股票打印一次日志
-                self.logger.info(f"已处理 {i} 只{board_type}股票【{level}分钟级别】数据")
+            if last_date not in dict_is_stale:
+                high_water_mark = {'date': last_date, 'time': None}
+                if period == TimePeriod.WEEK:
+                    dict_is_stale[last_date] = self._get_weekly_incremental_date_range(high_water_mark) is not None
+                else:
+                    dict_is_stale[last_date] = self._get_incremental_date_range(high_water_mark) is not None
+            if dict_is_stale[last_date]:
+                list_stale_codes.append(code)
+        return list_stale_codes
+
+    def derive_stock_data(self, codes, period=TimePeriod.WEEK, task=None):
+        '''
+            由已入库的源周期K线聚合生成指定股票的 period K线（见 BaostockDataManager.update_derived_bars），
+            源周期入库时已同步聚合，这里用于补齐（如首次启用聚合、源数据由其他途径入库）
+            返回: 有新K线写入的股票数量
+        '''
+        data_manager = BaostockDataManager()
+        derived_count = 0
+        for code in codes:
+            if task is not None:
+                task._check_pause()
+                if task.is_cancelled():
+                    break
+            try:
+                if data_manager.update_derived_bars(code, period) > 0:
+                    derived_count += 1
+            except Exception as e:
+                self.logger.error(f"聚合股票 {code} 的{TimePeriod.get_chinese_label(period)}时出错: {str(e)}")
+        return derived_count
+
+    def validate_derived_bars(self, code, period, start_date=None, end_date=None):
+        '''
+            校验模式：从 Baostock 下载 period 的K线，与本地由源周期聚合的结果逐根比较（不写入数据库）
+            用于启用聚合前确认交易时段切分、成交量与成交额求和等与官方K线一致。
+            季线、年线没有官方K线可下载，以下载的月线聚合结果为参照（与本地日线相互独立）
+            返回: 不一致项 DataFrame（见 kline_resampler.diff_resampled_bars），为空表示一致；无法下载时返回 None
+        '''
+        data_manager = BaostockDataManager()
+        source_period = data_manager.get_derived_source_period(period)
+        if TimePeriod.is_minute_level(period):
+            df_reference = self.process_minute_level_stock_data(code, period.value[:-1], start_date, end_date)
+            df_source = data_manager.get_stock_data_from_db_by_period(code, source_period, start_date, end_date)
+            df_derived = resample_minute_bars(df_source, period)
+        else:
+            trade_dates = data_manager.get_trading_calendar().get_trade_dates()
+            if period == TimePeriod.WEEK:
+                df_reference = self.process_weekly_stock_data(code, start_date, end_date)
+            elif period == TimePeriod.MONTH:
+                df_reference = self.process_monthly_stock_data(code, start_date, end_date)
+            else:
+                df_reference = self._get_monthly_aggregated_reference(code, period, trade_dates, start_date, end_date)
+            # 取全部日线聚合，保证区间第一根K线的涨跌幅有前收盘价
+            df_source = data_manager.get_stock_data_from_db_by_period(code, source_period, end_date=end_date)
+            df_derived = resample_daily_bars(df_source, period, trade_dates)
+        if df_reference is None or df_reference.empty:
+            self.logger.info(f"股票 {code} 无法下载{TimePeriod.get_chinese_label(period)}用于校验")
+            return None
+
+        key = 'time' if TimePeriod.is_minute_level(period) else 'date'
+        reference_keys = set(df_reference[key].astype(str))
+        first_key, last_key = min(reference_keys), max(reference_keys)
+        derived_keys = df_derived[key].astype(str)
+        df_derived = df_derived[(derived_keys >= first_key) & (derived_keys <= last_key)]
+
+        df_diff = diff_resampled_bars(df_derived, df_reference)
+        self.logger.info(f"股票 {code} {TimePeriod.get_chinese_label(period)}校验：下载 {len(df_reference)} 根，聚合 {len(df_derived)} 根，不一致 {len(df_diff)} 项")
+        return df_diff
+
+    def _get_monthly_aggregated_reference(self, code, period, trade_dates, start_date=None, end_date=None):
+        '''
+            季线、年线的校验参照：下载官方月线后按季、年聚合；下载区间从周期中间开始时，第一个周期不完整，不参与比较
+            返回: DataFrame，无法下载时返回 None
+        '''
+        df_monthly = self.process_monthly_stock_data(code, start_date, end_date)
+        if df_monthly is None or df_monthly.empty:
+            return None
+        self.logger.info(f"股票 {code} {TimePeriod.get_chinese_label(period)}没有官方K线，以下载的月线聚合结果为校验参照")
+        df_reference = resample_daily_bars(df_monthly, period, trade_dates)
+        first_month_start = pd.Timestamp(str(df_monthly['date'].min())).to_period('M').start_time.strftime('%Y-%m-%d')
+        if not df_reference.empty and first_month_start != get_period_start(df_monthly['date'].min(), period):
+            df_reference = df_reference.iloc[1:].reset_index(drop=True)
+        return df_reference
+
+    def run_download_pipeline(self, codes, period=TimePeriod.DAY, task=None, job_name=None):
+        '''
+            按 获取 -> 转换 -> 批量写入 流水线下载并保存指定股票的K线数据（见 StockDataPipeline），
+            网络请求与类型转换、磁盘写入并行进行。
+            指定 job_name 时记录下载任务台账：每只股票入库提交后标记完成，程序中途退出或任务取消后，
+            在同一目标交易日内再次运行同名任务只处理剩余股票。配置：
+                [BaostockDownload]
+                pipeline_queue_size = 32
+                pipeline_batch_size = 50
+                resume_jobs = true      # 继续未完成的同名任务
+                stale_only = true       # 只处理元数据目录判断为需要更新的股票
+            返回: 流水线各阶段统计，指定 job_name 时另含 job（台账各状态的股票数量）
+        '''
+        config_manager = ConfigManager()
+        config_manager.set_config_path("config.ini")
+        queue_size = int(config_manager.get('BaostockDownload', 'pipeline_queue_size', str(DEFAULT_QUEUE_SIZE)))
+        batch_size = int(config_manager.get('BaostockDownload', 'pipeline_batch_size', str(DEFAULT_BATCH_SIZE)))
+        resume_jobs = config_manager.get('BaostockDownload', 'resume_jobs', 'true').strip().lower() in ('true', '1', 'yes', 'on')
+        stale_only = config_manager.get('BaostockDownload', 'stale_only', 'true').strip().lower() in ('true', '1', 'yes', 'on')
+
+        data_manager = BaostockDataManager()
+        job_id = None
+        if job_name is not None:
+            job_id, codes = data_manager.start_ingest_job(job_name, period, codes, resume_jobs,
+                                                          target_date=self.get_latest_available_trade_date())
+        if stale_only:
+            stale_codes = self.filter_stale_codes(codes, period)
+            if job_id is not None:
+                stale_set = set(stale_codes)
+                data_manager.mark_ingest_job_items(job_id, [code for code in codes if code not in stale_set], StockMetaDbBase.ITEM_STATUS_SKIPPED)
+            self.logger.info(f"{TimePeriod.get_chinese_label(period)}数据：共 {len(codes)} 只股票，需要更新 {len(stale_codes)} 只")
+            codes = stale_codes
+
+        def mark(codes_to_mark, status, error=None):
+            if job_id is not None:
+                data_manager.mark_ingest_job_items(job_id, codes_to_mark, status, error)
+
+        def fetch(code):
+            try:
+                raw = self._fetch_stock_rows(code, period)
+            except Exception as e:
+                mark([code], StockMetaDbBase.ITEM_STATUS_FAILED, str(e))
+                raise
+            if raw is None:
+                mark([code], StockMetaDbBase.ITEM_STATUS_SKIPPED)
+            return raw
 
-            i += 1
+        def convert(code, raw):
+            try:
+                data = self._convert_stock_rows(code, raw)
+            except Exception as e:
+                mark([code], StockMetaDbBase.ITEM_STATUS_FAILED, str(e))
+                raise
+            if data is None:
+                # 下载成功但没有数据（如停牌），同样视为已完成
+                mark([code], StockMetaDbBase.ITEM_STATUS_DONE)
+            return data
+
+        def write_batch(batch):
+            list_items = [(code, df_data, write_way) for code, (write_way, df_data) in batch]
+            list_saved_codes = data_manager.save_stock_data_batch_to_db(list_items, period)
+            saved_set = set(list_saved_codes)
+            mark(list_saved_codes, StockMetaDbBase.ITEM_STATUS_DONE)
+            mark([code for code, _, _ in list_items if code not in saved_set], StockMetaDbBase.ITEM_STATUS_FAILED, "入库失败")
+            return len(list_saved_codes)
+
+        pipeline = StockDataPipeline(fetch, convert, write_batch, queue_size=queue_size, batch_size=batch_size,
+                                     # 连接配置按线程生效，写入线程整体使用 bulk_ingest，新建表的索引在全部写入后统一创建
+                                     writer_context=lambda: data_manager.use_storage_profile(PROFILE_BULK_INGEST))
+        stats = pipeline.run(codes, task)
+
+        if job_id is not None:
+            stats['job'] = data_manager.finish_ingest_job(job_id)
+            if not stats['job']['completed']:
+                self.logger.info(f"下载任务 {job_name} 未完成，剩余 {stats['job']['pending']} 只股票，下次继续")
+        return stats
+
+    # ------------------------------------------多进程并行下载接口--------------------------------------------
+    def get_download_frequency(self, period):
+        '''TimePeriod 转换为 Baostock 的 frequency 参数：d / w / 分钟数'''
+        if period == TimePeriod.DAY:
+            return 'd'
+        if period == TimePeriod.WEEK:
+            return 'w'
+        if TimePeriod.is_minute_level(period):
+            return period.value[:-1]
+        raise ValueError(f"不支持下载的周期: {period}")
+
+    def plan_stock_download(self, code, period=TimePeriod.DAY):
+        '''
+            生成单只股票的下载任务（与 process_and_save_* 的判断一致）：
+                数据库或表不存在：默认日期范围全量获取，replace 写入
+                已存在：高水位次日至今增量获取，append 写入
+            返回: dict 下载任务，无需下载时返回 None
+        '''
+        frequency = self.get_download_frequency(period)
+        data_manager = BaostockDataManager()
+        if not data_manager.check_stock_db_exists(code) or not data_manager.check_table_exists(code, period):
+            start_date, end_date = self.get_default_date_range(frequency)
+            write_way = 'replace'
+        else:
+            high_water_mark = data_manager.get_high_water_mark(code, period)
+            if high_water_mark is None:
+                return None
+            if period == TimePeriod.WEEK:
+                date_range = self._get_weekly_incremental_date_range(high_water_mark)
+            else:
+                date_range = self._get_incremental_date_range(high_water_mark)
+            if date_range is None:
+                return None
+            start_date, end_date = date_range
+            write_way = 'append'
+
+        return {'code': code, 'frequency': frequency, 'start_date': start_date, 'end_date': end_date,
+                'write_way': write_way, 'period': period.name}
+
+    def create_download_engine(self, num_workers=None):
+        '''
+            根据配置创建多进程下载引擎：
+                [BaostockDownload]
+                workers = 4                 # 工作进程数（Baostock 会话数）
+                requests_per_second = 20    # 所有进程合计的请求速率上限
+                max_retries = 3
+                bs_module = baostock        # 离线测试时可设为 utils.baostock_replay
+        '''
+        config_manager = ConfigManager()
+        config_manager.set_config_path("config.ini")
+        if num_workers is None:
+            num_workers = int(config_manager.get('BaostockDownload', 'workers', str(DEFAULT_NUM_WORKERS)))
+        requests_per_second = float(config_manager.get('BaostockDownload', 'requests_per_second', str(DEFAULT_REQUESTS_PER_SECOND)))
+        max_retries = int(config_manager.get('BaostockDownload', 'max_retries', str(DEFAULT_MAX_RETRIES)))
+        bs_module = config_manager.get('BaostockDownload', 'bs_module', 'baostock')
+        return BaostockDownloadEngine(num_workers, requests_per_second, max_retries, bs_module=bs_module)
+
+    def _save_downloaded_stock_data(self, download_task, df_data):
+        '''下载引擎的写入回调：类型转换后按任务的写入方式入库（只在调用线程中执行）'''
+        if df_data.empty:
+            return
+        BaostockDataManager().data_type_conversion(df_data)
+        df_data = df_data.dropna()
+        if not df_data.empty:
+            BaostockDataManager().save_stock_data_to_db(download_task['code'], df_data, download_task['write_way'],
+                                                        TimePeriod[download_task['period']])
+
+    def download_stock_data_parallel(self, board_names=None, period=TimePeriod.DAY, num_workers=None, task=None, engine=None):
+        '''
+            多进程并行获取/更新指定板块的K线数据（每个进程一个 Baostock 会话），调用线程统一入库
+
+            参数:
+                board_names (list, optional): 板块列表，默认 sh_main、sz_main、gem、star
+                period (TimePeriod): 日线、周线或分钟级周期
+                num_workers (int, optional): 工作进程数，默认读取配置
+                task (BaseTask, optional): 后台任务，支持暂停与取消
+                engine (BaostockDownloadEngine, optional): 指定下载引擎（如使用替身模块）
+            返回:
+                dict: 下载统计信息（见 BaostockDownloadEngine.download），另含 planned、skipped
+        '''
+        if board_names is None:
+            board_names = ['sh_main', 'sz_main', 'gem', 'star']
 
-            del result  # 及时删除避免内存泄漏
+        dict_stock_info = BaostockDataManager().get_stock_info_dict()
+        list_download_tasks = []
+        skipped = 0
+        for board_name in board_names:
+            if board_name not in dict_stock_info:
+                self.logger.info(f"无效的板块名称: {board_name}")
+                continue
+            for code in dict_stock_info[board_name]['证券代码']:
+                download_task = self.plan_stock_download(code, period)
+                if download_task is None:
+                    skipped += 1
+                else:
+                    list_download_tasks.append(download_task)
 
-        process_elapsed_time = time.time() - start_time  # 计算耗时
-        self.logger.info(f"获取{board_type}股票{level}分钟级别数据完成，共处理{i}只股票，耗时: {process_elapsed_time:.2f}秒，即{process_elapsed_time/60:.2f}分钟")
+        self.logger.info(f"并行下载{TimePeriod.get_chinese_label(period)}数据：待下载 {len(list_download_tasks)} 只，已是最新 {skipped} 只")
 
-        self.logger.info(f"{board_type}股票{level}分钟级别数据获取完成")
+        if engine is None:
+            engine = self.create_download_engine(num_workers)
+        # 批量下载入库使用 bulk_ingest 连接配置，新建表的索引在全部入库后统一创建
+        with BaostockDataManager().use_storage_profile(PROFILE_BULK_INGEST):
+            stats = engine.download(list_download_tasks, self._save_downloaded_stock_data, task)
 
-        # 批处理完成后强制垃圾回收
+        stats['planned'] = len(list_download_tasks)
+        stats['skipped'] = skipped
         gc.collect()
-
+        return stats
 
     # -----------------其他接口-------------------
     def get_and_save_all_stocks_from_bao(self):
@@ -1190,7 +1376,7 @@ class BaoStockProcessor(QObject):
 
                     for period in time_periods:
                         if BaostockDataManager().check_table_exists(code, period):
-                            db_path = BaostockDataManager().get_db_path(code)
+                            db_path = BaostockDataManager().get_db_path(code, period)
                             BaostockDataManager().create_baostock_table_index(db_path, period)
                         # else:
                         #     self.logger.debug(f"表 {table_name} 不存在，跳过索引创建")
@@ -1371,75 +1557,70 @@ class BaoStockProcessor(QObject):
         filter_result_data_manager = FilterResultDataManger(type)
         self.logger.info(f"开始执行【{TimePeriod.get_chinese_label(period)}】{filter_result_data_manager.get_strategy_name()}筛选，换手率： {turn}, 量比：{lb}，是否启用周线筛选条件：{b_weekly}")
         board_index = 0
+        code_list = []
         dict_stock_info = BaostockDataManager().get_stock_info_dict()
         for board_name, board_data in dict_stock_info.items():
             if board_index > 1:
                 # 仅处理沪深主板
                 break
             board_index += 1
-            for index, row in board_data.iterrows():
-                # try:
-                    code = row['证券代码']  # 使用正确的列名
-
-                    if not self.filter_check(code, condition):
-                        continue
-
-                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date)
-
-                    if b_weekly:
-                        weekly_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, TimePeriod.WEEK, start_date, end_date)
-                    else:
-                        weekly_data = None
-
-                    b_ret = False
-                    if type == 0:
-                        # 零轴上方MA52
-                        b_ret = pf.daily_up_ma52_filter(df_filter_data, weekly_data, period)
-                    elif type == 1:
-                        # 零轴上方MA24
-                        b_ret = pf.daily_up_ma24_filter(df_filter_data, weekly_data, period)
-
-                    elif type == 2:
-                        # 零轴上方MA10
-                        b_ret = pf.daily_up_ma10_filter(df_filter_data, period)
-                    elif type == 3:
-                        # 零轴上方MA5
-                        return
-                    elif type == 4:
-                        # 零轴下方MA52
-                        b_ret = pf.daily_down_between_ma24_ma52_filter(df_filter_data, weekly_data, period)
-                    elif type == 5:
-                        # 零轴下方MA5
-                        b_ret = pf.daily_down_between_ma5_ma52_filter(df_filter_data, weekly_data, period)
-                    elif type == 6:
-                        # 零轴下方MA52突破
-                        b_ret = pf.daily_down_breakthrough_ma52_filter(df_filter_data)
-                    elif type == 7:
-                        # 零轴下方MA24突破
-                        b_ret = pf.daily_down_breakthrough_ma24_filter(df_filter_data)
-                    elif type >= 8 and type <= 12:
-                        return
-                    elif type == 13:
-                        # 涨停复制
-                        b_ret = pf.limit_copy_filter(df_filter_data, end_date)
-                        if not b_ret:
-                            self.logger.info(f"{code} 涨停复制无符合条件数据")
-                    elif type == 14:
-                        # 突破回踩
-                        b_ret = pf.break_through_and_step_back(df_filter_data, period)
-                    elif type == 15:
-                        # 突破回踩2
-                        b_ret = pf.break_through_and_step_back_2(df_filter_data, period)
-                    elif type == 16:
-                        # 突破回踩3
-                        b_ret = pf.break_through_and_step_back_3(df_filter_data, period)
-
-                    if b_ret:
-                        filter_result.append(code)
-
-                # except Exception as e:
-                #     self.logger.error(f"对股票 {code} 进行策略判断时出错: {str(e)}")
-                #     continue
+            for code in board_data['证券代码']:
+                if self.filter_check(code, condition):
+                    code_list.append(code)
+
+        # 并行读取K线数据，按原有顺序逐个判断，只计算该策略用到的指标
+        daily_columns, weekly_columns = DICT_STRATEGY_FILTER_COLUMNS.get(type, (None, None))
+        for code, df_filter_data in BaostockDataManager().iter_stock_data_from_db_by_period_with_indicators(code_list, period, start_date, end_date, ordered=True, profile=PROFILE_SCAN, columns=daily_columns):
+            if b_weekly and weekly_columns != ():
+                weekly_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, TimePeriod.WEEK, start_date, end_date, columns=weekly_columns)
+            else:
+                weekly_data = None
+
+            b_ret = False
+            if type == 0:
+                # 零轴上方MA52
+                b_ret = pf.daily_up_ma52_filter(df_filter_data, weekly_data, period)
+            elif type == 1:
+                # 零轴上方MA24
+                b_ret = pf.daily_up_ma24_filter(df_filter_data, weekly_data, period)
+
+            elif type == 2:
+                # 零轴上方MA10
+                b_ret = pf.daily_up_ma10_filter(df_filter_data, period)
+            elif type == 3:
+                # 零轴上方MA5
+                return
+            elif type == 4:
+                # 零轴下方MA52
+                b_ret = pf.daily_down_between_ma24_ma52_filter(df_filter_data, weekly_data, period)
+            elif type == 5:
+                # 零轴下方MA5
+                b_ret = pf.daily_down_between_ma5_ma52_filter(df_filter_data, weekly_data, period)
+            elif type == 6:
+                # 零轴下方MA52突破
+                b_ret = pf.daily_down_breakthrough_ma52_filter(df_filter_data)
+            elif type == 7:
+                # 零轴下方MA24突破
+                b_ret = pf.daily_down_breakthrough_ma24_filter(df_filter_data)
+            elif type >= 8 and type <= 12:
+                return
+            elif type == 13:
+                # 涨停复制
+                b_ret = pf.limit_copy_filter(df_filter_data, end_date)
+                if not b_ret:
+                    self.logger.info(f"{code} 涨停复制无符合条件数据")
+            elif type == 14:
+                # 突破回踩
+                b_ret = pf.break_through_and_step_back(df_filter_data, period)
+            elif type == 15:
+                # 突破回踩2
+                b_ret = pf.break_through_and_step_back_2(df_filter_data, period)
+            elif type == 16:
+                # 突破回踩3
+                b_ret = pf.break_through_and_step_back_3(df_filter_data, period)
+
+            if b_ret:
+                filter_result.append(code)
 
 
         # 保存到文件，以便导入到看盘软件中
@@ -1478,10 +1659,10 @@ class BaoStockProcessor(QObject):
                     if not self.filter_check(code, condition):
                         continue
 
-                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date)
+                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date, columns=pf.DAILY_UP_MA52_COLUMNS)
 
                     if b_weekly:
-                        weekly_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, TimePeriod.WEEK, start_date, end_date)
+                        weekly_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, TimePeriod.WEEK, start_date, end_date, columns=pf.WEEKLY_CLOSE_DEA_MA52_COLUMNS)
                     else:
                         weekly_data = None
 
@@ -1531,10 +1712,10 @@ class BaoStockProcessor(QObject):
                     if not self.filter_check(code, condition):
                         continue
 
-                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date)
+                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date, columns=pf.DAILY_UP_MA24_COLUMNS)
 
                     if b_weekly:
-                        weekly_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, TimePeriod.WEEK, start_date, end_date)
+                        weekly_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, TimePeriod.WEEK, start_date, end_date, columns=pf.WEEKLY_CLOSE_MA52_COLUMNS)
                     else:
                         weekly_data = None
 
@@ -1580,7 +1761,7 @@ class BaoStockProcessor(QObject):
                     if not self.filter_check(code, condition):
                         continue
 
-                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date)
+                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date, columns=pf.DAILY_UP_MA10_COLUMNS)
                     
                     if pf.daily_up_ma10_filter(df_filter_data, period):
                         filter_result.append(code)
@@ -1628,9 +1809,9 @@ class BaoStockProcessor(QObject):
                     if not self.filter_check(code, condition):
                         continue
 
-                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date)
+                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date, columns=pf.DAILY_DOWN_BETWEEN_MA24_MA52_COLUMNS)
                     if b_weekly:
-                        weekly_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, TimePeriod.WEEK, start_date, end_date)
+                        weekly_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, TimePeriod.WEEK, start_date, end_date, columns=pf.WEEKLY_CLOSE_DEA_MA52_COLUMNS)
                     else:
                         weekly_data = None
                     
@@ -1676,9 +1857,9 @@ class BaoStockProcessor(QObject):
                     if not self.filter_check(code, condition):
                         continue
 
-                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date)
+                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date, columns=pf.DAILY_DOWN_BETWEEN_MA5_MA52_COLUMNS)
                     if b_weekly:
-                        weekly_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, TimePeriod.WEEK, start_date, end_date)
+                        weekly_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, TimePeriod.WEEK, start_date, end_date, columns=pf.WEEKLY_CLOSE_DEA_MA52_COLUMNS)
                     else:
                         weekly_data = None
                     
@@ -1724,7 +1905,7 @@ class BaoStockProcessor(QObject):
                     if not self.filter_check(code, condition):
                         continue
 
-                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date)
+                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date, columns=pf.DAILY_DOWN_BREAKTHROUGH_COLUMNS)
                     
                     if pf.daily_down_breakthrough_ma52_filter(df_filter_data):
                         filter_result.append(code)
@@ -1767,7 +1948,7 @@ class BaoStockProcessor(QObject):
                     if not self.filter_check(code, condition):
                         continue
 
-                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date)
+                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date, columns=pf.DAILY_DOWN_BREAKTHROUGH_COLUMNS)
                     
                     if pf.daily_down_breakthrough_ma24_filter(df_filter_data):
                         filter_result.append(code)
@@ -1955,7 +2136,7 @@ class BaoStockProcessor(QObject):
                     if not self.filter_check(code, condition):
                         continue
 
-                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date)
+                    df_filter_data = BaostockDataManager().get_stock_data_from_db_by_period_with_indicators_auto(code, period, start_date, end_date, columns=pf.LIMIT_COPY_COLUMNS)
                     
                     if pf.limit_copy_filter(df_filter_data, end_date):
                         filter_result.append(code)
@@ -0,0 +1,248 @@
+import numpy as np
+import pandas as pd
+
+from manager.period_manager import TimePeriod
+
+'''
+    由日线聚合生成周线、月线、季线、年线：
+        date            周期内最后一个交易日
+        open            周期内第一个交易日开盘价
+        high / low      周期内最高 / 最低价
+        close           周期内最后一个交易日收盘价
+        volume / amount / turnover_rate   周期内求和
+        change_percent  相对上一周期收盘价的涨跌幅（第一个周期用首日涨跌幅反推的前收盘价）
+        adjustflag      与日线一致
+    周期边界：交易周为自然周（周一至周日）内的交易日，月、季、年同理；节假日只影响周期内的交易日，不改变周期归属。
+    只输出已结束的周期：最后一根日线之后同一周期内还有交易日（按交易日历判断）时，该周期未结束，不输出。
+    没有交易日历时按工作日判断（节假日所在周期的收盘会推迟到下一次更新才输出）。
+
+    由较细的分钟线（如15分钟）聚合生成30、60、120分钟线，按A股交易时段切分：
+        上午 09:30-11:30、下午 13:00-15:00，共240分钟；K线时间为区间结束时间（与 Baostock 一致）
+        30分钟：10:00 10:30 11:00 11:30 13:30 14:00 14:30 15:00
+        60分钟：10:30 11:30 14:00 15:00
+        120分钟：11:30 15:00（上午、下午各一根）
+    周期需能整除上午时段的120分钟，因此聚合区间不会跨越午休。
+'''
+
+RESAMPLE_FREQUENCIES = {
+    TimePeriod.WEEK: 'W-SUN',
+    TimePeriod.MONTH: 'M',
+    TimePeriod.QUARTER: 'Q',
+    TimePeriod.YEAR: 'Y',
+}
+
+MORNING_OPEN_MINUTES = 9 * 60 + 30
+MORNING_CLOSE_MINUTES = 11 * 60 + 30
+AFTERNOON_OPEN_MINUTES = 13 * 60
+SESSION_MINUTES = MORNING_CLOSE_MINUTES - MORNING_OPEN_MINUTES
+
+OUTPUT_COLUMNS = ['date', 'code', 'open', 'high', 'low', 'close', 'volume', 'amount', 'change_percent', 'turnover_rate', 'adjustflag']
+
+def is_resample_period(period):
+    """该周期能否由日线聚合生成"""
+    return period in RESAMPLE_FREQUENCIES
+
+MINUTE_OUTPUT_COLUMNS = ['date', 'time', 'code', 'open', 'high', 'low', 'close', 'volume', 'amount', 'adjustflag']
+
+# 校验时比较的列及相对误差（Baostock 成交额按元四舍五入，价格保留4位小数）
+COMPARE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'amount']
+
+def get_minute_count(period):
+    """分钟级周期的分钟数，例如 TimePeriod.MINUTE_30 -> 30"""
+    return int(period.value[:-1])
+
+def is_intraday_resample_period(period, base_period):
+    """period 能否由 base_period 分钟线按交易时段聚合生成"""
+    if not (TimePeriod.is_minute_level(period) and TimePeriod.is_minute_level(base_period)):
+        return False
+    minutes, base_minutes = get_minute_count(period), get_minute_count(base_period)
+    return minutes > base_minutes and minutes % base_minutes == 0 and SESSION_MINUTES % minutes == 0
+
+def get_period_start(date, period):
+    """date 所在周期的第一天（YYYY-MM-DD），增量更新时从该日起读取日线"""
+    return pd.Timestamp(date).to_period(RESAMPLE_FREQUENCIES[period]).start_time.strftime('%Y-%m-%d')
+
+def _is_last_period_complete(last_date, period, trade_dates=None):
+    """
+    last_date 所在周期是否已结束：该周期内 last_date 之后没有交易日
+    trade_dates 为已排序的交易日（datetime64[D] 数组），不覆盖该周期剩余日期时按工作日判断
+    """
+    period_end = last_date.to_period(RESAMPLE_FREQUENCIES[period]).end_time.normalize()
+    if last_date >= period_end:
+        return True
+    remaining_start = np.datetime64(last_date + pd.Timedelta(days=1), 'D')
+    remaining_end = np.datetime64(period_end, 'D')
+    if trade_dates is not None and len(trade_dates) > 0 and trade_dates[-1] >= remaining_end:
+        start_index = np.searchsorted(trade_dates, remaining_start, side='left')
+        end_index = np.searchsorted(trade_dates, remaining_end, side='right')
+        return end_index == start_index
+    return np.busday_count(remaining_start, remaining_end + np.timedelta64(1, 'D')) == 0
+
+def resample_daily_bars(df_daily, period, trade_dates=None, include_partial=False):
+    """
+    日线聚合为长周期K线
+
+    参数:
+        df_daily (DataFrame): 单只股票的日线（列同日线表，date 为 YYYY-MM-DD 字符串或 datetime.date）
+        period (TimePeriod): WEEK / MONTH / QUARTER / YEAR
+        trade_dates (iterable, optional): 交易日（YYYY-MM-DD，或 TradingCalendar.get_trade_dates 的升序 datetime64[D] 数组），
+                                          用于判断最后一个周期是否结束
+        include_partial (bool): True 时同时输出未结束的最后一个周期
+
+    返回:
+        DataFrame: 列为 OUTPUT_COLUMNS，date 与输入同类型，按日期升序
+    """
+    if not is_resample_period(period):
+        raise ValueError(f"不支持由日线聚合的周期: {period}")
+    if df_daily is None or df_daily.empty:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+
+    date_as_string = isinstance(df_daily['date'].iloc[0], str)
+    df_sorted = df_daily.sort_values('date', kind='stable').reset_index(drop=True)
+    dates = pd.to_datetime(df_sorted['date'])
+    close = pd.to_numeric(df_sorted['close'], errors='coerce')
+
+    df_work = pd.DataFrame({
+        'date': dates,
+        'open': pd.to_numeric(df_sorted['open'], errors='coerce'),
+        'high': pd.to_numeric(df_sorted['high'], errors='coerce'),
+        'low': pd.to_numeric(df_sorted['low'], errors='coerce'),
+        'close': close,
+        'volume': pd.to_numeric(df_sorted['volume'], errors='coerce'),
+        'amount': pd.to_numeric(df_sorted['amount'], errors='coerce'),
+        'turnover_rate': pd.to_numeric(df_sorted['turnover_rate'], errors='coerce') if 'turnover_rate' in df_sorted.columns else np.nan,
+        'adjustflag': df_sorted['adjustflag'] if 'adjustflag' in df_sorted.columns else np.nan,
+    })
+    period_keys = dates.dt.to_period(RESAMPLE_FREQUENCIES[period])
+    df_bars = df_work.groupby(period_keys.values, sort=True).agg(
+        date=('date', 'last'), open=('open', 'first'), high=('high', 'max'), low=('low', 'min'), close=('close', 'last'),
+        volume=('volume', 'sum'), amount=('amount', 'sum'), turnover_rate=('turnover_rate', 'sum'), adjustflag=('adjustflag', 'last'),
+    ).reset_index(drop=True)
+
+    # 第一个周期的前收盘价由首日涨跌幅反推，之后为上一周期收盘价
+    first_preclose = np.nan
+    if 'change_percent' in df_sorted.columns:
+        first_change = pd.to_numeric(df_sorted['change_percent'], errors='coerce').iloc[0]
+        if pd.notna(first_change) and first_change != -100:
+            first_preclose = close.iloc[0] / (1 + first_change / 100)
+    preclose = df_bars['close'].shift(1)
+    preclose.iloc[0] = first_preclose
+    df_bars['change_percent'] = (df_bars['close'] / preclose - 1) * 100
+
+    if not include_partial:
+        trade_date_array = None
+        if trade_dates is not None:
+            if isinstance(trade_dates, np.ndarray) and trade_dates.dtype == np.dtype('datetime64[D]'):
+                trade_date_array = trade_dates
+            else:
+                trade_date_array = np.sort(pd.to_datetime(pd.Series(list(trade_dates))).to_numpy(dtype='datetime64[D]'))
+        if not _is_last_period_complete(df_bars['date'].iloc[-1], period, trade_date_array):
+            df_bars = df_bars.iloc[:-1]
+
+    df_bars['volume'] = df_bars['volume'].round().astype('Int64')
+    df_bars['code'] = df_sorted['code'].iloc[-1] if 'code' in df_sorted.columns else None
+    df_bars['date'] = df_bars['date'].dt.strftime('%Y-%m-%d') if date_as_string else df_bars['date'].dt.date
+    return df_bars[OUTPUT_COLUMNS].reset_index(drop=True)
+
+def _get_session_bucket_end_minutes(minutes_of_day, period_minutes):
+    """
+    K线结束时间（当日分钟数）所属聚合区间的结束时间（当日分钟数）
+    先换算为自开盘起的交易分钟数（上午 1-120，下午 121-240），向上取整到周期整数倍后换算回时钟时间
+    """
+    session_offset = np.where(minutes_of_day <= MORNING_CLOSE_MINUTES,
+                              minutes_of_day - MORNING_OPEN_MINUTES,
+                              SESSION_MINUTES + minutes_of_day - AFTERNOON_OPEN_MINUTES)
+    session_offset = np.clip(session_offset, 1, 2 * SESSION_MINUTES)
+    bucket_end_offset = -(-session_offset // period_minutes) * period_minutes
+    return np.where(bucket_end_offset <= SESSION_MINUTES,
+                    MORNING_OPEN_MINUTES + bucket_end_offset,
+                    AFTERNOON_OPEN_MINUTES + bucket_end_offset - SESSION_MINUTES)
+
+def resample_minute_bars(df_minute, period, include_partial=False):
+    """
+    较细的分钟线按交易时段聚合为 period 分钟线
+
+    参数:
+        df_minute (DataFrame): 单只股票的分钟线（列同分钟线表，time 为 'YYYY-MM-DD HH:MM:SS' 字符串或 datetime64）
+        period (TimePeriod): 目标分钟级周期（30m / 60m / 120m 等，需整除120分钟）
+        include_partial (bool): True 时同时输出未结束的区间（最后一根分钟线之后还有区间内的K线未生成）
+
+    返回:
+        DataFrame: 列为 MINUTE_OUTPUT_COLUMNS，date、time 与输入同类型，按时间升序
+    """
+    if not TimePeriod.is_minute_level(period) or SESSION_MINUTES % get_minute_count(period) != 0:
+        raise ValueError(f"不支持按交易时段聚合的周期: {period}")
+    if df_minute is None or df_minute.empty:
+        return pd.DataFrame(columns=MINUTE_OUTPUT_COLUMNS)
+
+    time_as_string = isinstance(df_minute['time'].iloc[0], str)
+    date_as_string = isinstance(df_minute['date'].iloc[0], str)
+    times = pd.to_datetime(df_minute['time'])
+    order = np.argsort(times.to_numpy(), kind='stable')
+    df_sorted = df_minute.iloc[order].reset_index(drop=True)
+    times = times.iloc[order].reset_index(drop=True)
+
+    minutes_of_day = (times.dt.hour * 60 + times.dt.minute).to_numpy()
+    bucket_end_minutes = _get_session_bucket_end_minutes(minutes_of_day, get_minute_count(period))
+    bucket_end = times.dt.normalize() + pd.to_timedelta(bucket_end_minutes, unit='m')
+
+    df_work = pd.DataFrame({
+        'time': bucket_end,
+        'open': pd.to_numeric(df_sorted['open'], errors='coerce'),
+        'high': pd.to_numeric(df_sorted['high'], errors='coerce'),
+        'low': pd.to_numeric(df_sorted['low'], errors='coerce'),
+        'close': pd.to_numeric(df_sorted['close'], errors='coerce'),
+        'volume': pd.to_numeric(df_sorted['volume'], errors='coerce'),
+        'amount': pd.to_numeric(df_sorted['amount'], errors='coerce'),
+        'adjustflag': df_sorted['adjustflag'] if 'adjustflag' in df_sorted.columns else np.nan,
+    })
+    df_bars = df_work.groupby('time', sort=True).agg(
+        open=('open', 'first'), high=('high', 'max'), low=('low', 'min'), close=('close', 'last'),
+        volume=('volume', 'sum'), amount=('amount', 'sum'), adjustflag=('adjustflag', 'last'),
+    ).reset_index()
+
+    # 区间结束时间晚于最后一根分钟线时，区间内还有K线未生成
+    if not include_partial:
+        df_bars = df_bars[df_bars['time'] <= times.iloc[-1]]
+
+    df_bars['volume'] = df_bars['volume'].round().astype('Int64')
+    df_bars['code'] = df_sorted['code'].iloc[-1] if 'code' in df_sorted.columns else None
+    df_bars['date'] = df_bars['time'].dt.strftime('%Y-%m-%d') if date_as_string else df_bars['time'].dt.date
+    if time_as_string:
+        df_bars['time'] = df_bars['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df_bars[MINUTE_OUTPUT_COLUMNS].reset_index(drop=True)
+
+def diff_resampled_bars(df_derived, df_reference, rtol=1e-4):
+    """
+    比较聚合生成的K线与下载的K线（校验模式）
+
+    参数:
+        df_derived (DataFrame): 聚合生成的K线
+        df_reference (DataFrame): 同一区间下载的K线
+        rtol (float): 数值列允许的相对误差
+
+    返回:
+        DataFrame: 不一致项，列为 key（分钟线为 time，其他为 date）、column、derived、reference；
+                   只在一方存在的K线 column 为 'missing'，为空表示完全一致
+    """
+    key = 'time' if 'time' in df_reference.columns else 'date'
+    derived = df_derived.assign(**{key: df_derived[key].astype(str)}).set_index(key)
+    reference = df_reference.assign(**{key: df_reference[key].astype(str)}).set_index(key)
+
+    list_diff = []
+    for value in derived.index.difference(reference.index):
+        list_diff.append({'key': value, 'column': 'missing', 'derived': 'present', 'reference': None})
+    for value in reference.index.difference(derived.index):
+        list_diff.append({'key': value, 'column': 'missing', 'derived': None, 'reference': 'present'})
+
+    common = derived.index.intersection(reference.index)
+    for column in COMPARE_COLUMNS:
+        if column not in derived.columns or column not in reference.columns:
+            continue
+        left = pd.to_numeric(derived.loc[common, column], errors='coerce').astype('float64').to_numpy()
+        right = pd.to_numeric(reference.loc[common, column], errors='coerce').astype('float64').to_numpy()
+        mismatch = ~np.isclose(left, right, rtol=rtol, atol=0, equal_nan=True)
+        for index in np.flatnonzero(mismatch):
+            list_diff.append({'key': common[index], 'column': column, 'derived': left[index], 'reference': right[index]})
+
+    return pd.DataFrame(list_diff, columns=['key', 'column', 'derived', 'reference']).sort_values(['key', 'column'], kind='stable').reset_index(drop=True)
@@ -0,0 +1,230 @@
+import time
+import queue
+import threading
+from contextlib import nullcontext
+
+from manager.logging_manager import get_logger
+
+'''
+    K线数据下载流水线：获取 -> 转换 -> 批量写入，三个阶段各自在线程中运行，阶段之间使用有界队列。
+        获取阶段（fetch）：网络请求，Baostock 会话不支持并发，单线程
+        转换阶段（convert）：原始数据转换为入库格式（类型转换、去空值），可多线程
+        写入阶段（write）：攒够 batch_size 只股票或等待超过 batch_interval 秒后批量写入
+    队列写满时上游阻塞（背压），内存占用不超过 queue_size 只股票的数据；网络等待与磁盘写入重叠进行。
+    每个阶段统计处理数量、处理耗时、等待上游（空闲）与等待下游（背压）的耗时，以及队列最大长度。
+'''
+
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_INTERVAL = 2.0
+
+_SENTINEL = object()
+
+class _StageMetrics:
+    """单个阶段的计时统计（只由该阶段的线程更新）"""
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0            # 处理耗时
+        self.wait_input = 0.0      # 等待上游数据
+        self.wait_output = 0.0     # 下游队列已满的阻塞时间（背压）
+        self.max_queue_depth = 0   # 输入队列的最大长度
+        self.batches = 0           # 写入批次数（仅写入阶段）
+
+    def to_dict(self):
+        return {'items': self.items, 'errors': self.errors, 'busy': self.busy, 'wait_input': self.wait_input,
+                'wait_output': self.wait_output, 'max_queue_depth': self.max_queue_depth}
+
+class StockDataPipeline:
+    """
+    获取/转换/批量写入三阶段流水线
+    """
+    def __init__(self, fetch_func, convert_func, write_batch_func, queue_size=DEFAULT_QUEUE_SIZE,
+                 batch_size=DEFAULT_BATCH_SIZE, batch_interval=DEFAULT_BATCH_INTERVAL, convert_workers=1, writer_context=None):
+        """
+        参数:
+            fetch_func (callable): fetch_func(item) -> 原始数据，返回 None 表示该项无需处理
+            convert_func (callable): convert_func(item, raw) -> 待写入数据，返回 None 表示无数据
+            write_batch_func (callable): write_batch_func([(item, data), ...]) -> 写入成功的项数
+            queue_size (int): 阶段之间队列的容量（只股票）
+            batch_size (int): 每批写入的最大股票数
+            batch_interval (float): 未攒满一批时的最长等待时间（秒）
+            convert_workers (int): 转换线程数
+            writer_context (callable, optional): 返回上下文管理器，包裹整个写入线程（如切换连接配置，配置按线程生效）
+        """
+        if queue_size <= 0 or batch_size <= 0 or convert_workers <= 0:
+            raise ValueError("queue_size、batch_size、convert_workers 必须为正整数")
+
+        self.logger = get_logger(__name__)
+        self.fetch_func = fetch_func
+        self.convert_func = convert_func
+        self.write_batch_func = write_batch_func
+        self.queue_size = int(queue_size)
+        self.batch_size = int(batch_size)
+        self.batch_interval = float(batch_interval)
+        self.convert_workers = int(convert_workers)
+        self.writer_context = writer_context
+
+    @staticmethod
+    def _put(q, value, metrics):
+        start = time.perf_counter()
+        q.put(value)
+        metrics.wait_output += time.perf_counter() - start
+
+    @staticmethod
+    def _get(q, metrics, timeout=None):
+        metrics.max_queue_depth = max(metrics.max_queue_depth, q.qsize())
+        start = time.perf_counter()
+        try:
+            return q.get(timeout=timeout)
+        finally:
+            metrics.wait_input += time.perf_counter() - start
+
+    def _fetch_stage(self, items, fetch_queue, metrics, task, stop_event):
+        try:
+            for item in items:
+                if task is not None:
+                    task._check_pause()
+                    if task.is_cancelled():
+                        break
+                if stop_event.is_set():
+                    break
+
+                start = time.perf_counter()
+                try:
+                    raw = self.fetch_func(item)
+                except Exception as e:
+                    metrics.errors += 1
+                    self.logger.error(f"获取 {item} 数据时出错: {str(e)}")
+                    continue
+                finally:
+                    metrics.busy += time.perf_counter() - start
+
+                if raw is None:
+                    continue
+                metrics.items += 1
+                self._put(fetch_queue, (item, raw), metrics)
+        finally:
+            for _ in range(self.convert_workers):
+                fetch_queue.put(_SENTINEL)
+
+    def _convert_stage(self, fetch_queue, write_queue, metrics):
+        try:
+            while True:
+                message = self._get(fetch_queue, metrics)
+                if message is _SENTINEL:
+                    break
+                item, raw = message
+
+                start = time.perf_counter()
+                try:
+                    data = self.convert_func(item, raw)
+                except Exception as e:
+                    metrics.errors += 1
+                    self.logger.error(f"转换 {item} 数据时出错: {str(e)}")
+                    continue
+                finally:
+                    metrics.busy += time.perf_counter() - start
+
+                if data is None:
+                    continue
+                metrics.items += 1
+                self._put(write_queue, (item, data), metrics)
+        finally:
+            write_queue.put(_SENTINEL)
+
+    def _write_batch(self, batch, metrics):
+        start = time.perf_counter()
+        try:
+            written = self.write_batch_func(batch)
+            metrics.items += written
+            metrics.errors += len(batch) - written
+        except Exception as e:
+            metrics.errors += len(batch)
+            self.logger.error(f"批量写入 {len(batch)} 只股票数据时出错: {str(e)}")
+        finally:
+            metrics.busy += time.perf_counter() - start
+            metrics.batches += 1
+
+    def _write_stage(self, write_queue, metrics):
+        remaining_producers = self.convert_workers
+        batch = []
+        batch_start = None
+        with (self.writer_context() if self.writer_context else nullcontext()):
+            while remaining_producers > 0:
+                timeout = None
+                if batch:
+                    timeout = max(0.0, self.batch_interval - (time.perf_counter() - batch_start))
+                try:
+                    message = self._get(write_queue, metrics, timeout)
+                except queue.Empty:
+                    message = None
+
+                if message is _SENTINEL:
+                    remaining_producers -= 1
+                elif message is not None:
+                    if not batch:
+                        batch_start = time.perf_counter()
+                    batch.append(message)
+
+                if batch and (len(batch) >= self.batch_size or message is None or remaining_producers == 0):
+                    self._write_batch(batch, metrics)
+                    batch = []
+
+    def run(self, items, task=None):
+        """
+        处理全部项目，阻塞直到写入完成
+
+        参数:
+            items (iterable): 待处理项目（如股票代码）
+            task (BaseTask, optional): 后台任务，获取阶段在每一项前检查暂停与取消
+
+        返回:
+            dict: {'elapsed', 'fetch': {...}, 'convert': {...}, 'write': {...}}，各阶段统计见 _StageMetrics，write 另含 batches
+        """
+        fetch_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        stop_event = threading.Event()
+
+        fetch_metrics = _StageMetrics('fetch')
+        list_convert_metrics = [_StageMetrics('convert') for _ in range(self.convert_workers)]
+        write_metrics = _StageMetrics('write')
+
+        start_time = time.perf_counter()
+        list_thread = [threading.Thread(target=self._fetch_stage, args=(items, fetch_queue, fetch_metrics, task, stop_event),
+                                        name="pipeline-fetch", daemon=True)]
+        list_thread += [threading.Thread(target=self._convert_stage, args=(fetch_queue, write_queue, metrics),
+                                         name=f"pipeline-convert-{index}", daemon=True)
+                        for index, metrics in enumerate(list_convert_metrics)]
+        writer_thread = threading.Thread(target=self._write_stage, args=(write_queue, write_metrics), name="pipeline-write", daemon=True)
+        list_thread.append(writer_thread)
+
+        for thread in list_thread:
+            thread.start()
+        try:
+            writer_thread.join()
+        finally:
+            # 写入线程异常退出时停止获取，避免上游永久阻塞在已满的队列上
+            stop_event.set()
+            while any(thread.is_alive() for thread in list_thread[:-1]):
+                for q in (fetch_queue, write_queue):
+                    try:
+                        while True:
+                            q.get_nowait()
+                    except queue.Empty:
+                        pass
+                time.sleep(0.01)
+
+        convert_stats = {key: sum(metrics.to_dict()[key] for metrics in list_convert_metrics)
+                         for key in ['items', 'errors', 'busy', 'wait_input', 'wait_output']}
+        convert_stats['max_queue_depth'] = max(metrics.max_queue_depth for metrics in list_convert_metrics)
+        write_stats = write_metrics.to_dict()
+        write_stats['batches'] = write_metrics.batches
+
+        stats = {'elapsed': time.perf_counter() - start_time, 'fetch': fetch_metrics.to_dict(),
+                 'convert': convert_stats, 'write': write_stats}
+        self.logger.info(f"流水线完成，耗时 {stats['elapsed']:.2f}秒：" + "，".join(
+            f"{name} {stats[name]['items']} 项/处理 {stats[name]['busy']:.2f}秒/背压 {stats[name]['wait_output']:.2f}秒"
+            for name in ['fetch', 'convert', 'write']))
+        return stats
@@ -1,4 +1,6 @@
 from processor.baostock_processor import BaoStockProcessor
+from manager.bao_stock_data_manager import BaostockDataManager
+from manager.period_manager import TimePeriod
 from thread.base_task import BaseTask
 import random
 import time
@@ -16,7 +18,11 @@ class BaostockDataFetchTask(BaseTask):
     def execute(self):
         """执行任务的主要方法"""
         board_types = ['sh_main', 'sz_main']
-        levels = ['15', '30', '60']
+        # 本地聚合的级别（默认30、60分钟）在源级别（minute_base_period）入库时同步生成，不再单独下载
+        data_manager = BaostockDataManager()
+        base_level = data_manager.minute_base_period.value[:-1]
+        levels = [base_level] + [level for level in ['15', '30', '60']
+                                 if level != base_level and not data_manager.is_derived_period(TimePeriod.from_minute_number_label(level))]
         
         total_tasks = len(board_types) * len(levels)
         completed_tasks = 0
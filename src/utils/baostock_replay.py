@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Baostock 本地替身（离线入库测试与基准测试用）
+
+实现项目用到的 Baostock 接口子集，返回值与 baostock 一致（ResultData：error_code、error_msg、fields、next()、get_row_data()）：
+    login / logout
+    query_history_k_data_plus   日线、周线、月线、5/15/30/60 分钟线
+    query_trade_dates           交易日历
+    query_all_stock             证券列表
+
+数据来源（按优先级）：
+    1. 录制的数据文件 <fixture_dir>/<frequency>/<code>.csv、<fixture_dir>/trade_dates.csv、<fixture_dir>/all_stock.csv（见 record_fixtures）
+    2. 合成数据：按股票代码固定随机种子生成，同一股票任意日期范围的查询结果前后一致；交易日为周一至周五
+
+使用方式：
+    - 替换模块：在导入 processor.baostock_processor 之前 sys.modules['baostock'] = utils.baostock_replay
+    - 多进程下载引擎：BaostockDownloadEngine(bs_module='utils.baostock_replay')
+配置通过环境变量传递（configure() 会同时写入环境变量，spawn 方式启动的工作进程同样生效）：
+    MPOLICY_BS_REPLAY_LATENCY          每次查询的延迟（秒），默认 0
+    MPOLICY_BS_REPLAY_PAGE_LATENCY     每页（10000 行）数据的额外延迟（秒），默认 0
+    MPOLICY_BS_REPLAY_FAILURE_RATE     查询返回网络错误的概率，默认 0
+    MPOLICY_BS_REPLAY_FIXTURE_DIR      录制数据目录，默认不使用
+    MPOLICY_BS_REPLAY_STOCKS           合成证券列表中每个板块的股票数，默认 50
+"""
+
+import os
+import time
+import zlib
+import random
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from pathlib import Path
+
+PAGE_SIZE = 10000
+SYNTHETIC_START_DATE = "2015-01-01"
+
+ERROR_CODE_SUCCESS = '0'
+ERROR_CODE_NOT_LOGGED_IN = '10001001'
+ERROR_CODE_NETWORK = '10002007'
+ERROR_CODE_INVALID_PARAM = '10004011'
+
+# 合成证券列表的各板块代码起点
+SYNTHETIC_BOARD_PREFIXES = [('sh.', 600000), ('sz.', 1), ('sz.', 300001), ('sh.', 688001)]
+
+# 各分钟频率每个交易日的K线结束时间
+_MORNING_START, _MORNING_END = 9 * 60 + 30, 11 * 60 + 30
+_AFTERNOON_START, _AFTERNOON_END = 13 * 60, 15 * 60
+
+_ENV_KEYS = {
+    'latency': 'MPOLICY_BS_REPLAY_LATENCY',
+    'page_latency': 'MPOLICY_BS_REPLAY_PAGE_LATENCY',
+    'failure_rate': 'MPOLICY_BS_REPLAY_FAILURE_RATE',
+    'fixture_dir': 'MPOLICY_BS_REPLAY_FIXTURE_DIR',
+    'stocks_per_board': 'MPOLICY_BS_REPLAY_STOCKS',
+}
+
+_lock = threading.Lock()
+_logged_in = False
+_stats = {'logins': 0, 'queries': 0, 'rows': 0, 'failures': 0}
+
+# =====================================================================配置======================================================
+def get_config():
+    """当前配置（每次从环境变量读取，configure 修改后立即生效）"""
+    return {
+        'latency': float(os.environ.get(_ENV_KEYS['latency'], '0') or 0),
+        'page_latency': float(os.environ.get(_ENV_KEYS['page_latency'], '0') or 0),
+        'failure_rate': float(os.environ.get(_ENV_KEYS['failure_rate'], '0') or 0),
+        'fixture_dir': os.environ.get(_ENV_KEYS['fixture_dir'], '') or None,
+        'stocks_per_board': int(os.environ.get(_ENV_KEYS['stocks_per_board'], '50') or 50),
+    }
+
+def configure(**kwargs):
+    """
+    修改配置，参数同 get_config 的键；值为 None 时恢复默认
+    """
+    for key, value in kwargs.items():
+        if key not in _ENV_KEYS:
+            raise ValueError(f"未知的配置项: {key}")
+        if value is None:
+            os.environ.pop(_ENV_KEYS[key], None)
+        else:
+            os.environ[_ENV_KEYS[key]] = str(value)
+
+def get_stats():
+    with _lock:
+        return dict(_stats)
+
+def reset_stats():
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
+
+def _add_stats(key, value=1):
+    with _lock:
+        _stats[key] += value
+
+# =====================================================================结果集======================================================
+class ResultData:
+    """与 baostock.data.resultset.ResultData 一致的结果集，分页读取时按配置模拟每页延迟"""
+    def __init__(self, error_code=ERROR_CODE_SUCCESS, error_msg='success', fields=None, rows=None, page_latency=0.0):
+        self.error_code = error_code
+        self.error_msg = error_msg
+        self.fields = list(fields or [])
+        self.data = rows if rows is not None else []
+        self._page_latency = page_latency
+        self._cursor = -1
+
+    def next(self):
+        self._cursor += 1
+        if self._cursor >= len(self.data):
+            return False
+        if self._page_latency > 0 and self._cursor % PAGE_SIZE == 0 and self._cursor > 0:
+            time.sleep(self._page_latency)
+        return True
+
+    def get_row_data(self):
+        return self.data[self._cursor]
+
+    def get_data(self):
+        return pd.DataFrame(self.data, columns=self.fields)
+
+def _error(error_code, error_msg):
+    return ResultData(error_code, error_msg)
+
+# =====================================================================会话======================================================
+def login(user_id='anonymous', password='123456', options=0):
+    global _logged_in
+    _logged_in = True
+    _add_stats('logins')
+    return ResultData(error_msg='success')
+
+def logout(user_id='anonymous'):
+    global _logged_in
+    _logged_in = False
+    return ResultData(error_msg='success')
+
+def _begin_query():
+    """公共的查询前处理：登录检查、延迟、故障注入；返回错误结果集或 None"""
+    config = get_config()
+    _add_stats('queries')
+    if not _logged_in:
+        return _error(ERROR_CODE_NOT_LOGGED_IN, '用户未登录')
+    if config['latency'] > 0:
+        time.sleep(config['latency'] * random.uniform(0.8, 1.2))
+    if config['failure_rate'] > 0 and random.random() < config['failure_rate']:
+        _add_stats('failures')
+        return _error(ERROR_CODE_NETWORK, '网络接收错误')
+    return None
+
+# =====================================================================交易日历======================================================
+def _normalize_date_range(start_date, end_date):
+    start_date = start_date or SYNTHETIC_START_DATE
+    end_date = end_date or datetime.date.today().strftime('%Y-%m-%d')
+    return start_date, end_date
+
+@lru_cache(maxsize=4)
+def _load_fixture_trade_dates(fixture_dir):
+    path = Path(fixture_dir) / "trade_dates.csv"
+    if not path.exists():
+        return None
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+def _trading_days(start_date, end_date):
+    """区间内的交易日（DatetimeIndex）"""
+    fixture_dir = get_config()['fixture_dir']
+    df_fixture = _load_fixture_trade_dates(fixture_dir) if fixture_dir else None
+    if df_fixture is not None:
+        mask = (df_fixture['calendar_date'] >= start_date) & (df_fixture['calendar_date'] <= end_date) & (df_fixture['is_trading_day'] == '1')
+        return pd.DatetimeIndex(pd.to_datetime(df_fixture.loc[mask, 'calendar_date']))
+    return pd.bdate_range(start_date, end_date)
+
+def query_trade_dates(start_date=None, end_date=None):
+    error = _begin_query()
+    if error is not None:
+        return error
+    start_date, end_date = _normalize_date_range(start_date, end_date)
+    calendar_dates = pd.date_range(start_date, end_date)
+    trading_days = set(_trading_days(start_date, end_date))
+    rows = [[day.strftime('%Y-%m-%d'), '1' if day in trading_days else '0'] for day in calendar_dates]
+    _add_stats('rows', len(rows))
+    return ResultData(fields=['calendar_date', 'is_trading_day'], rows=rows)
+
+# =====================================================================证券列表======================================================
+def query_all_stock(day=None):
+    error = _begin_query()
+    if error is not None:
+        return error
+
+    fixture_dir = get_config()['fixture_dir']
+    path = Path(fixture_dir) / "all_stock.csv" if fixture_dir else None
+    if path is not None and path.exists():
+        rows = pd.read_csv(path, dtype=str, keep_default_na=False).values.tolist()
+    else:
+        stocks_per_board = get_config()['stocks_per_board']
+        rows = [[f"{prefix}{start + index:06d}", '1', f"合成股票{prefix}{start + index:06d}"]
+                for prefix, start in SYNTHETIC_BOARD_PREFIXES for index in range(stocks_per_board)]
+    _add_stats('rows', len(rows))
+    return ResultData(fields=['code', 'tradeStatus', 'code_name'], rows=rows)
+
+# =====================================================================K线数据======================================================
+def _code_seed(code):
+    return zlib.crc32(code.encode('utf-8'))
+
+@lru_cache(maxsize=256)
+def _synthetic_daily(code):
+    """股票从 SYNTHETIC_START_DATE 至今的合成日线（数值列），结果缓存，同一股票的任意区间查询互相一致"""
+    days = _trading_days(SYNTHETIC_START_DATE, datetime.date.today().strftime('%Y-%m-%d'))
+    n = len(days)
+    rng = np.random.default_rng(_code_seed(code))
+    close = np.round(np.maximum(1.0, 10 + rng.uniform(0, 40) + np.cumsum(rng.normal(0, 0.2, n))), 2)
+    preclose = np.concatenate([[close[0]], close[:-1]])
+    open_ = np.round(preclose * (1 + rng.normal(0, 0.005, n)), 2)
+    high = np.round(np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n))), 2)
+    low = np.round(np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n))), 2)
+    volume = rng.integers(100000, 10000000, n)
+    return pd.DataFrame({
+        'date': days, 'open': open_, 'high': high, 'low': low, 'close': close, 'preclose': preclose,
+        'volume': volume, 'amount': np.round(volume * close, 2),
+        'pctChg': np.round((close / preclose - 1) * 100, 6), 'turn': np.round(rng.uniform(0.1, 8.0, n), 6),
+    })
+
+def _aggregate_daily(df_daily, freq, end_date):
+    """日线聚合为周线（W-FRI）或月线（M），日期为该周期最后一个交易日，只返回 end_date 之前已结束的周期"""
+    periods = df_daily['date'].dt.to_period(freq)
+    df_period = df_daily.groupby(periods).agg(date=('date', 'last'), open=('open', 'first'), high=('high', 'max'),
+                                              low=('low', 'min'), close=('close', 'last'), volume=('volume', 'sum'),
+                                              amount=('amount', 'sum'), turn=('turn', 'sum'))
+    df_period = df_period[df_period.index.end_time <= pd.Timestamp(end_date) + pd.Timedelta(days=1)].reset_index(drop=True)
+    df_period['preclose'] = df_period['close'].shift(1).fillna(df_period['open'])
+    df_period['pctChg'] = np.round((df_period['close'] / df_period['preclose'] - 1) * 100, 6)
+    return df_period
+
+def _minute_bar_ends(minutes):
+    """每个交易日的K线结束时刻（分钟数）"""
+    morning = np.arange(_MORNING_START + minutes, _MORNING_END + 1, minutes)
+    afternoon = np.arange(_AFTERNOON_START + minutes, _AFTERNOON_END + 1, minutes)
+    return np.concatenate([morning, afternoon])
+
+def _hash_uniform(*keys):
+    """由整数键（可广播的数组）计算 [0, 1) 均匀分布的伪随机数（splitmix64），同样的键总是得到同样的值"""
+    with np.errstate(over='ignore'):
+        x = np.uint64(0x9E3779B97F4A7C15)
+        for key in keys:
+            x = (x ^ np.asarray(key).astype(np.uint64)) * np.uint64(0xBF58476D1CE4E5B9)
+            x = x ^ (x >> np.uint64(31))
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+def _hash_normal(*keys):
+    """标准正态分布（Box-Muller），键同 _hash_uniform"""
+    u1 = np.maximum(_hash_uniform(*keys, 1), 1e-12)
+    u2 = _hash_uniform(*keys, 2)
+    return np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+def _synthetic_minute(code, df_daily, minutes):
+    """
+    由日线拆分出分钟线：开盘价到收盘价的随机桥，成交量按随机权重分配。
+    随机数由 (股票, 交易日, K线序号) 计算，任意日期范围的查询结果一致，整段区间一次向量化生成
+    """
+    bar_ends = _minute_bar_ends(minutes)
+    bars = len(bar_ends)
+    day_count = len(df_daily)
+    seed = _code_seed(code) * 1000 + minutes
+    day_key = df_daily['date'].map(pd.Timestamp.toordinal).to_numpy(dtype=np.int64)[:, None]
+    bar_key = np.arange(bars, dtype=np.int64)[None, :]
+
+    day_open = df_daily['open'].to_numpy(dtype=np.float64)[:, None]
+    day_close = df_daily['close'].to_numpy(dtype=np.float64)[:, None]
+    day_volume = df_daily['volume'].to_numpy(dtype=np.float64)[:, None]
+
+    steps = _hash_normal(seed, day_key, bar_key, 10) * 0.002
+    bridge = np.cumsum(steps, axis=1) - np.linspace(0, 1, bars)[None, :] * steps.sum(axis=1, keepdims=True)
+    close = np.round(day_open + (day_close - day_open) * np.arange(1, bars + 1)[None, :] / bars + bridge * day_open, 2)
+    close[:, -1] = day_close[:, 0]
+    open_ = np.concatenate([day_open, close[:, :-1]], axis=1)
+    high = np.round(np.maximum(open_, close) * (1 + np.abs(_hash_normal(seed, day_key, bar_key, 20)) * 0.001), 2)
+    low = np.round(np.minimum(open_, close) * (1 - np.abs(_hash_normal(seed, day_key, bar_key, 30)) * 0.001), 2)
+    weights = 0.5 + _hash_uniform(seed, day_key, bar_key, 40)
+    volume = np.floor(day_volume * weights / weights.sum(axis=1, keepdims=True)).astype(np.int64)
+
+    dates = df_daily['date'].to_numpy(dtype='datetime64[ns]')
+    times = dates[:, None] + (bar_ends * 60).astype('timedelta64[s]')[None, :]
+    return pd.DataFrame({
+        'date': np.repeat(dates, bars), 'time': times.ravel(),
+        'open': open_.ravel(), 'high': high.ravel(), 'low': low.ravel(), 'close': close.ravel(),
+        'volume': volume.ravel(), 'amount': np.round(volume * close, 2).ravel(),
+    }) if day_count else pd.DataFrame(columns=['date', 'time', 'open', 'high', 'low', 'close', 'volume', 'amount'])
+
+def _format_rows(df_data, code, fields, adjustflag):
+    """数值列格式化为 Baostock 返回的字符串"""
+    columns = {}
+    for field in fields:
+        if field == 'date':
+            # 交易日只有少数不同值，逐个格式化后按下标展开
+            unique_dates, inverse = np.unique(df_data['date'].to_numpy(dtype='datetime64[D]'), return_inverse=True)
+            columns[field] = pd.Series(np.asarray(unique_dates.astype(str), dtype=object)[inverse], index=df_data.index)
+        elif field == 'time':
+            times = df_data['time'].dt
+            compact = ((times.year * 10000 + times.month * 100 + times.day).astype(np.int64) * 10 ** 9
+                       + (times.hour * 10000 + times.minute * 100 + times.second).astype(np.int64) * 1000)
+            columns[field] = compact.astype(str)
+        elif field == 'code':
+            columns[field] = pd.Series(code, index=df_data.index)
+        elif field == 'adjustflag':
+            columns[field] = pd.Series(str(adjustflag), index=df_data.index)
+        elif field == 'tradestatus':
+            columns[field] = pd.Series('1', index=df_data.index)
+        elif field == 'isST':
+            columns[field] = pd.Series('0', index=df_data.index)
+        elif field == 'volume':
+            columns[field] = df_data['volume'].astype(np.int64).astype(str)
+        elif field in ('open', 'high', 'low', 'close', 'preclose', 'amount'):
+            columns[field] = df_data[field].round(4).astype(str)
+        else:
+            columns[field] = df_data[field].round(6).astype(str)
+    return pd.DataFrame(columns).values.tolist()
+
+def _load_fixture_kline(fixture_dir, frequency, code):
+    path = Path(fixture_dir) / frequency / f"{code}.csv"
+    if not path.exists():
+        return None
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+DAY_FIELDS = ['date', 'code', 'open', 'high', 'low', 'close', 'preclose', 'volume', 'amount', 'adjustflag', 'turn', 'tradestatus', 'pctChg', 'isST']
+MINUTE_FIELDS = ['date', 'time', 'code', 'open', 'high', 'low', 'close', 'volume', 'amount', 'adjustflag']
+MINUTE_FREQUENCIES = ('5', '15', '30', '60')
+
+def query_history_k_data_plus(code, fields, start_date=None, end_date=None, frequency='d', adjustflag='3'):
+    error = _begin_query()
+    if error is not None:
+        return error
+
+    list_fields = [field.strip() for field in fields.split(',') if field.strip()]
+    is_minute = frequency in MINUTE_FREQUENCIES
+    if frequency not in ('d', 'w', 'm') and not is_minute:
+        return _error(ERROR_CODE_INVALID_PARAM, f"不支持的频率: {frequency}")
+    invalid_fields = [field for field in list_fields if field not in (MINUTE_FIELDS if is_minute else DAY_FIELDS)]
+    if invalid_fields:
+        return _error(ERROR_CODE_INVALID_PARAM, f"不支持的字段: {','.join(invalid_fields)}")
+
+    start_date, end_date = _normalize_date_range(start_date, end_date)
+    config = get_config()
+
+    df_fixture = _load_fixture_kline(config['fixture_dir'], frequency, code) if config['fixture_dir'] else None
+    if df_fixture is not None:
+        missing_fields = [field for field in list_fields if field not in df_fixture.columns]
+        if missing_fields:
+            return _error(ERROR_CODE_INVALID_PARAM, f"录制数据中没有字段: {','.join(missing_fields)}")
+        mask = (df_fixture['date'] >= start_date) & (df_fixture['date'] <= end_date)
+        rows = df_fixture.loc[mask, list_fields].values.tolist()
+    else:
+        df_daily = _synthetic_daily(code)
+        if frequency == 'w':
+            df_data = _aggregate_daily(df_daily, 'W-FRI', end_date)
+        elif frequency == 'm':
+            df_data = _aggregate_daily(df_daily, 'M', end_date)
+        else:
+            df_data = df_daily
+        df_data = df_data[(df_data['date'] >= pd.Timestamp(start_date)) & (df_data['date'] <= pd.Timestamp(end_date))]
+        if is_minute:
+            df_data = _synthetic_minute(code, df_data, int(frequency))
+        rows = _format_rows(df_data.reset_index(drop=True), code, list_fields, adjustflag)
+
+    _add_stats('rows', len(rows))
+    return ResultData(fields=list_fields, rows=rows, page_latency=config['page_latency'])
+
+# =====================================================================录制======================================================
+def record_fixtures(bs_module, codes, frequencies, fixture_dir, start_date=None, end_date=None):
+    """
+    从真实 Baostock（已登录的 bs_module）录制数据文件，之后设置 fixture_dir 即可离线重放
+
+    参数:
+        bs_module: baostock 模块
+        codes (list): 股票代码
+        frequencies (list): 频率，如 ['d', 'w', '5']
+        fixture_dir (str): 录制目录
+
+    返回:
+        int: 录制的文件数
+    """
+    fixture_dir = Path(fixture_dir)
+    start_date, end_date = _normalize_date_range(start_date, end_date)
+    file_count = 0
+
+    rs = bs_module.query_trade_dates(start_date=start_date, end_date=end_date)
+    if rs.error_code == ERROR_CODE_SUCCESS:
+        fixture_dir.mkdir(parents=True, exist_ok=True)
+        rs.get_data().to_csv(fixture_dir / "trade_dates.csv", index=False)
+        file_count += 1
+
+    rs = bs_module.query_all_stock(end_date)
+    if rs.error_code == ERROR_CODE_SUCCESS:
+        fixture_dir.mkdir(parents=True, exist_ok=True)
+        rs.get_data().to_csv(fixture_dir / "all_stock.csv", index=False)
+        file_count += 1
+
+    for frequency in frequencies:
+        fields = MINUTE_FIELDS if frequency in MINUTE_FREQUENCIES else DAY_FIELDS
+        frequency_dir = fixture_dir / frequency
+        frequency_dir.mkdir(parents=True, exist_ok=True)
+        for code in codes:
+            rs = bs_module.query_history_k_data_plus(code, ",".join(fields), start_date=start_date, end_date=end_date,
+                                                     frequency=frequency, adjustflag='2')
+            rows = []
+            while (rs.error_code == ERROR_CODE_SUCCESS) & rs.next():
+                rows.append(rs.get_row_data())
+            if rs.error_code != ERROR_CODE_SUCCESS:
+                continue
+            pd.DataFrame(rows, columns=fields).to_csv(frequency_dir / f"{code}.csv", index=False)
+            file_count += 1
+    return file_count
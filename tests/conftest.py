@@ -0,0 +1,18 @@
+import os
+import sys
+
+# 与 scripts 相同：以 src 为模块根目录
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import pytest
+
+from indicators.incremental_indicators import IndicatorParams
+
+@pytest.fixture
+def indicator_params():
+    '''固定的指标参数，避免测试结果随用户指标配置变化'''
+    return IndicatorParams(macd=(12, 26, 9),
+                           ma=[(f'ma{cycle}', cycle) for cycle in (5, 10, 20, 24, 30, 52, 60, 120, 250)],
+                           rsi=(5, 12, 24), boll=(20, 2))
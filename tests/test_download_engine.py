@@ -0,0 +1,119 @@
+import sys
+import queue
+import types
+import threading
+
+import pytest
+
+from processor.baostock_download_engine import _download_worker, _MSG_RESULT, _MSG_DONE
+from processor.stock_data_pipeline import StockDataPipeline
+
+'''
+    下载引擎工作进程的取消与重试语义（在当前进程中直接运行 _download_worker），以及流水线取消后的处理范围。
+    取消前未完成的任务不能回报为失败或无数据，否则台账会把它标记为 failed / done 而不是保持 pending
+'''
+
+FAKE_BS_MODULE = 'fake_baostock_for_engine_tests'
+
+class FakeResultSet:
+    def __init__(self, rows=None, error_code='0', error_msg='success'):
+        self.rows = list(rows or [])
+        self.error_code = error_code
+        self.error_msg = error_msg
+
+    def next(self):
+        return bool(self.rows)
+
+    def get_row_data(self):
+        return self.rows.pop(0)
+
+class FakeTask:
+    '''模拟 BaseTask：fetch 阶段处理 cancel_after 项后取消'''
+    def __init__(self, cancel_after):
+        self.cancel_after = cancel_after
+        self.checked = 0
+
+    def _check_pause(self):
+        self.checked += 1
+
+    def is_cancelled(self):
+        return self.checked > self.cancel_after
+
+@pytest.fixture
+def fake_bs():
+    module = types.ModuleType(FAKE_BS_MODULE)
+    module.login = lambda: FakeResultSet()
+    module.logout = lambda: None
+    module.query_history_k_data_plus = None
+    sys.modules[FAKE_BS_MODULE] = module
+    yield module
+    del sys.modules[FAKE_BS_MODULE]
+
+def run_worker(list_tasks, stop_event, max_retries=3):
+    task_queue = queue.Queue()
+    for download_task in list_tasks:
+        task_queue.put(download_task)
+    task_queue.put(None)
+    result_queue = queue.Queue()
+    _download_worker(0, FAKE_BS_MODULE, task_queue, result_queue, stop_event, 0, max_retries, 0.0)
+    list_messages = []
+    while not result_queue.empty():
+        list_messages.append(result_queue.get_nowait())
+    return list_messages
+
+def make_task(code):
+    return {'code': code, 'frequency': 'd', 'start_date': '2024-01-01', 'end_date': '2024-01-31'}
+
+def test_worker_reports_rows_on_success(fake_bs):
+    fake_bs.query_history_k_data_plus = lambda *args, **kwargs: FakeResultSet([['2024-01-02', 'sh.600000']])
+    messages = run_worker([make_task('sh.600000')], threading.Event())
+
+    assert [message['type'] for message in messages] == [_MSG_RESULT, _MSG_DONE]
+    assert messages[0]['rows'] == [['2024-01-02', 'sh.600000']]
+    assert messages[0]['error'] is None
+
+def test_worker_reports_failure_after_all_retries(fake_bs):
+    fake_bs.query_history_k_data_plus = lambda *args, **kwargs: FakeResultSet(error_code='10002007', error_msg='网络接收错误')
+    messages = run_worker([make_task('sh.600000')], threading.Event(), max_retries=2)
+
+    assert [message['type'] for message in messages] == [_MSG_RESULT, _MSG_DONE]
+    assert messages[0]['error'] is not None
+    assert messages[0]['attempts'] == 3
+
+def test_worker_cancel_during_retry_leaves_task_unreported(fake_bs):
+    stop_event = threading.Event()
+    calls = []
+
+    def query(*args, **kwargs):
+        calls.append(args[0])
+        # 第一次请求失败的同时任务被取消，重试次数尚未用完
+        stop_event.set()
+        return FakeResultSet(error_code='10002007', error_msg='网络接收错误')
+
+    fake_bs.query_history_k_data_plus = query
+    messages = run_worker([make_task('sh.600000'), make_task('sh.600001')], stop_event)
+
+    assert calls == ['sh.600000']
+    assert [message['type'] for message in messages] == [_MSG_DONE]
+
+def test_worker_cancelled_before_dequeue_sends_no_result(fake_bs):
+    fake_bs.query_history_k_data_plus = lambda *args, **kwargs: pytest.fail("取消后不应再发出请求")
+    stop_event = threading.Event()
+    stop_event.set()
+    messages = run_worker([make_task('sh.600000')], stop_event)
+
+    assert [message['type'] for message in messages] == [_MSG_DONE]
+
+def test_pipeline_cancel_stops_fetching_and_writes_fetched_items():
+    written = []
+
+    def write_batch(batch):
+        written.extend(item for item, _ in batch)
+        return len(batch)
+
+    pipeline = StockDataPipeline(lambda item: item, lambda item, raw: raw, write_batch, queue_size=2, batch_size=2)
+    stats = pipeline.run(list(range(10)), FakeTask(cancel_after=3))
+
+    assert stats['fetch']['items'] == 3
+    assert sorted(written) == [0, 1, 2]
+    assert stats['write']['items'] == 3
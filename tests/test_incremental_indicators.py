@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from manager.period_manager import TimePeriod
+from indicators import stock_data_indicators as sdi
+from indicators.incremental_indicators import IndicatorParams, IncrementalIndicatorEngine, _IndicatorEntry
+
+'''
+    增量递推与全量计算逐位一致的回归测试：_RollingMeanState / _RollingStdState 复刻了 pandas 滚动均值、方差的
+    补偿求和与连续相同值处理，pandas 升级改变算法时在此处发现
+'''
+
+def make_bars(count=600, seed=7):
+    rng = np.random.default_rng(seed)
+    close = np.round(10 + np.cumsum(rng.normal(0, 0.15, count)), 2)
+    # 连续相同的收盘价（停牌、一字板），覆盖 pandas 对连续相同值的特殊处理
+    close[100:112] = close[99]
+    close[300:305] = close[299]
+    volume = rng.integers(100000, 1000000, count).astype(float)
+    dates = pd.bdate_range('2022-01-03', periods=count).strftime('%Y-%m-%d')
+    return pd.DataFrame({'date': dates, 'close': close, 'volume': volume})
+
+def history_entry(params, df_data):
+    return _IndicatorEntry.from_history(params, df_data['date'].iloc[0], df_data['date'].iloc[-1], df_data['close'], df_data['volume'])
+
+def assert_columns_equal(dict_actual, dict_expected):
+    assert set(dict_actual) == set(dict_expected)
+    for column, expected in dict_expected.items():
+        assert np.array_equal(dict_actual[column], expected, equal_nan=True), column
+
+@pytest.mark.parametrize('split', [1, 30, 250, 400, 599])
+def test_extend_matches_from_history(split, indicator_params):
+    df_data = make_bars()
+    expected = history_entry(indicator_params, df_data).dict_columns
+
+    entry = history_entry(indicator_params, df_data.iloc[:split])
+    entry.extend(df_data['date'].iloc[-1], df_data['close'].to_numpy(dtype=float), df_data['volume'].to_numpy(dtype=float))
+    assert_columns_equal(entry.dict_columns, expected)
+
+@pytest.mark.parametrize('split', [1, 250, 599])
+def test_extend_matches_default_indicators_auto_calculate(split):
+    # 对照实际的全量计算路径（读取同一份用户指标配置），而不只是引擎自己的 from_history
+    params = IndicatorParams.from_config()
+    df_data = make_bars()
+    df_expected = df_data.copy()
+    sdi.default_indicators_auto_calculate(df_expected)
+
+    entry = _IndicatorEntry.from_history(params, df_data['date'].iloc[0], df_data['date'].iloc[split - 1],
+                                         df_data['close'].iloc[:split], df_data['volume'].iloc[:split])
+    entry.extend(df_data['date'].iloc[-1], df_data['close'].to_numpy(dtype=float), df_data['volume'].to_numpy(dtype=float))
+    for column in params.get_columns():
+        assert np.array_equal(entry.dict_columns[column], df_expected[column].to_numpy(dtype=float), equal_nan=True), column
+
+def test_extend_bar_by_bar_matches_from_history(indicator_params):
+    df_data = make_bars(count=320)
+    expected = history_entry(indicator_params, df_data).dict_columns
+
+    entry = history_entry(indicator_params, df_data.iloc[:260])
+    close = df_data['close'].to_numpy(dtype=float)
+    volume = df_data['volume'].to_numpy(dtype=float)
+    for end in range(261, len(df_data) + 1):
+        entry.extend(df_data['date'].iloc[end - 1], close[:end], volume[:end])
+    assert_columns_equal(entry.dict_columns, expected)
+
+def test_engine_incremental_matches_full_calculation(indicator_params):
+    df_data = make_bars()
+    df_expected = df_data.copy()
+    IncrementalIndicatorEngine(max_cached_rows=0).calculate('sh.600000', TimePeriod.DAY, df_expected, indicator_params)
+
+    engine = IncrementalIndicatorEngine()
+    engine.calculate('sh.600000', TimePeriod.DAY, df_data.iloc[:400].copy(), indicator_params)
+    df_actual = df_data.copy()
+    engine.calculate('sh.600000', TimePeriod.DAY, df_actual, indicator_params)
+
+    assert engine.get_stats()['extends'] == 1
+    for column in indicator_params.get_columns():
+        assert np.array_equal(df_actual[column].to_numpy(), df_expected[column].to_numpy(), equal_nan=True), column
+
+def test_engine_calculate_columns_serves_required_columns_from_entry(indicator_params):
+    df_data = make_bars()
+    df_expected = df_data.copy()
+    IncrementalIndicatorEngine(max_cached_rows=0).calculate('sh.600000', TimePeriod.DAY, df_expected, indicator_params)
+
+    engine = IncrementalIndicatorEngine()
+    columns = ('date', 'close', 'dea', 'ma5', 'ma52', 'rsi12', 'turnover_rate')
+    df_miss = df_data.copy()
+    assert engine.calculate_columns('sh.600000', TimePeriod.DAY, df_miss, columns, indicator_params) is None
+    assert 'dea' not in df_miss.columns
+
+    engine.calculate('sh.600000', TimePeriod.DAY, df_data.iloc[:400].copy(), indicator_params)
+    df_actual = df_data.copy()
+    list_written = engine.calculate_columns('sh.600000', TimePeriod.DAY, df_actual, columns, indicator_params)
+
+    assert list_written == ['dea', 'ma5', 'ma52', 'rsi12']
+    assert 'diff' not in df_actual.columns
+    stats = engine.get_stats()
+    assert (stats['column_misses'], stats['extends'], stats['entries']) == (1, 1, 1)
+    for column in list_written:
+        assert np.array_equal(df_actual[column].to_numpy(), df_expected[column].to_numpy(), equal_nan=True), column
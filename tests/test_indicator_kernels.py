@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import kernels
+from indicators import stock_data_indicators as sdi
+from manager.indicators_config_manager import IndicatrosEnum
+
+'''
+    指标内核与原有 pandas 计算逐位一致的回归测试：MACD / DIF 在零轴附近的符号决定筛选结果，
+    任何后端都不能引入舍入差异。baseline_* 为改用 kernels 之前 stock_data_indicators 中的实现
+'''
+
+BACKENDS = [
+    kernels.BACKEND_NUMPY,
+    pytest.param(kernels.BACKEND_NUMBA, marks=pytest.mark.skipif(not kernels.is_numba_available(), reason="未安装 numba")),
+]
+
+def baseline_macd(stock_data, diff_period=12, dea_period=26, ma_period=9):
+    close = stock_data['close']
+    dif = close.ewm(span=diff_period, adjust=False).mean() - close.ewm(span=dea_period, adjust=False).mean()
+    dea = dif.ewm(span=ma_period, adjust=False).mean()
+    return {IndicatrosEnum.MACD_DIFF.value: dif, IndicatrosEnum.MACD_DEA.value: dea, IndicatrosEnum.MACD.value: 2 * (dif - dea)}
+
+def baseline_kdj(data, n=9, m1=3, m2=3):
+    low_min = data['low'].rolling(window=n).min()
+    high_max = data['high'].rolling(window=n).max()
+    rsv = (data['close'] - low_min) / (high_max - low_min) * 100
+    k = rsv.ewm(alpha=1/m1, adjust=False).mean()
+    d = k.ewm(alpha=1/m2, adjust=False).mean()
+    return {'RSV': rsv, IndicatrosEnum.KDJ_K.value: k, IndicatrosEnum.KDJ_D.value: d, IndicatrosEnum.KDJ_J.value: 3 * k - 2 * d}
+
+def baseline_rsi(data, period=14):
+    delta = data['close'].diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.ewm(span=period, min_periods=period, adjust=False).mean()
+    avg_loss = loss.ewm(span=period, min_periods=period, adjust=False).mean()
+    return {f'{IndicatrosEnum.RSI.value}{period}': 100 - (100 / (1 + avg_gain / avg_loss))}
+
+def make_bars(count=800, seed=11):
+    rng = np.random.default_rng(seed)
+    close = np.round(10 + np.cumsum(rng.normal(0, 0.12, count)), 2)
+    high = close + np.round(rng.uniform(0, 0.2, count), 2)
+    low = close - np.round(rng.uniform(0, 0.2, count), 2)
+    # 一字板：最高价等于最低价，RSV 为 NaN，覆盖 EMA 中间有 NaN 的递推
+    high[200:215] = low[200:215] = close[200:215] = close[199]
+    # 长期横盘使 DIF 贴近零轴
+    close[500:560] = high[500:560] = low[500:560] = close[499]
+    return pd.DataFrame({'close': close, 'high': high, 'low': low})
+
+@pytest.fixture
+def backend(request):
+    previous = kernels.get_backend()
+    kernels.set_backend(request.param)
+    yield request.param
+    kernels.set_backend(previous)
+
+def assert_matches_baseline(df_actual, dict_expected):
+    for column, expected in dict_expected.items():
+        assert np.array_equal(df_actual[column].to_numpy(dtype=float), expected.to_numpy(dtype=float), equal_nan=True), column
+
+@pytest.mark.parametrize('backend', BACKENDS, indirect=True)
+def test_macd_matches_baseline(backend):
+    df_data = make_bars()
+    expected = baseline_macd(df_data.copy())
+    sdi.macd(df_data)
+    assert_matches_baseline(df_data, expected)
+
+@pytest.mark.parametrize('backend', BACKENDS, indirect=True)
+@pytest.mark.parametrize('period', [5, 12, 14, 24])
+def test_rsi_matches_baseline(backend, period):
+    df_data = make_bars()
+    expected = baseline_rsi(df_data.copy(), period)
+    sdi.rsi(df_data, period)
+    assert_matches_baseline(df_data, expected)
+
+@pytest.mark.parametrize('backend', BACKENDS, indirect=True)
+def test_kdj_matches_baseline(backend):
+    df_data = make_bars()
+    expected = baseline_kdj(df_data.copy())
+    sdi.kdj(df_data)
+    assert_matches_baseline(df_data, expected)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from manager.period_manager import TimePeriod
+from processor.kline_resampler import resample_daily_bars, resample_minute_bars, get_period_start
+
+'''
+    日线聚合周线、月线与分钟线按交易时段聚合：聚合值、涨跌幅的前收盘价，以及未结束周期（周、月、分钟区间）的处理
+'''
+
+CODE = 'sh.600000'
+
+def make_daily(start='2024-01-01', end='2024-02-07'):
+    dates = pd.bdate_range(start, end).strftime('%Y-%m-%d')
+    count = len(dates)
+    close = np.round(10 + 0.1 * np.arange(count), 2)
+    change_percent = np.empty(count)
+    change_percent[0] = 1.0
+    change_percent[1:] = (close[1:] / close[:-1] - 1) * 100
+    return pd.DataFrame({'date': dates, 'code': CODE, 'open': close - 0.05, 'high': close + 0.2, 'low': close - 0.3,
+                         'close': close, 'volume': 100 * np.arange(1, count + 1), 'amount': 1000.0 * np.arange(1, count + 1),
+                         'change_percent': change_percent, 'turnover_rate': 0.5, 'adjustflag': 2})
+
+def trade_dates(start, end, holidays=()):
+    return [date for date in pd.bdate_range(start, end).strftime('%Y-%m-%d') if date not in holidays]
+
+def test_weekly_bars_aggregate_each_week():
+    df_daily = make_daily()
+    df_weekly = resample_daily_bars(df_daily, TimePeriod.WEEK, trade_dates('2024-01-01', '2024-02-16'))
+
+    assert list(df_weekly['date']) == ['2024-01-05', '2024-01-12', '2024-01-19', '2024-01-26', '2024-02-02']
+    first_week = df_daily.iloc[:5]
+    bar = df_weekly.iloc[0]
+    assert bar['open'] == first_week['open'].iloc[0]
+    assert bar['close'] == first_week['close'].iloc[-1]
+    assert bar['high'] == first_week['high'].max()
+    assert bar['low'] == first_week['low'].min()
+    assert int(bar['volume']) == first_week['volume'].sum()
+    assert bar['amount'] == pytest.approx(first_week['amount'].sum())
+    # 第一周的前收盘价由首日涨跌幅反推，之后为上一周收盘价
+    assert bar['change_percent'] == pytest.approx((first_week['close'].iloc[-1] / (df_daily['close'].iloc[0] / 1.01) - 1) * 100)
+    assert df_weekly['change_percent'].iloc[1] == pytest.approx((df_daily['close'].iloc[9] / df_daily['close'].iloc[4] - 1) * 100)
+
+def test_partial_last_week_is_excluded_until_week_ends():
+    df_daily = make_daily()
+    df_weekly = resample_daily_bars(df_daily, TimePeriod.WEEK, trade_dates('2024-01-01', '2024-02-16'))
+    assert df_weekly['date'].iloc[-1] == '2024-02-02'
+
+    df_partial = resample_daily_bars(df_daily, TimePeriod.WEEK, trade_dates('2024-01-01', '2024-02-16'), include_partial=True)
+    assert df_partial['date'].iloc[-1] == '2024-02-07'
+    assert int(df_partial['volume'].iloc[-1]) == df_daily['volume'].iloc[-3:].sum()
+
+    # 没有交易日历时按工作日判断，周四、周五仍视为交易日
+    assert resample_daily_bars(df_daily, TimePeriod.WEEK)['date'].iloc[-1] == '2024-02-02'
+
+def test_week_ending_before_holidays_is_complete():
+    df_daily = make_daily()
+    calendar = trade_dates('2024-01-01', '2024-02-16', holidays=('2024-02-08', '2024-02-09'))
+    df_weekly = resample_daily_bars(df_daily, TimePeriod.WEEK, calendar)
+    assert df_weekly['date'].iloc[-1] == '2024-02-07'
+
+def test_partial_last_month_is_excluded():
+    df_daily = make_daily()
+    df_monthly = resample_daily_bars(df_daily, TimePeriod.MONTH, trade_dates('2024-01-01', '2024-03-29'))
+
+    january = df_daily[df_daily['date'] <= '2024-01-31']
+    assert list(df_monthly['date']) == ['2024-01-31']
+    assert df_monthly['open'].iloc[0] == january['open'].iloc[0]
+    assert df_monthly['close'].iloc[0] == january['close'].iloc[-1]
+    assert int(df_monthly['volume'].iloc[0]) == january['volume'].sum()
+
+    # 月末最后一个交易日尚未入库时该月未结束
+    df_incomplete = resample_daily_bars(df_daily[df_daily['date'] <= '2024-01-30'], TimePeriod.MONTH, trade_dates('2024-01-01', '2024-03-29'))
+    assert df_incomplete.empty
+
+def test_get_period_start():
+    assert get_period_start('2024-02-07', TimePeriod.WEEK) == '2024-02-05'
+    assert get_period_start('2024-02-07', TimePeriod.MONTH) == '2024-02-01'
+    assert get_period_start('2024-05-20', TimePeriod.QUARTER) == '2024-04-01'
+    assert get_period_start('2024-05-20', TimePeriod.YEAR) == '2024-01-01'
+
+def make_minute_15(day='2024-01-02'):
+    times = [f'{day} {hour:02d}:{minute:02d}:00' for hour, minute in
+             [(9, 45), (10, 0), (10, 15), (10, 30), (10, 45), (11, 0), (11, 15), (11, 30),
+              (13, 15), (13, 30), (13, 45), (14, 0), (14, 15), (14, 30), (14, 45), (15, 0)]]
+    count = len(times)
+    close = 10 + 0.01 * np.arange(count)
+    return pd.DataFrame({'date': day, 'time': times, 'code': CODE, 'open': close - 0.005, 'high': close + 0.02,
+                         'low': close - 0.02, 'close': close, 'volume': 10 * np.arange(1, count + 1),
+                         'amount': 100.0 * np.arange(1, count + 1), 'adjustflag': 2})
+
+def test_minute_bars_follow_trading_sessions():
+    df_minute = make_minute_15()
+    df_60 = resample_minute_bars(df_minute, TimePeriod.MINUTE_60)
+
+    assert [time[-8:] for time in df_60['time']] == ['10:30:00', '11:30:00', '14:00:00', '15:00:00']
+    assert [int(volume) for volume in df_60['volume']] == [100, 260, 420, 580]
+    assert df_60['open'].iloc[2] == df_minute['open'].iloc[8]
+    assert df_60['close'].iloc[2] == df_minute['close'].iloc[11]
+
+def test_partial_minute_bucket_is_excluded():
+    df_minute = make_minute_15().iloc[:14]    # 最后一根为 14:30
+    df_60 = resample_minute_bars(df_minute, TimePeriod.MINUTE_60)
+    assert df_60['time'].iloc[-1].endswith('14:00:00')
+
+    df_partial = resample_minute_bars(df_minute, TimePeriod.MINUTE_60, include_partial=True)
+    assert df_partial['time'].iloc[-1].endswith('15:00:00')
+    assert int(df_partial['volume'].iloc[-1]) == 130 + 140
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators.lazy_indicator_frame import calculate_required_indicators
+from policy_filter import policy_filter as pf
+
+'''
+    各筛选函数声明的 *_COLUMNS 必须覆盖函数实际读取的列：调用方只按声明计算指标，漏列会在筛选时抛出 KeyError。
+    测试数据只保留声明的列，再运行筛选函数
+'''
+
+# (筛选函数, 日线列, 周线列)，周线列为 None 表示函数没有周线参数
+FILTERS = [
+    (pf.daily_up_ma52_filter, pf.DAILY_UP_MA52_COLUMNS, pf.WEEKLY_CLOSE_DEA_MA52_COLUMNS),
+    (pf.daily_up_ma24_filter, pf.DAILY_UP_MA24_COLUMNS, pf.WEEKLY_CLOSE_MA52_COLUMNS),
+    (pf.daily_up_ma10_filter, pf.DAILY_UP_MA10_COLUMNS, None),
+    (pf.daily_up_ma20_filter, pf.DAILY_UP_MA20_COLUMNS, None),
+    (pf.limit_copy_filter, pf.LIMIT_COPY_COLUMNS, None),
+    (pf.break_through_and_step_back, pf.BREAK_THROUGH_AND_STEP_BACK_COLUMNS, None),
+    (pf.break_through_and_step_back_2, pf.BREAK_THROUGH_AND_STEP_BACK_COLUMNS, None),
+    (pf.break_through_and_step_back_3, pf.BREAK_THROUGH_AND_STEP_BACK_COLUMNS, None),
+    (pf.daily_down_between_ma24_ma52_filter, pf.DAILY_DOWN_BETWEEN_MA24_MA52_COLUMNS, pf.WEEKLY_CLOSE_DEA_MA52_COLUMNS),
+    (pf.daily_down_between_ma5_ma52_filter, pf.DAILY_DOWN_BETWEEN_MA5_MA52_COLUMNS, pf.WEEKLY_CLOSE_DEA_MA52_COLUMNS),
+    (pf.daily_down_breakthrough_ma24_filter, pf.DAILY_DOWN_BREAKTHROUGH_COLUMNS, None),
+    (pf.daily_down_breakthrough_ma52_filter, pf.DAILY_DOWN_BREAKTHROUGH_COLUMNS, None),
+    (pf.daily_down_double_bottom_filter, pf.DAILY_DOWN_DOUBLE_BOTTOM_COLUMNS, pf.WEEKLY_CLOSE_DEA_MA52_COLUMNS),
+    (pf.find_lowest_after_dea_cross_below_zero, pf.LOWEST_AFTER_DEA_CROSS_COLUMNS, None),
+    (pf.get_cross_index, pf.ADJUST_PERIOD_COLUMNS, None),
+    (pf.find_unit_adjust_period, pf.ADJUST_PERIOD_COLUMNS, None),
+    (pf.get_last_adjust_period_deviate_status, pf.ADJUST_PERIOD_DEVIATE_STATUS_COLUMNS, None),
+]
+
+# 不同长度对应上涨、回落、下跌等阶段，使筛选函数走到不同分支
+BAR_COUNTS = (200, 300, 360, 400)
+
+def make_bars(count):
+    t = np.arange(count)
+    close = np.round(20 + 6 * np.sin(t / 40) + 0.01 * t, 2)
+    return pd.DataFrame({
+        'date': pd.bdate_range('2022-01-03', periods=count).strftime('%Y-%m-%d'),
+        'code': 'sh.600000',
+        'open': close,
+        'high': close * 1.01,
+        'low': close * 0.99,
+        'close': close,
+        'volume': 1e6 * (1 + 0.5 * np.sin(t)),
+        'amount': close * 1e6,
+        'turnover_rate': 5.0,
+        'change_percent': 0.0,
+    })
+
+def declared_frame(params, count, columns):
+    '''按声明的列计算指标，并只保留这些列'''
+    df_data = calculate_required_indicators(make_bars(count), columns, params)
+    return df_data[list(dict.fromkeys(columns))]
+
+@pytest.mark.parametrize('count', BAR_COUNTS)
+@pytest.mark.parametrize('filter_func, daily_columns, weekly_columns', FILTERS, ids=[item[0].__name__ for item in FILTERS])
+def test_filter_reads_only_declared_columns(filter_func, daily_columns, weekly_columns, count, indicator_params):
+    df_daily = declared_frame(indicator_params, count, daily_columns)
+    if weekly_columns is None:
+        filter_func(df_daily)
+    else:
+        filter_func(df_daily, declared_frame(indicator_params, count, weekly_columns))
+
+def test_adjust_period_found_with_declared_columns(indicator_params):
+    # 360 根时处于零轴下方调整周期中，覆盖 find_unit_adjust_period 遍历区间的完整流程
+    assert pf.find_unit_adjust_period(declared_frame(indicator_params, 360, pf.ADJUST_PERIOD_COLUMNS))
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from db_base.stock_meta_db_base import StockMetaDbBase
+from manager.period_manager import TimePeriod
+
+'''
+    元数据目录的增量维护：append 时的行数统计（追加、回补、覆盖）与链式校验和
+'''
+
+CODE = 'sh.600000'
+
+@pytest.fixture
+def meta_db(tmp_path):
+    db = StockMetaDbBase(str(tmp_path / "stock_meta.db"))
+    yield db
+    db.close_connection()
+
+def make_daily(dates, close=10.0):
+    return pd.DataFrame({'date': list(dates), 'code': CODE, 'open': close, 'high': close, 'low': close, 'close': close,
+                         'volume': 1000, 'amount': 10000.0, 'change_percent': 0.0, 'turnover_rate': 0.1, 'adjustflag': 2})
+
+def bdates(start, count):
+    return pd.bdate_range(start, periods=count).strftime('%Y-%m-%d')
+
+def test_append_chains_checksum_like_single_write(meta_db):
+    df_all = make_daily(bdates('2024-01-01', 30))
+    meta_db.update_catalog(CODE, df_all.iloc[:20], write_way='replace')
+    meta_db.update_catalog(CODE, df_all.iloc[20:], write_way='append')
+
+    entry = meta_db.get_catalog_entry(CODE, TimePeriod.DAY)
+    assert entry['row_count'] == 30
+    assert (entry['first_date'], entry['last_date']) == (df_all['date'].iloc[0], df_all['date'].iloc[-1])
+    assert entry['checksum'] == meta_db.compute_checksum(df_all)
+
+def test_append_backfill_counts_rows_before_first_date(meta_db):
+    df_all = make_daily(bdates('2024-01-01', 30))
+    meta_db.update_catalog(CODE, df_all.iloc[10:], write_way='replace')
+    meta_db.update_catalog(CODE, df_all.iloc[:10], write_way='append')
+
+    entry = meta_db.get_catalog_entry(CODE, TimePeriod.DAY)
+    assert entry['row_count'] == 30
+    assert (entry['first_date'], entry['last_date']) == (df_all['date'].iloc[0], df_all['date'].iloc[-1])
+    # 回补改变了K线序列的开头，链式校验和无法续算
+    assert entry['checksum'] is None
+
+def test_append_overlap_rewrite_clears_checksum(meta_db):
+    df_all = make_daily(bdates('2024-01-01', 30))
+    meta_db.update_catalog(CODE, df_all.iloc[:20], write_way='replace')
+    # 覆盖最后 5 根并追加 10 根
+    df_rewrite = make_daily(df_all['date'].iloc[15:], close=11.0)
+    meta_db.update_catalog(CODE, df_rewrite, write_way='append')
+
+    entry = meta_db.get_catalog_entry(CODE, TimePeriod.DAY)
+    assert entry['row_count'] == 30
+    assert entry['last_date'] == df_all['date'].iloc[-1]
+    assert entry['checksum'] is None
+
+def test_replace_restores_checksum(meta_db):
+    df_all = make_daily(bdates('2024-01-01', 30))
+    meta_db.update_catalog(CODE, df_all.iloc[10:], write_way='replace')
+    meta_db.update_catalog(CODE, df_all.iloc[:10], write_way='append')
+    meta_db.update_catalog(CODE, df_all, write_way='replace')
+
+    entry = meta_db.get_catalog_entry(CODE, TimePeriod.DAY)
+    assert entry['row_count'] == 30
+    assert entry['checksum'] == meta_db.compute_checksum(df_all)